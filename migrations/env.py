@@ -14,14 +14,16 @@ from dotenv import load_dotenv
 load_dotenv()
 # ensure src directory is on path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
-# Override SQLAlchemy URL from environment if provided
+# Override SQLAlchemy URL from environment if provided, unless the caller
+# supplied the URL (and connection) itself
 db_url = os.getenv('DATABASE_URL')
-if db_url:
+if db_url and 'connection' not in config.attributes:
     config.set_main_option('sqlalchemy.url', db_url)
 
 # Interpret the config file for Python logging.
-# This line sets up loggers basically.
-if config.config_file_name is not None:
+# This line sets up loggers basically. Skipped when the application runs
+# the migrations on its own connection, since it owns logging then.
+if config.config_file_name is not None and 'connection' not in config.attributes:
     fileConfig(config.config_file_name)
 
 # add your model's MetaData object here
@@ -69,6 +71,18 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # The application passes a connection in config.attributes so migrations
+    # run on its own (async) engine; see nagatha_assistant.db
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -0,0 +1,48 @@
+"""Add memory_stats counter table
+
+Revision ID: 3b8d2f61c4a7
+Revises: f54bb2e98366
+Create Date: 2025-08-02 10:14:37.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8d2f61c4a7'
+down_revision: Union[str, None] = 'f54bb2e98366'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'memory_stats',
+        sa.Column('section_id', sa.Integer(), nullable=False),
+        sa.Column('session_scope', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('entry_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('total_bytes', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(['section_id'], ['memory_sections.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('section_id', 'session_scope')
+    )
+
+    # Seed the counters from the existing entries so stats are correct
+    # immediately after upgrading.
+    op.execute(
+        """
+        INSERT INTO memory_stats (section_id, session_scope, entry_count, total_bytes)
+        SELECT section_id, COALESCE(session_id, 0), COUNT(*), COALESCE(SUM(LENGTH(value)), 0)
+        FROM memory_entries
+        GROUP BY section_id, COALESCE(session_id, 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('memory_stats')
@@ -0,0 +1,29 @@
+"""Add id-ordered index on memory_entries for batch scans
+
+Revision ID: 5e8b3f0c7a19
+Revises: 9c4e1b7a2d60
+Create Date: 2025-08-11 10:15:02.487316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8b3f0c7a19'
+down_revision: Union[str, None] = '9c4e1b7a2d60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_memory_entries_section_id_id', 'memory_entries',
+                    ['section_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_memory_entries_section_id_id', table_name='memory_entries')
@@ -0,0 +1,35 @@
+"""Add content_hash to memory_entries
+
+Revision ID: 8e4a1c7d9f20
+Revises: 3b8d2f61c4a7
+Create Date: 2025-08-03 09:41:12.518904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4a1c7d9f20'
+down_revision: Union[str, None] = '3b8d2f61c4a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows keep a NULL hash; DatabaseStorageBackend.remove_duplicates
+    # backfills them the first time a section is deduplicated.
+    with op.batch_alter_table('memory_entries') as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_memory_entries_section_content_hash', 'memory_entries',
+                    ['section_id', 'content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_memory_entries_section_content_hash', table_name='memory_entries')
+    with op.batch_alter_table('memory_entries') as batch_op:
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,29 @@
+"""Add section-wide time-ordered index on memory_entries
+
+Revision ID: 9c4e1b7a2d60
+Revises: f1c7a3e9b284
+Create Date: 2025-08-11 08:41:27.193554
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e1b7a2d60'
+down_revision: Union[str, None] = 'f1c7a3e9b284'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_memory_entries_section_created_id', 'memory_entries',
+                    ['section_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_memory_entries_section_created_id', table_name='memory_entries')
@@ -0,0 +1,41 @@
+"""Add composite and partial indexes for hot queries
+
+Revision ID: a4c19e7d2b56
+Revises: e27c4b90d6a5
+Create Date: 2025-08-07 09:31:12.584306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c19e7d2b56'
+down_revision: Union[str, None] = 'e27c4b90d6a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partial index predicate, valid on both SQLite and PostgreSQL
+EXPIRING = sa.text('expires_at IS NOT NULL')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_messages_session_timestamp', 'messages',
+                    ['session_id', 'timestamp'], unique=False)
+    op.create_index('ix_reminders_delivered_remind_at', 'reminders',
+                    ['delivered', 'remind_at'], unique=False)
+    op.create_index('ix_memory_entries_expires_at', 'memory_entries', ['expires_at'], unique=False,
+                    sqlite_where=EXPIRING, postgresql_where=EXPIRING)
+    op.create_index('ix_memory_archive_expires_at', 'memory_archive', ['expires_at'], unique=False,
+                    sqlite_where=EXPIRING, postgresql_where=EXPIRING)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_memory_archive_expires_at', table_name='memory_archive')
+    op.drop_index('ix_memory_entries_expires_at', table_name='memory_entries')
+    op.drop_index('ix_reminders_delivered_remind_at', table_name='reminders')
+    op.drop_index('ix_messages_session_timestamp', table_name='messages')
@@ -0,0 +1,28 @@
+"""Add (session_id, id) index for keyset-paginated message history
+
+Revision ID: b6e2d4a8c153
+Revises: a4c19e7d2b56
+Create Date: 2025-08-08 14:05:47.913260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e2d4a8c153'
+down_revision: Union[str, None] = 'a4c19e7d2b56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_messages_session_id_id', 'messages', ['session_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_messages_session_id_id', table_name='messages')
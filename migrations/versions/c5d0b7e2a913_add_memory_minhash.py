@@ -0,0 +1,31 @@
+"""Add minhash signature to memory_entries
+
+Revision ID: c5d0b7e2a913
+Revises: 8e4a1c7d9f20
+Create Date: 2025-08-04 16:22:48.106337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d0b7e2a913'
+down_revision: Union[str, None] = '8e4a1c7d9f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Signatures are computed lazily by the consolidation stage.
+    with op.batch_alter_table('memory_entries') as batch_op:
+        batch_op.add_column(sa.Column('minhash', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('memory_entries') as batch_op:
+        batch_op.drop_column('minhash')
@@ -0,0 +1,29 @@
+"""Add time-ordered index on memory_entries
+
+Revision ID: d9a3f6b18e42
+Revises: c5d0b7e2a913
+Create Date: 2025-08-05 11:07:55.640219
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9a3f6b18e42'
+down_revision: Union[str, None] = 'c5d0b7e2a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_memory_entries_section_session_created', 'memory_entries',
+                    ['section_id', 'session_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_memory_entries_section_session_created', table_name='memory_entries')
@@ -0,0 +1,56 @@
+"""Add memory access tracking and archive table
+
+Revision ID: e27c4b90d6a5
+Revises: d9a3f6b18e42
+Create Date: 2025-08-06 14:52:30.271948
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e27c4b90d6a5'
+down_revision: Union[str, None] = 'd9a3f6b18e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('memory_entries') as batch_op:
+        batch_op.add_column(sa.Column('access_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_accessed_at', sa.DateTime(timezone=True), nullable=True))
+
+    op.create_table(
+        'memory_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('section_id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=True),
+        sa.Column('value_type', sa.String(length=50), server_default='string', nullable=False),
+        sa.Column('value', sa.LargeBinary(), nullable=True),
+        sa.Column('content_hash', sa.String(length=64), nullable=True),
+        sa.Column('access_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_accessed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(['section_id'], ['memory_sections.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_memory_archive_id'), 'memory_archive', ['id'], unique=False)
+    op.create_index('ix_memory_archive_section_key', 'memory_archive', ['section_id', 'key'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_memory_archive_section_key', table_name='memory_archive')
+    op.drop_index(op.f('ix_memory_archive_id'), table_name='memory_archive')
+    op.drop_table('memory_archive')
+    with op.batch_alter_table('memory_entries') as batch_op:
+        batch_op.drop_column('last_accessed_at')
+        batch_op.drop_column('access_count')
@@ -0,0 +1,74 @@
+"""Add usage ledger, daily usage rollup and usage reset tables
+
+Revision ID: f1c7a3e9b284
+Revises: b6e2d4a8c153
+Create Date: 2025-08-10 09:32:18.564021
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c7a3e9b284'
+down_revision: Union[str, None] = 'b6e2d4a8c153'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _totals_columns():
+    return [
+        sa.Column('requests', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('prompt_tokens', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('completion_tokens', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('characters', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('audio_seconds', sa.Float(), server_default='0', nullable=False),
+        sa.Column('cost_usd', sa.Float(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'usage_ledger',
+        sa.Column('day', sa.String(length=10), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('session_scope', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('interface', sa.String(length=50), server_default='chat', nullable=False),
+        sa.Column('tool_round', sa.Integer(), server_default='0', nullable=False),
+        *_totals_columns(),
+        sa.PrimaryKeyConstraint('day', 'model', 'session_scope', 'interface', 'tool_round')
+    )
+    op.create_index('ix_usage_ledger_session_day', 'usage_ledger', ['session_scope', 'day'], unique=False)
+    op.create_index('ix_usage_ledger_interface_day', 'usage_ledger', ['interface', 'day'], unique=False)
+
+    op.create_table(
+        'usage_daily',
+        sa.Column('day', sa.String(length=10), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        *_totals_columns(),
+        sa.PrimaryKeyConstraint('day', 'model')
+    )
+    op.create_index('ix_usage_daily_model_day', 'usage_daily', ['model', 'day'], unique=False)
+
+    op.create_table(
+        'usage_resets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('reset_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_usage_resets_id'), 'usage_resets', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_usage_resets_id'), table_name='usage_resets')
+    op.drop_table('usage_resets')
+    op.drop_index('ix_usage_daily_model_day', table_name='usage_daily')
+    op.drop_table('usage_daily')
+    op.drop_index('ix_usage_ledger_interface_day', table_name='usage_ledger')
+    op.drop_index('ix_usage_ledger_session_day', table_name='usage_ledger')
+    op.drop_table('usage_ledger')
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent-writer throughput for each database runtime profile.
+
+Every profile gets a fresh SQLite file. A number of writer tasks, each with
+its own pooled connection, insert rows in small transactions while a reader
+task polls the table, mirroring the chat loop writing messages while the
+memory system and API read them.
+
+Usage:
+    python scripts/benchmark_db_profiles.py [--writers 8] [--transactions 200]
+        [--rows 5] [--profiles balanced,legacy]
+
+PostgreSQL profiles only change pool and driver options, so they are not
+benchmarked here; point DATABASE_URL at a server and run the application
+load instead.
+"""
+
+import sys
+import os
+
+# Add src directory to path so we can import nagatha_assistant
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from sqlalchemy import text
+
+from nagatha_assistant.db import DB_PROFILES, create_engine_for
+
+
+async def run_profile(profile: str, writers: int, transactions: int, rows: int) -> dict:
+    """Run the write workload against a fresh database with one profile."""
+    fd, path = tempfile.mkstemp(suffix=".db", prefix=f"nagatha_bench_{profile}_")
+    os.close(fd)
+    engine = create_engine_for(f"sqlite+aiosqlite:///{path}", profile,
+                               pool_size=writers + 1, max_overflow=0)
+    errors = 0
+    reads = 0
+    done = asyncio.Event()
+
+    async def writer(writer_id: int):
+        nonlocal errors
+        async with engine.connect() as conn:
+            for n in range(transactions):
+                try:
+                    await conn.execute(
+                        text("INSERT INTO bench (writer, payload) VALUES (:writer, :payload)"),
+                        [{"writer": writer_id, "payload": f"message {n} row {r}" * 4} for r in range(rows)]
+                    )
+                    await conn.commit()
+                except Exception:
+                    errors += 1
+                    await conn.rollback()
+
+    async def reader():
+        nonlocal reads
+        async with engine.connect() as conn:
+            while not done.is_set():
+                await conn.execute(text("SELECT count(*) FROM bench"))
+                await conn.rollback()
+                reads += 1
+                await asyncio.sleep(0)
+
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "CREATE TABLE bench (id INTEGER PRIMARY KEY, writer INTEGER, payload TEXT)"
+            ))
+
+        reader_task = asyncio.create_task(reader())
+        start = time.perf_counter()
+        await asyncio.gather(*(writer(i) for i in range(writers)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await reader_task
+
+        async with engine.connect() as conn:
+            written = (await conn.execute(text("SELECT count(*) FROM bench"))).scalar()
+    finally:
+        await engine.dispose()
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+    return {
+        "profile": profile,
+        "rows": written,
+        "seconds": elapsed,
+        "rows_per_sec": written / elapsed if elapsed else 0.0,
+        "commits_per_sec": (writers * transactions - errors) / elapsed if elapsed else 0.0,
+        "reads": reads,
+        "errors": errors,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--writers", type=int, default=8, help="concurrent writer tasks")
+    parser.add_argument("--transactions", type=int, default=200, help="transactions per writer")
+    parser.add_argument("--rows", type=int, default=5, help="rows per transaction")
+    parser.add_argument("--profiles", default=",".join(DB_PROFILES),
+                        help="comma-separated profiles to run")
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers x {args.transactions} transactions x {args.rows} rows\n")
+    print(f"{'profile':<12} {'rows/s':>10} {'commits/s':>10} {'reads':>8} {'errors':>7} {'seconds':>8}")
+    for profile in args.profiles.split(","):
+        result = await run_profile(profile.strip(), args.writers, args.transactions, args.rows)
+        print(f"{result['profile']:<12} {result['rows_per_sec']:>10.0f} {result['commits_per_sec']:>10.0f} "
+              f"{result['reads']:>8} {result['errors']:>7} {result['seconds']:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark the logging overhead of one conversation turn.
+
+A turn replays the log calls ``send_message`` makes: a handful of INFO lines
+written to the log file and DEBUG lines dumping the conversation context,
+which are dropped at the default INFO level. Each combination of handler and
+message style is timed on the calling thread, which is the time the event
+loop spends logging:
+
+- handler: "sync" writes the file in the caller, "queued" hands records to a
+  background listener thread (the application default)
+- style: "eager" builds f-strings before every call, "lazy" passes
+  %-style arguments and guards expensive debug output with isEnabledFor
+
+Usage:
+    python scripts/benchmark_logging.py [--turns 2000] [--context 15]
+"""
+
+import sys
+import os
+
+# Add src directory to path so we can import nagatha_assistant
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import argparse
+import logging
+import tempfile
+import time
+
+from nagatha_assistant.utils.logger import BackgroundHandler
+
+
+def eager_turn(logger: logging.Logger, context: list, tools: list, user_message: str) -> None:
+    logger.info(f"Tool selection: {len(tools)} available, {len(tools)} selected for user message")
+    logger.debug(f"Using {len(context)} recent conversation context entries")
+    logger.debug(f"Conversation context: {context}")
+    logger.debug(f"Building conversation history with {len(context)} context messages")
+    for msg in context:
+        logger.debug(f"Added context message: {msg['role']}: {msg['content'][:50]}...")
+    logger.debug(f"Added current user message: {user_message[:50]}...")
+    logger.info(f"Prepared {len(tools)} tools for OpenAI (filtered from {len(tools)} available)")
+    tool_names = [tool["name"] for tool in tools]
+    logger.debug(f"Tool names being sent to OpenAI: {tool_names}")
+    logger.info(f"Calling tool: {tools[0]['name']} with args: {{'query': {user_message!r}}}")
+
+
+def lazy_turn(logger: logging.Logger, context: list, tools: list, user_message: str) -> None:
+    logger.info("Tool selection: %d available, %d selected for user message", len(tools), len(tools))
+    logger.debug("Using %d recent conversation context entries", len(context))
+    logger.debug("Conversation context: %s", context)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("Building conversation history with %d context messages", len(context))
+    for msg in context:
+        if debug:
+            logger.debug("Added context message: %s: %s...", msg["role"], msg["content"][:50])
+    if debug:
+        logger.debug("Added current user message: %s...", user_message[:50])
+    logger.info("Prepared %d tools for OpenAI (filtered from %d available)", len(tools), len(tools))
+    if logger.isEnabledFor(logging.DEBUG):
+        tool_names = [tool["name"] for tool in tools]
+        logger.debug("Tool names being sent to OpenAI: %s", tool_names)
+    logger.info("Calling tool: %s with args: %s", tools[0]["name"], {"query": user_message})
+
+
+def run(handler_mode: str, style: str, turns: int, context_size: int) -> float:
+    """Time a number of turns and return microseconds per turn."""
+    fd, path = tempfile.mkstemp(suffix=".log", prefix="nagatha_bench_")
+    os.close(fd)
+    file_handler = logging.FileHandler(path)
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    handler = BackgroundHandler(file_handler) if handler_mode == "queued" else file_handler
+
+    logger = logging.getLogger(f"nagatha_bench.{handler_mode}.{style}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+
+    context = [{"role": "user" if n % 2 else "assistant", "content": f"message {n} " * 60}
+               for n in range(context_size)]
+    tools = [{"name": f"tool_{n}", "description": "x" * 80} for n in range(60)]
+    turn = eager_turn if style == "eager" else lazy_turn
+
+    start = time.perf_counter()
+    for n in range(turns):
+        turn(logger, context, tools, f"user message {n}")
+    elapsed = time.perf_counter() - start
+
+    logger.removeHandler(handler)
+    handler.close()
+    file_handler.close()
+    os.unlink(path)
+    return elapsed / turns * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--turns", type=int, default=2000, help="turns per combination")
+    parser.add_argument("--context", type=int, default=15, help="conversation context messages")
+    args = parser.parse_args()
+
+    print(f"{args.turns} turns, {args.context} context messages, logger level INFO\n")
+    print(f"{'handler':<8} {'style':<6} {'us/turn':>9}")
+    for handler_mode in ("sync", "queued"):
+        for style in ("eager", "lazy"):
+            us = run(handler_mode, style, args.turns, args.context)
+            print(f"{handler_mode:<8} {style:<6} {us:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
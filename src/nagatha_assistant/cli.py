@@ -80,6 +80,41 @@ def db_upgrade():
             sys.exit(1)
 
 
+@db.command("verify")
+def db_verify():
+    """
+    Check the database schema for drift from the application models.
+
+    Exits with status 1 when tables, columns or indexes are missing or the
+    database is stamped with an older Alembic revision.
+    """
+    from nagatha_assistant.db import verify_schema
+
+    try:
+        # Checks the application database (db.DATABASE_URL)
+        report = asyncio.run(verify_schema())
+    except Exception as exc:
+        click.echo(f"Error verifying database: {exc}", err=True)
+        sys.exit(1)
+
+    click.echo(f"Schema fingerprint: {report['fingerprint'] or '-'} "
+               f"(models: {report['expected_fingerprint']})")
+    click.echo(f"Alembic revision: {report['revision'] or 'not stamped'} "
+               f"(head: {report['head_revision'] or 'unknown'})")
+    for label, key in (("Missing table", "missing_tables"),
+                       ("Missing column", "missing_columns"),
+                       ("Missing index", "missing_indexes"),
+                       ("Extra column", "extra_columns")):
+        for name in report[key]:
+            click.echo(f"  {label}: {name}")
+
+    if report["ok"]:
+        click.echo("Database schema matches the models.")
+    else:
+        click.echo("Database schema has drifted; run 'nagatha db upgrade'.", err=True)
+        sys.exit(1)
+
+
 @db.command("backup")
 @click.argument("destination", required=False, type=click.Path())
 def db_backup(destination):
@@ -544,6 +579,62 @@ def memory_clear(section, session, confirm, key):
     asyncio.run(_clear())
 
 
+@memory.command("export")
+@click.argument("destination", type=click.Path())
+@click.option("--section", "sections", multiple=True, help="Section to export (repeatable; default all)")
+@click.option("--since", help="Only export entries updated after this high-water mark")
+def memory_export(destination, sections, since):
+    """
+    Stream memory entries to a compressed NDJSON file.
+    
+    DESTINATION: Output file; use a .gz or .zst extension for compression
+    
+    Examples:
+        nagatha memory export memory.ndjson.gz
+        nagatha memory export facts.ndjson.gz --section facts
+        nagatha memory export changes.ndjson.gz --since 2025-01-01T00:00:00+00:00
+    """
+    async def _export():
+        from nagatha_assistant.core.memory_export import export_memory
+        from nagatha_assistant.db import ensure_schema
+        
+        try:
+            await ensure_schema()
+            summary = await export_memory(destination, sections=sections or None, since=since)
+            click.echo(f"✅ Exported {summary['entries']} entries to {destination}")
+            if summary["high_water_mark"]:
+                click.echo(f"High-water mark: {summary['high_water_mark']}")
+        except Exception as e:
+            click.echo(f"❌ Error exporting memory: {e}", err=True)
+    
+    asyncio.run(_export())
+
+
+@memory.command("import")
+@click.argument("source", type=click.Path(exists=True))
+@click.option("--batch-size", default=500, show_default=True, help="Entries upserted per transaction")
+def memory_import(source, batch_size):
+    """
+    Import a file written by 'nagatha memory export'.
+    
+    Existing entries with the same section, key and session are updated.
+    
+    SOURCE: Export file to read
+    """
+    async def _import():
+        from nagatha_assistant.core.memory_export import import_memory
+        from nagatha_assistant.db import ensure_schema
+        
+        try:
+            await ensure_schema()
+            summary = await import_memory(source, batch_size=batch_size)
+            click.echo(f"✅ Imported {summary['entries']} entries from {source}")
+        except Exception as e:
+            click.echo(f"❌ Error importing memory: {e}", err=True)
+    
+    asyncio.run(_import())
+
+
 @memory.command("stats")
 @click.argument("section", required=False)
 @click.option("--detailed", is_flag=True, help="Show detailed statistics")
@@ -564,12 +655,22 @@ def memory_stats(section, detailed):
         try:
             memory = await ensure_memory_manager_started()
             stats = await memory.get_storage_stats()
+            section_stats = await memory.get_section_stats() if detailed else {}
+            
+            def _describe(name):
+                details = section_stats.get(name)
+                if not details:
+                    return ""
+                text = f", {details['bytes']} bytes, {len(details['sessions'])} sessions"
+                if details["growth_per_hour"] is not None:
+                    text += f", {details['growth_per_hour']:+.1f} entries/hour"
+                return text
             
             if section:
                 # Show stats for specific section
                 if section in stats:
                     count = stats[section]
-                    click.echo(f"Section '{section}': {count} entries")
+                    click.echo(f"Section '{section}': {count} entries{_describe(section)}")
                     
                     if detailed:
                         # Show sample keys
@@ -606,7 +707,7 @@ def memory_stats(section, detailed):
                             count = stats[section_name]
                             if count > 0:
                                 keys = await memory.list_keys(section_name)
-                                click.echo(f"  {section_name} ({count} entries):")
+                                click.echo(f"  {section_name} ({count} entries{_describe(section_name)}):")
                                 for key in keys[:3]:  # Show first 3
                                     click.echo(f"    • {key}")
                                 if len(keys) > 3:
@@ -1418,6 +1519,79 @@ def server_sessions(session_id, output_format):
     asyncio.run(_list_sessions())
 
 
+@server.command("history")
+@click.argument("session_id", type=int)
+@click.option("--limit", "-l", default=20, show_default=True, help="Messages per page (max 200)")
+@click.option("--before-id", type=int, help="Show messages older than this message id")
+@click.option("--format", "output_format", type=click.Choice(["text", "json"]),
+              default="text", help="Output format")
+def server_history(session_id, limit, before_id, output_format):
+    """
+    Show a page of a session's message history.
+    
+    Pages are fetched newest first; the footer prints the --before-id
+    to pass for the next older page.
+    
+    Examples:
+        nagatha server history 12
+        nagatha server history 12 --limit 50 --before-id 3400
+    """
+    async def _history():
+        import json
+        import os
+        import aiohttp
+        
+        try:
+            status_file = "/tmp/nagatha_server_status.json"
+            
+            if not os.path.exists(status_file):
+                click.echo("Server is not running", err=True)
+                return
+            
+            with open(status_file, 'r') as f:
+                status_data = json.load(f)
+            
+            # REST API runs on main server port + 1
+            rest_port = status_data['port'] + 1
+            server_url = f"http://{status_data['host']}:{rest_port}"
+            params = {"limit": limit}
+            if before_id is not None:
+                params["before_id"] = before_id
+            
+            async with aiohttp.ClientSession() as client_session:
+                async with client_session.get(
+                    f"{server_url}/sessions/{session_id}/messages", params=params
+                ) as response:
+                    if response.status != 200:
+                        click.echo(f"❌ Error getting history: HTTP {response.status}", err=True)
+                        return
+                    page = await response.json()
+            
+            if output_format == "json":
+                click.echo(json.dumps(page, indent=2))
+                return
+            
+            if not page["messages"]:
+                click.echo("No messages found.")
+                return
+            
+            # Print the page oldest first so it reads like a transcript
+            for message in reversed(page["messages"]):
+                timestamp = (message.get("timestamp") or "")[:19].replace("T", " ")
+                click.echo(f"[{message['id']}] {timestamp} {message['role']}: {message['content']}")
+            
+            if page["next_before_id"] is not None:
+                click.echo(f"\nOlder messages: nagatha server history {session_id} "
+                           f"--limit {limit} --before-id {page['next_before_id']}")
+                
+        except aiohttp.ClientError as e:
+            click.echo(f"❌ Could not connect to server: {e}", err=True)
+        except Exception as e:
+            click.echo(f"Error getting history: {e}", err=True)
+    
+    asyncio.run(_history())
+
+
 @server.command("session-end")
 @click.argument("session_id")
 @click.option("--force", is_flag=True, help="Force end session without confirmation")
@@ -1,6 +1,7 @@
 import os
 import asyncio
 import json
+import logging
 from typing import Any, Dict, List, Optional, Callable, Awaitable
 import openai
 from openai import AsyncOpenAI
@@ -8,16 +9,22 @@ from openai import AsyncOpenAI
 from sqlalchemy import select
 
 from nagatha_assistant.db import ensure_schema, SessionLocal
+from nagatha_assistant.core.unit_of_work import TurnUnitOfWork, save_message
 from nagatha_assistant.db_models import ConversationSession, Message
-from nagatha_assistant.utils.usage_tracker import record_usage
+from nagatha_assistant.utils.usage_tracker import record_usage, flush_usage
 from nagatha_assistant.utils.logger import setup_logger_with_env_control, should_log_to_chat, get_logger
 from nagatha_assistant.core.mcp_manager import get_mcp_manager, shutdown_mcp_manager
 from nagatha_assistant.core.personality import get_system_prompt
 from nagatha_assistant.core.event_bus import get_event_bus
+from nagatha_assistant.core.llm_gateway import LLMPriority, get_llm_gateway
+from nagatha_assistant.core.model_router import get_model_router
+from nagatha_assistant.core.session_actor import SessionActors, actors_from_env
 from nagatha_assistant.core.event import (
     StandardEventTypes, create_system_event, create_agent_event, EventPriority
 )
 
+logger = get_logger()
+
 # OpenAI client for conversations with timeout configuration
 OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))  # 60 seconds for tool-heavy requests
 _client: Optional[AsyncOpenAI] = None
@@ -28,7 +35,8 @@ def get_openai_client() -> AsyncOpenAI:
     if _client is None:
         _client = AsyncOpenAI(
             api_key=os.getenv("OPENAI_API_KEY"),
-            timeout=OPENAI_TIMEOUT
+            timeout=OPENAI_TIMEOUT,
+            max_retries=0  # Retries are handled by the LLM gateway
         )
     return _client
 
@@ -38,6 +46,16 @@ _push_callbacks: Dict[int, List[Callable[[Message], Awaitable[None]]]] = {}
 # Background task for autonomous memory maintenance
 _memory_maintenance_task: Optional[asyncio.Task] = None
 
+# Per-session mailboxes serializing send_message turns
+_session_actors: Optional[SessionActors] = None
+
+def get_session_actors() -> SessionActors:
+    """Get the per-session actors that run conversation turns, creating them lazily."""
+    global _session_actors
+    if _session_actors is None:
+        _session_actors = actors_from_env(_run_turn)
+    return _session_actors
+
 def subscribe_session(session_id: int, callback: Callable[[Message], Awaitable[None]]) -> None:
     """Register a coroutine callback to receive new messages for a session."""
     _push_callbacks.setdefault(session_id, []).append(callback)
@@ -59,7 +77,6 @@ async def _notify(session_id: int, message: Message) -> None:
             if asyncio.iscoroutine(res):
                 asyncio.create_task(res)
         except Exception:
-            logger = get_logger()
             logger.exception("Error in push callback for session %s", session_id)
 
 # Database initialization and session handling
@@ -70,7 +87,6 @@ async def init_db() -> None:
 
 async def _autonomous_memory_maintenance_loop() -> None:
     """Background task for autonomous memory maintenance."""
-    logger = get_logger()
     
     while True:
         try:
@@ -103,7 +119,6 @@ async def startup() -> Dict[str, Any]:
     Returns summary of MCP server connections for error reporting.
     """
     # Setup enhanced logging
-    logger = get_logger()
     
     # Start the event bus
     event_bus = get_event_bus()
@@ -180,7 +195,6 @@ async def shutdown() -> None:
         from .plugin_manager import shutdown_plugin_manager
         await shutdown_plugin_manager()
     except Exception as e:
-        logger = get_logger()
         logger.exception(f"Error shutting down plugins: {e}")
     
     # Cancel memory maintenance task (only if it exists)
@@ -191,17 +205,14 @@ async def shutdown() -> None:
             await _memory_maintenance_task
         except asyncio.CancelledError:
             pass
-        logger = get_logger()
         logger.info("Memory maintenance task cancelled")
     
     # Shutdown short-term memory system
     try:
         from .short_term_memory import shutdown_short_term_memory
         await shutdown_short_term_memory()
-        logger = get_logger()
         logger.info("Short-term memory system stopped")
     except Exception as e:
-        logger = get_logger()
         logger.exception(f"Error shutting down short-term memory: {e}")
     
     # Shutdown memory manager
@@ -209,21 +220,28 @@ async def shutdown() -> None:
         from .memory import shutdown_memory_manager
         await shutdown_memory_manager()
     except Exception as e:
-        logger = get_logger()
         logger.exception(f"Error shutting down memory manager: {e}")
     
+    # Stop session actors; turns still waiting are cancelled
+    if _session_actors is not None:
+        await _session_actors.stop()
+    
     await shutdown_mcp_manager()
     
+    # Write usage still buffered in memory
+    await flush_usage()
+    
+    # Close the routing decision log
+    get_model_router().close()
+    
     # Stop the event bus
     if event_bus._running:
         await event_bus.stop()
     
-    logger = get_logger()
     logger.info("Application shutdown complete")
 
 async def start_session() -> int:
     """Create a new conversation session and return its ID."""
-    logger = get_logger()
     await init_db()
     # Ensure MCP is initialized
     await get_mcp_manager()
@@ -233,7 +251,6 @@ async def start_session() -> int:
         from .memory import ensure_memory_manager_started
         await ensure_memory_manager_started()
     except Exception as e:
-        logger = get_logger()
         logger.exception(f"Error ensuring memory manager is started: {e}")
     
     # Ensure plugins are initialized
@@ -243,7 +260,6 @@ async def start_session() -> int:
         if not plugin_manager._plugins:  # Only load if not already loaded
             await plugin_manager.load_and_start_all()
     except Exception as e:
-        logger = get_logger()
         logger.exception(f"Error ensuring plugins are loaded: {e}")
     
     async with SessionLocal() as session:
@@ -310,13 +326,56 @@ async def start_session() -> int:
         
         return session_id
 
-async def get_messages(session_id: int) -> List[Message]:
-    """Retrieve all messages for a session, ordered by timestamp."""
+async def get_messages(session_id: int, limit: Optional[int] = None,
+                       before_id: Optional[int] = None) -> List[Message]:
+    """
+    Retrieve messages for a session.
+    
+    Without ``limit`` or ``before_id`` every message is returned, oldest
+    first. Otherwise a keyset page is returned newest first: at most
+    ``limit`` messages with an id below ``before_id``. Pass the id of the
+    last message of a page as ``before_id`` to fetch the next (older) page.
+    
+    Args:
+        session_id: Conversation session
+        limit: Maximum number of messages in the page
+        before_id: Only return messages older than this message id
+    """
     async with SessionLocal() as session:
-        stmt = select(Message).where(Message.session_id == session_id).order_by(Message.timestamp)
+        if limit is None and before_id is None:
+            stmt = select(Message).where(Message.session_id == session_id).order_by(Message.timestamp)
+        else:
+            stmt = select(Message).where(Message.session_id == session_id)
+            if before_id is not None:
+                stmt = stmt.where(Message.id < before_id)
+            stmt = stmt.order_by(Message.id.desc())
+            if limit is not None:
+                stmt = stmt.limit(limit)
         result = await session.execute(stmt)
         return result.scalars().all()
 
+
+def message_page(messages: List[Message], limit: int) -> Dict[str, Any]:
+    """
+    Serialize a newest-first page from :func:`get_messages`.
+    
+    Returns:
+        ``messages`` (newest first) and ``next_before_id``, the cursor for
+        the next older page, or None when this page was the last one
+    """
+    return {
+        "messages": [
+            {
+                "id": message.id,
+                "role": message.role,
+                "content": message.content,
+                "timestamp": message.timestamp.isoformat() if message.timestamp else None
+            }
+            for message in messages
+        ],
+        "next_before_id": messages[-1].id if messages and len(messages) >= limit else None
+    }
+
 async def list_sessions() -> List[ConversationSession]:
     """List all conversation sessions, ordered by creation time."""
     async with SessionLocal() as session:
@@ -334,7 +393,6 @@ async def get_available_tools() -> List[Dict[str, Any]]:
         mcp_tools = mcp_manager.get_available_tools()
         tools.extend(mcp_tools)
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error getting MCP tools: {e}")
     
     # Get plugin commands
@@ -356,7 +414,6 @@ async def get_available_tools() -> List[Dict[str, Any]]:
                 "server": f"plugin:{cmd_info['plugin']}"
             })
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error getting plugin commands: {e}")
     
     return tools
@@ -372,7 +429,6 @@ async def get_mcp_status() -> Dict[str, Any]:
             "summary": mcp_manager.get_initialization_summary()
         }
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error getting MCP status: {e}")
         return {"error": str(e), "servers": {}, "tools": [], "initialized": False}
 
@@ -383,7 +439,6 @@ async def reload_mcp_configuration() -> Dict[str, Any]:
         await mcp_manager.reload_configuration()
         return await get_mcp_status()
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error reloading MCP configuration: {e}")
         return {"error": str(e), "servers": {}, "tools": [], "initialized": False}
 
@@ -393,7 +448,6 @@ async def call_mcp_tool(tool_name: str, arguments: Dict[str, Any]) -> Any:
         mcp_manager = await get_mcp_manager()
         return await mcp_manager.call_tool(tool_name, arguments)
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error calling MCP tool '{tool_name}': {e}")
         raise
 
@@ -405,7 +459,6 @@ async def call_plugin_command(command_name: str, arguments: Dict[str, Any]) -> A
         plugin_manager = get_plugin_manager()
         return await plugin_manager.execute_command(command_name, **arguments)
     except Exception as e:
-        logger = get_logger()
         logger.error(f"Error calling plugin command '{command_name}': {e}")
         raise
 
@@ -418,7 +471,6 @@ async def call_tool_or_command(name: str, arguments: Dict[str, Any]) -> Any:
     For other operations, try MCP tools first, then plugin commands.
     Handles json import errors gracefully with fallback implementations.
     """
-    logger = get_logger()
     
     # For memory operations, try plugin command first
     if "memory" in name.lower():
@@ -482,7 +534,6 @@ def format_mcp_status_for_chat(init_summary: Dict[str, Any]) -> str:
 
 async def _fallback_web_search(tool_name: str, arguments: Dict[str, Any]) -> str:
     """Fallback implementation for web search when external MCP server fails."""
-    logger = get_logger()
     logger.info(f"Using fallback web search for '{tool_name}' with args: {arguments}")
     
     # Extract search query from arguments
@@ -500,7 +551,6 @@ async def _fallback_web_search(tool_name: str, arguments: Dict[str, Any]) -> str
 
 async def _fallback_memory_operation(tool_name: str, arguments: Dict[str, Any]) -> str:
     """Fallback implementation for memory operations when external MCP server fails."""
-    logger = get_logger()
     logger.info(f"Using fallback memory operation for '{tool_name}' with args: {arguments}")
     
     try:
@@ -635,42 +685,78 @@ def _select_relevant_tools(available_tools: List[Dict[str, Any]], user_message:
         
         selected_tools.extend(categories[:remaining_slots])
     
-    logger = get_logger()
-    logger.info(f"Tool selection: {len(available_tools)} available, {len(selected_tools)} selected for user message")
+    logger.info("Tool selection: %d available, %d selected for user message",
+                len(available_tools), len(selected_tools))
     return selected_tools
 
+def _record_completion_usage(response: Any, model: str, session_id: int, interface: str,
+                             tool_round: int) -> None:
+    """Add the token counts of a chat completion to the usage ledger."""
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    # Responses without usage (some proxies, test doubles) are not counted
+    if not isinstance(prompt_tokens, int) or not isinstance(completion_tokens, int):
+        return
+    record_usage(model, prompt_tokens, completion_tokens, session_id=session_id,
+                 interface=interface, tool_round=tool_round)
+
+
 async def send_message(
     session_id: int,
     user_message: str,
     model: str = None,
     tool_name: Optional[str] = None,
     tool_args: Optional[Dict[str, Any]] = None,
+    interface: str = "chat",
+    priority: LLMPriority = LLMPriority.INTERACTIVE,
 ) -> str:
     """
     Send a user message and get Nagatha's response.
     
     This function handles both direct tool calls and intelligent conversation
-    that may involve using MCP tools when appropriate.
+    that may involve using MCP tools when appropriate. Token usage of every
+    completion is recorded against the session and ``interface``; completions
+    are queued in the LLM gateway with ``priority``.
+    
+    Without an explicit ``model`` the model router picks the model tier and
+    reply budget for the turn, escalating to the standard tier when the cheap
+    tier asks for tools or runs out of tokens.
+    
+    Turns of the same session run one at a time through the session's actor.
+    With NAGATHA_COALESCE_WINDOW_MS set, a burst of messages for a session is
+    answered by a single turn and every sender receives that reply.
     """
-    logger = get_logger()
+    return await get_session_actors().submit(
+        session_id,
+        user_message,
+        mergeable=tool_name is None,
+        model=model,
+        tool_name=tool_name,
+        tool_args=tool_args,
+        interface=interface,
+        priority=priority,
+    )
 
-    if not model:
-        model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
-    # Save user message
-    async with SessionLocal() as session:
-        user_msg = Message(session_id=session_id, role="user", content=user_message)
-        session.add(user_msg)
-        await session.commit()
-        await session.refresh(user_msg)
+async def _run_turn(
+    session_id: int,
+    user_message: str,
+    model: str = None,
+    tool_name: Optional[str] = None,
+    tool_args: Optional[Dict[str, Any]] = None,
+    interface: str = "chat",
+    priority: LLMPriority = LLMPriority.INTERACTIVE,
+) -> str:
+    """Run one conversation turn for ``send_message``."""
+
+    # Save user message; the turn's memory writes are committed with the reply
+    user_msg = await save_message(session_id, "user", user_message)
+    turn = TurnUnitOfWork(session_id)
     
     # Add to conversation context for short-term memory
     try:
-        from .memory import get_memory_manager
-        memory_manager = get_memory_manager()
-        await memory_manager.add_conversation_context(
-            session_id, user_msg.id, "user", user_message
-        )
+        turn.remember_message(user_msg)
     except Exception as e:
         logger.warning(f"Failed to add user message to conversation context: {e}")
     
@@ -700,19 +786,14 @@ async def send_message(
         storage_analysis = await memory_trigger.analyze_for_storage(user_message, context)
         
         if storage_analysis["should_store"]:
-            logger.debug(f"Autonomous memory: storing {len(storage_analysis['entries'])} items from user message")
+            logger.debug("Autonomous memory: storing %d items from user message",
+                         len(storage_analysis["entries"]))
             
             # Store identified entries
             for entry in storage_analysis["entries"]:
-                await memory_trigger.memory_manager.set(
-                    section=entry["section"],
-                    key=entry["key"],
-                    value=entry["value"],
-                    session_id=entry.get("session_id"),
-                    ttl_seconds=entry.get("ttl_seconds")
-                )
+                turn.remember_entry(entry)
         else:
-            logger.debug(f"Autonomous memory: not storing user message - {storage_analysis['reason']}")
+            logger.debug("Autonomous memory: not storing user message - %s", storage_analysis["reason"])
     
     except Exception as e:
         logger.warning(f"Error in autonomous memory processing: {e}")
@@ -721,7 +802,7 @@ async def send_message(
     if tool_name:
         try:
             tool_args = tool_args or {}
-            logger.info(f"Direct tool call: '{tool_name}' with args: {tool_args}")
+            logger.info("Direct tool call: '%s' with args: %s", tool_name, tool_args)
             result = await call_tool_or_command(tool_name, tool_args)
             assistant_msg = f"Tool '{tool_name}' result:\n{result}"
         except Exception as e:
@@ -747,28 +828,28 @@ async def send_message(
                 
                 # If we have recent context, use it instead of full database history
                 if conversation_context:
-                    logger.debug(f"Using {len(conversation_context)} recent conversation context entries")
-                    logger.debug(f"Conversation context: {conversation_context}")
+                    logger.debug("Using %d recent conversation context entries", len(conversation_context))
+                    logger.debug("Conversation context: %s", conversation_context)
                 else:
                     # Fallback to database messages
-                    messages = await get_messages(session_id)
+                    messages = await get_messages(session_id, limit=15)
                     conversation_context = [
                         {"role": msg.role, "content": msg.content}
-                        for msg in messages[-15:]  # Last 15 messages
+                        for msg in reversed(messages)  # Last 15 messages, oldest first
                     ]
-                    logger.debug(f"Using {len(conversation_context)} database messages as fallback")
-                    logger.debug(f"Database conversation context: {conversation_context}")
+                    logger.debug("Using %d database messages as fallback", len(conversation_context))
+                    logger.debug("Database conversation context: %s", conversation_context)
                     
             except Exception as e:
                 logger.warning(f"Error getting conversation context: {e}")
                 # Fallback to database messages
-                messages = await get_messages(session_id)
+                messages = await get_messages(session_id, limit=15)
                 conversation_context = [
                     {"role": msg.role, "content": msg.content}
-                    for msg in messages[-15:]  # Last 15 messages
+                    for msg in reversed(messages)  # Last 15 messages, oldest first
                 ]
-                logger.debug(f"Using {len(conversation_context)} database messages after error")
-                logger.debug(f"Database conversation context: {conversation_context}")
+                logger.debug("Using %d database messages after error", len(conversation_context))
+                logger.debug("Database conversation context: %s", conversation_context)
             
             # Get available tools and create enhanced system prompt with memory context
             available_tools = await get_available_tools()
@@ -856,20 +937,25 @@ async def send_message(
             conversation_history = [{"role": "system", "content": enhanced_system_prompt}]
             
             # Add conversation context (excluding the current user message which we'll add separately)
-            logger.debug(f"Building conversation history with {len(conversation_context)} context messages")
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug("Building conversation history with %d context messages", len(conversation_context))
             context_added = 0
             for msg in conversation_context:
                 if msg["role"] != "user" or msg["content"] != user_message:
                     conversation_history.append(msg)
                     context_added += 1
-                    logger.debug(f"Added context message: {msg['role']}: {msg['content'][:50]}...")
-                else:
-                    logger.debug(f"Skipped duplicate message: {msg['role']}: {msg['content'][:50]}...")
+                    if debug:
+                        logger.debug("Added context message: %s: %s...", msg["role"], msg["content"][:50])
+                elif debug:
+                    logger.debug("Skipped duplicate message: %s: %s...", msg["role"], msg["content"][:50])
             
             # Add the current user message
             conversation_history.append({"role": "user", "content": user_message})
-            logger.debug(f"Added current user message: {user_message[:50]}...")
-            logger.debug(f"Final conversation history has {len(conversation_history)} messages ({context_added} context messages)")
+            if debug:
+                logger.debug("Added current user message: %s...", user_message[:50])
+                logger.debug("Final conversation history has %d messages (%d context messages)",
+                             len(conversation_history), context_added)
             
             # Ensure we have at least some context for conversation flow
             if context_added == 0 and len(conversation_context) > 0:
@@ -878,7 +964,7 @@ async def send_message(
                 for msg in reversed(conversation_context):
                     if msg["role"] == "assistant":
                         conversation_history.insert(1, msg)  # Insert after system message
-                        logger.debug(f"Added fallback context: {msg['role']}: {msg['content'][:50]}...")
+                        logger.debug("Added fallback context: %s: %s...", msg["role"], msg["content"][:50])
                         break
             
             # Call OpenAI with function calling for tool use
@@ -911,22 +997,54 @@ async def send_message(
                     
                     tools.append(tool_def)
                 
-                logger.info(f"Prepared {len(tools)} tools for OpenAI (filtered from {len(available_tools)} available)")
-                tool_names = [tool['function']['name'] for tool in tools]
-                logger.debug(f"Tool names being sent to OpenAI: {tool_names}")
+                logger.info("Prepared %d tools for OpenAI (filtered from %d available)",
+                            len(tools), len(available_tools))
+                if logger.isEnabledFor(logging.DEBUG):
+                    tool_names = [tool['function']['name'] for tool in tools]
+                    logger.debug("Tool names being sent to OpenAI: %s", tool_names)
+            
+            # Pick the model tier and reply budget for this turn
+            router = get_model_router()
+            route = router.route(user_message, model)
+            turn_failed = False
             
             # Call OpenAI
             try:
                 client = get_openai_client()
+                gateway = get_llm_gateway()
                 
-                response = await client.chat.completions.create(
-                    model=model,
+                response = await gateway.create_chat_completion(
+                    client,
+                    priority=priority,
+                    model=route.model,
                     messages=conversation_history,
                     tools=tools,
                     tool_choice="auto" if tools else None,
                     temperature=0.7,
-                    max_tokens=4000
+                    max_tokens=route.max_tokens
                 )
+                _record_completion_usage(response, route.model, session_id, interface, 0)
+                route.observe(response)
+                
+                escalation = router.escalation(route, response)
+                if escalation:
+                    router.escalate(route, escalation)
+                if escalation == "truncated":
+                    # The cheap reply was cut off; answer again on the standard tier
+                    response = await gateway.create_chat_completion(
+                        client,
+                        priority=priority,
+                        model=route.model,
+                        messages=conversation_history,
+                        tools=tools,
+                        tool_choice="auto" if tools else None,
+                        temperature=0.7,
+                        max_tokens=route.max_tokens
+                    )
+                    _record_completion_usage(response, route.model, session_id, interface, 0)
+                    route.observe(response)
+                # Answers after tool calls are written by the (possibly escalated) model
+                model = route.model
                 
                 assistant_msg = response.choices[0].message.content or ""
                 
@@ -936,12 +1054,12 @@ async def send_message(
                     logger.info(f"OpenAI requested {len(tool_calls)} tool calls")
                     
                     # Process tool calls
-                    for tool_call in tool_calls:
+                    for tool_round, tool_call in enumerate(tool_calls, start=1):
                         try:
                             tool_name = tool_call.function.name
                             tool_args = json.loads(tool_call.function.arguments)
                             
-                            logger.info(f"Calling tool: {tool_name} with args: {tool_args}")
+                            logger.info("Calling tool: %s with args: %s", tool_name, tool_args)
                             result = await call_tool_or_command(tool_name, tool_args)
                             
                             # Add tool result to conversation
@@ -958,12 +1076,16 @@ async def send_message(
                             })
                             
                             # Get final response from OpenAI
-                            final_response = await client.chat.completions.create(
+                            final_response = await gateway.create_chat_completion(
+                                client,
+                                priority=priority,
                                 model=model,
                                 messages=conversation_history,
                                 temperature=0.7,
                                 max_tokens=2000
                             )
+                            _record_completion_usage(final_response, model, session_id, interface, tool_round)
+                            route.observe(final_response)
                             
                             assistant_msg = final_response.choices[0].message.content or ""
                             
@@ -982,28 +1104,14 @@ async def send_message(
             except Exception as e:
                 logger.exception(f"Error calling OpenAI: {e}")
                 assistant_msg = f"I encountered an error while processing your request: {e}"
+                turn_failed = True
+            finally:
+                router.finish(route, session_id, interface, error=turn_failed)
             
         except Exception as e:
             logger.exception("Error in conversation processing")
             assistant_msg = f"I encountered an error while processing your request: {e}"
 
-    # Save assistant reply
-    async with SessionLocal() as session:
-        bot = Message(session_id=session_id, role="assistant", content=assistant_msg)
-        session.add(bot)
-        await session.commit()
-        await session.refresh(bot)
-    
-    # Add assistant response to conversation context
-    try:
-        from .memory import get_memory_manager
-        memory_manager = get_memory_manager()
-        await memory_manager.add_conversation_context(
-            session_id, bot.id, "assistant", assistant_msg
-        )
-    except Exception as e:
-        logger.warning(f"Failed to add assistant message to conversation context: {e}")
-
     # Autonomous memory processing for assistant response
     try:
         from .memory import get_memory_trigger, get_memory_learning
@@ -1014,36 +1122,34 @@ async def send_message(
         
         context = {
             "session_id": session_id, 
-            "message_id": bot.id,
+            "message_id": None,  # assigned when the reply is stored below
             "user_message": user_message,
             "is_assistant_response": True
         }
         
         # Learn from successful interaction patterns
-        await memory_learning.learn_from_feedback(
+        turn.remember_entry(memory_learning.feedback_entry(
             "interaction_pattern",
             f"User: {user_message[:100]}... | Assistant: {assistant_msg[:100]}...",
             context
-        )
+        ))
         
         # Store any self-awareness or personality insights from assistant response
         storage_analysis = await memory_trigger.analyze_for_storage(assistant_msg, context)
         
         if storage_analysis["should_store"]:
-            logger.debug(f"Autonomous memory: storing {len(storage_analysis['entries'])} items from assistant response")
+            logger.debug("Autonomous memory: storing %d items from assistant response",
+                         len(storage_analysis["entries"]))
             
             for entry in storage_analysis["entries"]:
-                await memory_trigger.memory_manager.set(
-                    section=entry["section"],
-                    key=entry["key"],
-                    value=entry["value"],
-                    session_id=entry.get("session_id"),
-                    ttl_seconds=entry.get("ttl_seconds")
-                )
+                turn.remember_entry(entry)
         
     except Exception as e:
         logger.warning(f"Error in autonomous memory processing for assistant response: {e}")
 
+    # Save assistant reply, its conversation context and the turn's memories together
+    bot = await turn.commit("assistant", assistant_msg)
+
     # Publish assistant message sent event
     if event_bus._running:
         response_event = create_agent_event(
@@ -1069,11 +1175,7 @@ async def push_message(
     Insert a message into the session and notify subscribers.
     """
     await init_db()
-    async with SessionLocal() as session:
-        msg = Message(session_id=session_id, role=role, content=content)
-        session.add(msg)
-        await session.commit()
-        await session.refresh(msg)
+    msg = await save_message(session_id, role, content)
     
     # Publish message event
     event_bus = get_event_bus()
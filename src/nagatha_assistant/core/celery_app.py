@@ -5,9 +5,13 @@ This module provides the core Celery application setup with Redis as the broker
 and result backend. It's designed to integrate with the existing event system.
 """
 
+import asyncio
 import os
+import threading
+from concurrent.futures import Future
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown
 from typing import Dict, Any, Optional
 
 from nagatha_assistant.utils.logger import get_logger
@@ -239,6 +243,89 @@ def clear_beat_schedule() -> None:
     logger.info("Cleared all periodic tasks from beat schedule")
 
 
+# Background event loop of a worker process
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_loop_pid: Optional[int] = None
+_worker_loop_lock = threading.Lock()
+_worker_bridge = None
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get this worker process's background event loop, starting it on first use.
+    
+    Celery tasks are synchronous. Rather than starting a new loop with
+    ``asyncio.run`` for every async call, each worker process runs one loop
+    in a daemon thread. The loop also hosts the process's event bus and, when
+    NAGATHA_EVENT_BRIDGE_URL is set, the bridge that forwards its task events
+    to the server. Must not be called from the loop's own thread.
+    """
+    global _worker_loop, _worker_loop_pid
+    
+    with _worker_loop_lock:
+        # A forked child gets a copy of the parent's state but not its thread
+        if _worker_loop is None or _worker_loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="nagatha-worker-loop", daemon=True).start()
+            asyncio.run_coroutine_threadsafe(_start_worker_events(), loop).result(timeout=30)
+            _worker_loop, _worker_loop_pid = loop, os.getpid()
+    return _worker_loop
+
+
+def run_in_worker_loop(coro) -> Future:
+    """
+    Schedule a coroutine on the worker loop.
+    
+    Returns:
+        A concurrent future; call ``result()`` to wait for the coroutine
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_worker_loop())
+
+
+def publish_from_worker(event) -> None:
+    """Publish an event on the worker process's event bus from a task thread."""
+    from .event_bus import get_event_bus
+    
+    get_worker_loop().call_soon_threadsafe(get_event_bus().publish_sync, event)
+
+
+async def _start_worker_events() -> None:
+    """Start the worker's event bus and, if configured, its event bridge."""
+    global _worker_bridge
+    from .event_bridge import bridge_from_env
+    from .event_bus import ensure_event_bus_started
+    
+    bus = await ensure_event_bus_started()
+    try:
+        _worker_bridge = bridge_from_env(bus, "worker")
+        if _worker_bridge:
+            await _worker_bridge.start()
+    except Exception as e:
+        logger.error(f"Failed to start worker event bridge: {e}")
+        _worker_bridge = None
+
+
+async def _stop_worker_events() -> None:
+    """Forward buffered events and stop the worker's event bus."""
+    from .event_bus import shutdown_event_bus
+    
+    if _worker_bridge:
+        await _worker_bridge.stop()
+    await shutdown_event_bus()
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(**kwargs) -> None:
+    """Flush the worker's events before the process exits."""
+    if _worker_loop is None or _worker_loop_pid != os.getpid():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_stop_worker_events(), _worker_loop).result(timeout=10)
+    except Exception as e:
+        logger.warning(f"Failed to stop worker events cleanly: {e}")
+    _worker_loop.call_soon_threadsafe(_worker_loop.stop)
+
+
 # Health check task
 @celery_app.task(bind=True, name='nagatha.health_check')
 def health_check(self):
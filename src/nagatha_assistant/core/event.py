@@ -6,9 +6,9 @@ including event definitions, priorities, and standard event types.
 """
 
 import asyncio
+import time
 import uuid
 from datetime import datetime, timezone
-from dataclasses import dataclass, field
 from enum import Enum, IntEnum
 from typing import Any, Dict, Optional, Union, Callable, Awaitable
 
@@ -21,24 +21,105 @@ class EventPriority(IntEnum):
     LOW = 3
 
 
-@dataclass
 class Event:
-    """Base event class for all events in the system."""
-    
-    event_type: str
-    data: Dict[str, Any] = field(default_factory=dict)
-    priority: EventPriority = EventPriority.NORMAL
-    source: Optional[str] = None
-    correlation_id: Optional[str] = None
-    
-    # Auto-populated fields
-    event_id: str = field(default_factory=lambda: str(uuid.uuid4()))
-    timestamp: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
-    
-    def __post_init__(self):
-        """Ensure timestamp is timezone-aware."""
-        if self.timestamp.tzinfo is None:
-            self.timestamp = self.timestamp.replace(tzinfo=timezone.utc)
+    """
+    Base event class for all events in the system.
+    
+    Events are slotted to keep history and queues compact. The ``event_id``
+    is only generated when first read, and the timestamp is held as epoch
+    seconds until it is read as a datetime.
+    """
+    
+    __slots__ = ("event_type", "data", "priority", "source", "correlation_id",
+                 "_event_id", "_timestamp", "_queued_at")
+    
+    def __init__(self, event_type: str, data: Optional[Dict[str, Any]] = None,
+                 priority: EventPriority = EventPriority.NORMAL, source: Optional[str] = None,
+                 correlation_id: Optional[str] = None, event_id: Optional[str] = None,
+                 timestamp: Union[datetime, float, None] = None):
+        self.event_type = event_type
+        self.data = data if data is not None else {}
+        self.priority = priority
+        self.source = source
+        self.correlation_id = correlation_id
+        self._event_id = event_id
+        self._timestamp = time.time() if timestamp is None else timestamp
+        if isinstance(timestamp, datetime):
+            self.timestamp = timestamp
+    
+    @property
+    def event_id(self) -> str:
+        """Unique event ID, generated on first access."""
+        if self._event_id is None:
+            self._event_id = str(uuid.uuid4())
+        return self._event_id
+    
+    @event_id.setter
+    def event_id(self, value: str) -> None:
+        self._event_id = value
+    
+    @property
+    def timestamp(self) -> datetime:
+        """Timezone-aware creation time."""
+        if not isinstance(self._timestamp, datetime):
+            self._timestamp = datetime.fromtimestamp(self._timestamp, timezone.utc)
+        return self._timestamp
+    
+    @timestamp.setter
+    def timestamp(self, value: datetime) -> None:
+        # Ensure timestamp is timezone-aware
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        self._timestamp = value
+    
+    @property
+    def created(self) -> float:
+        """Creation time in epoch seconds."""
+        if isinstance(self._timestamp, datetime):
+            return self._timestamp.timestamp()
+        return self._timestamp
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the event to a JSON-serializable dict."""
+        return {
+            "event_type": self.event_type,
+            "data": self.data,
+            "priority": int(self.priority),
+            "source": self.source,
+            "correlation_id": self.correlation_id,
+            "event_id": self.event_id,
+            "timestamp": self.created
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Event":
+        """Create an event from :meth:`to_dict` output."""
+        return cls(
+            event_type=data["event_type"],
+            data=data.get("data"),
+            priority=EventPriority(data.get("priority", EventPriority.NORMAL)),
+            source=data.get("source"),
+            correlation_id=data.get("correlation_id"),
+            event_id=data.get("event_id"),
+            timestamp=data.get("timestamp")
+        )
+    
+    def _fields(self) -> tuple:
+        return (self.event_type, self.data, self.priority, self.source,
+                self.correlation_id, self.event_id, self.timestamp)
+    
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self is other or self._fields() == other._fields()
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return (f"Event(event_type={self.event_type!r}, data={self.data!r}, "
+                f"priority={self.priority!r}, source={self.source!r}, "
+                f"correlation_id={self.correlation_id!r}, event_id={self.event_id!r}, "
+                f"timestamp={self.timestamp!r})")
 
 
 # Type aliases for event handlers
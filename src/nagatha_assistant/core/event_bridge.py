@@ -0,0 +1,312 @@
+"""
+Redis Streams bridge between event buses in different processes.
+
+Celery workers run in their own processes, each with its own ``EventBus``,
+so events they publish (task progress, notifications) never reached the
+unified server. A ``RedisStreamBridge`` attached to a bus can:
+
+- forward: subscribe to selected event patterns on the local bus and append
+  matching events to a Redis stream. Events are buffered briefly and written
+  with one pipelined batch of ``XADD`` calls per flush.
+- consume: read the stream through a consumer group with a blocking
+  ``XREADGROUP`` and publish the events on the local bus. The group records
+  the last delivered entry ID, so a restarted consumer resumes where it
+  stopped, starting with entries it had read but not acknowledged.
+
+Each bridge remembers recently seen event IDs. An event delivered twice (a
+redelivered pending entry, say) is published once, and an event that arrived
+through the bridge is never forwarded back.
+"""
+
+import asyncio
+import json
+import os
+import socket
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError, ResponseError
+
+from .event import Event
+from .event_bus import EventBus
+from nagatha_assistant.utils.logger import get_logger
+
+logger = get_logger()
+
+DEFAULT_STREAM = "nagatha:events"
+DEFAULT_GROUP = "nagatha-server"
+
+# Events Celery workers forward to the server by default
+DEFAULT_FORWARD_PATTERNS = ("task.*", "ui.notification")
+
+
+class RedisStreamBridge:
+    """
+    Forwards events between a local event bus and a Redis stream.
+
+    Attributes:
+        stream: Redis stream key
+        forward_patterns: Local event patterns appended to the stream
+        consume: Whether stream entries are published on the local bus
+        group: Consumer group name (consumers of one group share the entries)
+        consumer: Consumer name within the group; keep it stable across
+            restarts so unacknowledged entries are picked up again
+        last_id: ID of the last stream entry delivered to the local bus
+    """
+
+    def __init__(self, event_bus: EventBus, redis_url: Optional[str] = None, *,
+                 stream: str = DEFAULT_STREAM, forward_patterns: Sequence[str] = (),
+                 consume: bool = False, group: str = DEFAULT_GROUP,
+                 consumer: Optional[str] = None, batch_size: int = 100,
+                 flush_interval: float = 0.05, block_ms: int = 5000, maxlen: int = 10000,
+                 dedupe_size: int = 10000, redis_client: Optional[Any] = None):
+        """
+        Initialize the bridge.
+
+        Args:
+            event_bus: Local event bus
+            redis_url: Redis URL (defaults to CELERY_BROKER_URL)
+            stream: Redis stream key
+            forward_patterns: Local event patterns to append to the stream
+            consume: Read the stream and publish its events locally
+            group: Consumer group name
+            consumer: Consumer name (defaults to the host name)
+            batch_size: Maximum events per XADD pipeline and per XREADGROUP
+            flush_interval: Seconds to buffer forwarded events before writing
+            block_ms: How long one XREADGROUP call waits for new entries
+            maxlen: Approximate maximum stream length
+            dedupe_size: Number of recent event IDs remembered
+            redis_client: Existing async Redis client to use instead of redis_url
+        """
+        self.event_bus = event_bus
+        self.redis_url = redis_url or os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+        self.stream = stream
+        self.forward_patterns = tuple(forward_patterns)
+        self.consume = consume
+        self.group = group
+        self.consumer = consumer or socket.gethostname()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_ms = block_ms
+        self.maxlen = maxlen
+        self.dedupe_size = dedupe_size
+        self.last_id: Optional[str] = None
+
+        self._client = redis_client
+        self._owns_client = redis_client is None
+        self._subscription_ids: List[int] = []
+        self._outbox: List[Event] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._consume_task: Optional[asyncio.Task] = None
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._running = False
+
+        self._stats = {"forwarded": 0, "forward_failed": 0, "received": 0, "duplicates": 0}
+
+    async def start(self) -> None:
+        """Connect, subscribe to the forwarded patterns and start consuming."""
+        if self._running:
+            return
+
+        if self._client is None:
+            self._client = redis.from_url(self.redis_url, decode_responses=True)
+        if self.consume:
+            await self._ensure_group()
+
+        self._running = True
+        for pattern in self.forward_patterns:
+            self._subscription_ids.append(
+                self.event_bus.subscribe(pattern, self._on_local_event, mode="inline")
+            )
+        if self.consume:
+            self._consume_task = asyncio.create_task(self._consume_loop())
+
+        logger.info(f"Event bridge started on stream {self.stream} "
+                    f"(forwarding {list(self.forward_patterns)}, consuming: {self.consume})")
+
+    async def stop(self) -> None:
+        """Stop consuming, write buffered events and disconnect."""
+        if not self._running:
+            return
+        self._running = False
+
+        for subscription_id in self._subscription_ids:
+            self.event_bus.unsubscribe(subscription_id)
+        self._subscription_ids.clear()
+
+        if self._consume_task:
+            self._consume_task.cancel()
+            await asyncio.gather(self._consume_task, return_exceptions=True)
+            self._consume_task = None
+
+        await self.flush()
+
+        if self._owns_client and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        logger.info("Event bridge stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get bridge counters.
+
+        Returns:
+            ``forwarded``, ``forward_failed``, ``received``, ``duplicates``,
+            ``buffered`` and ``last_id``
+        """
+        return {**self._stats, "buffered": len(self._outbox), "last_id": self.last_id}
+
+    def _remember(self, event_id: str) -> bool:
+        """Record an event ID; returns False if it was already seen."""
+        if event_id in self._seen:
+            return False
+        self._seen[event_id] = None
+        if len(self._seen) > self.dedupe_size:
+            self._seen.popitem(last=False)
+        return True
+
+    def _forget(self, event_ids: List[str]) -> None:
+        """Drop event IDs recorded for a delivery that did not happen."""
+        for event_id in event_ids:
+            self._seen.pop(event_id, None)
+
+    # Forwarding
+
+    def _on_local_event(self, event: Event) -> None:
+        """Buffer a local event for the stream (runs inline on the loop)."""
+        if not self._running or not self._remember(event.event_id):
+            return  # Arrived through the bridge, or already forwarded
+
+        self._outbox.append(event)
+        if len(self._outbox) >= self.batch_size:
+            asyncio.create_task(self.flush())
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_after(self.flush_interval))
+
+    async def _flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write buffered events to the stream in one pipeline."""
+        if not self._outbox or self._client is None:
+            return
+        events, self._outbox = self._outbox, []
+
+        pipeline = self._client.pipeline(transaction=False)
+        for event in events:
+            pipeline.xadd(
+                self.stream,
+                {"event": json.dumps(event.to_dict(), default=str)},
+                maxlen=self.maxlen,
+                approximate=True
+            )
+        try:
+            await pipeline.execute()
+            self._stats["forwarded"] += len(events)
+            logger.debug(f"Forwarded {len(events)} events to {self.stream}")
+        except RedisError as e:
+            self._stats["forward_failed"] += len(events)
+            logger.warning(f"Failed to forward {len(events)} events to {self.stream}: {e}")
+
+    # Consuming
+
+    async def _ensure_group(self) -> None:
+        """Create the consumer group (and stream) unless it exists."""
+        try:
+            await self._client.xgroup_create(self.stream, self.group, id="$", mkstream=True)
+            logger.info(f"Created consumer group {self.group} on {self.stream}")
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _consume_loop(self) -> None:
+        """Deliver stream entries to the local bus until stopped."""
+        # Entries read but not acknowledged before a restart come first
+        cursor = "0"
+        while self._running:
+            try:
+                response = await self._client.xreadgroup(
+                    self.group, self.consumer, {self.stream: cursor},
+                    count=self.batch_size, block=self.block_ms
+                )
+            except asyncio.CancelledError:
+                raise
+            except ResponseError as e:
+                if "NOGROUP" in str(e):
+                    await self._ensure_group()
+                    continue
+                logger.warning(f"Event bridge read failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            except RedisError as e:
+                logger.warning(f"Event bridge read failed: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            entries = response[0][1] if response else []
+            if not entries:
+                cursor = ">"  # Pending entries done, wait for new ones
+                continue
+
+            try:
+                await self._deliver(entries)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Event bridge delivery failed: {e}")
+                cursor = "0"  # Retry the unacknowledged entries
+                await asyncio.sleep(1)
+
+    async def _deliver(self, entries: List[tuple]) -> None:
+        """Publish a batch of stream entries locally, then acknowledge them."""
+        events = []
+        for entry_id, fields in entries:
+            try:
+                event = Event.from_dict(json.loads(fields["event"]))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping malformed stream entry {entry_id}: {e}")
+                continue
+            if self._remember(event.event_id):
+                events.append(event)
+            else:
+                self._stats["duplicates"] += 1
+
+        if events:
+            # IDs are recorded before publishing so the bridge's own subscriber
+            # does not forward the events back; a failed publish forgets them
+            # so the redelivered entries are not taken for duplicates
+            try:
+                await self.event_bus.publish_many(events)
+            except BaseException:
+                self._forget([event.event_id for event in events])
+                raise
+            self._stats["received"] += len(events)
+
+        entry_ids = [entry_id for entry_id, _ in entries]
+        await self._client.xack(self.stream, self.group, *entry_ids)
+        self.last_id = entry_ids[-1]
+
+
+def bridge_from_env(event_bus: EventBus, role: str) -> Optional[RedisStreamBridge]:
+    """
+    Create a bridge if NAGATHA_EVENT_BRIDGE_URL is set.
+
+    Args:
+        event_bus: Local event bus
+        role: "server" consumes the stream; "worker" forwards the patterns in
+            NAGATHA_EVENT_BRIDGE_PATTERNS (comma-separated, task and
+            notification events by default)
+    """
+    url = os.getenv("NAGATHA_EVENT_BRIDGE_URL")
+    if not url:
+        return None
+
+    stream = os.getenv("NAGATHA_EVENT_BRIDGE_STREAM", DEFAULT_STREAM)
+    if role == "server":
+        return RedisStreamBridge(event_bus, url, stream=stream, consume=True)
+
+    patterns = os.getenv("NAGATHA_EVENT_BRIDGE_PATTERNS")
+    forward = [p.strip() for p in patterns.split(",") if p.strip()] if patterns else DEFAULT_FORWARD_PATTERNS
+    return RedisStreamBridge(event_bus, url, stream=stream, forward_patterns=forward)
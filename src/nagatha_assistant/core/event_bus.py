@@ -8,17 +8,62 @@ This module provides a thread-safe, asynchronous event bus with support for:
 - Synchronous and asynchronous handlers
 - Wildcard subscriptions
 - Thread safety
+
+Subscriptions are kept in a ``SubscriptionIndex`` so dispatch cost depends on
+the number of matching handlers rather than the total number of
+subscriptions: exact event types are a dict lookup, ``prefix*`` patterns are
+found by walking a character trie along the event type, and the remaining
+glob patterns are screened with one combined regex before being tested
+individually. Match results are cached per event type until the
+subscriptions change.
+
+Published events go through a bounded queue to a router task, which hands
+each (subscription, event) delivery to one of N worker tasks, each with its
+own bounded queue. A subscription always maps to the same worker (or, with a
+``partition_key``, every delivery for the same key does), so handlers see
+events in publish order while a slow handler only delays its own shard. When
+the queue is full, the overflow policy decides whether publishers wait or
+events are dropped.
+
+High-rate event types can be coalesced: events of such a type published
+within a short window reach subscribers as one batch event whose data holds
+every item. Subscribers that only need to know that something changed can
+subscribe with a debounce, receiving just the latest event once the burst has
+gone quiet.
+
+Synchronous handlers run on a thread pool owned by the bus, so they never
+compete with other users of the loop's default executor, or inline on the
+event loop when they are cheap enough not to need a thread. Every handler's
+call count and run time are recorded.
+
+The bus counts published events per type, handler calls, errors and latency
+(in fixed-bucket histograms) and the lag between publishing and routing,
+with plain counter updates only, so :meth:`EventBus.get_metrics` can stay
+enabled in production.
+
+Recent events are kept in a ring buffer indexed by type. An optional
+:class:`~nagatha_assistant.core.event_log.EventLog` also persists every
+published event so older ones can be replayed by time range or type.
 """
 
 import asyncio
+import bisect
 import fnmatch
+import heapq
+import itertools
+import os
+import re
 import threading
+import time
 import weakref
 from collections import defaultdict, deque
-from typing import Any, Dict, List, Optional, Set, Callable, Awaitable, Union
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Dict, Hashable, List, Optional, Set, Callable, Awaitable, Union
 from datetime import datetime, timezone
 
-from .event import Event, EventHandler, EventPriority, SyncEventHandler, AsyncEventHandler
+from .event_log import EventLog, Timestamp
+from .event import Event, EventHandler, EventPriority, StandardEventTypes, SyncEventHandler, AsyncEventHandler
 from nagatha_assistant.utils.logger import get_logger
 
 logger = get_logger()
@@ -29,24 +74,80 @@ class EventBusError(Exception):
     pass
 
 
+class OverflowPolicy(str, Enum):
+    """What publishing does when the event queue is full."""
+    BLOCK = "block"  # wait for space, slowing publishers down
+    DROP_OLDEST = "drop_oldest"  # discard the oldest queued event
+    DROP_LOW_PRIORITY = "drop_low_priority"  # discard the lowest-priority event, queued or new
+
+
+class HandlerMode(str, Enum):
+    """Where a synchronous handler runs (coroutine handlers are always awaited)."""
+    INLINE = "inline"  # directly on the event loop, for cheap handlers
+    THREADED = "threaded"  # on the event bus thread pool
+
+
+# Upper bounds of the handler latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _bucket_label(bound: Optional[float]) -> str:
+    """Histogram bucket name: the upper bound in milliseconds."""
+    return "+Inf" if bound is None else f"{bound * 1000:g}"
+
+
+_BUCKET_LABELS = tuple(_bucket_label(bound) for bound in LATENCY_BUCKETS + (None,))
+
+
+# Numbers subscriptions in creation order so they spread evenly over workers
+_subscription_sequence = itertools.count()
+
+
 class EventSubscription:
     """Represents a subscription to events."""
     
     def __init__(self, pattern: str, handler: EventHandler, 
                  priority_filter: Optional[EventPriority] = None,
-                 source_filter: Optional[str] = None):
+                 source_filter: Optional[str] = None,
+                 debounce: Optional[float] = None,
+                 mode: Union[HandlerMode, str, None] = None):
         self.pattern = pattern
         self.handler = handler
         self.priority_filter = priority_filter
         self.source_filter = source_filter
+        self.debounce = debounce
+        self.mode = HandlerMode(mode) if mode else HandlerMode.THREADED
+        self.is_async = asyncio.iscoroutinefunction(handler)
         self.subscription_id = id(self)
+        self.sequence = next(_subscription_sequence)
+        
+        # Handler timing
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+    
+    def record_call(self, elapsed: float, failed: bool = False) -> None:
+        """Record one handler call that took ``elapsed`` seconds."""
+        self.calls += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        if failed:
+            self.errors += 1
         
     def matches(self, event: Event) -> bool:
         """Check if this subscription matches the given event."""
         # Check event type pattern
         if not fnmatch.fnmatch(event.event_type, self.pattern):
             return False
-            
+        
+        return self.accepts(event)
+    
+    def accepts(self, event: Event) -> bool:
+        """Check the priority and source filters (the event type already matched)."""
         # Check priority filter
         if self.priority_filter is not None and event.priority > self.priority_filter:
             return False
@@ -58,6 +159,296 @@ class EventSubscription:
         return True
 
 
+_GLOB_CHARS = re.compile(r"[*?\[]")
+
+
+def _dispatch_order(subscription: EventSubscription):
+    """Sort key for handler invocation order."""
+    priority = subscription.priority_filter
+    return (EventPriority.NORMAL if priority is None else priority, subscription.sequence)
+
+
+class SubscriptionIndex:
+    """
+    Finds the subscriptions whose pattern matches an event type.
+    
+    Patterns are classified when added:
+    
+    - no glob characters: exact match, stored in a dict
+    - a literal prefix followed by a single trailing ``*`` (``agent.*``,
+      ``*``): stored on the prefix's node in a character trie
+    - anything else: matched with ``fnmatch`` semantics via compiled regexes,
+      screened first by one alternation of all of them
+    
+    Results are cached per event type and the cache is cleared whenever a
+    subscription is added or removed. The index is not thread-safe on its
+    own; ``EventBus`` guards it with its lock.
+    """
+    
+    _TERMINAL = ""  # trie key holding the subscriptions of a prefix
+    
+    def __init__(self, max_cached_types: int = 4096):
+        self._exact: Dict[str, List[EventSubscription]] = defaultdict(list)
+        self._trie: Dict[str, Any] = {}
+        self._globs: Dict[str, List[EventSubscription]] = defaultdict(list)
+        self._glob_regexes: Dict[str, "re.Pattern[str]"] = {}
+        self._any_glob: Optional["re.Pattern[str]"] = None
+        self._cache: Dict[str, List[EventSubscription]] = {}
+        self._max_cached_types = max_cached_types
+    
+    @staticmethod
+    def _prefix_of(pattern: str) -> Optional[str]:
+        """Return the literal prefix of a ``prefix*`` pattern, else None."""
+        if pattern.endswith("*") and not _GLOB_CHARS.search(pattern[:-1]):
+            return pattern[:-1]
+        return None
+    
+    def add(self, subscription: EventSubscription) -> None:
+        """Index a subscription."""
+        pattern = subscription.pattern
+        prefix = self._prefix_of(pattern)
+        if not _GLOB_CHARS.search(pattern):
+            self._exact[pattern].append(subscription)
+        elif prefix is not None:
+            node = self._trie
+            for char in prefix:
+                node = node.setdefault(char, {})
+            node.setdefault(self._TERMINAL, []).append(subscription)
+        else:
+            self._globs[pattern].append(subscription)
+            if pattern not in self._glob_regexes:
+                self._glob_regexes[pattern] = re.compile(fnmatch.translate(pattern))
+                self._compile_globs()
+        self._cache.clear()
+    
+    def remove(self, subscription: EventSubscription) -> None:
+        """Remove a subscription from the index."""
+        pattern = subscription.pattern
+        prefix = self._prefix_of(pattern)
+        if not _GLOB_CHARS.search(pattern):
+            self._discard(self._exact, pattern, subscription)
+        elif prefix is not None:
+            self._remove_prefix(self._trie, prefix, subscription)
+        else:
+            self._discard(self._globs, pattern, subscription)
+            if pattern not in self._globs:
+                del self._glob_regexes[pattern]
+                self._compile_globs()
+        self._cache.clear()
+    
+    @staticmethod
+    def _discard(table: Dict[str, List[EventSubscription]], key: str,
+                 subscription: EventSubscription) -> None:
+        """Remove one subscription from a list-valued table, dropping empty keys."""
+        subscriptions = table.get(key)
+        if subscriptions and subscription in subscriptions:
+            subscriptions.remove(subscription)
+            if not subscriptions:
+                del table[key]
+    
+    def _remove_prefix(self, node: Dict[str, Any], prefix: str,
+                       subscription: EventSubscription) -> None:
+        """Remove a subscription from the trie and prune empty branches."""
+        if not prefix:
+            self._discard(node, self._TERMINAL, subscription)
+            return
+        child = node.get(prefix[0])
+        if child is None:
+            return
+        self._remove_prefix(child, prefix[1:], subscription)
+        if not child:
+            del node[prefix[0]]
+    
+    def _compile_globs(self) -> None:
+        """Rebuild the combined screening regex for the generic glob patterns."""
+        if self._glob_regexes:
+            self._any_glob = re.compile(
+                "|".join(f"(?:{regex.pattern})" for regex in self._glob_regexes.values())
+            )
+        else:
+            self._any_glob = None
+    
+    def match(self, event_type: str) -> List[EventSubscription]:
+        """
+        Get the subscriptions whose pattern matches an event type.
+        
+        Returns:
+            Subscriptions in dispatch order; the list is shared with the
+            cache and must not be modified
+        """
+        cached = self._cache.get(event_type)
+        if cached is not None:
+            return cached
+        
+        matched = list(self._exact.get(event_type, ()))
+        
+        node = self._trie
+        matched.extend(node.get(self._TERMINAL, ()))
+        for char in event_type:
+            node = node.get(char)
+            if node is None:
+                break
+            matched.extend(node.get(self._TERMINAL, ()))
+        
+        if self._any_glob is not None and self._any_glob.match(event_type):
+            for pattern, regex in self._glob_regexes.items():
+                if regex.match(event_type):
+                    matched.extend(self._globs[pattern])
+        
+        matched.sort(key=_dispatch_order)
+        if len(self._cache) >= self._max_cached_types:
+            self._cache.clear()
+        self._cache[event_type] = matched
+        return matched
+    
+    def clear(self) -> None:
+        """Remove every subscription."""
+        self._exact.clear()
+        self._trie.clear()
+        self._globs.clear()
+        self._glob_regexes.clear()
+        self._any_glob = None
+        self._cache.clear()
+
+
+class EventHistory:
+    """
+    Fixed-size ring buffer of recent events with a per-type index.
+    
+    Events are numbered in publish order; each slot of the ring holds the
+    event with that number modulo the capacity. Every event type keeps the
+    numbers of its events still in the ring, so filtering by type reads
+    only that type's events instead of copying and scanning the whole
+    history. The caller provides locking.
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._ring: List[Optional[Event]] = [None] * self.capacity
+        self._next = 0  # number of the next event
+        self._by_type: Dict[str, deque] = {}
+    
+    def __len__(self) -> int:
+        return min(self._next, self.capacity)
+    
+    def append(self, event: Event) -> None:
+        """Add an event, evicting the oldest once the ring is full."""
+        slot = self._next % self.capacity
+        evicted = self._ring[slot]
+        if evicted is not None:
+            numbers = self._by_type[evicted.event_type]
+            numbers.popleft()
+            if not numbers:
+                del self._by_type[evicted.event_type]
+        
+        self._ring[slot] = event
+        self._by_type.setdefault(event.event_type, deque()).append(self._next)
+        self._next += 1
+    
+    def extend(self, events: List[Event]) -> None:
+        """Add events in order."""
+        for event in events:
+            self.append(event)
+    
+    def recent(self, limit: Optional[int] = None,
+               event_type_pattern: Optional[str] = None) -> List[Event]:
+        """
+        Get events newest first.
+        
+        Args:
+            limit: Maximum number of events to return
+            event_type_pattern: Exact type or glob pattern to filter by
+        """
+        if event_type_pattern is None:
+            numbers = range(self._next - 1, self._next - 1 - len(self), -1)
+        elif not _GLOB_CHARS.search(event_type_pattern):
+            numbers = reversed(self._by_type.get(event_type_pattern, ()))
+        else:
+            matching = [numbers for event_type, numbers in self._by_type.items()
+                        if fnmatch.fnmatch(event_type, event_type_pattern)]
+            if len(matching) == 1:
+                numbers = reversed(matching[0])
+            else:
+                numbers = heapq.merge(*(reversed(n) for n in matching), reverse=True)
+        
+        return [self._ring[number % self.capacity]
+                for number in itertools.islice(numbers, limit or None)]
+    
+    def clear(self) -> None:
+        """Remove every event."""
+        self._ring = [None] * self.capacity
+        self._next = 0
+        self._by_type.clear()
+
+
+def batch_event(events: List[Event]) -> Event:
+    """
+    Combine events of one type into a single batch event.
+    
+    The batch has the type of its items, the highest priority among them and
+    the source and correlation ID of the first. Its data is
+    ``{"batch": True, "count": N, "items": [...]}`` with each item's data in
+    publish order.
+    """
+    first = events[0]
+    return Event(
+        event_type=first.event_type,
+        data={"batch": True, "count": len(events), "items": [event.data for event in events]},
+        priority=min(event.priority for event in events),
+        source=first.source,
+        correlation_id=first.correlation_id
+    )
+
+
+class DispatchQueue(asyncio.Queue):
+    """
+    Bounded FIFO of events that applies an overflow policy when full.
+    
+    Attributes:
+        policy: Overflow policy used by :meth:`offer`
+        dropped: Number of events discarded by the policy
+        high_water: Largest depth reached
+    """
+    
+    def __init__(self, maxsize: int, policy: Union[OverflowPolicy, str] = OverflowPolicy.BLOCK):
+        super().__init__(maxsize)
+        self.policy = OverflowPolicy(policy)
+        self.dropped = 0
+        self.high_water = 0
+    
+    async def offer(self, event: Event) -> bool:
+        """
+        Enqueue an event, applying the overflow policy if the queue is full.
+        
+        Returns:
+            False if the event itself was dropped
+        """
+        event._queued_at = time.monotonic()
+        if self.full() and self.policy is not OverflowPolicy.BLOCK:
+            if self.policy is OverflowPolicy.DROP_OLDEST:
+                self._discard(0)
+            else:
+                # Oldest queued event of the lowest priority (highest value)
+                victim = max(
+                    range(len(self._queue)),
+                    key=lambda i: (getattr(self._queue[i], "priority", -1), -i)
+                )
+                if getattr(self._queue[victim], "priority", -1) < event.priority:
+                    self.dropped += 1
+                    return False
+                self._discard(victim)
+        
+        await self.put(event)
+        self.high_water = max(self.high_water, self.qsize())
+        return True
+    
+    def _discard(self, position: int) -> None:
+        """Remove a queued event without processing it."""
+        del self._queue[position]
+        self.task_done()
+        self.dropped += 1
+
+
 class EventBus:
     """
     Central event bus for asynchronous publish/subscribe communication.
@@ -71,20 +462,66 @@ class EventBus:
     - Filtering by priority and source
     """
     
-    def __init__(self, max_history: int = 1000):
+    def __init__(self, max_history: int = 1000, num_workers: int = 4, queue_size: int = 10000,
+                 overflow_policy: Union[OverflowPolicy, str] = OverflowPolicy.BLOCK,
+                 partition_key: Optional[Callable[[Event], Optional[Hashable]]] = None,
+                 coalesce: Optional[Dict[str, float]] = None, handler_threads: int = 4,
+                 event_log: Optional[EventLog] = None):
         """
         Initialize the event bus.
         
         Args:
             max_history: Maximum number of events to keep in history
+            num_workers: Number of handler worker tasks
+            queue_size: Capacity of the publish queue and of each worker queue
+            overflow_policy: What publish() does when the publish queue is full
+            partition_key: Optional function mapping an event to a key; all
+                deliveries with the same key go to one worker, so handlers
+                see them in order. Events with no key (None), or every event
+                when unset, are partitioned by subscription instead.
+            coalesce: Coalescing windows in seconds by event type, see
+                :meth:`set_coalescing`
+            handler_threads: Size of the thread pool for threaded sync handlers
+            event_log: Optional persistent log every published event is appended to
         """
         self._subscriptions: List[EventSubscription] = []
-        self._event_history: deque = deque(maxlen=max_history)
+        self._index = SubscriptionIndex()
+        self._event_history = EventHistory(max_history)
+        self._event_log = event_log
         self._lock = threading.RLock()
         self._running = False
-        self._event_queue: Optional[asyncio.Queue] = None
+        self._event_queue: Optional[DispatchQueue] = None
         self._processor_task: Optional[asyncio.Task] = None
         
+        self._num_workers = max(1, num_workers)
+        self._queue_size = queue_size
+        self._overflow_policy = OverflowPolicy(overflow_policy)
+        self._partition_key = partition_key
+        self._worker_queues: List[asyncio.Queue] = []
+        self._worker_tasks: List[asyncio.Task] = []
+        self._handler_threads = max(1, handler_threads)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        
+        # Coalescing: event type -> (window, max batch), pending events and flush timers
+        self._coalesce: Dict[str, tuple] = {}
+        self._coalesce_buffers: Dict[str, List[Event]] = {}
+        self._coalesce_tasks: Dict[str, asyncio.Task] = {}
+        for event_type, window in (coalesce or {}).items():
+            self.set_coalescing(event_type, window)
+        
+        # Debounced deliveries: subscription ID -> (timer, subscription, latest event)
+        self._debounced: Dict[int, tuple] = {}
+        # Events from publish_sync waiting for the next flush task
+        self._sync_pending: List[Event] = []
+        
+        # Metrics
+        self._published_counts: Dict[str, int] = {}
+        self._routed = 0
+        self._deliveries = 0
+        self._router_errors = 0
+        self._total_lag = 0.0
+        self._max_lag = 0.0
+        
         # Weak references to cleanup handlers when objects are garbage collected
         self._weak_refs: Set[weakref.ref] = set()
         
@@ -95,9 +532,14 @@ class EventBus:
                 return
                 
             self._running = True
-            self._event_queue = asyncio.Queue()
+            self._executor = ThreadPoolExecutor(max_workers=self._handler_threads,
+                                                thread_name_prefix="nagatha-event")
+            self._event_queue = DispatchQueue(self._queue_size, self._overflow_policy)
+            self._worker_queues = [asyncio.Queue(self._queue_size) for _ in range(self._num_workers)]
+            self._worker_tasks = [asyncio.create_task(self._run_worker(queue))
+                                  for queue in self._worker_queues]
             self._processor_task = asyncio.create_task(self._process_events())
-            logger.info("Event bus started")
+            logger.info(f"Event bus started with {self._num_workers} workers")
     
     async def stop(self) -> None:
         """Stop the event bus processing."""
@@ -107,26 +549,48 @@ class EventBus:
                 
             self._running = False
             
-            if self._event_queue:
-                await self._event_queue.put(None)  # Signal to stop processing
-                
-            if self._processor_task:
-                try:
-                    await asyncio.wait_for(self._processor_task, timeout=5.0)
-                except asyncio.TimeoutError:
-                    self._processor_task.cancel()
-                    try:
-                        await self._processor_task
-                    except asyncio.CancelledError:
-                        pass
+            # Let pending batches, the router and then the workers drain what is queued
+            for event_type in list(self._coalesce_buffers):
+                await self._flush_coalesced(event_type)
+            await self._stop_tasks([self._processor_task] if self._processor_task else [],
+                                   [self._event_queue] if self._event_queue else [])
+            for subscription_id in list(self._debounced):
+                self._fire_debounced(subscription_id)
+            await self._stop_tasks(self._worker_tasks, self._worker_queues)
+            self._executor.shutdown(wait=False)
                         
+            self._executor = None
+            if self._event_log is not None:
+                self._event_log.close()
             self._event_queue = None
             self._processor_task = None
+            self._worker_queues = []
+            self._worker_tasks = []
             logger.info("Event bus stopped")
     
+    @staticmethod
+    async def _stop_tasks(tasks: List[asyncio.Task], queues: List[asyncio.Queue],
+                          timeout: float = 5.0) -> None:
+        """Signal tasks to stop through their queues, cancelling any that do not finish."""
+        for queue in queues:
+            try:
+                queue.put_nowait(None)  # Signal to stop processing
+            except asyncio.QueueFull:
+                pass
+        
+        if not tasks:
+            return
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    
     def subscribe(self, pattern: str, handler: EventHandler, 
                   priority_filter: Optional[EventPriority] = None,
-                  source_filter: Optional[str] = None) -> int:
+                  source_filter: Optional[str] = None,
+                  debounce: Optional[float] = None,
+                  mode: Union[HandlerMode, str, None] = None) -> int:
         """
         Subscribe to events matching the given pattern.
         
@@ -135,13 +599,20 @@ class EventBus:
             handler: Function to handle matching events
             priority_filter: Only receive events with this priority or higher
             source_filter: Only receive events from this source
+            debounce: If set, call the handler only once no matching event has
+                arrived for this many seconds, with the latest event
+            mode: For a sync handler, "inline" to call it on the event loop
+                (only for cheap, non-blocking handlers) or "threaded" (the
+                default) to run it on the bus thread pool
             
         Returns:
             Subscription ID for later unsubscription
         """
         with self._lock:
-            subscription = EventSubscription(pattern, handler, priority_filter, source_filter)
+            subscription = EventSubscription(pattern, handler, priority_filter, source_filter,
+                                             debounce, mode)
             self._subscriptions.append(subscription)
+            self._index.add(subscription)
             
             # Create weak reference for cleanup
             if hasattr(handler, '__self__'):
@@ -165,6 +636,8 @@ class EventBus:
             for i, subscription in enumerate(self._subscriptions):
                 if subscription.subscription_id == subscription_id:
                     del self._subscriptions[i]
+                    self._index.remove(subscription)
+                    self._cancel_debounced(subscription_id)
                     logger.debug(f"Unsubscribed subscription ID {subscription_id}")
                     return True
             return False
@@ -180,11 +653,12 @@ class EventBus:
             Number of subscriptions removed
         """
         with self._lock:
-            removed_count = 0
-            self._subscriptions = [
-                sub for sub in self._subscriptions
-                if sub.handler != handler or (removed_count := removed_count + 1, False)[1]
-            ]
+            removed = [sub for sub in self._subscriptions if sub.handler == handler]
+            removed_count = len(removed)
+            for subscription in removed:
+                self._subscriptions.remove(subscription)
+                self._index.remove(subscription)
+                self._cancel_debounced(subscription.subscription_id)
             if removed_count > 0:
                 logger.debug(f"Unsubscribed {removed_count} subscriptions for handler")
             return removed_count
@@ -196,20 +670,46 @@ class EventBus:
         Args:
             event: The event to publish
         """
+        await self.publish_many([event])
+    
+    async def publish_many(self, events: List[Event]) -> None:
+        """
+        Publish several events, taking the history lock once.
+        
+        Args:
+            events: Events to publish, in order
+        """
         if not self._running or not self._event_queue:
             raise EventBusError("Event bus is not running")
-            
+        
         # Add to history immediately
         with self._lock:
-            self._event_history.append(event)
+            self._event_history.extend(events)
+            counts = self._published_counts
+            for event in events:
+                counts[event.event_type] = counts.get(event.event_type, 0) + 1
+        # Outside the lock; the log's writer thread does the disk I/O
+        if self._event_log is not None:
+            try:
+                self._event_log.append(events)
+            except OSError as e:
+                logger.warning(f"Failed to write event log: {e}")
         
         # Queue for processing
-        await self._event_queue.put(event)
-        logger.debug(f"Published event: {event.event_type} (ID: {event.event_id})")
+        for event in events:
+            if event.event_type in self._coalesce:
+                await self._add_coalesced(event)
+            elif await self._event_queue.offer(event):
+                logger.debug("Published event: %s", event.event_type)
+            else:
+                logger.debug("Event queue full, dropped event: %s", event.event_type)
     
     def publish_sync(self, event: Event) -> None:
         """
-        Synchronously publish an event (creates task for async processing).
+        Synchronously publish an event (queued for async processing).
+        
+        Events published before the event loop gets to run are handed to
+        :meth:`publish_many` together by a single task.
         
         Args:
             event: The event to publish
@@ -220,9 +720,75 @@ class EventBus:
             
         try:
             loop = asyncio.get_event_loop()
-            loop.create_task(self.publish(event))
         except RuntimeError:
             logger.warning(f"No event loop available, discarding event: {event.event_type}")
+            return
+        
+        self._sync_pending.append(event)
+        if len(self._sync_pending) == 1:
+            loop.create_task(self._flush_sync())
+    
+    async def _flush_sync(self) -> None:
+        """Publish the events queued by publish_sync."""
+        events, self._sync_pending = self._sync_pending, []
+        try:
+            await self.publish_many(events)
+        except EventBusError:
+            logger.warning(f"Event bus stopped, discarding {len(events)} events")
+    
+    def set_coalescing(self, event_type: str, window: Optional[float], max_batch: int = 500) -> None:
+        """
+        Coalesce bursts of an event type into batch events.
+        
+        The first event of the type starts a window; it and every event of the
+        type published before the window closes are delivered as one event
+        built by :func:`batch_event`. A window holding a single event delivers
+        it unchanged.
+        
+        Args:
+            event_type: Exact event type to coalesce
+            window: Window length in seconds, or None (or 0) to stop coalescing
+            max_batch: Deliver the batch early once it holds this many events
+        """
+        if window:
+            self._coalesce[event_type] = (window, max_batch)
+        else:
+            self._coalesce.pop(event_type, None)
+    
+    async def _add_coalesced(self, event: Event) -> None:
+        """Add an event to its type's open batch."""
+        window, max_batch = self._coalesce[event.event_type]
+        buffer = self._coalesce_buffers.setdefault(event.event_type, [])
+        buffer.append(event)
+        
+        if len(buffer) >= max_batch:
+            await self._flush_coalesced(event.event_type)
+        elif len(buffer) == 1:
+            self._coalesce_tasks[event.event_type] = asyncio.create_task(
+                self._flush_coalesced_after(event.event_type, window)
+            )
+    
+    async def _flush_coalesced_after(self, event_type: str, window: float) -> None:
+        """Close a coalescing window once it expires."""
+        await asyncio.sleep(window)
+        self._coalesce_tasks.pop(event_type, None)
+        await self._flush_coalesced(event_type)
+    
+    async def _flush_coalesced(self, event_type: str) -> None:
+        """Queue the open batch of an event type."""
+        task = self._coalesce_tasks.pop(event_type, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        
+        events = self._coalesce_buffers.pop(event_type, None)
+        if not events or not self._event_queue:
+            return
+        
+        event = events[0] if len(events) == 1 else batch_event(events)
+        if await self._event_queue.offer(event):
+            logger.debug("Published %d coalesced events: %s", len(events), event_type)
+        else:
+            logger.debug("Event queue full, dropped %d coalesced events: %s", len(events), event_type)
     
     def get_subscriptions(self) -> List[Dict[str, Any]]:
         """Get information about current subscriptions."""
@@ -233,11 +799,94 @@ class EventBus:
                     "pattern": sub.pattern,
                     "priority_filter": sub.priority_filter,
                     "source_filter": sub.source_filter,
+                    "debounce": sub.debounce,
+                    "mode": sub.mode.value,
                     "handler": str(sub.handler)
                 }
                 for sub in self._subscriptions
             ]
     
+    def get_handler_stats(self) -> List[Dict[str, Any]]:
+        """
+        Get the timing of every subscribed handler, slowest total first.
+        
+        Returns:
+            Dicts with ``id``, ``pattern``, ``handler``, ``mode``, ``calls``,
+            ``errors``, ``total_ms``, ``mean_ms``, ``max_ms`` and ``histogram``
+            (calls per latency bucket, keyed by the bucket's upper bound in ms)
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        
+        stats = [
+            {
+                "id": sub.subscription_id,
+                "pattern": sub.pattern,
+                "handler": getattr(sub.handler, "__qualname__", str(sub.handler)),
+                "mode": "async" if sub.is_async else sub.mode.value,
+                "calls": sub.calls,
+                "errors": sub.errors,
+                "total_ms": sub.total_time * 1000,
+                "mean_ms": sub.total_time * 1000 / sub.calls if sub.calls else 0.0,
+                "max_ms": sub.max_time * 1000,
+                "histogram": dict(zip(_BUCKET_LABELS, sub.histogram))
+            }
+            for sub in subscriptions
+        ]
+        stats.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return stats
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get event bus metrics.
+        
+        Returns:
+            Dict with ``published`` (count per event type), ``published_total``,
+            ``routed`` (events taken off the queue), ``deliveries`` (handler
+            calls queued), ``handler_errors``, ``router_errors``, ``lag``
+            (mean and max ms between queueing and routing), ``queue`` (see
+            :meth:`get_queue_stats`) and ``handlers`` (see :meth:`get_handler_stats`)
+        """
+        with self._lock:
+            published = dict(self._published_counts)
+        handlers = self.get_handler_stats()
+        
+        return {
+            "running": self._running,
+            "published": published,
+            "published_total": sum(published.values()),
+            "routed": self._routed,
+            "deliveries": self._deliveries,
+            "handler_errors": sum(handler["errors"] for handler in handlers),
+            "router_errors": self._router_errors,
+            "lag": {
+                "mean_ms": self._total_lag * 1000 / self._routed if self._routed else 0.0,
+                "max_ms": self._max_lag * 1000
+            },
+            "queue": self.get_queue_stats(),
+            "handlers": handlers
+        }
+    
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """
+        Get the dispatch queue depth gauge.
+        
+        Returns:
+            ``depth`` (events waiting to be routed), ``worker_depths`` (deliveries
+            waiting per worker), ``capacity``, ``high_water``, ``dropped``,
+            ``overflow_policy`` and ``workers``
+        """
+        queue = self._event_queue
+        return {
+            "depth": queue.qsize() if queue else 0,
+            "worker_depths": [worker_queue.qsize() for worker_queue in self._worker_queues],
+            "capacity": self._queue_size,
+            "high_water": queue.high_water if queue else 0,
+            "dropped": queue.dropped if queue else 0,
+            "overflow_policy": self._overflow_policy.value,
+            "workers": self._num_workers
+        }
+    
     def get_event_history(self, limit: Optional[int] = None, 
                          event_type_pattern: Optional[str] = None) -> List[Event]:
         """
@@ -251,18 +900,39 @@ class EventBus:
             List of events in reverse chronological order
         """
         with self._lock:
-            events = list(self._event_history)
-            
-            if event_type_pattern:
-                events = [e for e in events if fnmatch.fnmatch(e.event_type, event_type_pattern)]
-            
-            # Return most recent first
-            events.reverse()
+            return self._event_history.recent(limit, event_type_pattern)
+    
+    def replay_events(self, since: Timestamp = None, until: Timestamp = None,
+                      event_type_pattern: Optional[str] = None,
+                      limit: Optional[int] = None) -> List[Event]:
+        """
+        Get past events in publish order, from the persistent log if there is one.
+        
+        Without an event log only the in-memory history is searched. Reading
+        the log does not take the bus lock, so it can run in a thread.
+        
+        Args:
+            since: Only events created at or after this time (datetime or epoch seconds)
+            until: Only events created before this time
+            event_type_pattern: Exact type or glob pattern to filter by
+            limit: Maximum number of events to return (oldest first)
             
-            if limit:
-                events = events[:limit]
-                
-            return events
+        Returns:
+            List of events in chronological order
+        """
+        if self._event_log is not None:
+            events = self._event_log.replay(since, until, event_type_pattern)
+            return list(itertools.islice(events, limit or None))
+        
+        since = since.timestamp() if isinstance(since, datetime) else since
+        until = until.timestamp() if isinstance(until, datetime) else until
+        with self._lock:
+            events = self._event_history.recent(event_type_pattern=event_type_pattern)
+        events.reverse()
+        events = [event for event in events
+                  if (since is None or event.created >= since)
+                  and (until is None or event.created < until)]
+        return events[:limit] if limit else events
     
     def clear_history(self) -> None:
         """Clear the event history."""
@@ -271,65 +941,111 @@ class EventBus:
             logger.debug("Event history cleared")
     
     async def _process_events(self) -> None:
-        """Process events from the queue."""
+        """Route events from the publish queue to the workers."""
         logger.debug("Event processor started")
         
-        while self._running:
+        while True:
             try:
                 # Wait for event (or stop signal)
                 event = await self._event_queue.get()
                 if event is None:  # Stop signal
                     break
+                
+                lag = time.monotonic() - event._queued_at
+                self._routed += 1
+                self._total_lag += lag
+                if lag > self._max_lag:
+                    self._max_lag = lag
                     
                 await self._dispatch_event(event)
                 
             except Exception as e:
+                self._router_errors += 1
                 logger.exception(f"Error processing event: {e}")
         
         logger.debug("Event processor stopped")
     
     async def _dispatch_event(self, event: Event) -> None:
-        """Dispatch an event to all matching subscribers."""
-        # Get matching subscriptions (thread-safe copy)
+        """Hand an event to the worker of each matching subscriber."""
+        # Get matching subscriptions, already in processing order
         with self._lock:
-            matching_subs = [sub for sub in self._subscriptions if sub.matches(event)]
+            candidates = self._index.match(event.event_type)
+        matching_subs = [sub for sub in candidates if sub.accepts(event)]
         
         if not matching_subs:
-            logger.debug(f"No subscribers for event: {event.event_type}")
+            logger.debug("No subscribers for event: %s", event.event_type)
             return
         
-        # Sort by priority for processing order
-        matching_subs.sort(key=lambda sub: (
-            sub.priority_filter or EventPriority.NORMAL,
-            sub.subscription_id
-        ))
-        
-        # Process handlers
-        tasks = []
+        key = self._partition_key(event) if self._partition_key else None
         for subscription in matching_subs:
-            try:
-                handler = subscription.handler
-                
-                if asyncio.iscoroutinefunction(handler):
-                    # Async handler
-                    task = asyncio.create_task(handler(event))
-                    tasks.append(task)
-                else:
-                    # Sync handler - run in thread pool to avoid blocking
-                    task = asyncio.create_task(
-                        asyncio.get_event_loop().run_in_executor(None, handler, event)
-                    )
-                    tasks.append(task)
-                    
-            except Exception as e:
-                logger.exception(f"Error calling event handler: {e}")
+            if subscription.debounce:
+                self._debounce(subscription, event)
+                continue
+            # Blocks while the worker is full, pushing back on the publish queue
+            await self._worker_queue(subscription, key).put((subscription, event))
+            self._deliveries += 1
+    
+    def _worker_queue(self, subscription: EventSubscription, key: Optional[Hashable]) -> asyncio.Queue:
+        """Get the queue of the worker that handles a delivery."""
+        if key is not None:
+            return self._worker_queues[hash(key) % self._num_workers]
+        return self._worker_queues[subscription.sequence % self._num_workers]
+    
+    def _debounce(self, subscription: EventSubscription, event: Event) -> None:
+        """Hold the latest event for a debounced subscription, restarting its timer."""
+        pending = self._debounced.get(subscription.subscription_id)
+        if pending is not None:
+            pending[0].cancel()
+        timer = asyncio.get_running_loop().call_later(
+            subscription.debounce, self._fire_debounced, subscription.subscription_id
+        )
+        self._debounced[subscription.subscription_id] = (timer, subscription, event)
+    
+    def _fire_debounced(self, subscription_id: int) -> None:
+        """Deliver the held event of a debounced subscription."""
+        pending = self._debounced.pop(subscription_id, None)
+        if pending is None or not self._worker_queues:
+            return
+        timer, subscription, event = pending
+        timer.cancel()
         
-        # Wait for all handlers to complete
-        if tasks:
+        key = self._partition_key(event) if self._partition_key else None
+        queue = self._worker_queue(subscription, key)
+        try:
+            queue.put_nowait((subscription, event))
+        except asyncio.QueueFull:
+            asyncio.ensure_future(queue.put((subscription, event)))
+        self._deliveries += 1
+    
+    def _cancel_debounced(self, subscription_id: int) -> None:
+        """Discard the held event of a removed subscription."""
+        pending = self._debounced.pop(subscription_id, None)
+        if pending is not None:
+            pending[0].cancel()
+    
+    async def _run_worker(self, queue: asyncio.Queue) -> None:
+        """Run handlers for the deliveries of one shard, in order."""
+        while True:
+            delivery = await queue.get()
+            if delivery is None:  # Stop signal
+                break
+            
+            subscription, event = delivery
+            handler = subscription.handler
+            failed = False
+            start = time.perf_counter()
             try:
-                await asyncio.gather(*tasks, return_exceptions=True)
+                if subscription.is_async:
+                    await handler(event)
+                elif subscription.mode is HandlerMode.INLINE:
+                    handler(event)
+                else:
+                    # Sync handler - run on the bus thread pool to avoid blocking
+                    await asyncio.get_running_loop().run_in_executor(self._executor, handler, event)
             except Exception as e:
+                failed = True
                 logger.exception(f"Error in event handler execution: {e}")
+            subscription.record_call(time.perf_counter() - start, failed)
     
     def _cleanup_dead_refs(self, weak_ref: weakref.ref) -> None:
         """Clean up subscriptions for garbage collected objects."""
@@ -345,6 +1061,24 @@ _event_bus: Optional[EventBus] = None
 _bus_lock = threading.Lock()
 
 
+def _event_log_from_env() -> Optional[EventLog]:
+    """
+    Create the persistent event log if NAGATHA_EVENT_LOG_DIR is set.
+
+    Like log files, it is written on a background thread unless
+    NAGATHA_LOG_QUEUE=false.
+    """
+    directory = os.getenv("NAGATHA_EVENT_LOG_DIR")
+    if not directory:
+        return None
+    return EventLog(
+        directory,
+        segment_bytes=int(os.getenv("NAGATHA_EVENT_LOG_SEGMENT_MB", "16")) * 1024 * 1024,
+        max_segments=int(os.getenv("NAGATHA_EVENT_LOG_SEGMENTS", "16")),
+        background=os.getenv("NAGATHA_LOG_QUEUE", "true").lower() not in ("0", "false", "no", "off")
+    )
+
+
 def get_event_bus() -> EventBus:
     """Get the global event bus instance (singleton pattern)."""
     global _event_bus
@@ -352,7 +1086,15 @@ def get_event_bus() -> EventBus:
     if _event_bus is None:
         with _bus_lock:
             if _event_bus is None:
-                _event_bus = EventBus()
+                coalesce_window = float(os.getenv("NAGATHA_EVENT_COALESCE_MS", "50")) / 1000
+                _event_bus = EventBus(
+                    num_workers=int(os.getenv("NAGATHA_EVENT_WORKERS", "4")),
+                    queue_size=int(os.getenv("NAGATHA_EVENT_QUEUE_SIZE", "10000")),
+                    overflow_policy=os.getenv("NAGATHA_EVENT_OVERFLOW", OverflowPolicy.BLOCK.value),
+                    coalesce={StandardEventTypes.MEMORY_ENTRY_CREATED: coalesce_window},
+                    handler_threads=int(os.getenv("NAGATHA_EVENT_HANDLER_THREADS", "4")),
+                    event_log=_event_log_from_env()
+                )
     
     return _event_bus
 
@@ -0,0 +1,276 @@
+"""
+Append-only persistent event log.
+
+Events are appended to segment files in a directory, one line per event:
+
+    <created, epoch seconds>\t<event type>\t<event JSON>\n
+
+A segment is named after the time it was opened, in microseconds, so every
+event in a segment was written before the next segment's name. Once the
+current segment reaches ``segment_bytes`` a new one is opened, and the oldest
+segments beyond ``max_segments`` are deleted.
+
+With ``background`` set, callers only encode the events and queue the bytes;
+a writer thread does the write and flush, one per batch of whatever queued
+up meanwhile, so publishing from the event loop never waits on disk.
+
+Replay memory-maps one segment at a time and filters lines on their time and
+type prefix, decoding JSON only for the events it returns, so old events can
+be read back for debugging and the events API without being held in memory.
+"""
+
+import atexit
+import fnmatch
+import json
+import mmap
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Iterator, List, Optional, Tuple, Union
+
+from .event import Event
+from nagatha_assistant.utils.logger import get_logger
+
+logger = get_logger()
+
+SEGMENT_SUFFIX = ".events"
+
+_GLOB_CHARS = re.compile(r"[*?\[]")
+
+Timestamp = Union[datetime, float, None]
+
+
+def _epoch(value: Timestamp) -> Optional[float]:
+    """Convert a datetime or epoch seconds to epoch seconds."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return value
+
+
+class EventLog:
+    """
+    Segmented append-only event log.
+
+    Attributes:
+        directory: Directory holding the segment files
+        segment_bytes: Size at which a new segment is started
+        max_segments: Number of segments to keep
+        background: Whether appends are written by a writer thread
+    """
+
+    def __init__(self, directory: Union[str, Path], segment_bytes: int = 16 * 1024 * 1024,
+                 max_segments: int = 16, background: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_segments = max(1, max_segments)
+        self.background = background
+        self._file: Optional[IO[bytes]] = None
+        self._size = 0
+
+        # Encoded batches, threading.Event markers for flush(), or None to stop
+        self._queue: "queue.SimpleQueue[Union[bytes, threading.Event, None]]" = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+    def segments(self) -> List[Tuple[int, Path]]:
+        """Get (opened at, path) of every segment, oldest first."""
+        segments = []
+        for path in self.directory.glob(f"*{SEGMENT_SUFFIX}"):
+            try:
+                segments.append((int(path.stem), path))
+            except ValueError:
+                continue
+        segments.sort()
+        return segments
+
+    def append(self, events: List[Event]) -> None:
+        """
+        Append events to the current segment.
+
+        Lines are flushed to the OS but not fsynced; a crash can lose the
+        last writes but never corrupts earlier lines. In background mode the
+        events are encoded now, so later changes to them are not logged, and
+        written by the writer thread.
+        """
+        if not events:
+            return
+
+        data = b"".join(self._encode(event) for event in events)
+        if not self.background:
+            self._write(data)
+            return
+
+        self._start_writer()
+        self._queue.put(data)
+
+    def flush(self, timeout: Optional[float] = 5.0) -> None:
+        """Wait until the writer thread has written everything appended so far."""
+        writer = self._writer
+        if writer is None or not writer.is_alive():
+            return
+        written = threading.Event()
+        self._queue.put(written)
+        if not written.wait(timeout):
+            logger.warning("Timed out waiting for the event log writer")
+
+    def _write(self, data: bytes) -> None:
+        if self._file is None or self._size >= self.segment_bytes:
+            self._open_segment()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def _start_writer(self) -> None:
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._run_writer, name="nagatha-event-log", daemon=True
+                )
+                self._writer.start()
+                atexit.register(self.close)
+
+    def _run_writer(self) -> None:
+        """Write queued batches, coalescing whatever is waiting into one write and flush."""
+        stopping = False
+        while not stopping:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            chunks = []
+            markers = []
+            for item in items:
+                if item is None:
+                    stopping = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    chunks.append(item)
+            if chunks:
+                try:
+                    self._write(b"".join(chunks))
+                except OSError as e:
+                    logger.warning(f"Failed to write event log: {e}")
+            for marker in markers:
+                marker.set()
+
+    def replay(self, since: Timestamp = None, until: Timestamp = None,
+               event_type_pattern: Optional[str] = None) -> Iterator[Event]:
+        """
+        Read logged events back in write order.
+
+        Args:
+            since: Only events created at or after this time
+            until: Only events created before this time
+            event_type_pattern: Exact type or glob pattern to filter by
+
+        Yields:
+            Matching events, oldest first
+        """
+        since, until = _epoch(since), _epoch(until)
+        if self.background:
+            self.flush()
+        elif self._file is not None:
+            self._file.flush()
+
+        segments = self.segments()
+        for i, (_, path) in enumerate(segments):
+            # Everything in a segment was written before the next one was opened
+            if since is not None and i + 1 < len(segments) and segments[i + 1][0] / 1e6 <= since:
+                continue
+            yield from self._read_segment(path, since, until, event_type_pattern)
+
+    def close(self) -> None:
+        """Write what is queued and close the current segment; the next append opens a new one."""
+        writer = self._writer
+        if writer is not None:
+            self._writer = None
+            atexit.unregister(self.close)
+            if writer.is_alive():
+                self._queue.put(None)
+                writer.join()
+        self._close_file()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._size = 0
+
+    @staticmethod
+    def _encode(event: Event) -> bytes:
+        record = json.dumps(event.to_dict(), default=str)
+        return f"{event.created:.6f}\t{event.event_type}\t{record}\n".encode("utf-8")
+
+    def _open_segment(self) -> None:
+        """Start a new segment and apply retention."""
+        self._close_file()
+
+        segments = self.segments()
+        opened = time.time_ns() // 1000
+        if segments and opened <= segments[-1][0]:
+            opened = segments[-1][0] + 1
+        path = self.directory / f"{opened:016d}{SEGMENT_SUFFIX}"
+        self._file = open(path, "ab")
+        self._size = 0
+
+        segments.append((opened, path))
+        for _, old_path in segments[:-self.max_segments]:
+            try:
+                old_path.unlink()
+                logger.debug(f"Removed event log segment {old_path.name}")
+            except OSError as e:
+                logger.warning(f"Failed to remove event log segment {old_path}: {e}")
+
+    @staticmethod
+    def _read_segment(path: Path, since: Optional[float], until: Optional[float],
+                      event_type_pattern: Optional[str]) -> Iterator[Event]:
+        """Yield the matching events of one segment."""
+        exact = event_type_pattern is not None and not _GLOB_CHARS.search(event_type_pattern)
+        exact_type = event_type_pattern.encode("utf-8") if exact else None
+
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pos = 0
+                    while True:
+                        end = mm.find(b"\n", pos)
+                        if end == -1:  # Empty or partially written last line
+                            break
+                        line = mm[pos:end]
+                        pos = end + 1
+
+                        time_end = line.find(b"\t")
+                        type_end = line.find(b"\t", time_end + 1)
+                        if time_end == -1 or type_end == -1:
+                            continue
+                        created = float(line[:time_end])
+                        if since is not None and created < since:
+                            continue
+                        if until is not None and created >= until:
+                            continue
+
+                        event_type = line[time_end + 1:type_end]
+                        if exact_type is not None:
+                            if event_type != exact_type:
+                                continue
+                        elif event_type_pattern is not None and not fnmatch.fnmatch(
+                                event_type.decode("utf-8"), event_type_pattern):
+                            continue
+
+                        yield Event.from_dict(json.loads(line[type_end + 1:]))
+        except FileNotFoundError:
+            # Removed by retention while replaying
+            return
@@ -0,0 +1,495 @@
+"""
+Admission control for outbound LLM requests.
+
+Discord auto-chat in many channels, the REST API, the CLI and voice all call
+the chat completions API through the agent. Without coordination a burst
+trips the provider's rate limits and every caller fails at once. The
+``LLMGateway`` sits in front of the client:
+
+- Each model has two token buckets, one for requests per minute and one for
+  tokens per minute. A request is charged its estimated prompt tokens plus
+  its ``max_tokens`` up front, and the difference to the actual usage
+  reported in the response is settled afterwards. A concurrency limit caps
+  the requests in flight per model.
+- Requests waiting for a model are admitted in priority order (interactive
+  before channel auto-chat before background work), first come first served
+  within a priority.
+- Rate limit responses, timeouts, connection errors and 5xx responses are
+  retried with jittered exponential backoff. A 429 honours the
+  ``retry-after`` / ``x-ratelimit-reset-*`` headers and pauses admission for
+  the whole model, so queued requests don't repeat the failure.
+- Queue wait times, retries and rate limit hits are kept per model and per
+  priority and reported in ``/status``.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import random
+import re
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import openai
+
+from nagatha_assistant.utils.logger import get_logger
+
+logger = get_logger()
+
+# Bucket capacity in seconds of refill, so a minute's budget is not spent in
+# one burst that the provider's finer-grained enforcement would reject
+BURST_SECONDS = 10.0
+
+# Rough characters per token for estimating prompt size without a tokenizer
+CHARS_PER_TOKEN = 4
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+class LLMPriority(IntEnum):
+    """Request priority levels, with lower numbers being admitted first."""
+    INTERACTIVE = 0  # Direct messages, CLI, REST and voice
+    CHANNEL = 1      # Discord channel auto-chat
+    BACKGROUND = 2   # Summarization and other background work
+
+
+@dataclass
+class ModelLimits:
+    """Rate limits applied to one model."""
+    rpm: float = 500.0
+    tpm: float = 200000.0
+    concurrency: int = 8
+
+
+class TokenBucket:
+    """Bucket refilled continuously at ``rate`` units per second up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """
+        Seconds until ``amount`` can be taken.
+
+        Amounts larger than the capacity only need a full bucket, so an
+        oversized request is delayed rather than refused.
+        """
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate > 0 else 0.0
+
+    def take(self, amount: float, now: float) -> None:
+        """Take units; the level may go negative and delays later requests."""
+        self._refill(now)
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        """Return units that were charged but not used."""
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _Waiter:
+    __slots__ = ("future", "tokens", "priority", "enqueued")
+
+    def __init__(self, future: asyncio.Future, tokens: int, priority: LLMPriority):
+        self.future = future
+        self.tokens = tokens
+        self.priority = priority
+        self.enqueued = time.monotonic()
+
+
+class _ModelState:
+    """Buckets, queue and counters of one model."""
+
+    def __init__(self, limits: ModelLimits):
+        self.limits = limits
+        self.requests = TokenBucket(limits.rpm / 60.0, max(1.0, limits.rpm / 60.0 * BURST_SECONDS))
+        self.tokens = TokenBucket(limits.tpm / 60.0, max(1.0, limits.tpm / 60.0 * BURST_SECONDS))
+        self.waiters: List[Tuple[int, int, _Waiter]] = []
+        self.active = 0
+        self.blocked_until = 0.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.stats = {"admitted": 0, "retries": 0, "rate_limited": 0, "failed": 0,
+                      "estimated_tokens": 0, "actual_tokens": 0}
+
+
+class Admission:
+    """A granted request slot; settle the real token usage once it is known."""
+
+    def __init__(self, gateway: "LLMGateway", model: str, tokens: int):
+        self._gateway = gateway
+        self.model = model
+        self.tokens = tokens
+
+    def settle(self, actual_tokens: int) -> None:
+        """Adjust the token bucket from the estimate to the actual usage."""
+        state = self._gateway._models[self.model]
+        difference = self.tokens - actual_tokens
+        if difference > 0:
+            state.tokens.give(difference)
+        else:
+            state.tokens.take(-difference, time.monotonic())
+        state.stats["actual_tokens"] += actual_tokens
+        self.tokens = actual_tokens
+
+
+def estimate_tokens(messages: Any, tools: Any = None, max_tokens: Optional[int] = None) -> int:
+    """
+    Estimate the tokens a chat completion will count against the TPM limit.
+
+    Args:
+        messages: Request messages
+        tools: Tool definitions sent with the request
+        max_tokens: Completion budget (providers reserve it up front)
+
+    Returns:
+        Estimated prompt plus completion tokens
+    """
+    size = len(json.dumps(messages, default=str))
+    if tools:
+        size += len(json.dumps(tools, default=str))
+    return size // CHARS_PER_TOKEN + (max_tokens or 0)
+
+
+def retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Read how long the provider asks us to wait from response headers.
+
+    Uses ``retry-after-ms``, ``retry-after`` (seconds or an HTTP date) and,
+    failing those, the longest ``x-ratelimit-reset-requests`` /
+    ``x-ratelimit-reset-tokens`` duration (such as ``1s`` or ``6m0s``).
+
+    Returns:
+        Seconds to wait, or None if the headers don't say
+    """
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return float(value)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    resets = []
+    for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(name)
+        if value:
+            parts = _DURATION_PART.findall(value)
+            if parts:
+                resets.append(sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts))
+    return max(resets) if resets else None
+
+
+def priority_for(interface: str, interface_context: Optional[Dict[str, Any]] = None,
+                 requested: Optional[str] = None) -> LLMPriority:
+    """
+    Choose the priority of a conversation turn from where it came from.
+
+    Args:
+        interface: Interface the message arrived on
+        interface_context: Interface details of the session
+        requested: Priority name asked for by the caller, which wins if valid
+
+    Returns:
+        CHANNEL for Discord messages in a guild channel (auto-chat),
+        INTERACTIVE for everything else someone is waiting on
+    """
+    if isinstance(requested, str) and requested.upper() in LLMPriority.__members__:
+        return LLMPriority[requested.upper()]
+    if interface == "discord" and (interface_context or {}).get("guild_id"):
+        return LLMPriority.CHANNEL
+    return LLMPriority.INTERACTIVE
+
+
+class LLMGateway:
+    """
+    Rate limiting, prioritised admission and retries for chat completions.
+
+    Attributes:
+        default_limits: Limits for models without an entry in ``model_limits``
+        model_limits: Per-model limits
+        max_retries: Retries after the first attempt
+        backoff_base: First backoff step in seconds
+        backoff_max: Longest backoff in seconds
+    """
+
+    def __init__(self, default_limits: Optional[ModelLimits] = None,
+                 model_limits: Optional[Dict[str, ModelLimits]] = None,
+                 max_retries: int = 4, backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.default_limits = default_limits or ModelLimits()
+        self.model_limits = dict(model_limits or {})
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._models: Dict[str, _ModelState] = {}
+        self._sequence = itertools.count()
+        self._priority_stats = {
+            priority: {"admitted": 0, "total_wait": 0.0, "max_wait": 0.0} for priority in LLMPriority
+        }
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._models.get(model)
+        if state is None:
+            state = self._models[model] = _ModelState(self.model_limits.get(model, self.default_limits))
+        return state
+
+    async def create_chat_completion(self, client: Any, *,
+                                     priority: LLMPriority = LLMPriority.INTERACTIVE,
+                                     **request: Any) -> Any:
+        """
+        Call ``client.chat.completions.create`` through admission control.
+
+        Args:
+            client: OpenAI-compatible async client
+            priority: Queue priority of the request
+            **request: Arguments for ``chat.completions.create``; ``model``
+                and ``messages`` are required
+
+        Returns:
+            The completion response
+
+        Raises:
+            The last error once retries are exhausted, or any error that is
+            not worth retrying
+        """
+        model = request["model"]
+        estimate = estimate_tokens(request["messages"], request.get("tools"), request.get("max_tokens"))
+        state = self._state(model)
+
+        attempt = 0
+        while True:
+            admission = await self.acquire(model, estimate, priority)
+            try:
+                response = await client.chat.completions.create(**request)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                # The request never produced a completion; keep only the request charge
+                admission.settle(0)
+                if delay is None:
+                    state.stats["failed"] += 1
+                    raise
+                if _is_rate_limit(e):
+                    state.stats["rate_limited"] += 1
+                    state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+                state.stats["retries"] += 1
+                logger.warning(f"LLM request to {model} failed ({type(e).__name__}), "
+                               f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+            else:
+                total_tokens = getattr(getattr(response, "usage", None), "total_tokens", None)
+                if isinstance(total_tokens, int):
+                    admission.settle(total_tokens)
+                return response
+            finally:
+                self.release(admission)
+
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def acquire(self, model: str, tokens: int,
+                      priority: LLMPriority = LLMPriority.INTERACTIVE) -> Admission:
+        """
+        Wait until a request to ``model`` may be sent.
+
+        Every acquire must be paired with :meth:`release`.
+
+        Args:
+            model: Model the request is for
+            tokens: Estimated tokens of the request
+            priority: Queue priority
+
+        Returns:
+            The admission, for settling actual token usage
+        """
+        state = self._state(model)
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), tokens, priority)
+        heapq.heappush(state.waiters, (int(priority), next(self._sequence), waiter))
+        self._pump(model)
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just before the cancellation arrived
+                self.release(Admission(self, model, tokens))
+            else:
+                waiter.future.cancel()
+                self._pump(model)
+            raise
+        return Admission(self, model, tokens)
+
+    def release(self, admission: Admission) -> None:
+        """Free the concurrency slot of a finished request."""
+        state = self._models[admission.model]
+        state.active -= 1
+        self._pump(admission.model)
+
+    def _pump(self, model: str) -> None:
+        """Admit waiting requests in priority order while the limits allow."""
+        state = self._models[model]
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+
+        now = time.monotonic()
+        delay = 0.0
+        while state.waiters and state.active < state.limits.concurrency:
+            _, _, waiter = state.waiters[0]
+            if waiter.future.done():  # Cancelled while queued
+                heapq.heappop(state.waiters)
+                continue
+
+            delay = max(state.blocked_until - now,
+                        state.requests.wait_time(1, now),
+                        state.tokens.wait_time(waiter.tokens, now))
+            if delay > 0:
+                break
+
+            heapq.heappop(state.waiters)
+            state.requests.take(1, now)
+            state.tokens.take(waiter.tokens, now)
+            state.active += 1
+            self._record_admission(state, waiter, now)
+            waiter.future.set_result(None)
+
+        if delay > 0 and state.waiters and state.active < state.limits.concurrency:
+            state.timer = asyncio.get_running_loop().call_later(delay, self._pump, model)
+
+    def _record_admission(self, state: _ModelState, waiter: _Waiter, now: float) -> None:
+        wait = now - waiter.enqueued
+        state.stats["admitted"] += 1
+        state.stats["estimated_tokens"] += waiter.tokens
+        stats = self._priority_stats[waiter.priority]
+        stats["admitted"] += 1
+        stats["total_wait"] += wait
+        stats["max_wait"] = max(stats["max_wait"], wait)
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error is final."""
+        if attempt >= self.max_retries or not _is_retryable(error):
+            return None
+
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        response = getattr(error, "response", None)
+        requested = retry_after(getattr(response, "headers", None))
+        if requested is not None:
+            # Jitter on top of the provider's time spreads the retries out
+            return min(self.backoff_max, requested) + random.uniform(0, self.backoff_base)
+        return backoff
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get queue and rate limit metrics.
+
+        Returns:
+            ``models``: per model ``queued``, ``active``, bucket levels and
+            counters; ``priorities``: per priority ``admitted``,
+            ``avg_wait`` and ``max_wait`` in seconds
+        """
+        now = time.monotonic()
+        models = {}
+        for model, state in self._models.items():
+            models[model] = {
+                **state.stats,
+                "queued": sum(1 for _, _, w in state.waiters if not w.future.done()),
+                "active": state.active,
+                "paused_for": round(max(0.0, state.blocked_until - now), 3),
+                "request_budget": round(state.requests.level, 2),
+                "token_budget": round(state.tokens.level),
+                "limits": {"rpm": state.limits.rpm, "tpm": state.limits.tpm,
+                           "concurrency": state.limits.concurrency},
+            }
+
+        priorities = {}
+        for priority, stats in self._priority_stats.items():
+            admitted = stats["admitted"]
+            priorities[priority.name.lower()] = {
+                "admitted": admitted,
+                "avg_wait": round(stats["total_wait"] / admitted, 4) if admitted else 0.0,
+                "max_wait": round(stats["max_wait"], 4),
+            }
+        return {"models": models, "priorities": priorities}
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    return isinstance(error, openai.RateLimitError)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Whether an error is transient: rate limits, timeouts, connection and server errors."""
+    if isinstance(error, openai.RateLimitError):
+        # Exhausted billing quota also arrives as a 429 but won't clear by waiting
+        return getattr(error, "code", None) != "insufficient_quota"
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409) or error.status_code >= 500
+    return False
+
+
+def _limits_from_env() -> Tuple[ModelLimits, Dict[str, ModelLimits]]:
+    """
+    Read limits from the environment.
+
+    NAGATHA_LLM_RPM, NAGATHA_LLM_TPM and NAGATHA_LLM_CONCURRENCY set the
+    defaults; NAGATHA_LLM_LIMITS overrides single models as a comma-separated
+    list of ``model=rpm:tpm[:concurrency]``.
+    """
+    default = ModelLimits(
+        rpm=float(os.getenv("NAGATHA_LLM_RPM", "500")),
+        tpm=float(os.getenv("NAGATHA_LLM_TPM", "200000")),
+        concurrency=int(os.getenv("NAGATHA_LLM_CONCURRENCY", "8")),
+    )
+    per_model = {}
+    for item in os.getenv("NAGATHA_LLM_LIMITS", "").split(","):
+        if "=" not in item:
+            continue
+        model, _, values = item.partition("=")
+        parts = values.split(":")
+        try:
+            per_model[model.strip()] = ModelLimits(
+                rpm=float(parts[0]),
+                tpm=float(parts[1]) if len(parts) > 1 else default.tpm,
+                concurrency=int(parts[2]) if len(parts) > 2 else default.concurrency,
+            )
+        except ValueError:
+            logger.warning(f"Ignoring invalid NAGATHA_LLM_LIMITS entry '{item}'")
+    return default, per_model
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Get the global LLM gateway, configured from the environment."""
+    global _gateway
+    if _gateway is None:
+        default, per_model = _limits_from_env()
+        _gateway = LLMGateway(default, per_model,
+                              max_retries=int(os.getenv("NAGATHA_LLM_MAX_RETRIES", "4")))
+    return _gateway
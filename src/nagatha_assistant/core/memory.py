@@ -13,14 +13,21 @@ and retrieve information across sessions, including:
 """
 
 import asyncio
+import random
+import time
+from collections import deque, OrderedDict
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from enum import Enum
 
 from nagatha_assistant.core.storage import StorageBackend, HybridStorageBackend, DatabaseStorageBackend, InMemoryStorageBackend
+from nagatha_assistant.core.memory_consolidation import NearDuplicateConsolidator
+from nagatha_assistant.core.memory_rules import (
+    MessageScan, RuleProfiler, STYLE_RULES, EMOTION_RULES, measure, stable_hash
+)
 from nagatha_assistant.core.short_term_memory import get_short_term_memory, ensure_short_term_memory_started
 from nagatha_assistant.core.event_bus import get_event_bus
-from nagatha_assistant.core.event import StandardEventTypes, create_memory_event, EventPriority
+from nagatha_assistant.core.event import Event, StandardEventTypes, create_memory_event, EventPriority
 from nagatha_assistant.utils.logger import setup_logger_with_env_control, get_logger
 
 logger = get_logger()
@@ -37,10 +44,51 @@ class MemorySection:
     """Represents a logical section of memory with specific persistence characteristics."""
     
     def __init__(self, name: str, persistence_level: PersistenceLevel = PersistenceLevel.PERMANENT,
-                 description: Optional[str] = None):
+                 description: Optional[str] = None, append_log: bool = False):
         self.name = name
         self.persistence_level = persistence_level
         self.description = description
+        # Append logs are read newest-first with tail() and never archived
+        self.append_log = append_log
+
+
+class AccessTracker:
+    """
+    Buffers sampled memory reads so access counters cost no write per read.
+    
+    Each read is recorded with probability ``sample_rate`` and weighted by
+    ``1 / sample_rate``, so the flushed counts are unbiased estimates.
+    """
+    
+    def __init__(self, sample_rate: float = 0.1, max_pending: int = 1000):
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self._pending: Dict[str, Dict[Tuple[str, Optional[int]], Tuple[int, datetime]]] = {}
+        self._size = 0
+    
+    def record(self, section: str, key: str, session_id: Optional[int] = None) -> bool:
+        """
+        Record a read if it is sampled.
+        
+        Returns:
+            True when the buffer is full and should be flushed
+        """
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        
+        weight = max(1, round(1 / self.sample_rate))
+        section_pending = self._pending.setdefault(section, {})
+        identity = (key, session_id)
+        count, _ = section_pending.get(identity, (0, None))
+        if not count:
+            self._size += 1
+        section_pending[identity] = (count + weight, datetime.now(timezone.utc))
+        return self._size >= self.max_pending
+    
+    def drain(self) -> Dict[str, Dict[Tuple[str, Optional[int]], Tuple[int, datetime]]]:
+        """Take the buffered counts, leaving the buffer empty."""
+        pending, self._pending, self._size = self._pending, {}, 0
+        return pending
 
 
 class MemoryManager:
@@ -58,7 +106,8 @@ class MemoryManager:
         "session_state": MemorySection("session_state", PersistenceLevel.SESSION,
                                      "Current session state and context"),
         "command_history": MemorySection("command_history", PersistenceLevel.PERMANENT,
-                                       "History of user commands and interactions"),
+                                       "History of user commands and interactions",
+                                       append_log=True),
         "facts": MemorySection("facts", PersistenceLevel.PERMANENT,
                               "Long-term facts and knowledge"),
         "temporary": MemorySection("temporary", PersistenceLevel.TEMPORARY,
@@ -66,7 +115,8 @@ class MemoryManager:
         "personality": MemorySection("personality", PersistenceLevel.PERMANENT,
                                    "Dynamic personality traits, inflection styles, and interaction preferences"),
         "conversation_context": MemorySection("conversation_context", PersistenceLevel.SESSION,
-                                            "Recent conversation context and messages"),
+                                            "Recent conversation context and messages",
+                                            append_log=True),
     }
     
     def __init__(self, storage_backend: Optional[StorageBackend] = None):
@@ -80,6 +130,26 @@ class MemoryManager:
         self._short_term_memory = None
         self._cleanup_task: Optional[asyncio.Task] = None
         self._running = False
+        
+        # Counter reconciliation and growth-rate sampling
+        self.stats_reconcile_interval = 3600
+        self.stats_sample_interval = 60
+        self._last_reconcile = time.monotonic()
+        self._stats_samples: Dict[str, deque] = {}
+        
+        # Sampled read tracking and hot/cold tiering of permanent sections
+        self.access_tracker = AccessTracker()
+        self.archive_after_days = 30
+        self.archive_interval = 86400
+        self._last_archive = time.monotonic()
+        
+        # Materialized personality entries per session scope (None is global),
+        # kept current by set/delete and rebuilt after personality_view_ttl to
+        # pick up writes made by other processes
+        self.personality_view_ttl = 300
+        self.personality_view_max_scopes = 256
+        self._personality_views: "OrderedDict[Optional[int], Dict[str, Any]]" = OrderedDict()
+        self._personality_versions: Dict[Optional[int], int] = {}
     
     async def start(self) -> None:
         """Start the memory manager and cleanup tasks."""
@@ -117,6 +187,8 @@ class MemoryManager:
             except asyncio.CancelledError:
                 pass
         
+        await self.flush_access_stats()
+        
         # Stop the storage backend if it has a stop method
         if hasattr(self._storage, 'stop'):
             await self._storage.stop()
@@ -140,6 +212,61 @@ class MemoryManager:
             expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
         
         await self._storage.set(section, key, value, session_id, expires_at)
+        await self._after_set(section, key, value, session_id, ttl_seconds, expires_at)
+        await self._publish_created([self._created_event(section, key, value, session_id, ttl_seconds)])
+    
+    async def set_many(self, entries: List[Dict[str, Any]],
+                       session=None) -> Optional[Callable[[], Awaitable[None]]]:
+        """
+        Store several values with one storage write.
+        
+        Database-backed sections are written in a single transaction. With
+        ``session`` the writes join the caller's open transaction and the
+        caller commits; errors then propagate instead of being logged, and
+        the derived views, short-term context and created events are left
+        to the returned callback so nothing is announced before the commit.
+        
+        Args:
+            entries: Dicts with ``section``, ``key`` and ``value`` and optional
+                ``session_id`` and ``ttl_seconds`` keys, as accepted by :meth:`set`
+            session: Optional open database session to write in
+        
+        Returns:
+            With ``session``, a coroutine function to await once the caller
+            has committed; otherwise None
+        """
+        now = datetime.now(timezone.utc)
+        prepared = []
+        for entry in entries:
+            ttl_seconds = entry.get("ttl_seconds")
+            expires_at = now + timedelta(seconds=ttl_seconds) if ttl_seconds is not None else None
+            prepared.append((entry["section"], entry["key"], entry["value"],
+                             entry.get("session_id"), expires_at))
+        
+        await self._storage.set_many(prepared, session=session)
+        
+        async def after_commit() -> None:
+            events = []
+            for (section, key, value, session_id, expires_at), entry in zip(prepared, entries):
+                await self._after_set(section, key, value, session_id, entry.get("ttl_seconds"), expires_at)
+                events.append(self._created_event(section, key, value, session_id, entry.get("ttl_seconds")))
+                if section == "conversation_context" and isinstance(value, dict):
+                    await self._add_short_term_context(
+                        session_id, value.get("message_id"), value.get("role"),
+                        value.get("content"), value.get("metadata")
+                    )
+            await self._publish_created(events)
+        
+        if session is not None:
+            return after_commit
+        await after_commit()
+        return None
+    
+    async def _after_set(self, section: str, key: str, value: Any, session_id: Optional[int],
+                         ttl_seconds: Optional[int], expires_at: Optional[datetime]) -> None:
+        """Update derived views and caches for a stored value."""
+        if section == "personality":
+            self._update_personality_view(session_id, key, (value, expires_at))
         
         # Also store in short-term memory for conversation context
         if section == "conversation_context" and self._short_term_memory:
@@ -150,25 +277,31 @@ class MemoryManager:
             except Exception as e:
                 logger.warning(f"Failed to store in short-term memory: {e}")
         
-        # Publish event
+        logger.debug(f"Stored memory: {section}/{key} (session: {session_id})")
+    
+    @staticmethod
+    def _created_event(section: str, key: str, value: Any, session_id: Optional[int],
+                       ttl_seconds: Optional[int]) -> Event:
+        """Build the entry created event for a stored value."""
+        return create_memory_event(
+            StandardEventTypes.MEMORY_ENTRY_CREATED,
+            section,
+            key,
+            {
+                "value_type": type(value).__name__,
+                "session_id": session_id,
+                "has_ttl": ttl_seconds is not None
+            }
+        )
+    
+    async def _publish_created(self, events: List[Event]) -> None:
+        """Publish entry created events in one call."""
         try:
             event_bus = get_event_bus()
             if event_bus and event_bus._running:
-                event = create_memory_event(
-                    StandardEventTypes.MEMORY_ENTRY_CREATED,
-                    section,
-                    key,
-                    {
-                        "value_type": type(value).__name__,
-                        "session_id": session_id,
-                        "has_ttl": ttl_seconds is not None
-                    }
-                )
-                await event_bus.publish(event)
+                await event_bus.publish_many(events)
         except Exception as e:
             logger.warning(f"Failed to publish memory event: {e}")
-        
-        logger.debug(f"Stored memory: {section}/{key} (session: {session_id})")
     
     async def get(self, section: str, key: str, session_id: Optional[int] = None,
                   default: Any = None) -> Any:
@@ -187,6 +320,9 @@ class MemoryManager:
         value = await self._storage.get(section, key, session_id)
         if value is None:
             return default
+        
+        if self.access_tracker.record(section, key, session_id):
+            await self.flush_access_stats()
         return value
     
     async def delete(self, section: str, key: str, session_id: Optional[int] = None) -> bool:
@@ -203,6 +339,9 @@ class MemoryManager:
         """
         deleted = await self._storage.delete(section, key, session_id)
         
+        if section == "personality":
+            self._update_personality_view(session_id, key, None)
+        
         # Also delete from short-term memory
         if section == "conversation_context" and self._short_term_memory:
             try:
@@ -258,6 +397,14 @@ class MemoryManager:
         """
         results = await self._storage.search(section, query, session_id)
         
+        # Recalled entries are in use; without this, entries only ever found
+        # by search would look idle and be archived
+        flush = False
+        for result in results:
+            flush = self.access_tracker.record(section, result["key"], result.get("session_id")) or flush
+        if flush:
+            await self.flush_access_stats()
+        
         # Publish search event
         try:
             event_bus = get_event_bus()
@@ -312,18 +459,21 @@ class MemoryManager:
             "session_id": session_id
         }
         
-        # Use timestamp as key for ordering
+        # Timestamp keeps keys unique; ordering comes from the storage append log
         key = f"{timestamp}_{session_id or 'global'}"
-        await self.set("command_history", key, history_entry)
+        await self.set("command_history", key, history_entry, session_id=session_id)
     
-    async def get_command_history(self, session_id: Optional[int] = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get command history, optionally filtered by session."""
-        # Search for all commands (empty query matches all)
-        results = await self.search("command_history", "", session_id)
+    async def get_command_history(self, session_id: Optional[int] = None, limit: int = 100,
+                                  before: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        Get command history, most recent first, optionally filtered by session.
         
-        # Sort by timestamp (most recent first) and limit
-        results.sort(key=lambda x: x.get("value", {}).get("timestamp", ""), reverse=True)
-        return results[:limit]
+        Args:
+            session_id: Optional session ID to filter by
+            limit: Maximum number of entries to return
+            before: ``cursor`` of the last entry from a previous page
+        """
+        return await self.tail("command_history", session_id, limit, before)
     
     async def store_fact(self, key: str, fact: str, source: Optional[str] = None) -> None:
         """Store a long-term fact."""
@@ -364,19 +514,37 @@ class MemoryManager:
             metadata: Additional metadata
         """
         # Store in long-term memory
-        context_data = {
-            "session_id": session_id,
-            "message_id": message_id,
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "metadata": metadata or {}
-        }
-        
-        key = f"{message_id}_{session_id}"
-        await self.set("conversation_context", key, context_data, session_id=session_id, ttl_seconds=7200)
+        await self.set(**self.conversation_context_entry(session_id, message_id, role, content, metadata))
         
         # Also store in short-term memory for fast access
+        await self._add_short_term_context(session_id, message_id, role, content, metadata)
+    
+    def conversation_context_entry(self, session_id: int, message_id: int, role: str,
+                                   content: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Build the conversation context entry for a message without storing it.
+        
+        Returns:
+            An entry for :meth:`set_many` (its keys are also :meth:`set` arguments)
+        """
+        return {
+            "section": "conversation_context",
+            "key": f"{message_id}_{session_id}",
+            "value": {
+                "session_id": session_id,
+                "message_id": message_id,
+                "role": role,
+                "content": content,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "metadata": metadata or {}
+            },
+            "session_id": session_id,
+            "ttl_seconds": 7200
+        }
+    
+    async def _add_short_term_context(self, session_id: int, message_id: int, role: str,
+                                      content: str, metadata: Dict[str, Any] = None) -> None:
+        """Mirror a conversation message into short-term memory, if available."""
         if self._short_term_memory:
             try:
                 await self._short_term_memory.add_conversation_context(
@@ -422,11 +590,7 @@ class MemoryManager:
                 logger.warning(f"Failed to get from short-term conversation context: {e}")
         
         # Fallback to long-term memory
-        results = await self.search("conversation_context", "", session_id)
-        
-        # Sort by timestamp (most recent first) and limit
-        results.sort(key=lambda x: x.get("value", {}).get("timestamp", ""), reverse=True)
-        return results[:limit]
+        return await self.tail("conversation_context", session_id, limit)
     
     async def search_conversation_context(self, session_id: int, query: str) -> List[Dict[str, Any]]:
         """
@@ -495,29 +659,99 @@ class MemoryManager:
         logger.info(f"Cleared {deleted_count} entries from section {section}")
         return deleted_count
     
+    async def remove_duplicates(self, section: str) -> int:
+        """
+        Remove entries in a section whose value exactly duplicates another.
+        
+        Args:
+            section: Section to deduplicate
+        
+        Returns:
+            Number of entries removed
+        """
+        return await self._storage.remove_duplicates(section)
+    
+    async def tail(self, section: str, session_id: Optional[int] = None, limit: int = 100,
+                   before: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        Read the most recently written entries of a section, newest first.
+        
+        Reads are keyset-paginated, so their cost depends on ``limit`` rather
+        than on how much history the section holds.
+        
+        Args:
+            section: Section to read
+            session_id: Optional session ID to filter by; None reads all sessions
+            limit: Maximum number of entries to return
+            before: ``cursor`` of the last entry from a previous page
+        
+        Returns:
+            List of entries with a ``cursor`` for fetching the next page
+        """
+        return await self._storage.tail(section, session_id, limit, before)
+    
+    async def scan(self, section: str, after: Optional[Any] = None,
+                   limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Read a batch of entries from a section for incremental processing.
+        
+        Args:
+            section: Section to scan
+            after: Cursor of the last entry from the previous batch
+            limit: Maximum number of entries to return
+        
+        Returns:
+            Entries with ``cursor``, ``key``, ``value``, ``session_id`` and ``signature``
+        """
+        return await self._storage.scan(section, after, limit)
+    
+    async def store_signatures(self, section: str,
+                               signatures: Dict[Tuple[str, Optional[int]], str]) -> None:
+        """Persist MinHash signatures keyed by (key, session_id)."""
+        await self._storage.set_signatures(section, signatures)
+    
+    async def get_section_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get detailed per-section statistics from the maintained counters.
+        
+        Returns:
+            Mapping of section name to ``count``, ``bytes``, a per-session
+            breakdown under ``sessions`` and ``growth_per_hour`` (entries per
+            hour, or None until enough samples have been collected).
+        """
+        stats: Dict[str, Dict[str, Any]] = {}
+        for row in await self._storage.get_stats():
+            section = stats.setdefault(row["section"], {"count": 0, "bytes": 0, "sessions": {}})
+            section["count"] += row["count"]
+            section["bytes"] += row["bytes"]
+            if row["session_id"] is not None:
+                section["sessions"][row["session_id"]] = {"count": row["count"], "bytes": row["bytes"]}
+        
+        now = time.monotonic()
+        for section_name, section in stats.items():
+            samples = self._stats_samples.setdefault(section_name, deque(maxlen=60))
+            if not samples or now - samples[-1][0] >= self.stats_sample_interval:
+                samples.append((now, section["count"]))
+            
+            section["growth_per_hour"] = None
+            elapsed = now - samples[0][0]
+            if elapsed > 0:
+                section["growth_per_hour"] = (section["count"] - samples[0][1]) * 3600 / elapsed
+        
+        return stats
+    
     async def get_storage_stats(self) -> Dict[str, Any]:
         """Get statistics about memory storage."""
-        stats = {}
-        
-        # Check predefined sections
-        for section_name in self.SECTIONS.keys():
-            keys = await self.list_keys(section_name)
-            stats[section_name] = len(keys)
-        
-        # Also check for any other sections that might have data
-        # This is a best-effort attempt for in-memory backend
-        if hasattr(self._storage, '_storage'):
-            # InMemoryStorageBackend
-            for section_name in self._storage._storage.keys():
-                if section_name not in stats:
-                    keys = await self.list_keys(section_name)
-                    stats[section_name] = len(keys)
+        stats = {section_name: 0 for section_name in self.SECTIONS.keys()}
+        
+        # Counters are maintained on write, so this does not scan any keys
+        for section_name, section in (await self.get_section_stats()).items():
+            stats[section_name] = section["count"]
         
         # Add short-term memory stats
         if self._short_term_memory:
             try:
-                active_sessions = await self._short_term_memory.get_active_sessions()
-                stats["active_sessions"] = len(active_sessions)
+                stats["active_sessions"] = await self._short_term_memory.count_active_sessions()
             except Exception as e:
                 logger.warning(f"Failed to get short-term memory stats: {e}")
         
@@ -526,6 +760,129 @@ class MemoryManager:
         
         return stats
     
+    async def reconcile_stats(self) -> int:
+        """
+        Recompute the maintained counters from the stored entries.
+        
+        Returns:
+            Number of counter rows that had drifted and were corrected
+        """
+        corrected = await self._storage.reconcile_stats()
+        self._last_reconcile = time.monotonic()
+        return corrected
+    
+    def _update_personality_view(self, session_id: Optional[int], key: str,
+                                 entry: Optional[Tuple[Any, Optional[datetime]]]) -> None:
+        """Apply a personality write (or a delete, when ``entry`` is None) to its view."""
+        self._personality_versions[session_id] = self._personality_versions.get(session_id, 0) + 1
+        view = self._personality_views.get(session_id)
+        if view is None:
+            return
+        if entry is None:
+            view["entries"].pop(key, None)
+        else:
+            view["entries"][key] = entry
+    
+    async def _build_personality_view(self, session_id: Optional[int]) -> Dict[str, Any]:
+        """Read every personality entry of a scope, with its expiry time, into a new view."""
+        version = self._personality_versions.get(session_id, 0)
+        
+        entries = {
+            entry["key"]: (entry["value"], entry["expires_at"])
+            for entry in await self._storage.list_entries("personality", session_id)
+        }
+        view = {"built_at": time.monotonic(), "entries": entries}
+        
+        # A write that raced with the reads may be missing; serve but don't cache
+        if self._personality_versions.get(session_id, 0) == version:
+            self._personality_views[session_id] = view
+            self._personality_views.move_to_end(session_id)
+            while len(self._personality_views) > self.personality_view_max_scopes:
+                self._personality_views.popitem(last=False)
+        return view
+    
+    async def get_personality_entries(self, session_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get all live personality entries of a scope from the materialized view.
+        
+        The view is built with one pass over the section on first use and then
+        updated in place by every personality write or delete, so repeated
+        calls do not touch storage. Expired entries are dropped on read.
+        
+        Args:
+            session_id: Session scope; None for global entries
+        
+        Returns:
+            Mapping of key to stored value
+        """
+        view = self._personality_views.get(session_id)
+        if view is None or time.monotonic() - view["built_at"] >= self.personality_view_ttl:
+            view = await self._build_personality_view(session_id)
+        else:
+            self._personality_views.move_to_end(session_id)
+        
+        entries = view["entries"]
+        now = datetime.now(timezone.utc)
+        for key in [key for key, (_, expires_at) in entries.items() if expires_at and expires_at < now]:
+            del entries[key]
+        
+        return {key: value for key, (value, _) in entries.items()}
+    
+    async def flush_access_stats(self) -> None:
+        """Write buffered read counts to storage in one batch per section."""
+        for section, accesses in self.access_tracker.drain().items():
+            try:
+                await self._storage.record_access(section, accesses)
+            except Exception as e:
+                logger.warning(f"Failed to record memory access for {section}: {e}")
+    
+    async def get_access_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get access totals per section, including archived entries.
+        
+        Returns:
+            Mapping of section name to ``entries``, ``archived``, ``accesses``
+            and ``last_accessed_at``
+        """
+        await self.flush_access_stats()
+        return await self._storage.get_access_stats()
+    
+    async def archive_cold_entries(self, max_idle_days: Optional[int] = None,
+                                   batch_size: int = 1000) -> int:
+        """
+        Move permanent entries that have not been used recently to cold storage.
+        
+        Archived entries are promoted back transparently when read or found
+        by a search. Append-log sections are read by position and are kept hot.
+        
+        Args:
+            max_idle_days: Days without a read or write before an entry is
+                archived; defaults to ``archive_after_days``
+            batch_size: Entries moved per storage call
+        
+        Returns:
+            Number of entries archived
+        """
+        # Pending reads must land first or recently used entries look idle
+        await self.flush_access_stats()
+        
+        idle_days = self.archive_after_days if max_idle_days is None else max_idle_days
+        cutoff = datetime.now(timezone.utc) - timedelta(days=idle_days)
+        archived = 0
+        for section_name, section in self.SECTIONS.items():
+            if section.persistence_level != PersistenceLevel.PERMANENT or section.append_log:
+                continue
+            while True:
+                moved = await self._storage.archive_cold(section_name, cutoff, batch_size)
+                archived += moved
+                if moved < batch_size:
+                    break
+        
+        self._last_archive = time.monotonic()
+        if archived:
+            logger.info(f"Archived {archived} cold memory entries")
+        return archived
+    
     async def _cleanup_loop(self) -> None:
         """Background task to clean up expired entries."""
         while self._running:
@@ -539,6 +896,14 @@ class MemoryManager:
                 if cleaned_count > 0:
                     logger.debug(f"Cleaned up {cleaned_count} expired memory entries")
                 
+                await self.flush_access_stats()
+                
+                if time.monotonic() - self._last_reconcile >= self.stats_reconcile_interval:
+                    await self.reconcile_stats()
+                
+                if time.monotonic() - self._last_archive >= self.archive_interval:
+                    await self.archive_cold_entries()
+                
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -551,12 +916,23 @@ class MemoryTrigger:
     Analyzes content to determine what should be stored autonomously.
     
     Provides importance scoring, section selection, and conflict resolution
-    for autonomous memory management.
+    for autonomous memory management. The content rules are compiled once in
+    :mod:`nagatha_assistant.core.memory_rules` and each message is scanned
+    a single time per analysis.
     """
     
     def __init__(self, memory_manager: MemoryManager):
         self.memory_manager = memory_manager
         self.importance_threshold = 0.5  # Configurable threshold for storing information
+        self.offload_threshold = 20000  # Characters above which scanning runs in a worker thread
+        self.profiler: Optional[RuleProfiler] = None  # Set to collect per-rule timings
+    
+    def _scan(self, content: str) -> MessageScan:
+        """Scan a message once, segmenting it into sentences up front."""
+        with measure(self.profiler, "scan"):
+            scan = MessageScan(content)
+            scan.sentences
+        return scan
         
     async def analyze_for_storage(self, content: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -582,8 +958,14 @@ class MemoryTrigger:
             "importance_score": 0.0
         }
         
+        # Long pasted messages are scanned off the event loop
+        if len(content) > self.offload_threshold:
+            scan = await asyncio.to_thread(self._scan, content)
+        else:
+            scan = self._scan(content)
+        
         # Calculate importance score
-        importance_score = await self._calculate_importance(content, context)
+        importance_score = await self._calculate_importance(content, context, scan)
         recommendations["importance_score"] = importance_score
         
         if importance_score < self.importance_threshold:
@@ -594,20 +976,20 @@ class MemoryTrigger:
         entries_to_store = []
         
         # User preferences detection
-        preference_entries = await self._detect_user_preferences(content, context)
+        preference_entries = await self._detect_user_preferences(content, context, scan)
         entries_to_store.extend(preference_entries)
         
         # Personality traits detection
-        personality_entries = await self._detect_personality_cues(content, context)
+        personality_entries = await self._detect_personality_cues(content, context, scan)
         entries_to_store.extend(personality_entries)
         
         # Facts and knowledge detection
-        fact_entries = await self._detect_facts(content, context)
+        fact_entries = await self._detect_facts(content, context, scan)
         entries_to_store.extend(fact_entries)
         
         # Session state information
         if session_id:
-            session_entries = await self._detect_session_state(content, context)
+            session_entries = await self._detect_session_state(content, context, scan)
             entries_to_store.extend(session_entries)
         
         if entries_to_store:
@@ -619,95 +1001,55 @@ class MemoryTrigger:
             
         return recommendations
     
-    async def _calculate_importance(self, content: str, context: Dict[str, Any]) -> float:
+    async def _calculate_importance(self, content: str, context: Dict[str, Any],
+                                    scan: Optional[MessageScan] = None) -> float:
         """Calculate importance score for content."""
-        score = 0.0
-        content_lower = content.lower()
-        
-        # Preference indicators
-        preference_keywords = ["prefer", "like", "dislike", "want", "need", "always", "never", "usually"]
-        score += sum(0.1 for keyword in preference_keywords if keyword in content_lower)
+        scan = scan or self._scan(content)
         
-        # Personality indicators
-        personality_keywords = ["feel", "think", "enjoy", "frustrated", "happy", "style", "approach"]
-        score += sum(0.15 for keyword in personality_keywords if keyword in content_lower)
-        
-        # Factual information indicators
-        fact_keywords = ["is", "are", "was", "were", "will", "has", "have", "does", "do"]
-        score += sum(0.05 for keyword in fact_keywords if keyword in content_lower)
-        
-        # Personal information indicators
-        personal_keywords = ["my", "mine", "me", "i", "myself"]
-        score += sum(0.1 for keyword in personal_keywords if keyword in content_lower)
-        
-        # Interaction style indicators
-        interaction_keywords = ["please", "thank", "help", "explain", "show", "tell"]
-        score += sum(0.1 for keyword in interaction_keywords if keyword in content_lower)
-        
-        # Length factor (longer content generally more important)
-        length_factor = min(len(content) / 200, 0.3)
-        score += length_factor
+        with measure(self.profiler, "importance"):
+            score = scan.importance()
+            
+            # Length factor (longer content generally more important)
+            length_factor = min(len(content) / 200, 0.3)
+            score += length_factor
         
         return min(score, 1.0)  # Cap at 1.0
     
-    async def _detect_user_preferences(self, content: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _detect_user_preferences(self, content: str, context: Dict[str, Any],
+                                       scan: Optional[MessageScan] = None) -> List[Dict[str, Any]]:
         """Detect user preferences in content."""
         entries = []
-        content_lower = content.lower()
-        
-        # Simple preference detection patterns
-        preference_patterns = [
-            ("prefer", "preference"),
-            ("like", "positive_preference"),
-            ("dislike", "negative_preference"),
-            ("always", "strong_preference"),
-            ("never", "strong_negative_preference"),
-            ("usually", "general_preference")
-        ]
-        
-        for pattern, pref_type in preference_patterns:
-            if pattern in content_lower:
-                # Extract context around the preference
-                import re
-                matches = re.finditer(rf'\b\w*{pattern}\w*\b[^.!?]*[.!?]', content, re.IGNORECASE)
-                for match in matches:
-                    preference_text = match.group().strip()
-                    if len(preference_text) > 10:  # Meaningful preference
-                        key = f"{pref_type}_{hash(preference_text) % 10000}"
-                        entries.append({
-                            "section": "user_preferences",
-                            "key": key,
-                            "value": {
-                                "text": preference_text,
-                                "type": pref_type,
-                                "detected_at": datetime.now(timezone.utc).isoformat(),
-                                "confidence": 0.7
-                            },
-                            "session_id": None,  # User preferences are global
-                            "ttl_seconds": None
-                        })
+        scan = scan or self._scan(content)
+        
+        with measure(self.profiler, "preferences"):
+            for pref_type, preference_text in scan.preferences():
+                if len(preference_text) > 10:  # Meaningful preference
+                    key = f"{pref_type}_{stable_hash(preference_text)}"
+                    entries.append({
+                        "section": "user_preferences",
+                        "key": key,
+                        "value": {
+                            "text": preference_text,
+                            "type": pref_type,
+                            "detected_at": datetime.now(timezone.utc).isoformat(),
+                            "confidence": 0.7
+                        },
+                        "session_id": None,  # User preferences are global
+                        "ttl_seconds": None
+                    })
         
         return entries
     
-    async def _detect_personality_cues(self, content: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _detect_personality_cues(self, content: str, context: Dict[str, Any],
+                                       scan: Optional[MessageScan] = None) -> List[Dict[str, Any]]:
         """Detect personality-related information in content."""
         entries = []
-        content_lower = content.lower()
         session_id = context.get("session_id")
+        scan = scan or self._scan(content)
         
-        # Interaction style cues
-        style_patterns = [
-            ("formal", "formality_preference"),
-            ("casual", "informality_preference"),
-            ("detailed", "detail_preference"),
-            ("brief", "brevity_preference"),
-            ("explain", "explanation_preference"),
-            ("humor", "humor_preference"),
-            ("serious", "seriousness_preference")
-        ]
-        
-        for pattern, style_type in style_patterns:
-            if pattern in content_lower:
+        with measure(self.profiler, "personality"):
+            # Interaction style cues
+            for style_type in scan.matched(STYLE_RULES):
                 key = f"{style_type}_{session_id or 'global'}"
                 entries.append({
                     "section": "personality",
@@ -722,19 +1064,9 @@ class MemoryTrigger:
                     "session_id": session_id,
                     "ttl_seconds": None
                 })
-        
-        # Emotional tone detection
-        emotion_patterns = [
-            ("happy", "positive_emotion"),
-            ("frustrated", "negative_emotion"),
-            ("excited", "high_energy"),
-            ("calm", "low_energy"),
-            ("confused", "confusion_state"),
-            ("understand", "comprehension_state")
-        ]
-        
-        for pattern, emotion_type in emotion_patterns:
-            if pattern in content_lower:
+            
+            # Emotional tone detection
+            for emotion_type in scan.matched(EMOTION_RULES):
                 key = f"emotion_{emotion_type}_{session_id or 'global'}"
                 entries.append({
                     "section": "personality",
@@ -751,50 +1083,33 @@ class MemoryTrigger:
         
         return entries
     
-    async def _detect_facts(self, content: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _detect_facts(self, content: str, context: Dict[str, Any],
+                            scan: Optional[MessageScan] = None) -> List[Dict[str, Any]]:
         """Detect factual information worth storing."""
         entries = []
-        content_lower = content.lower()
-        
-        # Simple fact detection - statements with declarative structure
-        import re
-        
-        # Look for statements that declare facts
-        fact_patterns = [
-            r'\b\w+\s+is\s+\w+',
-            r'\b\w+\s+are\s+\w+',
-            r'\b\w+\s+has\s+\w+',
-            r'\b\w+\s+have\s+\w+',
-            r'\b\w+\s+does\s+\w+',
-            r'\b\w+\s+can\s+\w+'
-        ]
-        
-        for pattern in fact_patterns:
-            matches = re.finditer(pattern, content, re.IGNORECASE)
-            for match in matches:
-                fact_text = match.group().strip()
-                if len(fact_text) > 5:  # Meaningful fact
-                    # Expand to get full sentence
-                    sentence_match = re.search(rf'[^.!?]*{re.escape(fact_text)}[^.!?]*[.!?]', content, re.IGNORECASE)
-                    if sentence_match:
-                        full_fact = sentence_match.group().strip()
-                        key = f"fact_{hash(full_fact) % 10000}"
-                        entries.append({
-                            "section": "facts",
-                            "key": key,
-                            "value": {
-                                "fact": full_fact,
-                                "source": "conversation",
-                                "stored_at": datetime.now(timezone.utc).isoformat(),
-                                "confidence": 0.4
-                            },
-                            "session_id": None,  # Facts are global
-                            "ttl_seconds": None
-                        })
+        scan = scan or self._scan(content)
+        
+        with measure(self.profiler, "facts"):
+            # Sentences with a declarative "<subject> <verb> <object>" statement
+            for full_fact in scan.facts():
+                key = f"fact_{stable_hash(full_fact)}"
+                entries.append({
+                    "section": "facts",
+                    "key": key,
+                    "value": {
+                        "fact": full_fact,
+                        "source": "conversation",
+                        "stored_at": datetime.now(timezone.utc).isoformat(),
+                        "confidence": 0.4
+                    },
+                    "session_id": None,  # Facts are global
+                    "ttl_seconds": None
+                })
         
         return entries
     
-    async def _detect_session_state(self, content: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _detect_session_state(self, content: str, context: Dict[str, Any],
+                                    scan: Optional[MessageScan] = None) -> List[Dict[str, Any]]:
         """Detect session-specific state information."""
         entries = []
         session_id = context.get("session_id")
@@ -802,29 +1117,21 @@ class MemoryTrigger:
         if not session_id:
             return entries
         
-        content_lower = content.lower()
-        
-        # Current task or topic detection
-        task_keywords = ["working on", "task", "project", "goal", "trying to", "need to"]
-        for keyword in task_keywords:
-            if keyword in content_lower:
-                # Extract context around the task
-                import re
-                matches = re.finditer(rf'[^.!?]*{keyword}[^.!?]*[.!?]', content, re.IGNORECASE)
-                for match in matches:
-                    task_text = match.group().strip()
-                    if len(task_text) > 15:
-                        entries.append({
-                            "section": "session_state",
-                            "key": "current_task",
-                            "value": {
-                                "task": task_text,
-                                "detected_at": datetime.now(timezone.utc).isoformat()
-                            },
-                            "session_id": session_id,
-                            "ttl_seconds": None
-                        })
-                        break  # Only store one task per analysis
+        scan = scan or self._scan(content)
+        
+        with measure(self.profiler, "session_state"):
+            # Current task or topic detection
+            for task_text in scan.tasks():
+                entries.append({
+                    "section": "session_state",
+                    "key": "current_task",
+                    "value": {
+                        "task": task_text,
+                        "detected_at": datetime.now(timezone.utc).isoformat()
+                    },
+                    "session_id": session_id,
+                    "ttl_seconds": None
+                })
         
         return entries
 
@@ -851,36 +1158,40 @@ class MemoryLearning:
         patterns["section_usage"] = stats
         
         # Track which sections are accessed most frequently
-        # This would be enhanced with actual access tracking
         access_data = await self._get_access_statistics()
         patterns["access_frequency"] = access_data
         
         return patterns
     
     async def _get_access_statistics(self) -> Dict[str, int]:
-        """Get statistics on memory access patterns."""
-        # This is a simplified version - would be enhanced with actual tracking
-        stats = {}
+        """Get estimated read counts per section from the sampled access counters."""
+        stats = {section_name: 0 for section_name in self.memory_manager.SECTIONS.keys()}
         
-        for section_name in self.memory_manager.SECTIONS.keys():
-            keys = await self.memory_manager.list_keys(section_name)
-            stats[section_name] = len(keys)
+        for section_name, section in (await self.memory_manager.get_access_stats()).items():
+            stats[section_name] = section["accesses"]
         
         return stats
     
     async def learn_from_feedback(self, feedback_type: str, content: str, 
                                 context: Dict[str, Any] = None) -> None:
         """Learn from user feedback about memory decisions."""
-        feedback_entry = {
-            "type": feedback_type,  # "positive", "negative", "correction"
-            "content": content,
-            "context": context or {},
-            "timestamp": datetime.now(timezone.utc).isoformat()
+        await self.memory_manager.set(**self.feedback_entry(feedback_type, content, context))
+    
+    def feedback_entry(self, feedback_type: str, content: str,
+                       context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Build the feedback entry stored by :meth:`learn_from_feedback` without storing it."""
+        now = datetime.now(timezone.utc)
+        return {
+            "section": "temporary",
+            "key": f"feedback_{int(now.timestamp())}",
+            "value": {
+                "type": feedback_type,  # "positive", "negative", "correction"
+                "content": content,
+                "context": context or {},
+                "timestamp": now.isoformat()
+            },
+            "ttl_seconds": 86400  # 24 hours
         }
-        
-        # Store feedback for learning
-        feedback_key = f"feedback_{int(datetime.now(timezone.utc).timestamp())}"
-        await self.memory_manager.set("temporary", feedback_key, feedback_entry, ttl_seconds=86400)  # 24 hours
 
 
 class ContextualRecall:
@@ -1074,8 +1385,12 @@ class MemoryMaintenance:
     Handles automated cleanup, consolidation, and organization of memory data.
     """
     
+    # Sections where autonomous storage accumulates near-duplicate variants
+    CONSOLIDATION_SECTIONS = ["facts", "user_preferences"]
+    
     def __init__(self, memory_manager: MemoryManager):
         self.memory_manager = memory_manager
+        self.consolidator = NearDuplicateConsolidator(memory_manager)
         
     async def perform_maintenance(self) -> Dict[str, int]:
         """Perform comprehensive memory maintenance."""
@@ -1083,7 +1398,8 @@ class MemoryMaintenance:
             "duplicates_removed": 0,
             "entries_consolidated": 0,
             "outdated_removed": 0,
-            "conflicts_resolved": 0
+            "conflicts_resolved": 0,
+            "entries_archived": 0
         }
         
         # Remove duplicates
@@ -1102,6 +1418,12 @@ class MemoryMaintenance:
         conflicts_resolved = await self._resolve_conflicts()
         maintenance_results["conflicts_resolved"] = conflicts_resolved
         
+        # Move cold permanent entries out of the hot table
+        try:
+            maintenance_results["entries_archived"] = await self.memory_manager.archive_cold_entries()
+        except Exception as e:
+            logger.warning(f"Error archiving cold memory entries: {e}")
+        
         return maintenance_results
     
     async def _remove_duplicates(self) -> int:
@@ -1110,31 +1432,22 @@ class MemoryMaintenance:
         
         for section_name in self.memory_manager.SECTIONS.keys():
             try:
-                keys = await self.memory_manager.list_keys(section_name)
-                seen_values = {}
-                
-                for key in keys:
-                    value = await self.memory_manager.get(section_name, key)
-                    if value is not None:
-                        value_str = str(value)
-                        if value_str in seen_values:
-                            # Duplicate found, remove the newer one (keep the original)
-                            await self.memory_manager.delete(section_name, key)
-                            duplicates_removed += 1
-                        else:
-                            seen_values[value_str] = key
+                # Grouped by content hash in the storage backend, keeping the original
+                duplicates_removed += await self.memory_manager.remove_duplicates(section_name)
             except Exception as e:
                 logger.warning(f"Error removing duplicates from {section_name}: {e}")
         
         return duplicates_removed
     
     async def _consolidate_memories(self) -> int:
-        """Consolidate related memories."""
-        # This is a simplified version - would be enhanced with better similarity detection
+        """Merge near-duplicate facts and preferences found with MinHash/LSH."""
         consolidated = 0
         
-        # For now, just log that consolidation would happen here
-        logger.debug("Memory consolidation would be performed here")
+        for section_name in self.CONSOLIDATION_SECTIONS:
+            try:
+                consolidated += await self.consolidator.consolidate_section(section_name)
+            except Exception as e:
+                logger.warning(f"Error consolidating memories in {section_name}: {e}")
         
         return consolidated
     
@@ -1203,11 +1516,10 @@ class PersonalityMemory:
             "learned_traits": {}
         }
         
-        # Get all personality memories
-        personality_keys = await self.memory_manager.list_keys("personality", session_id)
+        # Get all personality memories from the manager's materialized view
+        personality_entries = await self.memory_manager.get_personality_entries(session_id)
         
-        for key in personality_keys:
-            value = await self.memory_manager.get("personality", key, session_id)
+        for key, value in personality_entries.items():
             if isinstance(value, dict):
                 if "style_type" in value:
                     profile["interaction_preferences"][key] = value
@@ -0,0 +1,278 @@
+"""
+Near-duplicate memory consolidation for Nagatha Assistant.
+
+Autonomously stored facts and preferences often arrive as slightly different
+variants of the same statement.  This module finds such variants with MinHash
+signatures and locality-sensitive hashing (LSH) and merges each cluster into a
+single canonical entry that records how often it was mentioned.
+
+The work is incremental and memory-bounded:
+
+- Signatures are persisted per entry through the storage backend, so only new
+  or changed entries are hashed on each run.
+- The LSH bucket index is built in partitions sized to ``max_index_entries``,
+  so the number of buckets held in memory at once does not grow with the
+  section size.
+"""
+
+import hashlib
+import random
+import re
+import struct
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from nagatha_assistant.utils.logger import get_logger
+
+logger = get_logger()
+
+# Large Mersenne prime used for the universal hash permutations
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Value fields that hold the comparable text and the timestamp, in priority order
+TEXT_FIELDS = ("fact", "text", "context", "content")
+TIMESTAMP_FIELDS = ("last_seen", "detected_at", "stored_at", "timestamp")
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def extract_text(value: Any) -> str:
+    """Get the comparable text of a memory value."""
+    if isinstance(value, dict):
+        for field in TEXT_FIELDS:
+            if isinstance(value.get(field), str):
+                return value[field]
+        return ""
+    if isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """Parse the newest known timestamp field of a memory value."""
+    if not isinstance(value, dict):
+        return None
+    for field in TIMESTAMP_FIELDS:
+        raw = value.get(field)
+        if isinstance(raw, str):
+            try:
+                parsed = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+            except ValueError:
+                continue
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+
+class MinHasher:
+    """
+    Computes fixed-size MinHash signatures over word shingles.
+
+    Signatures are deterministic across processes (token hashing uses BLAKE2b
+    rather than Python's randomized ``hash``) so they can be persisted.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._format = f"<{num_perm}I"
+
+    def _shingles(self, text: str) -> Iterable[str]:
+        """Split text into overlapping word shingles."""
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        if len(tokens) <= self.shingle_size:
+            return {" ".join(tokens)}
+        return {
+            " ".join(tokens[i:i + self.shingle_size])
+            for i in range(len(tokens) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> bytes:
+        """Compute the packed MinHash signature of a text."""
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+            for shingle in self._shingles(text)
+        ]
+        mins = [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._permutations
+        ]
+        return struct.pack(self._format, *mins)
+
+    def similarity(self, first: bytes, second: bytes) -> float:
+        """Estimate the Jaccard similarity of two signatures."""
+        a = struct.unpack(self._format, first)
+        b = struct.unpack(self._format, second)
+        return sum(1 for x, y in zip(a, b) if x == y) / self.num_perm
+
+
+class _DisjointSet:
+    """Union-find over entry identifiers, holding only entries that were merged."""
+
+    def __init__(self):
+        self._parent: Dict[Any, Any] = {}
+
+    def find(self, item: Any) -> Any:
+        parent = self._parent.setdefault(item, item)
+        if parent != item:
+            parent = self._parent[item] = self.find(parent)
+        return parent
+
+    def union(self, first: Any, second: Any) -> None:
+        root_first, root_second = self.find(first), self.find(second)
+        if root_first != root_second:
+            self._parent[root_second] = root_first
+
+    def groups(self) -> List[List[Any]]:
+        clusters: Dict[Any, List[Any]] = {}
+        for item in self._parent:
+            clusters.setdefault(self.find(item), []).append(item)
+        return [members for members in clusters.values() if len(members) > 1]
+
+
+class NearDuplicateConsolidator:
+    """
+    Finds and merges near-duplicate entries in memory sections.
+
+    Candidate pairs come from LSH banding over MinHash signatures; a pair is
+    merged when its estimated similarity reaches ``threshold``. Each cluster
+    collapses into the member found first in scan order, which receives the
+    newest member's value, the summed ``mention_count`` and the newest
+    timestamp as ``last_seen``.
+    """
+
+    def __init__(self, memory_manager, threshold: float = 0.8, num_perm: int = 64,
+                 bands: int = 8, batch_size: int = 1000, max_index_entries: int = 500_000):
+        """
+        Initialize the consolidator.
+
+        Args:
+            memory_manager: Memory manager whose storage is consolidated
+            threshold: Minimum estimated Jaccard similarity for a merge
+            num_perm: Number of MinHash permutations per signature
+            bands: Number of LSH bands; must divide ``num_perm``
+            batch_size: Entries read from storage per batch
+            max_index_entries: Upper bound on LSH buckets held in memory at once
+        """
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+
+        self.memory_manager = memory_manager
+        self.threshold = threshold
+        self.bands = bands
+        self.batch_size = batch_size
+        self.max_index_entries = max_index_entries
+        self.hasher = MinHasher(num_perm=num_perm)
+        self._band_width = (num_perm // bands) * 4  # Bytes per band of packed signature
+
+    async def _iter_entries(self, section: str):
+        """Yield entries with signatures, computing and storing missing ones."""
+        cursor = None
+
+        while True:
+            batch = await self.memory_manager.scan(section, after=cursor, limit=self.batch_size)
+            if not batch:
+                return
+            cursor = batch[-1]["cursor"]
+
+            computed: Dict[Tuple[str, Optional[int]], str] = {}
+            for entry in batch:
+                text = extract_text(entry["value"])
+                if not text.strip():
+                    continue
+
+                signature = entry.get("signature")
+                if signature:
+                    signature = bytes.fromhex(signature)
+                else:
+                    signature = self.hasher.signature(text)
+                    computed[(entry["key"], entry["session_id"])] = signature.hex()
+
+                yield entry["key"], entry["session_id"], signature
+
+            await self.memory_manager.store_signatures(section, computed)
+
+            if len(batch) < self.batch_size:
+                return
+
+    async def find_clusters(self, section: str) -> List[List[Tuple[str, Optional[int]]]]:
+        """
+        Find clusters of near-duplicate entries in a section.
+
+        Returns:
+            Lists of (key, session_id) identifiers, each with two or more members
+        """
+        section_stats = (await self.memory_manager.get_section_stats()).get(section, {})
+        total = section_stats.get("count", 0)
+        partitions = max(1, -(-total * self.bands // self.max_index_entries))
+
+        merged = _DisjointSet()
+        for partition in range(partitions):
+            # Bucket hash -> (identifier, signature) of the first entry seen
+            buckets: Dict[int, Tuple[Tuple[str, Optional[int]], bytes]] = {}
+
+            async for key, session_id, signature in self._iter_entries(section):
+                identifier = (key, session_id)
+                for band in range(self.bands):
+                    chunk = signature[band * self._band_width:(band + 1) * self._band_width]
+                    bucket = hash((band, session_id, chunk))
+                    if bucket % partitions != partition:
+                        continue
+
+                    first = buckets.get(bucket)
+                    if first is None:
+                        buckets[bucket] = (identifier, signature)
+                    elif (merged.find(first[0]) != merged.find(identifier) and
+                          self.hasher.similarity(first[1], signature) >= self.threshold):
+                        merged.union(first[0], identifier)
+
+        return merged.groups()
+
+    async def consolidate_section(self, section: str) -> int:
+        """
+        Merge near-duplicate clusters in a section.
+
+        Returns:
+            Number of entries removed by merging
+        """
+        removed = 0
+        for cluster in await self.find_clusters(section):
+            removed += await self._merge_cluster(section, cluster)
+
+        if removed:
+            logger.info(f"Consolidated {removed} near-duplicate entries in {section}")
+        return removed
+
+    async def _merge_cluster(self, section: str, cluster: List[Tuple[str, Optional[int]]]) -> int:
+        """Collapse a cluster into its first member."""
+        members = []
+        for key, session_id in cluster:
+            value = await self.memory_manager.get(section, key, session_id)
+            if value is not None:
+                members.append((key, session_id, value))
+        if len(members) < 2:
+            return 0
+
+        canonical_key, canonical_session, _ = members[0]
+        newest = max(members, key=lambda member: _parse_timestamp(member[2]) or _EPOCH)
+
+        merged_value = dict(newest[2]) if isinstance(newest[2], dict) else {"text": extract_text(newest[2])}
+        merged_value["mention_count"] = sum(
+            member[2].get("mention_count", 1) if isinstance(member[2], dict) else 1
+            for member in members
+        )
+        newest_time = _parse_timestamp(newest[2])
+        if newest_time is not None:
+            merged_value["last_seen"] = newest_time.isoformat()
+
+        await self.memory_manager.set(section, canonical_key, merged_value, canonical_session)
+        for key, session_id, _ in members[1:]:
+            await self.memory_manager.delete(section, key, session_id)
+
+        return len(members) - 1
@@ -0,0 +1,302 @@
+"""
+Streaming export and import of persistent memory for Nagatha Assistant.
+
+Exports are newline-delimited JSON (one entry per line) written through a
+compressor, so memory use stays constant regardless of how large the store is:
+
+- Entries are read from ``memory_entries`` and then ``memory_archive`` in
+  keyset-paginated batches ordered by id. Archived values are decompressed,
+  so the file does not depend on which tier an entry was in.
+- Incremental exports only include entries updated after a previous export's
+  high-water mark, which is recorded in the file footer.
+- Imports stream the file back and apply batched upserts keyed on
+  (section, key, session).
+
+Values are exported in their stored serialized form, so a round trip does not
+re-encode them. Deletions are not tracked, so an incremental export cannot
+remove entries on import.
+
+File layout::
+
+    {"type": "header", "format": "nagatha-memory", "version": 1, ...}
+    {"type": "entry", "section": "facts", "key": "...", ...}
+    ...
+    {"type": "footer", "entries": 42, "high_water_mark": "..."}
+"""
+
+import gzip
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, IO, Iterable, List, Optional
+
+from sqlalchemy import select, and_, update, insert, delete
+
+from nagatha_assistant.db import SessionLocal
+from nagatha_assistant.db_models import MemorySection, MemoryEntry, MemoryArchive
+from nagatha_assistant.utils.logger import get_logger
+
+logger = get_logger()
+
+EXPORT_FORMAT = "nagatha-memory"
+EXPORT_VERSION = 1
+
+
+def _open_compressed(path: str, mode: str) -> IO[str]:
+    """Open a text stream through the compressor implied by the file extension."""
+    if path.endswith(".zst"):
+        try:
+            import zstandard  # type: ignore
+        except ImportError as e:
+            raise ValueError("zstd compression requires the 'zstandard' package") from e
+        raw = open(path, mode + "b")
+        if mode == "w":
+            stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    """Serialize a datetime, treating naive values (SQLite) as UTC."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    """Parse a datetime written by :func:`_isoformat`."""
+    return datetime.fromisoformat(value) if value else None
+
+
+async def _iter_pages(session, model, section_ids: List[int], since_time: Optional[datetime],
+                      batch_size: int):
+    """Yield keyset-paginated pages of rows from an entry table."""
+    cursor = None
+    while section_ids:
+        conditions = [model.section_id.in_(section_ids)]
+        if since_time is not None:
+            conditions.append(model.updated_at > since_time)
+        if cursor is not None:
+            conditions.append(model.id > cursor)
+
+        stmt = select(model).where(and_(*conditions)).order_by(model.id).limit(batch_size)
+        batch = (await session.execute(stmt)).scalars().all()
+        if not batch:
+            return
+
+        yield batch
+        cursor = batch[-1].id
+
+        # Drop the page from the identity map so memory stays flat
+        session.expunge_all()
+
+
+async def export_memory(path: str, sections: Optional[Iterable[str]] = None,
+                        since: Optional[str] = None, batch_size: int = 1000) -> Dict[str, Any]:
+    """
+    Stream memory entries to a compressed NDJSON file.
+
+    Args:
+        path: Destination file; ``.gz`` and ``.zst`` extensions select compression
+        sections: Optional section names to export; defaults to all sections
+        since: High-water mark from a previous export; only entries updated
+            after it are written
+        batch_size: Entries fetched per keyset page
+
+    Returns:
+        Summary with ``file``, ``entries``, ``sections`` and ``high_water_mark``
+    """
+    since_time = _parse(since)
+    entries = 0
+    section_counts: Dict[str, int] = {}
+    newest: Optional[datetime] = None
+    wanted = set(sections) if sections is not None else None
+
+    async with SessionLocal() as session:
+        section_rows = (await session.execute(select(MemorySection.id, MemorySection.name))).all()
+        names = {section_id: name for section_id, name in section_rows}
+        section_ids = [section_id for section_id, name in section_rows
+                       if wanted is None or name in wanted]
+
+        with _open_compressed(path, "w") as out:
+            out.write(json.dumps({
+                "type": "header",
+                "format": EXPORT_FORMAT,
+                "version": EXPORT_VERSION,
+                "since": since,
+                "created_at": datetime.now(timezone.utc).isoformat()
+            }) + "\n")
+
+            for model in (MemoryEntry, MemoryArchive):
+                async for batch in _iter_pages(session, model, section_ids, since_time, batch_size):
+                    for entry in batch:
+                        section_name = names[entry.section_id]
+                        value = entry.value
+                        if model is MemoryArchive and value is not None:
+                            value = zlib.decompress(value).decode("utf-8")
+                        out.write(json.dumps({
+                            "type": "entry",
+                            "section": section_name,
+                            "key": entry.key,
+                            "value_type": entry.value_type,
+                            "value": value,
+                            "session_id": entry.session_id,
+                            "created_at": _isoformat(entry.created_at),
+                            "updated_at": _isoformat(entry.updated_at),
+                            "expires_at": _isoformat(entry.expires_at),
+                            "content_hash": entry.content_hash
+                        }) + "\n")
+                        section_counts[section_name] = section_counts.get(section_name, 0) + 1
+                        if entry.updated_at is not None and (newest is None or entry.updated_at > newest):
+                            newest = entry.updated_at
+
+                    entries += len(batch)
+
+            high_water_mark = _isoformat(newest) if newest is not None else since
+            out.write(json.dumps({
+                "type": "footer",
+                "entries": entries,
+                "high_water_mark": high_water_mark
+            }) + "\n")
+
+    logger.info(f"Exported {entries} memory entries to {path}")
+    return {
+        "file": path,
+        "entries": entries,
+        "sections": section_counts,
+        "high_water_mark": high_water_mark
+    }
+
+
+async def _section_ids(session, names: Iterable[str], cache: Dict[str, int]) -> None:
+    """Resolve section names to ids, creating missing sections."""
+    missing = [name for name in set(names) if name not in cache]
+    if not missing:
+        return
+
+    rows = (await session.execute(
+        select(MemorySection.id, MemorySection.name).where(MemorySection.name.in_(missing))
+    )).all()
+    cache.update({name: section_id for section_id, name in rows})
+
+    for name in missing:
+        if name not in cache:
+            section = MemorySection(name=name, persistence_level="permanent")
+            session.add(section)
+            await session.flush()
+            cache[name] = section.id
+
+
+async def _upsert_batch(session, batch: List[Dict[str, Any]], sections: Dict[str, int]) -> int:
+    """Insert or update a batch of exported entries, returning the number written."""
+    await _section_ids(session, (record["section"] for record in batch), sections)
+
+    # Later lines win when a batch contains the same entry twice
+    records = {}
+    for record in batch:
+        records[(sections[record["section"]], record["key"], record["session_id"])] = record
+
+    existing = {}
+    for section_id in {identity[0] for identity in records}:
+        keys = [identity[1] for identity in records if identity[0] == section_id]
+        rows = (await session.execute(
+            select(MemoryEntry.id, MemoryEntry.key, MemoryEntry.session_id).where(
+                MemoryEntry.section_id == section_id, MemoryEntry.key.in_(keys)
+            )
+        )).all()
+        for entry_id, key, session_id in rows:
+            existing[(section_id, key, session_id)] = entry_id
+
+    updates, inserts = [], []
+    for identity, record in records.items():
+        values = {
+            "value_type": record["value_type"],
+            "value": record["value"],
+            "updated_at": _parse(record["updated_at"]) or datetime.now(timezone.utc),
+            "expires_at": _parse(record.get("expires_at")),
+            "content_hash": record.get("content_hash"),
+            "minhash": None
+        }
+        if identity in existing:
+            updates.append({"id": existing[identity], **values})
+        else:
+            inserts.append({
+                "section_id": identity[0],
+                "key": identity[1],
+                "session_id": identity[2],
+                "created_at": _parse(record.get("created_at")) or datetime.now(timezone.utc),
+                **values
+            })
+
+    # Imported values supersede archived copies of the same entries
+    for section_id in {identity[0] for identity in records}:
+        keys = [identity[1] for identity in records if identity[0] == section_id]
+        rows = (await session.execute(
+            select(MemoryArchive.id, MemoryArchive.key, MemoryArchive.session_id).where(
+                MemoryArchive.section_id == section_id, MemoryArchive.key.in_(keys)
+            )
+        )).all()
+        stale = [row[0] for row in rows if (section_id, row[1], row[2]) in records]
+        if stale:
+            await session.execute(delete(MemoryArchive).where(MemoryArchive.id.in_(stale)))
+
+    if updates:
+        await session.execute(update(MemoryEntry), updates)
+    if inserts:
+        await session.execute(insert(MemoryEntry), inserts)
+    return len(records)
+
+
+async def import_memory(path: str, batch_size: int = 500) -> Dict[str, Any]:
+    """
+    Stream an export file back into ``memory_entries`` with batched upserts.
+
+    Args:
+        path: File written by :func:`export_memory`
+        batch_size: Entries upserted per transaction
+
+    Returns:
+        Summary with ``file`` and ``entries`` (number of entries written)
+    """
+    from nagatha_assistant.core.storage import DatabaseStorageBackend
+
+    written = 0
+    sections: Dict[str, int] = {}
+    batch: List[Dict[str, Any]] = []
+
+    with _open_compressed(path, "r") as source:
+        header = json.loads(source.readline() or "{}")
+        if header.get("format") != EXPORT_FORMAT:
+            raise ValueError(f"{path} is not a memory export")
+        if header.get("version", 0) > EXPORT_VERSION:
+            raise ValueError(f"Unsupported memory export version {header.get('version')}")
+
+        for line in source:
+            record = json.loads(line)
+            if record.get("type") != "entry":
+                continue
+
+            batch.append(record)
+            if len(batch) >= batch_size:
+                async with SessionLocal() as session:
+                    written += await _upsert_batch(session, batch, sections)
+                    await session.commit()
+                batch = []
+
+        if batch:
+            async with SessionLocal() as session:
+                written += await _upsert_batch(session, batch, sections)
+                await session.commit()
+
+    # Counters were bypassed by the bulk writes; recompute them once
+    await DatabaseStorageBackend().reconcile_stats()
+
+    logger.info(f"Imported {written} memory entries from {path}")
+    return {"file": path, "entries": written}
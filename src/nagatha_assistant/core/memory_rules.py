@@ -0,0 +1,235 @@
+"""
+Compiled content rules for autonomous memory storage.
+
+``MemoryTrigger`` runs every user and assistant message through keyword and
+pattern rules. This module compiles those rules once at import time and scans
+each message once:
+
+- The keywords of every rule are deduplicated into a single table, and each
+  keyword in it is looked up once as a substring of the lowercased message,
+  so rules sharing a keyword do not repeat the check.
+- The message is split into sentences once; sentence-level rules then only
+  look at sentences, and only for keywords the message actually contains.
+- Declarative fact statements are found with one alternation regex whose
+  named group records the matched verb, applied per sentence, so long
+  messages are no longer re-scanned once per match.
+
+Generated keys use a stable BLAKE2b hash rather than Python's salted
+``hash()``, so the same text maps to the same key across processes.
+"""
+
+import hashlib
+import re
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+# (keyword, score) groups for importance scoring, in evaluation order
+IMPORTANCE_RULES: Tuple[Tuple[Tuple[str, ...], float], ...] = (
+    (("prefer", "like", "dislike", "want", "need", "always", "never", "usually"), 0.1),  # Preferences
+    (("feel", "think", "enjoy", "frustrated", "happy", "style", "approach"), 0.15),  # Personality
+    (("is", "are", "was", "were", "will", "has", "have", "does", "do"), 0.05),  # Factual statements
+    (("my", "mine", "me", "i", "myself"), 0.1),  # Personal information
+    (("please", "thank", "help", "explain", "show", "tell"), 0.1),  # Interaction style
+)
+
+PREFERENCE_RULES = (
+    ("prefer", "preference"),
+    ("like", "positive_preference"),
+    ("dislike", "negative_preference"),
+    ("always", "strong_preference"),
+    ("never", "strong_negative_preference"),
+    ("usually", "general_preference"),
+)
+
+STYLE_RULES = (
+    ("formal", "formality_preference"),
+    ("casual", "informality_preference"),
+    ("detailed", "detail_preference"),
+    ("brief", "brevity_preference"),
+    ("explain", "explanation_preference"),
+    ("humor", "humor_preference"),
+    ("serious", "seriousness_preference"),
+)
+
+EMOTION_RULES = (
+    ("happy", "positive_emotion"),
+    ("frustrated", "negative_emotion"),
+    ("excited", "high_energy"),
+    ("calm", "low_energy"),
+    ("confused", "confusion_state"),
+    ("understand", "comprehension_state"),
+)
+
+TASK_KEYWORDS = ("working on", "task", "project", "goal", "trying to", "need to")
+
+FACT_VERBS = ("is", "are", "has", "have", "does", "can")
+
+# A terminated sentence, including leading whitespace after the previous terminator
+_SENTENCE = re.compile(r"[^.!?]*[.!?]")
+
+# "<word> <verb> <word>" with the verb captured by name
+_FACT_STATEMENT = re.compile(
+    r"\b\w+\s+(?P<verb>" + "|".join(FACT_VERBS) + r")\s+\w+", re.IGNORECASE
+)
+
+# The first word of a sentence containing each preference keyword
+_PREFERENCE_WORDS = {
+    keyword: re.compile(rf"\b\w*{keyword}\w*\b", re.IGNORECASE)
+    for keyword, _ in PREFERENCE_RULES
+}
+
+_ALL_KEYWORDS: Tuple[str, ...] = tuple(dict.fromkeys(
+    [keyword for keywords, _ in IMPORTANCE_RULES for keyword in keywords]
+    + [keyword for keyword, _ in PREFERENCE_RULES + STYLE_RULES + EMOTION_RULES]
+    + list(TASK_KEYWORDS)
+))
+
+
+def stable_hash(text: str, modulo: int = 10000) -> int:
+    """Hash text to a small integer that is identical across processes."""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % modulo
+
+
+class Sentence(NamedTuple):
+    """A terminated sentence of a message and its lowercased form."""
+    text: str
+    lower: str
+
+
+class MessageScan:
+    """
+    The result of scanning a message once.
+
+    Attributes:
+        content: Original message text
+        keywords: Rule keywords present anywhere in the message (case-insensitive)
+        sentences: Terminated sentences in message order
+    """
+
+    __slots__ = ("content", "keywords", "_sentences")
+
+    def __init__(self, content: str):
+        self.content = content
+        lower = content.lower()
+        self.keywords: FrozenSet[str] = frozenset(
+            keyword for keyword in _ALL_KEYWORDS if keyword in lower
+        )
+        self._sentences: Optional[List[Sentence]] = None
+
+    @property
+    def sentences(self) -> List[Sentence]:
+        """Split the message into sentences on first use."""
+        if self._sentences is None:
+            self._sentences = [
+                Sentence(match.group(), match.group().lower())
+                for match in _SENTENCE.finditer(self.content)
+            ]
+        return self._sentences
+
+    def importance(self) -> float:
+        """Sum the keyword scores of the importance rules."""
+        score = 0.0
+        for keywords, weight in IMPORTANCE_RULES:
+            score += sum(weight for keyword in keywords if keyword in self.keywords)
+        return score
+
+    def preferences(self) -> List[Tuple[str, str]]:
+        """
+        Find preference statements.
+
+        Returns:
+            (preference type, text) pairs, where the text runs from the first
+            word containing the keyword to the end of its sentence
+        """
+        found = []
+        for keyword, pref_type in PREFERENCE_RULES:
+            if keyword not in self.keywords:
+                continue
+            pattern = _PREFERENCE_WORDS[keyword]
+            for sentence in self.sentences:
+                if keyword not in sentence.lower:
+                    continue
+                match = pattern.search(sentence.text)
+                if match:
+                    found.append((pref_type, sentence.text[match.start():].strip()))
+        return found
+
+    def matched(self, rules: Tuple[Tuple[str, str], ...]) -> List[str]:
+        """Get the labels of keyword rules present in the message, in rule order."""
+        return [label for keyword, label in rules if keyword in self.keywords]
+
+    def facts(self) -> List[str]:
+        """Get distinct sentences containing a declarative fact statement."""
+        facts = []
+        seen = set()
+        for sentence in self.sentences:
+            if _FACT_STATEMENT.search(sentence.text):
+                fact = sentence.text.strip()
+                if fact not in seen:
+                    seen.add(fact)
+                    facts.append(fact)
+        return facts
+
+    def tasks(self, min_length: int = 15) -> List[str]:
+        """Get the first sentence long enough to describe a task, per task keyword."""
+        tasks = []
+        for keyword in TASK_KEYWORDS:
+            if keyword not in self.keywords:
+                continue
+            for sentence in self.sentences:
+                if keyword in sentence.lower:
+                    text = sentence.text.strip()
+                    if len(text) > min_length:
+                        tasks.append(text)
+                        break
+        return tasks
+
+
+class RuleProfiler:
+    """
+    Accumulates wall-clock time spent in each content rule.
+
+    Assign one to ``MemoryTrigger.profiler`` to collect timings; the
+    trigger does no timing work when no profiler is set.
+    """
+
+    def __init__(self):
+        self._timings: Dict[str, List[float]] = {}
+
+    @contextmanager
+    def measure(self, rule: str):
+        """Time the enclosed block under ``rule``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timing = self._timings.setdefault(rule, [0, 0.0])
+            timing[0] += 1
+            timing[1] += time.perf_counter() - start
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get the collected timings.
+
+        Returns:
+            Mapping of rule name to ``calls``, ``total_ms`` and ``mean_ms``
+        """
+        return {
+            rule: {
+                "calls": calls,
+                "total_ms": total * 1000,
+                "mean_ms": total * 1000 / calls if calls else 0.0
+            }
+            for rule, (calls, total) in self._timings.items()
+        }
+
+    def reset(self) -> None:
+        """Discard the collected timings."""
+        self._timings.clear()
+
+
+def measure(profiler: Optional[RuleProfiler], rule: str):
+    """Time a block with ``profiler`` if one is set."""
+    return profiler.measure(rule) if profiler is not None else nullcontext()
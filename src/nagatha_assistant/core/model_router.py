@@ -0,0 +1,443 @@
+"""
+Tiered model routing for conversation turns.
+
+Most turns are greetings, thanks and one-line acknowledgements that don't
+need the full model or a 4000 token budget. ``ModelRouter`` picks a tier and
+a ``max_tokens`` budget for every turn before its first completion:
+
+- Fast local heuristics decide the clear cases: acknowledgements go to the
+  cheap tier; code, links and long messages go to the standard tier.
+- Everything else is decided by two small online models over the same
+  features, trained on the logged outcomes of earlier turns: a logistic model
+  for the risk that a turn needs tools or a long reply, and a linear model
+  for the reply length, which sets the cheap tier's budget. Until enough
+  turns have been seen a length rule is used instead.
+- A cheap turn escalates to the standard tier when the model asks for tools
+  (the tool calls are kept; the answer after them is written by the standard
+  model) or when its reply was cut off by the budget (the completion is
+  repeated on the standard tier).
+- Every decision is appended to a JSON lines log with its latency, tokens,
+  cost and escalation, written off the event loop. The log is replayed into
+  the models when the router is created.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from nagatha_assistant.utils.logger import background_handler, get_logger
+from nagatha_assistant.utils.usage_tracker import usage_cost
+
+logger = get_logger()
+
+FEATURE_NAMES = (
+    "bias", "log_chars", "log_words", "lines", "questions", "code", "url",
+    "tool_hints", "reasoning_hints", "acknowledgement",
+)
+
+# Words that make up a greeting, thanks or acknowledgement
+ACKNOWLEDGEMENT_WORDS = {
+    "hi", "hello", "hey", "yo", "hiya", "thanks", "thank", "thx", "ty", "you", "so", "much",
+    "ok", "okay", "k", "cool", "nice", "great", "awesome", "perfect", "good", "morning",
+    "afternoon", "evening", "night", "bye", "goodbye", "later", "see", "ya", "lol", "haha",
+    "yes", "no", "yep", "yeah", "nope", "sure", "got", "it", "there", "nagatha", "np",
+}
+
+_WORD = re.compile(r"[\w']+")
+_CODE = re.compile(r"```|^\s{4,}\S|\b(def|class|import|function|SELECT)\b", re.MULTILINE)
+_URL = re.compile(r"https?://|www\.", re.IGNORECASE)
+_TOOL_HINTS = re.compile(
+    r"\b(search|look ?up|find|google|browse|website|remember|remind|note|notes|task|tasks|"
+    r"schedule|file|files|read|weather|news|latest|today|current|price|calculate|download|tool)\b",
+    re.IGNORECASE,
+)
+_REASONING_HINTS = re.compile(
+    r"\b(explain|why|how|compare|analy\w*|write|summar\w*|plan|step by step|code|debug|"
+    r"design|review|translate|essay)\b",
+    re.IGNORECASE,
+)
+
+
+def turn_features(user_message: str) -> List[float]:
+    """
+    Describe a user message for routing.
+
+    Args:
+        user_message: Message text
+
+    Returns:
+        Feature values in :data:`FEATURE_NAMES` order
+    """
+    words = _WORD.findall(user_message.lower())
+    acknowledgement = bool(words) and len(words) <= 6 and all(w in ACKNOWLEDGEMENT_WORDS for w in words)
+    return [
+        1.0,
+        math.log1p(len(user_message)),
+        math.log1p(len(words)),
+        min(user_message.count("\n") + 1, 10) / 10.0,
+        float(min(user_message.count("?"), 3)),
+        1.0 if _CODE.search(user_message) else 0.0,
+        1.0 if _URL.search(user_message) else 0.0,
+        float(min(len(_TOOL_HINTS.findall(user_message)), 3)),
+        float(min(len(_REASONING_HINTS.findall(user_message)), 3)),
+        1.0 if acknowledgement else 0.0,
+    ]
+
+
+class _OnlineModel:
+    """Linear or logistic regression trained one sample at a time."""
+
+    def __init__(self, size: int, logistic: bool, learning_rate: float, l2: float = 1e-4):
+        self.weights = [0.0] * size
+        self.logistic = logistic
+        self.learning_rate = learning_rate
+        self.l2 = l2
+
+    def predict(self, features: List[float]) -> float:
+        value = sum(w * x for w, x in zip(self.weights, features))
+        if self.logistic:
+            return 1.0 / (1.0 + math.exp(-max(-30.0, min(30.0, value))))
+        return value
+
+    def update(self, features: List[float], target: float) -> None:
+        error = self.predict(features) - target
+        for i, x in enumerate(features):
+            self.weights[i] -= self.learning_rate * (error * x + self.l2 * self.weights[i])
+
+
+@dataclass
+class ModelTier:
+    """A model and the largest reply budget it is given."""
+
+    name: str
+    model: str
+    max_tokens: int
+
+
+@dataclass
+class RouteDecision:
+    """
+    The tier chosen for a turn and the outcome of its completions.
+
+    ``model`` and ``max_tokens`` are what the next completion should use; they
+    change when the turn escalates, while ``tier`` keeps the original choice.
+    """
+
+    tier: str
+    model: str
+    max_tokens: int
+    reason: str
+    features: List[float]
+    risk: Optional[float] = None
+    predicted_tokens: Optional[int] = None
+    escalated: Optional[str] = None
+    started: float = field(default_factory=time.monotonic)
+    # Outcome of the turn's first completion, used for training
+    finish_reason: Optional[str] = None
+    tool_calls: int = 0
+    reply_tokens: Optional[int] = None
+    # Totals over all completions of the turn
+    completions: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+
+    def observe(self, response: Any, model: Optional[str] = None) -> None:
+        """
+        Add a completion of this turn to the outcome.
+
+        Args:
+            response: Chat completion response
+            model: Model the completion was made with (defaults to ``model``)
+        """
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        if not isinstance(prompt_tokens, int) or not isinstance(completion_tokens, int):
+            prompt_tokens = completion_tokens = None
+
+        if self.completions == 0:
+            choice = response.choices[0]
+            finish_reason = getattr(choice, "finish_reason", None)
+            self.finish_reason = finish_reason if isinstance(finish_reason, str) else None
+            self.tool_calls = len(choice.message.tool_calls or [])
+            self.reply_tokens = completion_tokens
+        self.completions += 1
+
+        if prompt_tokens is not None:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost_usd += usage_cost(model or self.model, prompt_tokens, completion_tokens)
+
+
+class ModelRouter:
+    """
+    Chooses a model tier and budget per turn and learns from the outcomes.
+
+    Attributes:
+        cheap: Tier tried first for simple turns
+        standard: Tier for everything else and for escalations
+        enabled: When false every turn uses the standard tier
+        log_path: JSON lines file of decisions and outcomes; ``None`` disables it
+        min_samples: Logged turns needed before the learned models are used
+        risk_threshold: Highest predicted escalation risk routed to the cheap tier
+    """
+
+    def __init__(self, cheap: ModelTier, standard: ModelTier, enabled: bool = True,
+                 log_path: Union[str, Path, None] = None, min_samples: int = 200,
+                 risk_threshold: float = 0.35, max_history: int = 5000):
+        self.cheap = cheap
+        self.standard = standard
+        self.enabled = enabled
+        self.log_path = Path(log_path) if log_path else None
+        self.min_samples = min_samples
+        self.risk_threshold = risk_threshold
+
+        self._risk = _OnlineModel(len(FEATURE_NAMES), logistic=True, learning_rate=0.05)
+        self._length = _OnlineModel(len(FEATURE_NAMES), logistic=False, learning_rate=0.01)
+        self.samples = 0
+        self._sink: Optional[logging.Handler] = None
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+        if self.log_path is not None:
+            self._replay(max_history)
+
+    @property
+    def learned(self) -> bool:
+        """Whether enough turns have been seen to trust the learned models."""
+        return self.samples >= self.min_samples
+
+    def route(self, user_message: str, model: Optional[str] = None) -> RouteDecision:
+        """
+        Choose the tier and budget for a turn.
+
+        Args:
+            user_message: The user's message
+            model: Model requested by the caller; pins the turn to the standard
+                budget on that model
+
+        Returns:
+            The routing decision
+        """
+        features = turn_features(user_message)
+        if model:
+            return self._decide(self.standard, features, "pinned", model=model)
+        if not self.enabled:
+            return self._decide(self.standard, features, "disabled")
+
+        named = dict(zip(FEATURE_NAMES, features))
+        if named["acknowledgement"]:
+            return self._decide(self.cheap, features, "acknowledgement")
+        if named["code"] or named["url"]:
+            return self._decide(self.standard, features, "code_or_link")
+        if named["log_words"] > math.log1p(80):
+            return self._decide(self.standard, features, "long_message")
+
+        if self.learned:
+            risk = self._risk.predict(features)
+            tier = self.cheap if risk < self.risk_threshold else self.standard
+            return self._decide(tier, features, "learned", risk=risk)
+
+        if named["tool_hints"] or named["reasoning_hints"] or named["log_words"] > math.log1p(12):
+            return self._decide(self.standard, features, "heuristic")
+        return self._decide(self.cheap, features, "heuristic")
+
+    def _decide(self, tier: ModelTier, features: List[float], reason: str,
+                model: Optional[str] = None, risk: Optional[float] = None) -> RouteDecision:
+        max_tokens = tier.max_tokens
+        predicted = None
+        if self.learned:
+            predicted = max(1, int(math.expm1(max(0.0, self._length.predict(features)))))
+            if tier is self.cheap:
+                # Twice the expected reply leaves room for the longer answers
+                max_tokens = max(128, min(tier.max_tokens, 2 * predicted + 64))
+        return RouteDecision(tier=tier.name, model=model or tier.model, max_tokens=max_tokens,
+                             reason=reason, features=features, risk=risk,
+                             predicted_tokens=predicted)
+
+    def escalation(self, decision: RouteDecision, response: Any) -> Optional[str]:
+        """
+        Check whether a cheap completion needs the standard tier.
+
+        Args:
+            decision: The turn's decision
+            response: The completion made with it
+
+        Returns:
+            ``"tools"`` if the model asked for tools, ``"truncated"`` if the
+            reply hit the budget, otherwise ``None``
+        """
+        if decision.tier != self.cheap.name or decision.escalated:
+            return None
+        choice = response.choices[0]
+        if choice.message.tool_calls:
+            return "tools"
+        if getattr(choice, "finish_reason", None) == "length":
+            return "truncated"
+        return None
+
+    def escalate(self, decision: RouteDecision, why: str) -> None:
+        """Move a turn to the standard tier."""
+        decision.escalated = why
+        decision.model = self.standard.model
+        decision.max_tokens = self.standard.max_tokens
+        logger.info("Escalated turn from %s to %s: %s", self.cheap.model, decision.model, why)
+
+    def finish(self, decision: RouteDecision, session_id: Optional[int] = None,
+               interface: str = "chat", error: bool = False) -> None:
+        """
+        Log a finished turn's outcome and learn from it.
+
+        Args:
+            decision: The turn's decision with its observed completions
+            session_id: Session of the turn
+            interface: Interface the turn came from
+            error: Whether the turn failed
+        """
+        latency = time.monotonic() - decision.started
+        stats = self._stats.setdefault(decision.tier, {
+            "turns": 0, "escalated": 0, "errors": 0, "latency": 0.0, "cost_usd": 0.0,
+        })
+        stats["turns"] += 1
+        stats["escalated"] += 1 if decision.escalated else 0
+        stats["errors"] += 1 if error else 0
+        stats["latency"] += latency
+        stats["cost_usd"] += decision.cost_usd
+
+        if error or decision.completions == 0:
+            return
+
+        entry = {
+            "ts": round(time.time(), 3),
+            "session_id": session_id,
+            "interface": interface,
+            "tier": decision.tier,
+            "reason": decision.reason,
+            "model": decision.model,
+            "max_tokens": decision.max_tokens,
+            "risk": None if decision.risk is None else round(decision.risk, 4),
+            "predicted_tokens": decision.predicted_tokens,
+            "features": [round(x, 4) for x in decision.features],
+            "escalated": decision.escalated,
+            "finish_reason": decision.finish_reason,
+            "tool_calls": decision.tool_calls,
+            "reply_tokens": decision.reply_tokens,
+            "completions": decision.completions,
+            "prompt_tokens": decision.prompt_tokens,
+            "completion_tokens": decision.completion_tokens,
+            "cost_usd": round(decision.cost_usd, 6),
+            "latency_ms": round(latency * 1000, 1),
+        }
+        self._learn(entry)
+        self._write(entry)
+
+    def _learn(self, entry: Dict[str, Any]) -> None:
+        """Train the models on one logged turn."""
+        features = entry.get("features")
+        if not isinstance(features, list) or len(features) != len(FEATURE_NAMES):
+            return
+        needed_more = bool(entry.get("tool_calls")) or entry.get("finish_reason") == "length"
+        self._risk.update(features, 1.0 if needed_more else 0.0)
+        reply_tokens = entry.get("reply_tokens")
+        # Truncated and tool-calling replies don't show how long the answer would be
+        if not needed_more and isinstance(reply_tokens, int):
+            self._length.update(features, math.log1p(reply_tokens))
+        self.samples += 1
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        if self.log_path is None:
+            return
+        try:
+            if self._sink is None:
+                handler = logging.FileHandler(self.log_path, delay=True, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                self._sink = background_handler(handler)
+            self._sink.handle(logging.makeLogRecord({
+                "name": "nagatha_assistant.routing", "levelno": logging.INFO,
+                "levelname": "INFO", "msg": json.dumps(entry),
+            }))
+        except Exception as e:
+            logger.warning(f"Failed to log routing decision: {e}")
+
+    def _replay(self, max_history: int) -> None:
+        """Train on the most recent turns in the log."""
+        if not self.log_path.exists():
+            return
+        try:
+            with self.log_path.open(encoding="utf-8") as fh:
+                lines = deque(fh, maxlen=max_history)
+        except OSError as e:
+            logger.warning(f"Could not read routing log {self.log_path}: {e}")
+            return
+        for line in lines:
+            try:
+                self._learn(json.loads(line))
+            except (ValueError, TypeError):
+                continue
+        logger.info("Model router trained on %d logged turns", self.samples)
+
+    def close(self) -> None:
+        """Write out and close the decision log."""
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get routing metrics.
+
+        Returns:
+            Tier configuration, whether the learned models are in use, and per
+            tier ``turns``, ``escalated``, ``errors``, ``avg_latency`` in
+            seconds and ``cost_usd``
+        """
+        tiers = {}
+        for tier in (self.cheap, self.standard):
+            stats = self._stats.get(tier.name, {})
+            turns = stats.get("turns", 0)
+            tiers[tier.name] = {
+                "model": tier.model,
+                "max_tokens": tier.max_tokens,
+                "turns": turns,
+                "escalated": stats.get("escalated", 0),
+                "errors": stats.get("errors", 0),
+                "avg_latency": round(stats.get("latency", 0.0) / turns, 4) if turns else 0.0,
+                "cost_usd": round(stats.get("cost_usd", 0.0), 6),
+            }
+        return {"enabled": self.enabled, "learned": self.learned, "samples": self.samples,
+                "tiers": tiers}
+
+
+_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """
+    Get the global model router, configured from the environment.
+
+    NAGATHA_ROUTER=false sends every turn to OPENAI_MODEL with the full
+    budget. NAGATHA_ROUTER_CHEAP_MODEL and NAGATHA_ROUTER_CHEAP_MAX_TOKENS
+    configure the cheap tier, NAGATHA_ROUTER_MAX_TOKENS the standard budget,
+    NAGATHA_ROUTER_LOG the decision log (empty to disable) and
+    NAGATHA_ROUTER_MIN_SAMPLES the turns needed before the learned models
+    are used.
+    """
+    global _router
+    if _router is None:
+        model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        _router = ModelRouter(
+            cheap=ModelTier("cheap", os.getenv("NAGATHA_ROUTER_CHEAP_MODEL", model),
+                            int(os.getenv("NAGATHA_ROUTER_CHEAP_MAX_TOKENS", "400"))),
+            standard=ModelTier("standard", model, int(os.getenv("NAGATHA_ROUTER_MAX_TOKENS", "4000"))),
+            enabled=os.getenv("NAGATHA_ROUTER", "true").lower() not in ("0", "false", "no", "off"),
+            log_path=os.getenv("NAGATHA_ROUTER_LOG", ".nagatha_routing.jsonl") or None,
+            min_samples=int(os.getenv("NAGATHA_ROUTER_MIN_SAMPLES", "200")),
+        )
+    return _router
@@ -138,7 +138,8 @@ class BasePlugin(ABC):
     
     def subscribe_to_events(self, pattern: str, handler: EventHandler, 
                           priority_filter: Optional[Any] = None,
-                          source_filter: Optional[str] = None) -> int:
+                          source_filter: Optional[str] = None,
+                          mode: Optional[str] = None) -> int:
         """
         Subscribe to events with automatic cleanup on plugin stop.
         
@@ -147,12 +148,13 @@ class BasePlugin(ABC):
             handler: Event handler function
             priority_filter: Filter by event priority
             source_filter: Filter by event source
+            mode: "inline" or "threaded" for a sync handler, see EventBus.subscribe
             
         Returns:
             Subscription ID
         """
         subscription_id = self._event_bus.subscribe(
-            pattern, handler, priority_filter, source_filter
+            pattern, handler, priority_filter, source_filter, mode=mode
         )
         self._event_subscriptions.append(subscription_id)
         return subscription_id
@@ -0,0 +1,260 @@
+"""
+Per-session actors that serialize conversation turns.
+
+A turn reads the session's recent context, calls the model and writes the
+reply. When two messages for the same session arrive close together (a
+Discord user typing in several short messages is the common case) running
+their turns concurrently means both read the same context, both pay for a
+full completion, and the second reply ignores the first. ``SessionActors``
+gives every active session a mailbox drained by a single worker task:
+
+- Turns of one session run strictly one after another, in arrival order.
+  Different sessions still run concurrently.
+- With a coalescing window, the worker waits that long after the first
+  message of a burst and merges every compatible message that arrived in
+  the meantime, including those queued behind a running turn, into one
+  turn. Each sender gets the reply of the merged turn.
+- A worker that has been idle for ``idle_timeout`` exits and its actor is
+  dropped, so sessions that have gone quiet cost nothing.
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from nagatha_assistant.utils.logger import get_logger
+
+logger = get_logger()
+
+# Handler running one turn: handler(session_id, user_message, **options)
+TurnHandler = Callable[..., Awaitable[Any]]
+
+# Session whose turn the current task is running, so a nested call for the
+# same session runs inline instead of waiting on its own mailbox
+_running_session: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "nagatha_running_session", default=None
+)
+
+
+@dataclass
+class _Envelope:
+    """A message waiting in a session's mailbox."""
+
+    user_message: str
+    options: Dict[str, Any]
+    mergeable: bool
+    future: asyncio.Future
+    received: float = field(default_factory=time.monotonic)
+
+    def key(self) -> Tuple[Any, ...]:
+        """Options that must match for two messages to share a turn."""
+        return tuple(sorted(self.options.items(), key=lambda item: item[0]))
+
+
+class _SessionActor:
+    """Mailbox and worker task of one session."""
+
+    def __init__(self, session_id: int):
+        self.session_id = session_id
+        self.loop = asyncio.get_running_loop()
+        self.mailbox: List[_Envelope] = []
+        self.arrived = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class SessionActors:
+    """
+    Registry of per-session actors running turns through one handler.
+
+    Attributes:
+        handler: Coroutine function running a single turn
+        coalesce_window: Seconds to collect a burst before its turn starts;
+            0 disables coalescing
+        max_batch: Most messages merged into one turn
+        idle_timeout: Seconds a worker waits for mail before its actor is evicted
+        separator: Text joining merged messages
+    """
+
+    def __init__(self, handler: TurnHandler, coalesce_window: float = 0.0, max_batch: int = 10,
+                 idle_timeout: float = 300.0, separator: str = "\n"):
+        self.handler = handler
+        self.coalesce_window = coalesce_window
+        self.max_batch = max(1, max_batch)
+        self.idle_timeout = idle_timeout
+        self.separator = separator
+
+        self._actors: Dict[int, _SessionActor] = {}
+        self._stats = {"messages": 0, "turns": 0, "coalesced": 0, "evicted": 0, "failed": 0}
+
+    async def submit(self, session_id: int, user_message: str, mergeable: bool = True,
+                     **options: Any) -> Any:
+        """
+        Queue a message for its session and wait for the turn's result.
+
+        Args:
+            session_id: Session the message belongs to
+            user_message: Message text
+            mergeable: Whether the message may share a turn with others
+            **options: Passed to the handler; only messages with equal options are merged
+
+        Returns:
+            The handler's result for the turn that included the message
+        """
+        if _running_session.get() == session_id:
+            # Called from inside this session's own turn; queueing would deadlock
+            return await self.handler(session_id, user_message, **options)
+
+        actor = self._actor(session_id)
+        future = actor.loop.create_future()
+        actor.mailbox.append(_Envelope(user_message, options, mergeable, future))
+        actor.arrived.set()
+        self._stats["messages"] += 1
+        if actor.task is None or actor.task.done():
+            actor.task = actor.loop.create_task(self._work(actor))
+        return await future
+
+    def _actor(self, session_id: int) -> _SessionActor:
+        actor = self._actors.get(session_id)
+        if actor is None or actor.loop is not asyncio.get_running_loop():
+            # New session, or an actor left behind by an event loop that has since closed
+            actor = self._actors[session_id] = _SessionActor(session_id)
+        return actor
+
+    async def _work(self, actor: _SessionActor) -> None:
+        """Run the session's turns until it has been idle for ``idle_timeout``."""
+        _running_session.set(actor.session_id)
+        try:
+            while True:
+                if not actor.mailbox:
+                    actor.arrived.clear()
+                    try:
+                        await asyncio.wait_for(actor.arrived.wait(), self.idle_timeout)
+                    except asyncio.TimeoutError:
+                        if not actor.mailbox:
+                            # No await between this check and the removal, so
+                            # no message can slip in unseen
+                            self._evict(actor)
+                            return
+                        continue
+
+                if self.coalesce_window > 0:
+                    delay = actor.mailbox[0].received + self.coalesce_window - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                batch = self._take_batch(actor)
+                if batch:
+                    await self._run(actor, batch)
+        finally:
+            if self._actors.get(actor.session_id) is actor and not actor.mailbox:
+                self._actors.pop(actor.session_id, None)
+
+    def _take_batch(self, actor: _SessionActor) -> List[_Envelope]:
+        """Remove the next turn's messages from the mailbox."""
+        # Senders that gave up waiting don't need a turn
+        actor.mailbox = [envelope for envelope in actor.mailbox if not envelope.future.done()]
+        if not actor.mailbox:
+            return []
+
+        first = actor.mailbox.pop(0)
+        batch = [first]
+        if self.coalesce_window > 0 and first.mergeable:
+            key = first.key()
+            remaining = []
+            for envelope in actor.mailbox:
+                # Merge only contiguous compatible messages so order is kept
+                if remaining or len(batch) >= self.max_batch or not envelope.mergeable \
+                        or envelope.key() != key:
+                    remaining.append(envelope)
+                else:
+                    batch.append(envelope)
+            actor.mailbox = remaining
+        return batch
+
+    async def _run(self, actor: _SessionActor, batch: List[_Envelope]) -> None:
+        """Run one turn for a batch and hand the result to every sender."""
+        user_message = self.separator.join(envelope.user_message for envelope in batch)
+        if len(batch) > 1:
+            self._stats["coalesced"] += len(batch) - 1
+            logger.info("Session %s: merged %d messages into one turn", actor.session_id, len(batch))
+        self._stats["turns"] += 1
+
+        try:
+            result = await self.handler(actor.session_id, user_message, **batch[0].options)
+        except asyncio.CancelledError:
+            for envelope in batch:
+                envelope.future.cancel()
+            raise
+        except Exception as e:
+            self._stats["failed"] += 1
+            for envelope in batch:
+                if not envelope.future.done():
+                    envelope.future.set_exception(e)
+            return
+
+        for envelope in batch:
+            if not envelope.future.done():
+                envelope.future.set_result(result)
+
+    def _evict(self, actor: _SessionActor) -> None:
+        if self._actors.get(actor.session_id) is actor:
+            del self._actors[actor.session_id]
+            self._stats["evicted"] += 1
+            logger.debug("Evicted idle actor for session %s", actor.session_id)
+
+    async def stop(self) -> None:
+        """Cancel all workers and fail the messages still waiting."""
+        actors = list(self._actors.values())
+        self._actors.clear()
+        for actor in actors:
+            for envelope in actor.mailbox:
+                if not envelope.future.done():
+                    envelope.future.cancel()
+            actor.mailbox.clear()
+            if actor.task is not None and not actor.task.done():
+                actor.task.cancel()
+                try:
+                    await actor.task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get actor and mailbox metrics.
+
+        Returns:
+            Counters for ``messages``, ``turns``, ``coalesced`` messages,
+            ``evicted`` actors and ``failed`` turns, plus the number of
+            ``active`` actors and messages ``queued`` in their mailboxes
+        """
+        return {
+            **self._stats,
+            "active": len(self._actors),
+            "queued": sum(len(actor.mailbox) for actor in self._actors.values()),
+            "coalesce_window": self.coalesce_window,
+        }
+
+
+def actors_from_env(handler: TurnHandler) -> SessionActors:
+    """
+    Create session actors configured from the environment.
+
+    NAGATHA_COALESCE_WINDOW_MS sets the coalescing window (default 0, off),
+    NAGATHA_COALESCE_MAX_MESSAGES the largest merge and
+    NAGATHA_SESSION_IDLE_SECONDS the idle time before eviction.
+
+    Args:
+        handler: Coroutine function running a single turn
+
+    Returns:
+        The configured registry
+    """
+    return SessionActors(
+        handler,
+        coalesce_window=float(os.getenv("NAGATHA_COALESCE_WINDOW_MS", "0")) / 1000.0,
+        max_batch=int(os.getenv("NAGATHA_COALESCE_MAX_MESSAGES", "10")),
+        idle_timeout=float(os.getenv("NAGATHA_SESSION_IDLE_SECONDS", "300")),
+    )
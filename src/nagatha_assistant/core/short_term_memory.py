@@ -108,6 +108,10 @@ class ShortTermMemory:
     - Real-time context updates
     """
     
+    # Sorted set of session IDs scored by last activity, so active sessions
+    # can be listed and counted without a KEYS scan
+    ACTIVE_SESSIONS_KEY = "active_sessions"
+    
     def __init__(self, redis_url: str = None):
         """
         Initialize the short-term memory system.
@@ -311,11 +315,11 @@ class ShortTermMemory:
             
             # Store in Redis
             key = f"session_state:{session_id}"
-            await self.redis_client.setex(
-                key,
-                self.default_ttl,
-                json.dumps(current_state.to_dict())
-            )
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.setex(key, self.default_ttl, json.dumps(current_state.to_dict()))
+                pipe.zadd(self.ACTIVE_SESSIONS_KEY,
+                          {str(session_id): current_state.last_activity.timestamp()})
+                await pipe.execute()
             
             logger.debug(f"Updated session state for {session_id}")
             
@@ -423,6 +427,7 @@ class ShortTermMemory:
             # Clear session state
             state_key = f"session_state:{session_id}"
             await self.redis_client.delete(state_key)
+            await self.redis_client.zrem(self.ACTIVE_SESSIONS_KEY, str(session_id))
             
             # Clear individual conversation entries
             pattern = f"conversation:{session_id}:*"
@@ -446,15 +451,15 @@ class ShortTermMemory:
             return []
         
         try:
-            pattern = "session_state:*"
-            keys = await self.redis_client.keys(pattern)
+            # Drop sessions whose state has expired
+            cutoff = datetime.now(timezone.utc).timestamp() - self.default_ttl
+            await self.redis_client.zremrangebyscore(self.ACTIVE_SESSIONS_KEY, "-inf", cutoff)
+            members = await self.redis_client.zrange(self.ACTIVE_SESSIONS_KEY, 0, -1)
             
             session_ids = []
-            for key in keys:
-                # Extract session ID from key format "session_state:{session_id}"
-                session_id = key.split(":")[1]
+            for member in members:
                 try:
-                    session_ids.append(int(session_id))
+                    session_ids.append(int(member))
                 except ValueError:
                     continue
             
@@ -464,6 +469,24 @@ class ShortTermMemory:
             logger.error(f"Error getting active sessions: {e}")
             return []
     
+    async def count_active_sessions(self) -> int:
+        """
+        Count active sessions without listing them.
+        
+        Returns:
+            Number of sessions active within the default TTL
+        """
+        if not self._running or not self.redis_client:
+            return 0
+        
+        try:
+            cutoff = datetime.now(timezone.utc).timestamp() - self.default_ttl
+            return await self.redis_client.zcount(self.ACTIVE_SESSIONS_KEY, f"({cutoff}", "+inf")
+            
+        except RedisError as e:
+            logger.error(f"Error counting active sessions: {e}")
+            return 0
+    
     async def _update_session_activity(self, session_id: int) -> None:
         """Update session activity timestamp."""
         try:
@@ -71,7 +71,7 @@ class ChatSlashCommand(BaseSlashCommand):
             session_id = await start_session()
             
             # Get AI response
-            response = await send_message(session_id, message)
+            response = await send_message(session_id, message, interface="discord")
             
             # Split long responses (Discord limit is 2000 chars)
             if len(response) > 2000:
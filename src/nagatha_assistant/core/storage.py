@@ -5,22 +5,32 @@ This module provides different storage backends for the memory system,
 including database storage, Redis storage, and in-memory caching.
 """
 
+import bisect
+import hashlib
+import itertools
 import json
+import pickle
+import time
+import zlib
 from abc import ABC, abstractmethod
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Union
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from sqlalchemy import select, delete, and_, or_
+from sqlalchemy import select, delete, update, insert, and_, or_, func
 from sqlalchemy.exc import IntegrityError
 import redis.asyncio as redis
 from redis.exceptions import RedisError
 
-from nagatha_assistant.db import SessionLocal
-from nagatha_assistant.db_models import MemorySection, MemoryEntry
+from nagatha_assistant.db import SessionLocal, increment_row
+from nagatha_assistant.db_models import MemorySection, MemoryEntry, MemoryStat, MemoryArchive
 from nagatha_assistant.utils.logger import setup_logger_with_env_control, get_logger
 
 logger = get_logger()
 
+# Sections written as time-ordered logs; backends without an ordered index
+# keep an explicit append log for these so tail() reads are O(limit)
+APPEND_LOG_SECTIONS = ("command_history", "conversation_context")
+
 
 class StorageBackend(ABC):
     """Abstract base class for storage backends."""
@@ -56,11 +66,309 @@ class StorageBackend(ABC):
     async def cleanup_expired(self) -> int:
         """Clean up expired entries."""
         pass
+    
+    async def remove_duplicates(self, section: str) -> int:
+        """
+        Remove entries whose value exactly duplicates an earlier entry.
+        
+        This generic implementation only sees the keys ``list_keys(section)``
+        returns, i.e. entries without a session, fetches every value and keeps
+        the first copy listed. Backends that store content hashes override it
+        and deduplicate within every session scope.
+        
+        Args:
+            section: Section to deduplicate
+        
+        Returns:
+            Number of entries removed
+        """
+        seen = set()
+        removed = 0
+        for key in await self.list_keys(section):
+            value = await self.get(section, key)
+            if value is None:
+                continue
+            digest = content_hash(value)
+            if digest in seen:
+                if await self.delete(section, key):
+                    removed += 1
+            else:
+                seen.add(digest)
+        return removed
+    
+    async def tail(self, section: str, session_id: Optional[int] = None, limit: int = 100,
+                   before: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        Read the most recently written entries of a section, newest first.
+        
+        Args:
+            section: Section to read
+            session_id: Optional session to filter by; None reads all sessions
+            limit: Maximum number of entries to return
+            before: Cursor of the oldest entry from the previous page
+        
+        Returns:
+            Entries in the :meth:`search` format plus a ``cursor`` key. This
+            generic implementation sorts the whole section by the value's
+            ``timestamp`` and uses the position as the cursor.
+        """
+        results = await self.search(section, "", session_id)
+        results.sort(key=lambda x: x.get("value", {}).get("timestamp", "")
+                     if isinstance(x.get("value"), dict) else "", reverse=True)
+        start = 0 if before is None else before + 1
+        page = results[start:start + limit]
+        for position, entry in enumerate(page, start):
+            entry["cursor"] = position
+        return page
+    
+    async def list_entries(self, section: str, session_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Read every live entry of one scope together with its expiry time.
+        
+        Args:
+            section: Section to read
+            session_id: Session scope; None for entries without a session
+        
+        Returns:
+            Entries with ``key``, ``value`` and ``expires_at`` (None when the
+            entry does not expire). This generic implementation reads the
+            keys one by one and cannot see expiry times.
+        """
+        entries = []
+        for key in await self.list_keys(section, session_id):
+            value = await self.get(section, key, session_id)
+            if value is not None:
+                entries.append({"key": key, "value": value, "expires_at": None})
+        return entries
+    
+    async def scan(self, section: str, after: Optional[Any] = None,
+                   limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Read a batch of entries in a stable order for incremental processing.
+        
+        Args:
+            section: Section to scan
+            after: Cursor returned with the last entry of the previous batch
+            limit: Maximum number of entries to return
+        
+        Returns:
+            Entries with ``cursor``, ``key``, ``value``, ``session_id`` and
+            ``signature`` (a stored MinHash signature, or None) keys. This
+            generic implementation only covers global entries.
+        """
+        keys = sorted(await self.list_keys(section))
+        if after is not None:
+            keys = [key for key in keys if key > after]
+        
+        entries = []
+        for key in keys[:limit]:
+            value = await self.get(section, key)
+            if value is not None:
+                entries.append({"cursor": key, "key": key, "value": value,
+                                "session_id": None, "signature": None})
+        return entries
+    
+    async def set_many(self, entries: List[Tuple[str, str, Any, Optional[int], Optional[datetime]]],
+                       session=None) -> None:
+        """
+        Store several values, in one transaction where the backend supports it.
+        
+        Args:
+            entries: (section, key, value, session_id, expires_at) tuples, applied in order
+            session: Optional open database session to write in; the caller
+                commits it. Backends without a database ignore it.
+        """
+        for section, key, value, session_id, expires_at in entries:
+            await self.set(section, key, value, session_id, expires_at)
+    
+    async def set_signatures(self, section: str,
+                             signatures: Dict[Tuple[str, Optional[int]], str]) -> None:
+        """
+        Persist MinHash signatures for entries so they are not recomputed.
+        
+        Args:
+            section: Section the entries belong to
+            signatures: Mapping of (key, session_id) to a hex-encoded signature
+        """
+        return None
+    
+    async def record_access(self, section: str,
+                            accesses: Dict[Tuple[str, Optional[int]], Tuple[int, datetime]]) -> None:
+        """
+        Apply a batch of buffered read counts.
+        
+        Args:
+            section: Section the entries belong to
+            accesses: Mapping of (key, session_id) to (read count, last read time)
+        """
+        return None
+    
+    async def archive_cold(self, section: str, cutoff: datetime, limit: int = 1000) -> int:
+        """
+        Move entries not read or written since ``cutoff`` to cold storage.
+        
+        Archived entries are promoted back by :meth:`get`. Backends without
+        a cold tier archive nothing.
+        
+        Returns:
+            Number of entries archived
+        """
+        return 0
+    
+    async def get_access_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get access tracking totals per section.
+        
+        Returns:
+            Mapping of section name to ``entries`` (hot), ``archived``,
+            ``accesses`` (estimated reads) and ``last_accessed_at``
+        """
+        return {}
+    
+    async def get_stats(self) -> List[Dict[str, Any]]:
+        """
+        Get maintained entry counters.
+        
+        Returns:
+            One row per (section, session) with ``section``, ``session_id``,
+            ``count`` and ``bytes`` keys. Backends without counters return
+            an empty list.
+        """
+        return []
+    
+    async def reconcile_stats(self) -> int:
+        """
+        Recompute maintained counters from the stored entries.
+        
+        Returns:
+            Number of counter rows that had drifted and were corrected
+        """
+        return 0
+
+
+def content_hash(value: Any) -> str:
+    """
+    Compute a stable hash of a value for exact-duplicate detection.
+    
+    The value is serialized as canonical JSON (sorted keys, no insignificant
+    whitespace) so that equal values hash equally regardless of dict order.
+    """
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Attach UTC to a naive datetime (SQLite returns stored times without a zone)."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _value_size(value: Any) -> int:
+    """Approximate stored size of a value (length of its serialized form)."""
+    if isinstance(value, str):
+        return len(value)
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+class StatsCounter:
+    """In-process entry and byte counters keyed by (section, session_id)."""
+    
+    def __init__(self):
+        self._counters: Dict[Tuple[str, Optional[int]], List[int]] = {}
+    
+    def apply(self, section: str, session_id: Optional[int], count_delta: int, bytes_delta: int) -> None:
+        """Adjust the counters for a section/session pair."""
+        counter = self._counters.get((section, session_id))
+        if counter is None:
+            counter = self._counters[(section, session_id)] = [0, 0]
+        counter[0] += count_delta
+        counter[1] += bytes_delta
+    
+    def rows(self) -> List[Dict[str, Any]]:
+        """Return the counters in the :meth:`StorageBackend.get_stats` format."""
+        return [
+            {"section": section, "session_id": session_id, "count": counter[0], "bytes": counter[1]}
+            for (section, session_id), counter in self._counters.items()
+            if counter[0] or counter[1]
+        ]
+    
+    def replace(self, actual: Dict[Tuple[str, Optional[int]], List[int]]) -> int:
+        """Replace all counters with recomputed values, returning the number corrected."""
+        corrected = 0
+        for scope in set(self._counters) | set(actual):
+            if self._counters.get(scope, [0, 0]) != actual.get(scope, [0, 0]):
+                corrected += 1
+        self._counters = {scope: list(counter) for scope, counter in actual.items()}
+        return corrected
+
+
+class AppendLog:
+    """
+    Append-only sequence of keys with newest-first keyset reads.
+    
+    Rewritten or deleted keys leave stale positions behind that are skipped
+    on read and dropped when the log is compacted during appends.
+    """
+    
+    def __init__(self):
+        self._seqs: List[int] = []
+        self._keys: List[str] = []
+        self._live: Dict[str, int] = {}
+    
+    def append(self, key: str, seq: int) -> None:
+        """Record that a key was written with the given (increasing) sequence number."""
+        self._seqs.append(seq)
+        self._keys.append(key)
+        self._live[key] = seq
+        if len(self._seqs) > 2 * len(self._live) + 64:
+            self._compact()
+    
+    def discard(self, key: str) -> None:
+        """Forget a deleted key."""
+        self._live.pop(key, None)
+    
+    def position(self, key: str) -> Optional[int]:
+        """Get the sequence number a live key was last written with."""
+        return self._live.get(key)
+    
+    def restore(self, key: str, seq: int) -> None:
+        """Put a key back at an earlier sequence number, keeping the log ordered."""
+        index = bisect.bisect_left(self._seqs, seq)
+        # The old position may still be there if the log wasn't compacted since
+        if index == len(self._seqs) or self._seqs[index] != seq:
+            self._seqs.insert(index, seq)
+            self._keys.insert(index, key)
+        self._live[key] = seq
+    
+    def iter_newest(self, before: Optional[int] = None):
+        """Yield (seq, key) pairs newest first, starting below ``before``."""
+        end = len(self._seqs) if before is None else bisect.bisect_left(self._seqs, before)
+        for index in range(end - 1, -1, -1):
+            key = self._keys[index]
+            if self._live.get(key) == self._seqs[index]:
+                yield self._seqs[index], key
+    
+    def _compact(self) -> None:
+        """Drop stale positions."""
+        live = sorted((seq, key) for key, seq in self._live.items())
+        self._seqs = [seq for seq, _ in live]
+        self._keys = [key for _, key in live]
 
 
 class RedisStorageBackend(StorageBackend):
     """Redis-backed storage implementation for fast, temporary storage."""
     
+    # Per-section counter hashes and the set of sections that have one
+    STATS_KEY_PREFIX = "memory_stats:"
+    STATS_SECTIONS_KEY = "memory_stats_sections"
+    
+    # Sorted sets of entries scored by write time, for APPEND_LOG_SECTIONS
+    LOG_KEY_PREFIX = "memory_log:"
+    
     def __init__(self, redis_url: str = None):
         """
         Initialize Redis storage backend.
@@ -148,13 +456,29 @@ class RedisStorageBackend(StorageBackend):
             
             if expires_at:
                 ttl = int((expires_at - datetime.now(timezone.utc)).total_seconds())
-                if ttl > 0:
-                    await self.redis_client.setex(redis_key, ttl, serialized_value)
-                else:
+                if ttl <= 0:
                     # Already expired
                     return
             else:
-                await self.redis_client.setex(redis_key, self.default_ttl, serialized_value)
+                ttl = self.default_ttl
+            
+            # SET ... GET returns the previous value so the counters can be
+            # adjusted without a separate round trip.
+            previous = await self.redis_client.set(redis_key, serialized_value, ex=ttl, get=True)
+            await self._apply_stats(
+                section,
+                session_id,
+                0 if previous is not None else 1,
+                len(serialized_value) - (len(previous) if previous is not None else 0),
+            )
+            
+            if section in APPEND_LOG_SECTIONS:
+                member = json.dumps([session_id, key])
+                score = time.time() * 1_000_000  # Microseconds keep scores exact in a double
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for log_key in self._log_keys(section, session_id):
+                        pipe.zadd(log_key, {member: score})
+                    await pipe.execute()
             
             logger.debug(f"Stored in Redis: {section}/{key} (session: {session_id})")
             
@@ -168,8 +492,16 @@ class RedisStorageBackend(StorageBackend):
         
         try:
             redis_key = self._make_key(section, key, session_id)
-            result = await self.redis_client.delete(redis_key)
-            return result > 0
+            previous = await self.redis_client.getdel(redis_key)
+            if previous is None:
+                return False
+            
+            await self._apply_stats(section, session_id, -1, -len(previous))
+            if section in APPEND_LOG_SECTIONS:
+                member = json.dumps([session_id, key])
+                for log_key in self._log_keys(section, session_id):
+                    await self.redis_client.zrem(log_key, member)
+            return True
             
         except RedisError as e:
             logger.error(f"Error deleting value from Redis: {e}")
@@ -213,6 +545,32 @@ class RedisStorageBackend(StorageBackend):
             logger.error(f"Error listing keys from Redis: {e}")
             return []
     
+    async def list_entries(self, section: str, session_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read a scope's values and remaining TTLs with one pipelined round trip."""
+        keys = await self.list_keys(section, session_id)
+        if not keys:
+            return []
+        
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    redis_key = self._make_key(section, key, session_id)
+                    pipe.get(redis_key)
+                    pipe.pttl(redis_key)
+                replies = await pipe.execute()
+        except RedisError as e:
+            logger.error(f"Error listing entries from Redis: {e}")
+            return []
+        
+        now = datetime.now(timezone.utc)
+        entries = []
+        for key, value, ttl_ms in zip(keys, replies[::2], replies[1::2]):
+            if value is None:
+                continue  # Expired since it was listed
+            expires_at = now + timedelta(milliseconds=ttl_ms) if ttl_ms and ttl_ms > 0 else None
+            entries.append({"key": key, "value": self._deserialize_value(value), "expires_at": expires_at})
+        return entries
+    
     async def search(self, section: str, query: str, session_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """Search for entries in Redis storage."""
         if not self._running or not self.redis_client:
@@ -246,6 +604,140 @@ class RedisStorageBackend(StorageBackend):
         """Clean up expired entries in Redis."""
         # Redis handles TTL automatically, so no manual cleanup needed
         return 0
+    
+    def _log_keys(self, section: str, session_id: Optional[int]) -> List[str]:
+        """Sorted sets an entry is logged in: section-wide and, if scoped, per session."""
+        keys = [f"{self.LOG_KEY_PREFIX}{section}"]
+        if session_id:
+            keys.append(f"{self.LOG_KEY_PREFIX}{section}:{session_id}")
+        return keys
+    
+    async def tail(self, section: str, session_id: Optional[int] = None, limit: int = 100,
+                   before: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """Read newest entries from the section's sorted-set log, using the score as the cursor."""
+        if section not in APPEND_LOG_SECTIONS:
+            return await super().tail(section, session_id, limit, before)
+        if not self._running or not self.redis_client:
+            return []
+        
+        try:
+            log_key = self._log_keys(section, session_id)[-1]
+            upper = "+inf" if before is None else f"({before}"
+            results = []
+            
+            while len(results) < limit:
+                members = await self.redis_client.zrevrangebyscore(
+                    log_key, upper, "-inf", start=0, num=limit - len(results), withscores=True
+                )
+                if not members:
+                    break
+                
+                refs = [json.loads(member) for member, _ in members]
+                values = await self.redis_client.mget(
+                    [self._make_key(section, key, entry_session) for entry_session, key in refs]
+                )
+                
+                stale = []
+                for (member, score), (entry_session, key), value in zip(members, refs, values):
+                    if value is None:
+                        # Expired; drop it from the log
+                        stale.append(member)
+                        continue
+                    results.append({
+                        "key": key,
+                        "value": self._deserialize_value(value),
+                        "section": section,
+                        "session_id": entry_session,
+                        "cursor": score
+                    })
+                
+                if stale:
+                    await self.redis_client.zrem(log_key, *stale)
+                upper = f"({members[-1][1]}"
+            
+            return results
+            
+        except RedisError as e:
+            logger.error(f"Error reading Redis log: {e}")
+            return []
+    
+    async def _apply_stats(self, section: str, session_id: Optional[int],
+                           count_delta: int, bytes_delta: int) -> None:
+        """Adjust the per-section counter hash with HINCRBY."""
+        scope = session_id or "global"
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.sadd(self.STATS_SECTIONS_KEY, section)
+            pipe.hincrby(f"{self.STATS_KEY_PREFIX}{section}", f"{scope}:count", count_delta)
+            pipe.hincrby(f"{self.STATS_KEY_PREFIX}{section}", f"{scope}:bytes", bytes_delta)
+            await pipe.execute()
+    
+    async def get_stats(self) -> List[Dict[str, Any]]:
+        """Get counters from the per-section Redis hashes."""
+        if not self._running or not self.redis_client:
+            return []
+        
+        try:
+            rows = []
+            sections = await self.redis_client.smembers(self.STATS_SECTIONS_KEY)
+            for section in sections:
+                fields = await self.redis_client.hgetall(f"{self.STATS_KEY_PREFIX}{section}")
+                scopes: Dict[str, Dict[str, Any]] = {}
+                for field, amount in fields.items():
+                    scope, _, metric = field.rpartition(":")
+                    row = scopes.setdefault(scope, {
+                        "section": section,
+                        "session_id": None if scope == "global" else int(scope),
+                        "count": 0,
+                        "bytes": 0
+                    })
+                    row[metric] = int(amount)
+                rows.extend(row for row in scopes.values() if row["count"] or row["bytes"])
+            return rows
+            
+        except RedisError as e:
+            logger.error(f"Error getting stats from Redis: {e}")
+            return []
+    
+    async def reconcile_stats(self) -> int:
+        """Recount Redis entries (keys expired by TTL never decrement the counters)."""
+        if not self._running or not self.redis_client:
+            return 0
+        
+        try:
+            actual: Dict[str, Dict[str, int]] = {}
+            async for redis_key in self.redis_client.scan_iter(match="memory:*", count=1000):
+                parts = redis_key.split(":", 3)
+                if len(parts) < 3:
+                    continue
+                section = parts[1]
+                scope = parts[2] if len(parts) == 4 and parts[2].isdigit() else "global"
+                size = await self.redis_client.strlen(redis_key)
+                fields = actual.setdefault(section, {})
+                fields[f"{scope}:count"] = fields.get(f"{scope}:count", 0) + 1
+                fields[f"{scope}:bytes"] = fields.get(f"{scope}:bytes", 0) + size
+            
+            corrected = 0
+            sections = set(await self.redis_client.smembers(self.STATS_SECTIONS_KEY)) | set(actual)
+            for section in sections:
+                stats_key = f"{self.STATS_KEY_PREFIX}{section}"
+                current = {field: int(amount) for field, amount in
+                           (await self.redis_client.hgetall(stats_key)).items()}
+                fields = actual.get(section, {})
+                if {f: a for f, a in current.items() if a} != fields:
+                    corrected += 1
+                    async with self.redis_client.pipeline(transaction=True) as pipe:
+                        pipe.delete(stats_key)
+                        if fields:
+                            pipe.hset(stats_key, mapping=fields)
+                            pipe.sadd(self.STATS_SECTIONS_KEY, section)
+                        else:
+                            pipe.srem(self.STATS_SECTIONS_KEY, section)
+                        await pipe.execute()
+            return corrected
+            
+        except RedisError as e:
+            logger.error(f"Error reconciling Redis stats: {e}")
+            return 0
 
 
 class DatabaseStorageBackend(StorageBackend):
@@ -304,8 +796,153 @@ class DatabaseStorageBackend(StorageBackend):
         else:
             return value
     
+    @staticmethod
+    def _identity(model, section_id: int, key: str, session_id: Optional[int]) -> List[Any]:
+        """Build the (section, key, session) match conditions for a table."""
+        return [
+            model.section_id == section_id,
+            model.key == key,
+            model.session_id == session_id if session_id is not None else model.session_id.is_(None)
+        ]
+    
+    @staticmethod
+    def _unarchive(archived: MemoryArchive) -> Optional[str]:
+        """Decompress an archived serialized value."""
+        return zlib.decompress(archived.value).decode("utf-8") if archived.value is not None else None
+    
+    async def _restore(self, session, archived: MemoryArchive, value: Optional[str],
+                       deltas: Dict[Tuple[int, int], List[int]]) -> bool:
+        """
+        Move one archive row back into ``memory_entries`` inside the caller's transaction.
+        
+        Returns:
+            False if the entry had expired and was dropped instead
+        """
+        now = datetime.now(timezone.utc)
+        await session.delete(archived)
+        
+        expires_at = _as_utc(archived.expires_at)
+        if expires_at and expires_at < now:
+            return False
+        
+        session.add(MemoryEntry(
+            section_id=archived.section_id,
+            key=archived.key,
+            session_id=archived.session_id,
+            value_type=archived.value_type,
+            value=value,
+            content_hash=archived.content_hash,
+            access_count=archived.access_count,
+            last_accessed_at=now,
+            created_at=archived.created_at,
+            updated_at=archived.updated_at,
+            expires_at=archived.expires_at
+        ))
+        delta = deltas.setdefault((archived.section_id, archived.session_id or 0), [0, 0])
+        delta[0] += 1
+        delta[1] += len(value or "")
+        return True
+    
+    async def _promote(self, session, section: str, section_id: int, key: str,
+                       session_id: Optional[int]) -> Optional[Any]:
+        """Move an archived entry back into ``memory_entries`` and return its value."""
+        stmt = select(MemoryArchive).where(*self._identity(MemoryArchive, section_id, key, session_id))
+        archived = (await session.execute(stmt)).scalars().first()
+        if archived is None:
+            return None
+        
+        value = self._unarchive(archived)
+        deltas: Dict[Tuple[int, int], List[int]] = {}
+        restored = await self._restore(session, archived, value, deltas)
+        await self._apply_stats(session, deltas)
+        await session.commit()
+        if not restored:
+            return None
+        
+        logger.debug(f"Promoted archived memory entry {section}/{key}")
+        return await self._deserialize_value(archived.value_type, value)
+    
+    async def search_archive(self, section: str, query: str,
+                             session_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Search archived entries of a section and promote the matches.
+        
+        Archived values are compressed, so the section's archive rows are
+        decompressed and matched here rather than in SQL. A matching entry is
+        in use again and moves back to ``memory_entries``.
+        
+        Args:
+            section: Section to search
+            query: Text to find in the key or value (case-insensitive)
+            session_id: Session scope; ``None`` searches global entries
+        
+        Returns:
+            Matching entries, shaped like :meth:`search` results
+        """
+        try:
+            section_id = await self._ensure_section(section)
+            
+            async with SessionLocal() as session:
+                stmt = select(MemoryArchive).where(
+                    MemoryArchive.section_id == section_id,
+                    MemoryArchive.session_id == session_id if session_id is not None
+                    else MemoryArchive.session_id.is_(None)
+                )
+                needle = query.lower()
+                results = []
+                deltas: Dict[Tuple[int, int], List[int]] = {}
+                for archived in (await session.execute(stmt)).scalars().all():
+                    value = self._unarchive(archived)
+                    if needle not in archived.key.lower() and needle not in (value or "").lower():
+                        continue
+                    if await self._restore(session, archived, value, deltas):
+                        results.append({
+                            "key": archived.key,
+                            "value": await self._deserialize_value(archived.value_type, value),
+                            "section": section,
+                            "session_id": archived.session_id
+                        })
+                
+                if deltas or results:
+                    await self._apply_stats(session, deltas)
+                    await session.commit()
+                    logger.debug(f"Promoted {len(results)} archived entries from {section} on search")
+                return results
+                
+        except Exception as e:
+            logger.error(f"Error searching archived database entries: {e}")
+            return []
+    
+    async def _promote_scope(self, section_id: int, session_id: Optional[int], limit: int,
+                             exact_scope: bool = False) -> int:
+        """
+        Promote up to ``limit`` archived entries of a section (and session, if given).
+        
+        Used by :meth:`tail` when the hot rows run out, so older log entries
+        are read back in their original ``created_at`` order. With
+        ``exact_scope`` a None session means entries without a session
+        rather than the whole section.
+        """
+        async with SessionLocal() as session:
+            conditions = [MemoryArchive.section_id == section_id]
+            if session_id is not None:
+                conditions.append(MemoryArchive.session_id == session_id)
+            elif exact_scope:
+                conditions.append(MemoryArchive.session_id.is_(None))
+            stmt = select(MemoryArchive).where(*conditions).limit(limit)
+            rows = (await session.execute(stmt)).scalars().all()
+            if not rows:
+                return 0
+            
+            deltas: Dict[Tuple[int, int], List[int]] = {}
+            for archived in rows:
+                await self._restore(session, archived, self._unarchive(archived), deltas)
+            await self._apply_stats(session, deltas)
+            await session.commit()
+            return len(rows)
+    
     async def get(self, section: str, key: str, session_id: Optional[int] = None) -> Optional[Any]:
-        """Get a value from database storage."""
+        """Get a value from database storage, promoting it if it was archived."""
         try:
             section_id = await self._ensure_section(section)
             
@@ -326,11 +963,14 @@ class DatabaseStorageBackend(StorageBackend):
                 entry = result.scalar_one_or_none()
                 
                 if entry is None:
-                    return None
+                    return await self._promote(session, section, section_id, key, session_id)
                 
                 # Check if expired
-                if entry.expires_at and entry.expires_at < datetime.now(timezone.utc):
+                if entry.expires_at and _as_utc(entry.expires_at) < datetime.now(timezone.utc):
                     await session.delete(entry)
+                    await self._apply_stats(session, {
+                        (section_id, entry.session_id or 0): [-1, -len(entry.value or "")]
+                    })
                     await session.commit()
                     return None
                 
@@ -340,52 +980,119 @@ class DatabaseStorageBackend(StorageBackend):
             logger.error(f"Error getting value from database: {e}")
             return None
     
+    async def _section_ids(self, session, names: List[str]) -> Dict[str, int]:
+        """
+        Resolve section names inside the caller's transaction, creating missing ones.
+        
+        Sections created here are only cached by the caller once it commits.
+        """
+        ids = {name: self._sections_cache[name] for name in names if name in self._sections_cache}
+        missing = [name for name in dict.fromkeys(names) if name not in ids]
+        if missing:
+            rows = (await session.execute(
+                select(MemorySection.id, MemorySection.name).where(MemorySection.name.in_(missing))
+            )).all()
+            for section_id, name in rows:
+                ids[name] = self._sections_cache[name] = section_id
+            for name in missing:
+                if name not in ids:
+                    section = MemorySection(name=name, persistence_level="permanent")
+                    session.add(section)
+                    await session.flush()
+                    ids[name] = section.id
+                    logger.debug(f"Created memory section: {name}")
+        return ids
+    
+    async def _upsert(self, session, section_id: int, key: str, value: Any,
+                      session_id: Optional[int], expires_at: Optional[datetime]) -> List[int]:
+        """Insert or update one entry in the caller's transaction, returning its stats delta."""
+        value_type, serialized_value = await self._serialize_value(value)
+        
+        stmt = select(MemoryEntry).where(*self._identity(MemoryEntry, section_id, key, session_id))
+        existing_entry = (await session.execute(stmt)).scalar_one_or_none()
+        
+        if existing_entry:
+            # Update existing entry
+            stats_delta = [0, len(serialized_value) - len(existing_entry.value or "")]
+            existing_entry.value_type = value_type
+            existing_entry.value = serialized_value
+            existing_entry.content_hash = content_hash(value)
+            existing_entry.minhash = None
+            existing_entry.expires_at = expires_at
+            existing_entry.updated_at = datetime.now(timezone.utc)
+        else:
+            stats_delta = [1, len(serialized_value)]
+            # A rewrite supersedes any archived copy
+            await session.execute(delete(MemoryArchive).where(
+                *self._identity(MemoryArchive, section_id, key, session_id)
+            ))
+            # Create new entry
+            session.add(MemoryEntry(
+                section_id=section_id,
+                key=key,
+                value_type=value_type,
+                value=serialized_value,
+                session_id=session_id,
+                expires_at=expires_at,
+                content_hash=content_hash(value)
+            ))
+        return stats_delta
+    
     async def set(self, section: str, key: str, value: Any, session_id: Optional[int] = None,
                   expires_at: Optional[datetime] = None) -> None:
         """Set a value in database storage."""
         try:
             section_id = await self._ensure_section(section)
-            value_type, serialized_value = await self._serialize_value(value)
             
             async with SessionLocal() as session:
-                # Check if entry exists
-                conditions = [
-                    MemoryEntry.section_id == section_id,
-                    MemoryEntry.key == key
-                ]
-                
-                if session_id is not None:
-                    conditions.append(MemoryEntry.session_id == session_id)
-                else:
-                    conditions.append(MemoryEntry.session_id.is_(None))
-                
-                stmt = select(MemoryEntry).where(and_(*conditions))
-                result = await session.execute(stmt)
-                existing_entry = result.scalar_one_or_none()
-                
-                if existing_entry:
-                    # Update existing entry
-                    existing_entry.value_type = value_type
-                    existing_entry.value = serialized_value
-                    existing_entry.expires_at = expires_at
-                    existing_entry.updated_at = datetime.now(timezone.utc)
-                else:
-                    # Create new entry
-                    entry = MemoryEntry(
-                        section_id=section_id,
-                        key=key,
-                        value_type=value_type,
-                        value=serialized_value,
-                        session_id=session_id,
-                        expires_at=expires_at
-                    )
-                    session.add(entry)
-                
+                stats_delta = await self._upsert(session, section_id, key, value, session_id, expires_at)
+                await self._apply_stats(session, {(section_id, session_id or 0): stats_delta})
                 await session.commit()
                 
         except Exception as e:
             logger.error(f"Error setting value in database: {e}")
     
+    async def _set_many(self, session, entries) -> Dict[str, int]:
+        """Upsert a batch in one session and apply the combined counter deltas."""
+        section_ids = await self._section_ids(session, [entry[0] for entry in entries])
+        
+        deltas: Dict[Tuple[int, int], List[int]] = {}
+        for section, key, value, session_id, expires_at in entries:
+            section_id = section_ids[section]
+            count_delta, bytes_delta = await self._upsert(
+                session, section_id, key, value, session_id, expires_at
+            )
+            delta = deltas.setdefault((section_id, session_id or 0), [0, 0])
+            delta[0] += count_delta
+            delta[1] += bytes_delta
+        
+        await self._apply_stats(session, deltas)
+        return section_ids
+    
+    async def set_many(self, entries: List[Tuple[str, str, Any, Optional[int], Optional[datetime]]],
+                       session=None) -> None:
+        """
+        Upsert several entries in a single transaction.
+        
+        With ``session`` the writes join the caller's transaction and errors
+        propagate so the caller can roll back; otherwise one transaction is
+        opened and committed here.
+        """
+        if not entries:
+            return
+        
+        if session is not None:
+            await self._set_many(session, entries)
+            return
+        
+        try:
+            async with SessionLocal() as own_session:
+                section_ids = await self._set_many(own_session, entries)
+                await own_session.commit()
+            self._sections_cache.update(section_ids)
+        except Exception as e:
+            logger.error(f"Error setting values in database: {e}")
+    
     async def delete(self, section: str, key: str, session_id: Optional[int] = None) -> bool:
         """Delete a value from database storage."""
         try:
@@ -402,11 +1109,26 @@ class DatabaseStorageBackend(StorageBackend):
                 else:
                     conditions.append(MemoryEntry.session_id.is_(None))
                 
-                stmt = delete(MemoryEntry).where(and_(*conditions))
-                result = await session.execute(stmt)
+                stmt = select(
+                    MemoryEntry.id, MemoryEntry.session_id, func.length(MemoryEntry.value)
+                ).where(and_(*conditions))
+                rows = (await session.execute(stmt)).all()
+                archived = await session.execute(delete(MemoryArchive).where(
+                    *self._identity(MemoryArchive, section_id, key, session_id)
+                ))
+                if not rows:
+                    await session.commit()
+                    return archived.rowcount > 0
+                
+                await session.execute(
+                    delete(MemoryEntry).where(MemoryEntry.id.in_([row[0] for row in rows]))
+                )
+                await self._apply_stats(session, {
+                    (section_id, session_id or 0): [-len(rows), -sum(row[2] or 0 for row in rows)]
+                })
                 await session.commit()
                 
-                return result.rowcount > 0
+                return True
                 
         except Exception as e:
             logger.error(f"Error deleting value from database: {e}")
@@ -430,6 +1152,15 @@ class DatabaseStorageBackend(StorageBackend):
                 result = await session.execute(stmt)
                 keys = [row[0] for row in result.fetchall()]
                 
+                # Archived keys stay listed; reading one promotes it
+                archive_conditions = [MemoryArchive.section_id == section_id]
+                if session_id is not None:
+                    archive_conditions.append(MemoryArchive.session_id == session_id)
+                else:
+                    archive_conditions.append(MemoryArchive.session_id.is_(None))
+                stmt = select(MemoryArchive.key).where(and_(*archive_conditions))
+                keys.extend(row[0] for row in (await session.execute(stmt)).fetchall())
+                
                 # Apply pattern filter if specified
                 if pattern:
                     import fnmatch
@@ -442,7 +1173,7 @@ class DatabaseStorageBackend(StorageBackend):
             return []
     
     async def search(self, section: str, query: str, session_id: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Search for entries in database storage."""
+        """Search for entries in database storage, promoting archived matches."""
         try:
             section_id = await self._ensure_section(section)
             
@@ -466,10 +1197,14 @@ class DatabaseStorageBackend(StorageBackend):
                 entries = result.scalars().all()
                 
                 results = []
+                expired: Dict[Tuple[int, int], List[int]] = {}
                 for entry in entries:
                     # Check if expired
-                    if entry.expires_at and entry.expires_at < datetime.now(timezone.utc):
+                    if entry.expires_at and _as_utc(entry.expires_at) < datetime.now(timezone.utc):
                         await session.delete(entry)
+                        delta = expired.setdefault((section_id, entry.session_id or 0), [0, 0])
+                        delta[0] -= 1
+                        delta[1] -= len(entry.value or "")
                         continue
                     
                     value = await self._deserialize_value(entry.value_type, entry.value)
@@ -480,8 +1215,11 @@ class DatabaseStorageBackend(StorageBackend):
                         "session_id": entry.session_id
                     })
                 
+                await self._apply_stats(session, expired)
                 await session.commit()
-                return results
+            
+            # Entries that went cold are still part of the section
+            return results + await self.search_archive(section, query, session_id)
                 
         except Exception as e:
             logger.error(f"Error searching database: {e}")
@@ -491,13 +1229,27 @@ class DatabaseStorageBackend(StorageBackend):
         """Clean up expired entries in database storage."""
         try:
             async with SessionLocal() as session:
-                stmt = delete(MemoryEntry).where(
-                    MemoryEntry.expires_at < datetime.now(timezone.utc)
-                )
+                now = datetime.now(timezone.utc)
+                scope = func.coalesce(MemoryEntry.session_id, 0)
+                
+                # Collect the counter adjustments before the rows disappear
+                stmt = select(
+                    MemoryEntry.section_id, scope, func.count(), func.sum(func.length(MemoryEntry.value))
+                ).where(MemoryEntry.expires_at < now).group_by(MemoryEntry.section_id, scope)
+                deltas = {
+                    (row[0], row[1]): [-row[2], -(row[3] or 0)]
+                    for row in (await session.execute(stmt)).all()
+                }
+                
+                stmt = delete(MemoryEntry).where(MemoryEntry.expires_at < now)
                 result = await session.execute(stmt)
+                await self._apply_stats(session, deltas)
+                archived = await session.execute(
+                    delete(MemoryArchive).where(MemoryArchive.expires_at < now)
+                )
                 await session.commit()
                 
-                cleaned_count = result.rowcount
+                cleaned_count = result.rowcount + archived.rowcount
                 if cleaned_count > 0:
                     logger.debug(f"Cleaned up {cleaned_count} expired database entries")
                 
@@ -506,6 +1258,442 @@ class DatabaseStorageBackend(StorageBackend):
         except Exception as e:
             logger.error(f"Error cleaning up expired database entries: {e}")
             return 0
+    
+    async def remove_duplicates(self, section: str) -> int:
+        """
+        Remove exact duplicates in a section using the ``content_hash`` index.
+        
+        Rows written before hashes existed are backfilled first. Within each
+        (session, content_hash) group the entry with the lowest id is kept.
+        """
+        return len(await self.remove_duplicate_entries(section))
+    
+    async def remove_duplicate_entries(self, section: str) -> List[Tuple[str, Optional[int]]]:
+        """
+        Remove exact duplicates like :meth:`remove_duplicates`, reporting what went.
+        
+        Args:
+            section: Section to deduplicate
+        
+        Returns:
+            (key, session_id) of every removed entry, for callers that cache them
+        """
+        try:
+            section_id = await self._ensure_section(section)
+            
+            async with SessionLocal() as session:
+                await self._backfill_content_hashes(session, section_id)
+                
+                scope = func.coalesce(MemoryEntry.session_id, 0)
+                keepers = select(func.min(MemoryEntry.id)).where(
+                    MemoryEntry.section_id == section_id,
+                    MemoryEntry.content_hash.is_not(None)
+                ).group_by(scope, MemoryEntry.content_hash)
+                
+                stmt = select(
+                    MemoryEntry.id, scope, func.length(MemoryEntry.value),
+                    MemoryEntry.key, MemoryEntry.session_id
+                ).where(
+                    MemoryEntry.section_id == section_id,
+                    MemoryEntry.content_hash.is_not(None),
+                    MemoryEntry.id.not_in(keepers)
+                )
+                rows = (await session.execute(stmt)).all()
+                if not rows:
+                    await session.commit()
+                    return []
+                
+                deltas: Dict[Tuple[int, int], List[int]] = {}
+                for _, session_scope, size, _, _ in rows:
+                    delta = deltas.setdefault((section_id, session_scope), [0, 0])
+                    delta[0] -= 1
+                    delta[1] -= size or 0
+                
+                await session.execute(
+                    delete(MemoryEntry).where(MemoryEntry.id.in_([row[0] for row in rows]))
+                )
+                await self._apply_stats(session, deltas)
+                await session.commit()
+                
+                logger.debug(f"Removed {len(rows)} duplicate entries from {section}")
+                return [(row[3], row[4]) for row in rows]
+                
+        except Exception as e:
+            logger.error(f"Error removing duplicates from database: {e}")
+            return []
+    
+    async def tail(self, section: str, session_id: Optional[int] = None, limit: int = 100,
+                   before: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        Read newest entries via the (section_id, session_id, created_at) index,
+        or (section_id, created_at, id) when no session is given.
+        
+        The cursor is the entry id; pages continue from that entry's
+        ``created_at``, with the id breaking ties. When a page comes up short
+        and the section has archived entries, they are promoted back (keeping
+        their ``created_at``) and the page is read again.
+        """
+        try:
+            section_id = await self._ensure_section(section)
+            rows = await self._tail_rows(section_id, session_id, limit, before)
+            if len(rows) < limit and await self._promote_scope(section_id, session_id, max(limit, 1000)):
+                rows = await self._tail_rows(section_id, session_id, limit, before)
+            
+            return [
+                {
+                    "key": row[1],
+                    "value": await self._deserialize_value(row[2], row[3]),
+                    "section": section,
+                    "session_id": row[4],
+                    "cursor": row[0]
+                }
+                for row in rows
+            ]
+                
+        except Exception as e:
+            logger.error(f"Error reading database log: {e}")
+            return []
+    
+    async def _tail_rows(self, section_id: int, session_id: Optional[int], limit: int,
+                         before: Optional[Any]) -> List[Any]:
+        """Run the keyset query behind :meth:`tail`."""
+        async with SessionLocal() as session:
+            conditions = [
+                MemoryEntry.section_id == section_id,
+                or_(MemoryEntry.expires_at.is_(None),
+                    MemoryEntry.expires_at > datetime.now(timezone.utc))
+            ]
+            if session_id is not None:
+                conditions.append(MemoryEntry.session_id == session_id)
+            if before is not None:
+                anchor = select(MemoryEntry.created_at).where(
+                    MemoryEntry.id == before
+                ).scalar_subquery()
+                conditions.append(or_(
+                    MemoryEntry.created_at < anchor,
+                    and_(MemoryEntry.created_at == anchor, MemoryEntry.id < before)
+                ))
+            
+            stmt = select(
+                MemoryEntry.id, MemoryEntry.key, MemoryEntry.value_type,
+                MemoryEntry.value, MemoryEntry.session_id
+            ).where(and_(*conditions)).order_by(
+                MemoryEntry.created_at.desc(), MemoryEntry.id.desc()
+            ).limit(limit)
+            return (await session.execute(stmt)).all()
+    
+    async def list_entries(self, section: str, session_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read a scope's live entries and expiry times in one query, promoting archived ones first."""
+        try:
+            section_id = await self._ensure_section(section)
+            while await self._promote_scope(section_id, session_id, 1000, exact_scope=True) == 1000:
+                pass
+            
+            async with SessionLocal() as session:
+                conditions = [MemoryEntry.section_id == section_id]
+                if session_id is not None:
+                    conditions.append(MemoryEntry.session_id == session_id)
+                else:
+                    conditions.append(MemoryEntry.session_id.is_(None))
+                
+                stmt = select(
+                    MemoryEntry.key, MemoryEntry.value_type, MemoryEntry.value, MemoryEntry.expires_at
+                ).where(and_(*conditions))
+                rows = (await session.execute(stmt)).all()
+            
+            # Expired rows are skipped here and deleted by cleanup_expired()
+            now = datetime.now(timezone.utc)
+            entries = []
+            for key, value_type, value, expires_at in rows:
+                expires_at = _as_utc(expires_at)
+                if expires_at and expires_at < now:
+                    continue
+                entries.append({
+                    "key": key,
+                    "value": await self._deserialize_value(value_type, value),
+                    "expires_at": expires_at
+                })
+            return entries
+            
+        except Exception as e:
+            logger.error(f"Error listing database entries: {e}")
+            return []
+    
+    async def scan(self, section: str, after: Optional[Any] = None,
+                   limit: int = 1000) -> List[Dict[str, Any]]:
+        """Read a batch of entries ordered by id, using the id as the cursor."""
+        try:
+            section_id = await self._ensure_section(section)
+            
+            async with SessionLocal() as session:
+                conditions = [MemoryEntry.section_id == section_id]
+                if after is not None:
+                    conditions.append(MemoryEntry.id > after)
+                
+                stmt = select(
+                    MemoryEntry.id, MemoryEntry.key, MemoryEntry.value_type, MemoryEntry.value,
+                    MemoryEntry.session_id, MemoryEntry.minhash
+                ).where(and_(*conditions)).order_by(MemoryEntry.id).limit(limit)
+                rows = (await session.execute(stmt)).all()
+                
+                return [
+                    {
+                        "cursor": row[0],
+                        "key": row[1],
+                        "value": await self._deserialize_value(row[2], row[3]),
+                        "session_id": row[4],
+                        "signature": row[5]
+                    }
+                    for row in rows
+                ]
+                
+        except Exception as e:
+            logger.error(f"Error scanning database section: {e}")
+            return []
+    
+    async def set_signatures(self, section: str,
+                             signatures: Dict[Tuple[str, Optional[int]], str]) -> None:
+        """Store MinHash signatures in the ``minhash`` column."""
+        if not signatures:
+            return
+        
+        try:
+            section_id = await self._ensure_section(section)
+            
+            async with SessionLocal() as session:
+                for (key, session_id), signature in signatures.items():
+                    stmt = update(MemoryEntry).where(
+                        MemoryEntry.section_id == section_id,
+                        MemoryEntry.key == key,
+                        MemoryEntry.session_id == session_id if session_id is not None
+                        else MemoryEntry.session_id.is_(None)
+                    ).values(minhash=signature)
+                    await session.execute(stmt)
+                await session.commit()
+                
+        except Exception as e:
+            logger.error(f"Error storing signatures in database: {e}")
+    
+    async def record_access(self, section: str,
+                            accesses: Dict[Tuple[str, Optional[int]], Tuple[int, datetime]]) -> None:
+        """Add buffered read counts to ``access_count`` in one transaction."""
+        if not accesses:
+            return
+        
+        try:
+            section_id = await self._ensure_section(section)
+            
+            async with SessionLocal() as session:
+                for (key, session_id), (count, accessed_at) in accesses.items():
+                    stmt = update(MemoryEntry).where(
+                        *self._identity(MemoryEntry, section_id, key, session_id)
+                    ).values(
+                        access_count=MemoryEntry.access_count + count,
+                        last_accessed_at=accessed_at
+                    )
+                    await session.execute(stmt)
+                await session.commit()
+                
+        except Exception as e:
+            logger.error(f"Error recording memory access in database: {e}")
+    
+    async def archive_cold(self, section: str, cutoff: datetime, limit: int = 1000) -> int:
+        """
+        Move cold rows into the compressed ``memory_archive`` table.
+        
+        A row is cold when neither its last recorded read nor its last write
+        is newer than ``cutoff``. Rows are moved in id order, ``limit`` per
+        call, and the counters are adjusted in the same transaction.
+        """
+        try:
+            section_id = await self._ensure_section(section)
+            
+            async with SessionLocal() as session:
+                last_used = func.coalesce(MemoryEntry.last_accessed_at, MemoryEntry.updated_at)
+                stmt = select(MemoryEntry).where(
+                    MemoryEntry.section_id == section_id,
+                    last_used < cutoff
+                ).order_by(MemoryEntry.id).limit(limit)
+                entries = (await session.execute(stmt)).scalars().all()
+                if not entries:
+                    return 0
+                
+                # Replace stale archived copies of the same entries
+                identities = {(entry.key, entry.session_id) for entry in entries}
+                stmt = select(MemoryArchive.id, MemoryArchive.key, MemoryArchive.session_id).where(
+                    MemoryArchive.section_id == section_id,
+                    MemoryArchive.key.in_([key for key, _ in identities])
+                )
+                stale = [row[0] for row in (await session.execute(stmt)).all()
+                         if (row[1], row[2]) in identities]
+                if stale:
+                    await session.execute(delete(MemoryArchive).where(MemoryArchive.id.in_(stale)))
+                
+                deltas: Dict[Tuple[int, int], List[int]] = {}
+                archived = []
+                for entry in entries:
+                    delta = deltas.setdefault((section_id, entry.session_id or 0), [0, 0])
+                    delta[0] -= 1
+                    delta[1] -= len(entry.value or "")
+                    archived.append({
+                        "section_id": section_id,
+                        "key": entry.key,
+                        "session_id": entry.session_id,
+                        "value_type": entry.value_type,
+                        "value": zlib.compress(entry.value.encode("utf-8")) if entry.value is not None else None,
+                        "content_hash": entry.content_hash,
+                        "access_count": entry.access_count or 0,
+                        "last_accessed_at": entry.last_accessed_at,
+                        "created_at": entry.created_at,
+                        "updated_at": entry.updated_at,
+                        "expires_at": entry.expires_at
+                    })
+                
+                await session.execute(insert(MemoryArchive), archived)
+                await session.execute(
+                    delete(MemoryEntry).where(MemoryEntry.id.in_([entry.id for entry in entries]))
+                )
+                await self._apply_stats(session, deltas)
+                await session.commit()
+                
+                logger.debug(f"Archived {len(entries)} cold entries from {section}")
+                return len(entries)
+                
+        except Exception as e:
+            logger.error(f"Error archiving cold database entries: {e}")
+            return 0
+    
+    async def get_access_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Aggregate access counters over the hot and archive tables."""
+        try:
+            async with SessionLocal() as session:
+                stats: Dict[str, Dict[str, Any]] = {}
+                for model, count_field in ((MemoryEntry, "entries"), (MemoryArchive, "archived")):
+                    stmt = select(
+                        MemorySection.name, func.count(), func.sum(model.access_count),
+                        func.max(model.last_accessed_at)
+                    ).join(MemorySection, MemorySection.id == model.section_id).group_by(MemorySection.name)
+                    for name, count, accesses, last_accessed in (await session.execute(stmt)).all():
+                        section = stats.setdefault(name, {
+                            "entries": 0, "archived": 0, "accesses": 0, "last_accessed_at": None
+                        })
+                        section[count_field] = count
+                        section["accesses"] += accesses or 0
+                        if last_accessed is not None and (
+                            section["last_accessed_at"] is None or last_accessed > section["last_accessed_at"]
+                        ):
+                            section["last_accessed_at"] = last_accessed
+                return stats
+                
+        except Exception as e:
+            logger.error(f"Error getting access stats from database: {e}")
+            return {}
+    
+    async def _backfill_content_hashes(self, session, section_id: int, batch_size: int = 1000) -> None:
+        """Compute missing content hashes for a section in batches."""
+        while True:
+            stmt = select(MemoryEntry.id, MemoryEntry.value_type, MemoryEntry.value).where(
+                MemoryEntry.section_id == section_id,
+                MemoryEntry.content_hash.is_(None)
+            ).limit(batch_size)
+            rows = (await session.execute(stmt)).all()
+            if not rows:
+                return
+            
+            updates = []
+            for entry_id, value_type, value in rows:
+                value = await self._deserialize_value(value_type, value)
+                updates.append({"id": entry_id, "content_hash": content_hash(value)})
+            await session.execute(update(MemoryEntry), updates)
+            await session.flush()
+            
+            if len(rows) < batch_size:
+                return
+    
+    async def _apply_stats(self, session, deltas: Dict[Tuple[int, int], List[int]]) -> None:
+        """
+        Adjust counter rows inside the caller's transaction.
+        
+        Args:
+            session: Open database session the entry change was made in
+            deltas: Mapping of (section_id, session_scope) to [count_delta, bytes_delta]
+        """
+        now = datetime.now(timezone.utc)
+        for (section_id, scope), (count_delta, bytes_delta) in deltas.items():
+            if not count_delta and not bytes_delta:
+                continue
+            
+            await increment_row(
+                session, MemoryStat,
+                {"section_id": section_id, "session_scope": scope},
+                {"entry_count": count_delta, "total_bytes": bytes_delta},
+                values={"updated_at": now},
+                initial={"entry_count": max(count_delta, 0), "total_bytes": max(bytes_delta, 0)}
+            )
+    
+    async def get_stats(self) -> List[Dict[str, Any]]:
+        """Get counters from the ``memory_stats`` table."""
+        try:
+            async with SessionLocal() as session:
+                stmt = select(
+                    MemorySection.name, MemoryStat.session_scope,
+                    MemoryStat.entry_count, MemoryStat.total_bytes
+                ).join(MemorySection, MemorySection.id == MemoryStat.section_id)
+                rows = (await session.execute(stmt)).all()
+                return [
+                    {"section": row[0], "session_id": row[1] or None, "count": row[2], "bytes": row[3]}
+                    for row in rows
+                    if row[2] or row[3]
+                ]
+                
+        except Exception as e:
+            logger.error(f"Error getting stats from database: {e}")
+            return []
+    
+    async def reconcile_stats(self) -> int:
+        """Recompute the ``memory_stats`` table with a single grouped scan."""
+        try:
+            async with SessionLocal() as session:
+                scope = func.coalesce(MemoryEntry.session_id, 0)
+                stmt = select(
+                    MemoryEntry.section_id, scope, func.count(), func.sum(func.length(MemoryEntry.value))
+                ).group_by(MemoryEntry.section_id, scope)
+                actual = {
+                    (row[0], row[1]): (row[2], row[3] or 0)
+                    for row in (await session.execute(stmt)).all()
+                }
+                
+                current = {
+                    (stat.section_id, stat.session_scope): stat
+                    for stat in (await session.execute(select(MemoryStat))).scalars().all()
+                }
+                
+                corrected = 0
+                now = datetime.now(timezone.utc)
+                for pair in set(actual) | set(current):
+                    count, total_bytes = actual.get(pair, (0, 0))
+                    stat = current.get(pair)
+                    if stat is None:
+                        session.add(MemoryStat(
+                            section_id=pair[0], session_scope=pair[1],
+                            entry_count=count, total_bytes=total_bytes, updated_at=now
+                        ))
+                    elif (stat.entry_count, stat.total_bytes) != (count, total_bytes):
+                        stat.entry_count = count
+                        stat.total_bytes = total_bytes
+                        stat.updated_at = now
+                    else:
+                        continue
+                    corrected += 1
+                
+                await session.commit()
+                if corrected:
+                    logger.info(f"Reconciled {corrected} drifted memory stats rows")
+                return corrected
+                
+        except Exception as e:
+            logger.error(f"Error reconciling database stats: {e}")
+            return 0
 
 
 class InMemoryStorageBackend(StorageBackend):
@@ -514,6 +1702,14 @@ class InMemoryStorageBackend(StorageBackend):
     def __init__(self):
         self._storage: Dict[str, Dict[str, Dict[str, Any]]] = {}
         self._expiry_times: Dict[str, Dict[str, datetime]] = {}
+        self._stats = StatsCounter()
+        
+        # Write-ordered logs per section and per (section, session)
+        self._logs: Dict[Any, AppendLog] = {}
+        self._seq = 0
+        
+        # Cold tier: section -> storage key -> compressed pickled entry
+        self._archive: Dict[str, Dict[str, bytes]] = {}
     
     def _get_section_storage(self, section: str) -> Dict[str, Dict[str, Any]]:
         """Get or create storage for a section."""
@@ -527,20 +1723,55 @@ class InMemoryStorageBackend(StorageBackend):
             return f"{session_id}:{key}"
         return key
     
+    def _restore(self, section: str, storage_key: str, entry: Dict[str, Any],
+                 expires_at: Optional[datetime], seq: Optional[int] = None) -> None:
+        """Put a previously archived entry back at its log position, adjusting the counters."""
+        self._get_section_storage(section)[storage_key] = entry
+        self._stats.apply(section, entry["session_id"], 1, entry.get("size", 0))
+        for log_key in (section, (section, entry["session_id"])):
+            log = self._logs.setdefault(log_key, AppendLog())
+            if seq is None:
+                self._seq += 1
+                seq = self._seq
+                log.append(storage_key, seq)
+            else:
+                log.restore(storage_key, seq)
+        if expires_at:
+            self._expiry_times.setdefault(section, {})[storage_key] = expires_at
+    
+    def _promote(self, section: str, storage_key: str) -> Optional[Dict[str, Any]]:
+        """Move an archived entry back into the hot tier and return it."""
+        archived = self._archive.get(section, {}).pop(storage_key, None)
+        if archived is None:
+            return None
+        entry, expires_at, seq = pickle.loads(zlib.decompress(archived))
+        entry["last_accessed_at"] = datetime.now(timezone.utc)
+        self._restore(section, storage_key, entry, expires_at, seq)
+        return entry
+    
+    def _remove(self, section: str, storage_key: str) -> None:
+        """Remove an entry and its expiry time, adjusting the counters."""
+        entry = self._storage[section].pop(storage_key)
+        self._stats.apply(section, entry["session_id"], -1, -entry.get("size", 0))
+        for log_key in (section, (section, entry["session_id"])):
+            if log_key in self._logs:
+                self._logs[log_key].discard(storage_key)
+        if section in self._expiry_times:
+            self._expiry_times[section].pop(storage_key, None)
+    
     async def get(self, section: str, key: str, session_id: Optional[int] = None) -> Optional[Any]:
         """Get a value from in-memory storage."""
         try:
             section_storage = self._get_section_storage(section)
             storage_key = self._make_key(key, session_id)
             
-            if storage_key not in section_storage:
+            if storage_key not in section_storage and self._promote(section, storage_key) is None:
                 return None
             
             # Check if expired
             if section in self._expiry_times and storage_key in self._expiry_times[section]:
                 if self._expiry_times[section][storage_key] < datetime.now(timezone.utc):
-                    del section_storage[storage_key]
-                    del self._expiry_times[section][storage_key]
+                    self._remove(section, storage_key)
                     return None
             
             return section_storage[storage_key]["value"]
@@ -556,11 +1787,31 @@ class InMemoryStorageBackend(StorageBackend):
             section_storage = self._get_section_storage(section)
             storage_key = self._make_key(key, session_id)
             
+            size = _value_size(value)
+            previous = section_storage.get(storage_key)
+            if previous is None:
+                self._stats.apply(section, session_id, 1, size)
+            else:
+                self._stats.apply(section, session_id, 0, size - previous.get("size", 0))
+            
+            now = datetime.now(timezone.utc)
             section_storage[storage_key] = {
                 "value": value,
                 "session_id": session_id,
-                "created_at": datetime.now(timezone.utc)
+                "size": size,
+                "content_hash": content_hash(value),
+                "created_at": previous["created_at"] if previous else now,
+                "updated_at": now,
+                "access_count": previous.get("access_count", 0) if previous else 0,
+                "last_accessed_at": previous.get("last_accessed_at") if previous else None
             }
+            self._archive.get(section, {}).pop(storage_key, None)
+            
+            # Rewrites keep their original position, like created_at in SQL
+            if previous is None:
+                self._seq += 1
+                for log_key in (section, (section, session_id)):
+                    self._logs.setdefault(log_key, AppendLog()).append(storage_key, self._seq)
             
             # Set expiry time
             if expires_at:
@@ -577,16 +1828,12 @@ class InMemoryStorageBackend(StorageBackend):
             section_storage = self._get_section_storage(section)
             storage_key = self._make_key(key, session_id)
             
+            archived = self._archive.get(section, {}).pop(storage_key, None)
             if storage_key in section_storage:
-                del section_storage[storage_key]
-                
-                # Clean up expiry time
-                if section in self._expiry_times and storage_key in self._expiry_times[section]:
-                    del self._expiry_times[section][storage_key]
-                
+                self._remove(section, storage_key)
                 return True
             
-            return False
+            return archived is not None
             
         except Exception as e:
             logger.error(f"Error deleting value from in-memory storage: {e}")
@@ -599,7 +1846,9 @@ class InMemoryStorageBackend(StorageBackend):
             section_storage = self._get_section_storage(section)
             keys = []
             
-            for storage_key in section_storage.keys():
+            # Archived keys stay listed; reading one promotes it
+            archived = self._archive.get(section, {}).keys()
+            for storage_key in itertools.chain(section_storage.keys(), archived):
                 # Extract the actual key from storage key
                 if session_id is not None:
                     # Format: session_id:key
@@ -622,17 +1871,23 @@ class InMemoryStorageBackend(StorageBackend):
             return []
     
     async def search(self, section: str, query: str, session_id: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Search for entries in in-memory storage."""
+        """Search for entries in in-memory storage, promoting archived matches."""
         try:
             section_storage = self._get_section_storage(section)
             results = []
             
-            for storage_key, entry in section_storage.items():
+            needle = query.lower()
+            for storage_key, archived in list(self._archive.get(section, {}).items()):
+                entry, _, _ = pickle.loads(zlib.decompress(archived))
+                key = storage_key.split(":", 1)[1] if entry["session_id"] is not None else storage_key
+                if entry["session_id"] == session_id and needle in f"{key} {str(entry['value'])}".lower():
+                    self._promote(section, storage_key)
+            
+            for storage_key, entry in list(section_storage.items()):
                 # Check if expired
                 if section in self._expiry_times and storage_key in self._expiry_times[section]:
                     if self._expiry_times[section][storage_key] < datetime.now(timezone.utc):
-                        del section_storage[storage_key]
-                        del self._expiry_times[section][storage_key]
+                        self._remove(section, storage_key)
                         continue
                 
                 # Extract key and session_id
@@ -675,8 +1930,7 @@ class InMemoryStorageBackend(StorageBackend):
                         storage_key in self._expiry_times[section] and
                         self._expiry_times[section][storage_key] < current_time):
                         
-                        del section_storage[storage_key]
-                        del self._expiry_times[section][storage_key]
+                        self._remove(section, storage_key)
                         cleaned_count += 1
             
             if cleaned_count > 0:
@@ -687,6 +1941,182 @@ class InMemoryStorageBackend(StorageBackend):
         except Exception as e:
             logger.error(f"Error cleaning up expired in-memory entries: {e}")
             return 0
+    
+    async def remove_duplicates(self, section: str) -> int:
+        """Remove exact duplicates using the content hash stored with each entry."""
+        section_storage = self._get_section_storage(section)
+        seen = set()
+        duplicates = []
+        
+        # Entries are kept in insertion order, so the earliest copy survives
+        for storage_key, entry in section_storage.items():
+            marker = (entry["session_id"], entry["content_hash"])
+            if marker in seen:
+                duplicates.append(storage_key)
+            else:
+                seen.add(marker)
+        
+        for storage_key in duplicates:
+            self._remove(section, storage_key)
+        return len(duplicates)
+    
+    async def tail(self, section: str, session_id: Optional[int] = None, limit: int = 100,
+                   before: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """Read newest entries from the append log, using the write sequence as the cursor.
+        
+        Archived entries of the section (and session, if given) are promoted
+        back to their original log positions first.
+        """
+        for storage_key, archived in list(self._archive.get(section, {}).items()):
+            if session_id is None or pickle.loads(zlib.decompress(archived))[0]["session_id"] == session_id:
+                self._promote(section, storage_key)
+        
+        log = self._logs.get(section if session_id is None else (section, session_id))
+        if log is None:
+            return []
+        
+        now = datetime.now(timezone.utc)
+        expiry_times = self._expiry_times.get(section, {})
+        results = []
+        expired = []
+        
+        for seq, storage_key in log.iter_newest(before):
+            if storage_key in expiry_times and expiry_times[storage_key] < now:
+                expired.append(storage_key)
+                continue
+            
+            entry = self._storage[section][storage_key]
+            key = storage_key
+            if entry["session_id"] is not None:
+                key = storage_key.split(":", 1)[1]
+            results.append({
+                "key": key,
+                "value": entry["value"],
+                "section": section,
+                "session_id": entry["session_id"],
+                "cursor": seq
+            })
+            if len(results) >= limit:
+                break
+        
+        for storage_key in expired:
+            self._remove(section, storage_key)
+        return results
+    
+    async def list_entries(self, section: str, session_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read a scope's live entries with their expiry times, promoting archived ones first."""
+        for storage_key, archived in list(self._archive.get(section, {}).items()):
+            if pickle.loads(zlib.decompress(archived))[0]["session_id"] == session_id:
+                self._promote(section, storage_key)
+        
+        now = datetime.now(timezone.utc)
+        expiry_times = self._expiry_times.get(section, {})
+        entries = []
+        expired = []
+        for storage_key, entry in self._get_section_storage(section).items():
+            if entry["session_id"] != session_id:
+                continue
+            expires_at = expiry_times.get(storage_key)
+            if expires_at is not None and expires_at < now:
+                expired.append(storage_key)
+                continue
+            key = storage_key if session_id is None else storage_key.split(":", 1)[1]
+            entries.append({"key": key, "value": entry["value"], "expires_at": expires_at})
+        
+        for storage_key in expired:
+            self._remove(section, storage_key)
+        return entries
+    
+    async def scan(self, section: str, after: Optional[Any] = None,
+                   limit: int = 1000) -> List[Dict[str, Any]]:
+        """Read a batch of entries in insertion order, using the position as the cursor."""
+        section_storage = self._get_section_storage(section)
+        start = 0 if after is None else after + 1
+        
+        entries = []
+        for position, (storage_key, entry) in enumerate(
+                itertools.islice(section_storage.items(), start, start + limit), start):
+            key = storage_key
+            if entry["session_id"] is not None:
+                key = storage_key.split(":", 1)[1]
+            entries.append({
+                "cursor": position,
+                "key": key,
+                "value": entry["value"],
+                "session_id": entry["session_id"],
+                "signature": entry.get("signature")
+            })
+        return entries
+    
+    async def set_signatures(self, section: str,
+                             signatures: Dict[Tuple[str, Optional[int]], str]) -> None:
+        """Store MinHash signatures alongside the entries."""
+        section_storage = self._get_section_storage(section)
+        for (key, session_id), signature in signatures.items():
+            entry = section_storage.get(self._make_key(key, session_id))
+            if entry is not None:
+                entry["signature"] = signature
+    
+    async def record_access(self, section: str,
+                            accesses: Dict[Tuple[str, Optional[int]], Tuple[int, datetime]]) -> None:
+        """Add buffered read counts to the stored entries."""
+        section_storage = self._get_section_storage(section)
+        for (key, session_id), (count, accessed_at) in accesses.items():
+            entry = section_storage.get(self._make_key(key, session_id))
+            if entry is not None:
+                entry["access_count"] = entry.get("access_count", 0) + count
+                entry["last_accessed_at"] = accessed_at
+    
+    async def archive_cold(self, section: str, cutoff: datetime, limit: int = 1000) -> int:
+        """Move cold entries into the compressed in-memory archive."""
+        section_storage = self._get_section_storage(section)
+        cold = [
+            storage_key for storage_key, entry in section_storage.items()
+            if (entry.get("last_accessed_at") or entry.get("updated_at") or entry["created_at"]) < cutoff
+        ][:limit]
+        
+        archive = self._archive.setdefault(section, {})
+        log = self._logs.get(section)
+        for storage_key in cold:
+            entry = section_storage[storage_key]
+            expires_at = self._expiry_times.get(section, {}).get(storage_key)
+            # Keep the log position so a promoted entry is read back in write order
+            seq = log.position(storage_key) if log is not None else None
+            self._remove(section, storage_key)
+            archive[storage_key] = zlib.compress(pickle.dumps((entry, expires_at, seq)))
+        return len(cold)
+    
+    async def get_access_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Aggregate access counters over the hot entries and the archive."""
+        stats: Dict[str, Dict[str, Any]] = {}
+        for section in set(self._storage) | set(self._archive):
+            entries = list(self._storage.get(section, {}).values())
+            entries.extend(
+                pickle.loads(zlib.decompress(archived))[0]
+                for archived in self._archive.get(section, {}).values()
+            )
+            accessed = [entry["last_accessed_at"] for entry in entries if entry.get("last_accessed_at")]
+            stats[section] = {
+                "entries": len(self._storage.get(section, {})),
+                "archived": len(self._archive.get(section, {})),
+                "accesses": sum(entry.get("access_count", 0) for entry in entries),
+                "last_accessed_at": max(accessed) if accessed else None
+            }
+        return stats
+    
+    async def get_stats(self) -> List[Dict[str, Any]]:
+        """Get the maintained in-memory counters."""
+        return self._stats.rows()
+    
+    async def reconcile_stats(self) -> int:
+        """Recompute the in-memory counters from the stored entries."""
+        actual: Dict[Tuple[str, Optional[int]], List[int]] = {}
+        for section, section_storage in self._storage.items():
+            for entry in section_storage.values():
+                counter = actual.setdefault((section, entry["session_id"]), [0, 0])
+                counter[0] += 1
+                counter[1] += entry.get("size", 0)
+        return self._stats.replace(actual)
 
 
 class HybridStorageBackend(StorageBackend):
@@ -797,6 +2227,18 @@ class HybridStorageBackend(StorageBackend):
             # Fallback to database
             await self.db_backend.set(section, key, value, session_id, expires_at)
     
+    async def set_many(self, entries: List[Tuple[str, str, Any, Optional[int], Optional[datetime]]],
+                       session=None) -> None:
+        """Set several values; database writes share one transaction."""
+        for section, key, value, session_id, expires_at in entries:
+            if self._should_use_redis(section):
+                try:
+                    await self.redis_backend.set(section, key, value, session_id, expires_at)
+                except Exception as e:
+                    logger.error(f"Error in hybrid storage set_many: {e}")
+        
+        await self.db_backend.set_many(entries, session=session)
+    
     async def delete(self, section: str, key: str, session_id: Optional[int] = None) -> bool:
         """Delete a value using hybrid storage strategy."""
         try:
@@ -840,7 +2282,12 @@ class HybridStorageBackend(StorageBackend):
                 # Try Redis first, fallback to database
                 results = await self.redis_backend.search(section, query, session_id)
                 if not results:
-                    results = await self.db_backend.search(section, query, session_id)
+                    return await self.db_backend.search(section, query, session_id)
+                # Redis only caches hot entries; archived matches live in the database
+                found = {(result["key"], result["session_id"]) for result in results}
+                for result in await self.db_backend.search_archive(section, query, session_id):
+                    if (result["key"], result["session_id"]) not in found:
+                        results.append(result)
                 return results
             else:
                 # Use database only
@@ -859,4 +2306,58 @@ class HybridStorageBackend(StorageBackend):
             return redis_cleaned + db_cleaned
         except Exception as e:
             logger.error(f"Error in hybrid storage cleanup: {e}")
-            return await self.db_backend.cleanup_expired()
\ No newline at end of file
+            return await self.db_backend.cleanup_expired()
+    
+    async def remove_duplicates(self, section: str) -> int:
+        """Remove duplicates from the database, then drop the removed entries' Redis copies."""
+        removed = await self.db_backend.remove_duplicate_entries(section)
+        if removed and self._should_use_redis(section):
+            for key, session_id in removed:
+                await self.redis_backend.delete(section, key, session_id)
+        return len(removed)
+    
+    async def tail(self, section: str, session_id: Optional[int] = None, limit: int = 100,
+                   before: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """Read newest entries from the database, which holds every hybrid entry.
+        
+        Cursors are backend specific, so pages are never mixed with Redis.
+        """
+        return await self.db_backend.tail(section, session_id, limit, before)
+    
+    async def list_entries(self, section: str, session_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read a scope from the database, which holds every hybrid entry."""
+        return await self.db_backend.list_entries(section, session_id)
+    
+    async def scan(self, section: str, after: Optional[Any] = None,
+                   limit: int = 1000) -> List[Dict[str, Any]]:
+        """Scan the database, which holds every hybrid entry."""
+        return await self.db_backend.scan(section, after, limit)
+    
+    async def set_signatures(self, section: str,
+                             signatures: Dict[Tuple[str, Optional[int]], str]) -> None:
+        """Store signatures in the database."""
+        await self.db_backend.set_signatures(section, signatures)
+    
+    async def record_access(self, section: str,
+                            accesses: Dict[Tuple[str, Optional[int]], Tuple[int, datetime]]) -> None:
+        """Record reads in the database, which holds every hybrid entry."""
+        await self.db_backend.record_access(section, accesses)
+    
+    async def archive_cold(self, section: str, cutoff: datetime, limit: int = 1000) -> int:
+        """Archive cold database rows; Redis copies expire on their own."""
+        return await self.db_backend.archive_cold(section, cutoff, limit)
+    
+    async def get_access_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get access totals from the database."""
+        return await self.db_backend.get_access_stats()
+    
+    async def get_stats(self) -> List[Dict[str, Any]]:
+        """Get counters from the database, which holds every hybrid entry."""
+        return await self.db_backend.get_stats()
+    
+    async def reconcile_stats(self) -> int:
+        """Reconcile counters in both underlying backends."""
+        corrected = await self.db_backend.reconcile_stats()
+        if self._running:
+            corrected += await self.redis_backend.reconcile_stats()
+        return corrected
@@ -0,0 +1,140 @@
+"""
+Per-turn unit of work for conversation writes.
+
+A chat turn used to open a transaction for every row it wrote: the user
+message, the assistant message (each followed by a refresh round trip to read
+back the id and timestamp) and one per memory entry, plus another whenever a
+memory section id was not cached. ``TurnUnitOfWork`` collects the turn's
+memory upserts and writes them together with the assistant message, so a turn
+commits twice:
+
+1. The user message, inserted with ``RETURNING`` as soon as it arrives so it
+   is durable before the model is called.
+2. The assistant message and every deferred memory upsert of the turn
+   (conversation context, autonomous memories and learning feedback).
+
+Memory upserts join the message transaction when the memory storage is
+database backed; if they fail, the assistant message is committed on its own
+and the upserts are retried in their own transaction. Derived views, the
+short-term context and entry created events follow only after a commit.
+"""
+
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+
+from nagatha_assistant.db import SessionLocal
+from nagatha_assistant.db_models import Message
+from nagatha_assistant.utils.logger import get_logger
+
+logger = get_logger()
+
+
+async def insert_message(session, session_id: int, role: str, content: str) -> Message:
+    """
+    Insert a message and read back its generated columns in one statement.
+
+    Args:
+        session: Open database session; the caller commits
+        session_id: Conversation session the message belongs to
+        role: Message role (user, assistant or system)
+        content: Message text
+
+    Returns:
+        The inserted message with ``id`` and ``timestamp`` populated
+    """
+    if not session.bind.dialect.insert_returning:
+        # MySQL has no RETURNING; fall back to a flush and a refresh
+        message = Message(session_id=session_id, role=role, content=content)
+        session.add(message)
+        await session.flush()
+        await session.refresh(message)
+        return message
+
+    stmt = insert(Message).values(session_id=session_id, role=role, content=content).returning(Message)
+    return (await session.execute(stmt)).scalar_one()
+
+
+async def save_message(session_id: int, role: str, content: str) -> Message:
+    """Insert and commit a single message."""
+    async with SessionLocal() as session:
+        message = await insert_message(session, session_id, role, content)
+        await session.commit()
+    return message
+
+
+class TurnUnitOfWork:
+    """
+    Collects the memory writes of one conversation turn and commits them with
+    the assistant reply.
+
+    Attributes:
+        session_id: Conversation session of the turn
+        entries: Pending memory entries in the form accepted by ``MemoryManager.set_many``
+    """
+
+    def __init__(self, session_id: int, memory_manager=None):
+        self.session_id = session_id
+        self.entries: List[Dict[str, Any]] = []
+        self._memory_manager = memory_manager
+
+    @property
+    def memory_manager(self):
+        """The memory manager the entries are written to (the global one by default)."""
+        if self._memory_manager is None:
+            from .memory import get_memory_manager
+            self._memory_manager = get_memory_manager()
+        return self._memory_manager
+
+    def remember_entry(self, entry: Dict[str, Any]) -> None:
+        """Queue an entry built by a memory helper such as ``conversation_context_entry``."""
+        self.entries.append(entry)
+
+    def remember_message(self, message: Message) -> None:
+        """Queue the conversation context entry for a stored message."""
+        self.remember_entry(self.memory_manager.conversation_context_entry(
+            message.session_id, message.id, message.role, message.content
+        ))
+
+    async def commit(self, role: str, content: str) -> Message:
+        """
+        Store the closing message of the turn together with the pending memory writes.
+
+        Args:
+            role: Role of the closing message (usually ``assistant``)
+            content: Message text
+
+        Returns:
+            The stored message
+        """
+        manager = self.memory_manager
+        try:
+            async with SessionLocal() as session:
+                message = await insert_message(session, self.session_id, role, content)
+                entries = self.entries + [manager.conversation_context_entry(
+                    self.session_id, message.id, role, content
+                )]
+                after_commit = await manager.set_many(entries, session=session)
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Batched turn commit failed, writing separately: {e}")
+        else:
+            self.entries = []
+            # Views, short-term context and events only describe committed rows
+            if after_commit is not None:
+                try:
+                    await after_commit()
+                except Exception as e:
+                    logger.warning(f"Failed to update memory views for the turn: {e}")
+            return message
+
+        message = await save_message(self.session_id, role, content)
+        entries = self.entries + [manager.conversation_context_entry(
+            self.session_id, message.id, role, content
+        )]
+        self.entries = []
+        try:
+            await manager.set_many(entries)
+        except Exception as e:
+            logger.warning(f"Failed to store turn memories: {e}")
+        return message
@@ -23,6 +23,7 @@ import openai
 from openai import OpenAI
 
 from nagatha_assistant.utils.logger import get_logger
+from nagatha_assistant.utils.usage_tracker import record_usage
 from nagatha_assistant.core.agent import send_message, start_session
 
 logger = get_logger()
@@ -298,6 +299,10 @@ class VoiceHandler:
             # Clean up temporary file
             os.unlink(temp_file_path)
             
+            segments = result.get("segments") or []
+            record_usage("whisper-base", interface="voice",
+                         audio_seconds=segments[-1]["end"] if segments else 0.0)
+            
             transcribed_text = result["text"].strip()
             if transcribed_text:
                 logger.info(f"Speech transcribed: {transcribed_text}")
@@ -337,6 +342,7 @@ class VoiceHandler:
                 voice=voice,
                 input=text
             )
+            record_usage("tts-1", interface="voice", characters=len(text))
             
             # Read the audio data
             audio_data = response.content
@@ -380,7 +386,7 @@ class VoiceHandler:
             })
             
             # Get AI response
-            response = await send_message(session['session_id'], transcribed_text)
+            response = await send_message(session['session_id'], transcribed_text, interface="voice")
             
             # Add response to history
             session['conversation_history'].append({
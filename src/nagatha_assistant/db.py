@@ -1,9 +1,11 @@
 import os
 from dotenv import load_dotenv
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from functools import lru_cache
 import concurrent.futures, asyncio, pathlib, threading
+from typing import Any, Dict, Optional
 from nagatha_assistant.utils.logger import get_logger
 
 
@@ -23,9 +25,146 @@ elif raw_url.startswith("postgresql://") and not raw_url.startswith("postgresql+
 else:
     DATABASE_URL = raw_url
 
+## ---------------------------------------------------------------------------
+# Runtime profiles – connection tuning selected with NAGATHA_DB_PROFILE
+## ---------------------------------------------------------------------------
+
+# SQLite settings are PRAGMAs applied to every new connection; PostgreSQL
+# settings are engine pool options plus asyncpg connect arguments.
+DB_PROFILES: Dict[str, Dict[str, Dict[str, Any]]] = {
+    # Engine defaults: rollback journal, no busy timeout, default pool
+    "legacy": {
+        "sqlite": {},
+        "postgresql": {},
+    },
+    # Concurrent readers with one writer at a time; short lock waits
+    "balanced": {
+        "sqlite": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -16000,  # KiB (negative) = 16 MB page cache
+            "mmap_size": 134217728,
+            "temp_store": "MEMORY",
+        },
+        "postgresql": {
+            "pool_size": 5,
+            "max_overflow": 10,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+            "statement_cache_size": 100,
+            "prepared_statement_cache_size": 100,
+        },
+    },
+    # Larger caches and pools for the server plus several workers
+    "throughput": {
+        "sqlite": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 10000,
+            "cache_size": -64000,
+            "mmap_size": 268435456,
+            "temp_store": "MEMORY",
+            "wal_autocheckpoint": 4000,
+        },
+        "postgresql": {
+            "pool_size": 20,
+            "max_overflow": 20,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+            "statement_cache_size": 500,
+            "prepared_statement_cache_size": 500,
+        },
+    },
+    # WAL with a full fsync on every commit
+    "durable": {
+        "sqlite": {
+            "journal_mode": "WAL",
+            "synchronous": "FULL",
+            "busy_timeout": 10000,
+            "cache_size": -16000,
+        },
+        "postgresql": {
+            "pool_size": 5,
+            "max_overflow": 5,
+            "pool_pre_ping": True,
+            "pool_recycle": 1800,
+        },
+    },
+    # PgBouncer in transaction mode cannot keep server-side prepared statements
+    "pgbouncer": {
+        "sqlite": {},
+        "postgresql": {
+            "pool_size": 10,
+            "max_overflow": 10,
+            "pool_pre_ping": True,
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+        },
+    },
+}
+
+DEFAULT_DB_PROFILE = "balanced"
+
+# asyncpg connect() arguments; everything else is a create_engine option
+_ASYNCPG_CONNECT_ARGS = ("statement_cache_size", "prepared_statement_cache_size")
+
+
+def get_db_profile(name: Optional[str] = None) -> str:
+    """Resolve the runtime profile name, falling back to the default if unknown."""
+    name = (name or os.getenv("NAGATHA_DB_PROFILE") or DEFAULT_DB_PROFILE).lower()
+    if name not in DB_PROFILES:
+        get_logger().warning(
+            f"Unknown NAGATHA_DB_PROFILE '{name}', using '{DEFAULT_DB_PROFILE}'"
+        )
+        return DEFAULT_DB_PROFILE
+    return name
+
+
+def engine_options(url: str, profile: str) -> Dict[str, Any]:
+    """Build create_async_engine keyword arguments for a URL and profile."""
+    if not url.startswith("postgresql"):
+        return {}
+
+    settings = dict(DB_PROFILES[profile]["postgresql"])
+    connect_args = {key: settings.pop(key) for key in _ASYNCPG_CONNECT_ARGS if key in settings}
+    if connect_args:
+        settings["connect_args"] = connect_args
+    return settings
+
+
+def apply_sqlite_pragmas(async_engine, profile: str) -> None:
+    """Run the profile's PRAGMAs on every new SQLite connection of an engine."""
+    pragmas = DB_PROFILES[profile]["sqlite"]
+    if not pragmas:
+        return
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):  # noqa: D401
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
+
+
+def create_engine_for(url: str, profile: Optional[str] = None, **kwargs):
+    """Create an async engine configured with a runtime profile."""
+    profile = get_db_profile(profile)
+    options = engine_options(url, profile)
+    options.update(kwargs)
+    async_engine = create_async_engine(url, **options)
+    if url.startswith("sqlite"):
+        apply_sqlite_pragmas(async_engine, profile)
+    return async_engine
+
+
+DB_PROFILE = get_db_profile()
+
 # Create an async engine
-engine = create_async_engine(
-    DATABASE_URL, echo=(os.getenv("LOG_LEVEL", "INFO").upper() == "DEBUG")
+engine = create_engine_for(
+    DATABASE_URL, DB_PROFILE, echo=(os.getenv("LOG_LEVEL", "INFO").upper() == "DEBUG")
 )
 
 # Async session factory
@@ -42,80 +181,334 @@ import nagatha_assistant.db_models  # noqa: F401
 # Lock to ensure Alembic migrations are executed only once at a time
 _LOCK = threading.Lock()
 
+## ---------------------------------------------------------------------------
+# Counter rows – add to a row, creating it on first use
+## ---------------------------------------------------------------------------
+
+
+async def increment_row(session, model_class, key: Dict[str, Any], increments: Dict[str, Any],
+                        values: Optional[Dict[str, Any]] = None,
+                        initial: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Add to the counter columns of a row, inserting the row if it is missing.
+
+    On SQLite and PostgreSQL this is a single INSERT ... ON CONFLICT DO
+    UPDATE, so concurrent first writes to the same key (server and worker
+    processes) both land instead of one failing on the primary key and
+    rolling back the caller's transaction.
+
+    Args:
+        session: Open database session; the statement joins its transaction
+        model_class: Mapped class whose primary key is exactly ``key``
+        key: Primary key values of the row
+        increments: Amounts added to columns of an existing row
+        values: Columns set to these values on insert and on update
+        initial: Column values for a new row; defaults to ``increments``
+    """
+    values = values or {}
+    row = {**key, **(increments if initial is None else initial), **values}
+    added = {name: getattr(model_class, name) + amount for name, amount in increments.items()}
+
+    dialect = session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(model_class).values(**row).on_conflict_do_update(
+            index_elements=list(key), set_={**added, **values}
+        )
+        await session.execute(stmt)
+        return
+
+    # Other dialects: update, then insert when no row matched
+    from sqlalchemy import update
+
+    result = await session.execute(update(model_class).filter_by(**key).values(**added, **values))
+    if result.rowcount == 0:
+        session.add(model_class(**row))
+        await session.flush()
+
+
 ## ---------------------------------------------------------------------------
 # Alembic helper – ensure DB schema is up-to-date
 ## ---------------------------------------------------------------------------
 
 
+def _alembic_config(url: str):
+    """Build an Alembic config pointing at the project's migrations."""
+    from alembic.config import Config  # type: ignore
+
+    root = pathlib.Path(__file__).resolve().parents[2]
+    cfg = Config(str(root / "alembic.ini"))
+    cfg.set_main_option("script_location", str(root / "migrations"))
+    cfg.set_main_option("sqlalchemy.url", url)
+    return cfg
+
+
+class SchemaError(RuntimeError):
+    """The database schema cannot be brought in line with the models."""
+
+
+def _create_missing(sync_connection) -> None:
+    """Create tables missing from the models, and missing indexes on existing tables."""
+    import sqlalchemy as sa
+
+    Base.metadata.create_all(sync_connection)
+    inspector = sa.inspect(sync_connection)
+    for table in Base.metadata.tables.values():
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            # An index over a missing column waits for the migration adding it
+            if all(column.name in columns for column in index.columns):
+                index.create(sync_connection, checkfirst=True)
+
+
+def _upgrade(sync_connection) -> None:
+    """Bring the database on a connection to the Alembic head (run via run_sync)."""
+    import sqlalchemy as sa
+    from alembic import command  # type: ignore
+
+    cfg = _alembic_config(DATABASE_URL)
+    cfg.attributes["connection"] = sync_connection
+    logger = get_logger()
+
+    tables = set(sa.inspect(sync_connection).get_table_names())
+    if "alembic_version" in tables or not tables & set(Base.metadata.tables):
+        # Stamped database, or an empty one: the version table says what to run
+        command.upgrade(cfg, "head")
+        return
+
+    # Tables created by metadata.create_all() without Alembic: nothing records
+    # which migrations they reflect, so repair what can be added and stamp
+    # head only once the schema actually matches it
+    _create_missing(sync_connection)
+    report = _inspect_schema(sync_connection)
+    if report["missing_columns"]:
+        logger.error(
+            f"Unversioned database is missing columns ({', '.join(report['missing_columns'])}); "
+            "stamp the revision it was created at with 'alembic stamp <revision>' and restart"
+        )
+        return
+    logger.info("Stamping unversioned database at the current Alembic head")
+    command.stamp(cfg, "head")
+
+
 @lru_cache(maxsize=1)
 def _migration_runner() -> None:
-    """Run Alembic migrations to *head* (idempotent), then create any missing tables."""
-
-    # If using a SQLite file-based DB and the file already exists, skip migrations (assume schema is managed externally)
-    if DATABASE_URL.startswith("sqlite") and ":memory:" not in DATABASE_URL:
-        # Extract file path after '///'
-        parts = DATABASE_URL.split("///", 1)
-        if len(parts) == 2:
-            db_file = parts[1]
-            try:
-                import os as _os
-                if _os.path.exists(db_file):
-                    return
-            except Exception:
-                pass
-    # Attempt Alembic migrations
-    try:
-        from alembic.config import Config  # type: ignore
-        from alembic import command  # type: ignore
+    """Run Alembic migrations to *head* (idempotent)."""
 
-        root = pathlib.Path(__file__).resolve().parents[2]
-        cfg = Config(str(root / "alembic.ini"))
-        cfg.set_main_option("script_location", str(root / "migrations"))
-        cfg.set_main_option("sqlalchemy.url", DATABASE_URL)
-        try:
-            command.upgrade(cfg, "head")
-        except Exception as exc:  # noqa: BLE001
-            if "already exists" in str(exc):
-                logger = get_logger()
-                logger.debug("Schema already present, skip Alembic upgrade")
-            else:
-                raise
+    # A private in-memory database starts empty; create_all builds it
+    if DATABASE_URL.startswith("sqlite") and ":memory:" in DATABASE_URL:
+        return
+    try:
+        import alembic  # type: ignore  # noqa: F401
     except ModuleNotFoundError:
         logger = get_logger()
         logger.warning(
             "Alembic not installed – falling back to metadata.create_all()"
         )
+        return
+
+    # Runs in a worker thread, so it gets its own loop and engine; Alembic
+    # drives the async connection through run_sync
+    async def upgrade() -> None:
+        migration_engine = create_engine_for(DATABASE_URL, "legacy")
+        try:
+            async with migration_engine.begin() as conn:
+                await conn.run_sync(_upgrade)
+        finally:
+            await migration_engine.dispose()
+
+    asyncio.run(upgrade())
+
+
+## ---------------------------------------------------------------------------
+# Schema verification – compare the live database with the models
+## ---------------------------------------------------------------------------
+
+
+def _fingerprint(tables: Dict[str, Dict[str, Any]]) -> str:
+    """Hash a {table: {"columns": [...], "indexes": [...]}} description."""
+    import hashlib
+
+    parts = []
+    for name in sorted(tables):
+        table = tables[name]
+        parts.append(
+            f"{name}({','.join(sorted(table['columns']))})[{','.join(sorted(table['indexes']))}]"
+        )
+    return hashlib.sha256(";".join(parts).encode("utf-8")).hexdigest()[:16]
 
-    # Ensure any missing tables are created via metadata
+
+def _model_tables() -> Dict[str, Dict[str, Any]]:
+    """Describe the tables, columns and named indexes declared by the models."""
+    return {
+        name: {
+            "columns": [column.name for column in table.columns],
+            "indexes": [index.name for index in table.indexes if index.name],
+        }
+        for name, table in Base.metadata.tables.items()
+    }
+
+
+def model_fingerprint() -> str:
+    """Fingerprint of the schema the models expect."""
+    return _fingerprint(_model_tables())
+
+
+def _inspect_schema(sync_connection) -> Dict[str, Any]:
+    """Compare the live schema on a connection with the models (run via run_sync)."""
+    import sqlalchemy as sa
+
+    inspector = sa.inspect(sync_connection)
+    existing = set(inspector.get_table_names())
+    expected = _model_tables()
+
+    live: Dict[str, Dict[str, Any]] = {}
+    missing_tables, missing_columns, missing_indexes, extra_columns = [], [], [], []
+    for name, table in expected.items():
+        if name not in existing:
+            missing_tables.append(name)
+            continue
+        columns = [column["name"] for column in inspector.get_columns(name)]
+        indexes = [index["name"] for index in inspector.get_indexes(name) if index.get("name")]
+        live[name] = {"columns": columns, "indexes": indexes}
+        missing_columns += [f"{name}.{column}" for column in table["columns"] if column not in columns]
+        missing_indexes += [f"{name}.{index}" for index in table["indexes"] if index not in indexes]
+        extra_columns += [f"{name}.{column}" for column in columns if column not in table["columns"]]
+
+    revision = None
+    if "alembic_version" in existing:
+        revision = sync_connection.execute(
+            sa.text("SELECT version_num FROM alembic_version")
+        ).scalar()
+
+    return {
+        "fingerprint": _fingerprint(live) if not missing_tables else None,
+        "expected_fingerprint": _fingerprint(expected),
+        "missing_tables": missing_tables,
+        "missing_columns": missing_columns,
+        "missing_indexes": missing_indexes,
+        "extra_columns": extra_columns,
+        "revision": revision,
+    }
+
+
+def _head_revision() -> Optional[str]:
+    """Latest Alembic revision, or None when Alembic is unavailable."""
     try:
-        import sqlalchemy as sa
-        from nagatha_assistant.db_models import Base as _Base  # type: ignore
+        from alembic.script import ScriptDirectory  # type: ignore
 
-        sync_url = DATABASE_URL.replace("+aiosqlite", "")
-        sync_engine = sa.create_engine(sync_url)
-        _Base.metadata.create_all(sync_engine)
+        return ScriptDirectory.from_config(_alembic_config(DATABASE_URL)).get_current_head()
     except Exception:
-        pass
+        return None
+
+
+async def verify_schema(url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Check the live database for drift from the models.
+
+    Args:
+        url: Database URL to check; defaults to the application database
+
+    Returns:
+        Report with ``ok``, ``fingerprint``, ``expected_fingerprint``,
+        ``missing_tables``, ``missing_columns``, ``missing_indexes``,
+        ``extra_columns``, ``revision`` and ``head_revision``. Extra columns
+        and an unstamped database (``revision`` of None) do not fail the check.
+    """
+    check_engine = engine if url is None else create_engine_for(url, "legacy")
+    try:
+        async with check_engine.connect() as conn:
+            report = await conn.run_sync(_inspect_schema)
+    finally:
+        if check_engine is not engine:
+            await check_engine.dispose()
+
+    report["head_revision"] = _head_revision()
+    report["ok"] = not (
+        report["missing_tables"] or report["missing_columns"] or report["missing_indexes"]
+        or (report["revision"] is not None and report["head_revision"] is not None
+            and report["revision"] != report["head_revision"])
+    )
+    return report
+
+
+## ---------------------------------------------------------------------------
+# Readiness gate – prepare the schema once per process
+## ---------------------------------------------------------------------------
+
+# Set once migrations, create_all and verification have run in this process
+_schema_ready = threading.Event()
+_schema_fingerprint: Optional[str] = None
+
+
+def schema_fingerprint() -> Optional[str]:
+    """Fingerprint of the live schema recorded by the readiness gate, if it has run."""
+    return _schema_fingerprint
+
+
+def reset_schema_gate() -> None:
+    """Forget the readiness result so the next ensure_schema() prepares the schema again."""
+    global _schema_fingerprint
+    _schema_ready.clear()
+    _schema_fingerprint = None
+    _migration_runner.cache_clear()
+
+
+@event.listens_for(Base.metadata, "after_drop")
+def _schema_dropped(target, connection, **kw):  # noqa: D401
+    """Reopen the gate when the model tables are dropped (e.g. by test fixtures)."""
+    reset_schema_gate()
+
+
+def _create_and_inspect(sync_connection) -> Dict[str, Any]:
+    """Create missing tables and indexes, then describe the resulting schema."""
+    _create_missing(sync_connection)
+    return _inspect_schema(sync_connection)
 
 
 async def ensure_schema() -> None:
-    # Serialise access so migrations are only run once even if multiple
-    # coroutines hit this function concurrently (e.g. pytest workers).
+    """
+    Make sure the schema is ready, doing the work only once per process.
+
+    The first call runs Alembic migrations, creates any tables and indexes
+    missing from the models and verifies the result; later calls return
+    immediately. Drift that cannot be repaired that way (missing columns on
+    existing tables) keeps the gate closed.
+
+    Raises:
+        SchemaError: If the schema still differs from the models; run
+            ``nagatha db verify`` for details
+    """
+    global _schema_fingerprint
+    if _schema_ready.is_set():
+        return
+
+    # Serialise migrations so they only run once even if multiple
+    # coroutines or threads hit this function concurrently.
     loop = asyncio.get_running_loop()
 
     def runner():  # noqa: D401
         with _LOCK:
             _migration_runner()
 
-    # Run migrations/thread-safe operations
     await loop.run_in_executor(None, runner)
-    # Ensure all tables (including new models) exist via metadata.create_all
+    if _schema_ready.is_set():
+        return
+
     try:
-        import sqlalchemy as sa
-        from nagatha_assistant.db_models import Base as _Base
-        # Use synchronous engine for DDL
-        sync_url = DATABASE_URL.replace("+aiosqlite", "")
-        sync_engine = sa.create_engine(sync_url)
-        _Base.metadata.create_all(sync_engine)
-    except Exception:
-        pass
\ No newline at end of file
+        async with engine.begin() as conn:
+            report = await conn.run_sync(_create_and_inspect)
+    except Exception as e:
+        get_logger().error(f"Error preparing database schema: {e}")
+        return
+
+    drift = report["missing_tables"] + report["missing_columns"] + report["missing_indexes"]
+    if drift:
+        message = f"Database schema differs from the models ({', '.join(drift)}); run 'nagatha db verify'"
+        get_logger().error(message)
+        raise SchemaError(message)
+    _schema_fingerprint = report["fingerprint"]
+    _schema_ready.set()
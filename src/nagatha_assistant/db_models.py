@@ -1,7 +1,7 @@
 """
 Database models for Nagatha Assistant chat sessions.
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func, Table, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, func, Table, Boolean, Index, LargeBinary, Float, text
 from sqlalchemy.orm import relationship
 
 from nagatha_assistant.db import Base
@@ -41,6 +41,13 @@ class Message(Base):
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     session = relationship("ConversationSession", back_populates="messages")
+
+    __table_args__ = (
+        # Per-session history in timestamp order
+        Index("ix_messages_session_timestamp", "session_id", "timestamp"),
+        # Keyset pagination of history (newest first by id)
+        Index("ix_messages_session_id_id", "session_id", "id"),
+    )
     
 # ---------------------------------------------------------------------------
 # Notes and Tags models
@@ -118,6 +125,11 @@ class Reminder(Base):
     last_sent_at = Column(DateTime(timezone=True), nullable=True)
 
     task = relationship("Task", back_populates="reminders")
+
+    __table_args__ = (
+        # Due-reminder polling: undelivered reminders by time
+        Index("ix_reminders_delivered_remind_at", "delivered", "remind_at"),
+    )
     
 # ---------------------------------------------------------------------------
 # Establish Task-Tag back-population on Tag
@@ -160,6 +172,10 @@ class MemoryEntry(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=True)  # For temporary memory
+    content_hash = Column(String(64), nullable=True)  # SHA-256 of the canonical value, for deduplication
+    minhash = Column(Text, nullable=True)  # Hex MinHash signature for near-duplicate detection
+    access_count = Column(Integer, nullable=False, server_default="0")  # Estimated reads (sampled)
+    last_accessed_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
     section = relationship("MemorySection", back_populates="memory_entries")
@@ -169,9 +185,67 @@ class MemoryEntry(Base):
     __table_args__ = (
         # For session-scoped memory, key must be unique within section and session
         # For global memory, key must be unique within section
+        Index("ix_memory_entries_section_content_hash", "section_id", "content_hash"),
+        # Time-ordered reads for log-like sections (command history, conversation context)
+        Index("ix_memory_entries_section_session_created", "section_id", "session_id", "created_at"),
+        # Newest-first reads of a whole section, across all sessions
+        Index("ix_memory_entries_section_created_id", "section_id", "created_at", "id"),
+        # Keyset batches over a section in id order (scan)
+        Index("ix_memory_entries_section_id_id", "section_id", "id"),
+        # Expiry cleanup; most entries never expire, so only index those that do
+        Index("ix_memory_entries_expires_at", "expires_at",
+              sqlite_where=text("expires_at IS NOT NULL"),
+              postgresql_where=text("expires_at IS NOT NULL")),
+    )
+
+
+class MemoryArchive(Base):
+    """Cold memory entries moved out of ``memory_entries`` by the tiering job.
+
+    Values are stored zlib-compressed. An archived entry is promoted back to
+    ``memory_entries`` the next time it is read.
+    """
+    __tablename__ = "memory_archive"
+
+    id = Column(Integer, primary_key=True, index=True)
+    section_id = Column(Integer, ForeignKey("memory_sections.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    session_id = Column(Integer, nullable=True)
+    value_type = Column(String(50), nullable=False, server_default="string")
+    value = Column(LargeBinary, nullable=True)  # zlib-compressed serialized value
+    content_hash = Column(String(64), nullable=True)
+    access_count = Column(Integer, nullable=False, server_default="0")
+    last_accessed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_memory_archive_section_key", "section_id", "key"),
+        Index("ix_memory_archive_expires_at", "expires_at",
+              sqlite_where=text("expires_at IS NOT NULL"),
+              postgresql_where=text("expires_at IS NOT NULL")),
     )
 
 
+class MemoryStat(Base):
+    """Maintained entry/byte counters per memory section and session scope.
+
+    Rows are adjusted in the same transaction as the entry write so that
+    statistics can be read without scanning ``memory_entries``.  The
+    ``session_scope`` column uses ``0`` for global entries so that the pair
+    can serve as a primary key (NULLs are never equal in a unique index).
+    """
+    __tablename__ = "memory_stats"
+
+    section_id = Column(Integer, ForeignKey("memory_sections.id", ondelete="CASCADE"), primary_key=True)
+    session_scope = Column(Integer, primary_key=True, server_default="0")
+    entry_count = Column(Integer, nullable=False, server_default="0")
+    total_bytes = Column(Integer, nullable=False, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+
 # ---------------------------------------------------------------------------
 # Discord Auto-Chat Configuration models
 # ---------------------------------------------------------------------------
@@ -188,4 +262,70 @@ class DiscordAutoChat(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     last_message_at = Column(DateTime(timezone=True), nullable=True)  # For rate limiting
-    message_count = Column(Integer, nullable=False, server_default="0")  # Daily message count for rate limiting
\ No newline at end of file
+    message_count = Column(Integer, nullable=False, server_default="0")  # Daily message count for rate limiting
+
+
+# ---------------------------------------------------------------------------
+# Usage accounting models
+# ---------------------------------------------------------------------------
+
+class UsageLedger(Base):
+    """Token, audio and cost totals per day, model, session, interface and tool round.
+
+    Calls are buffered in memory by ``utils/usage_tracker.py`` and added to
+    these rows in batches. ``session_scope`` is ``0`` for calls made outside
+    a conversation, as in ``memory_stats``. ``tool_round`` is ``0`` for the
+    first completion of a turn and counts the follow-up completions made
+    after tool calls.
+    """
+    __tablename__ = "usage_ledger"
+
+    day = Column(String(10), primary_key=True)  # YYYY-MM-DD, UTC
+    model = Column(String(100), primary_key=True)
+    session_scope = Column(Integer, primary_key=True, server_default="0")
+    interface = Column(String(50), primary_key=True, server_default="chat")
+    tool_round = Column(Integer, primary_key=True, server_default="0")
+    requests = Column(Integer, nullable=False, server_default="0")
+    prompt_tokens = Column(Integer, nullable=False, server_default="0")
+    completion_tokens = Column(Integer, nullable=False, server_default="0")
+    characters = Column(Integer, nullable=False, server_default="0")  # TTS input
+    audio_seconds = Column(Float, nullable=False, server_default="0")  # STT input
+    cost_usd = Column(Float, nullable=False, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Per-session and per-interface totals over a range of days
+        Index("ix_usage_ledger_session_day", "session_scope", "day"),
+        Index("ix_usage_ledger_interface_day", "interface", "day"),
+    )
+
+
+class UsageDaily(Base):
+    """Daily totals per model, maintained in the same transaction as ``usage_ledger``.
+
+    Whole-history summaries read this table, which grows by one row per model
+    per day, instead of aggregating the ledger.
+    """
+    __tablename__ = "usage_daily"
+
+    day = Column(String(10), primary_key=True)
+    model = Column(String(100), primary_key=True)
+    requests = Column(Integer, nullable=False, server_default="0")
+    prompt_tokens = Column(Integer, nullable=False, server_default="0")
+    completion_tokens = Column(Integer, nullable=False, server_default="0")
+    characters = Column(Integer, nullable=False, server_default="0")
+    audio_seconds = Column(Float, nullable=False, server_default="0")
+    cost_usd = Column(Float, nullable=False, server_default="0")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_usage_daily_model_day", "model", "day"),
+    )
+
+
+class UsageReset(Base):
+    """Times the usage totals were cleared."""
+    __tablename__ = "usage_resets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    reset_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -34,10 +34,10 @@ class TaskManagerPlugin(SimplePlugin):
         """Initialize the task manager plugin."""
         logger.info("Task Manager plugin started")
         
-        # Register event handlers
-        self.register_event_handler(StandardEventTypes.TASK_CREATED, self._on_task_created)
-        self.register_event_handler(StandardEventTypes.TASK_COMPLETED, self._on_task_completed)
-        self.register_event_handler(StandardEventTypes.TASK_UPDATED, self._on_task_updated)
+        # Register event handlers; they only record history, so run them on the loop
+        self.subscribe_to_events(StandardEventTypes.TASK_CREATED, self._on_task_created, mode="inline")
+        self.subscribe_to_events(StandardEventTypes.TASK_COMPLETED, self._on_task_completed, mode="inline")
+        self.subscribe_to_events(StandardEventTypes.TASK_UPDATED, self._on_task_updated, mode="inline")
     
     async def on_stop(self) -> None:
         """Clean up the task manager plugin."""
@@ -7,24 +7,21 @@ Tasks integrate with the existing event system and can be used by plugins and MC
 
 import os
 import subprocess
-import json
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 from celery import current_task
 
-from ..core.celery_app import celery_app
+from ..core.celery_app import celery_app, publish_from_worker, run_in_worker_loop
 from ..core.event import Event, StandardEventTypes, create_system_event
-from ..core.event_bus import get_event_bus
 from ..core.memory import get_memory_manager
 from nagatha_assistant.utils.logger import get_logger
 
 logger = get_logger()
-event_bus = get_event_bus()
 
 
 def emit_task_event(event_type: str, task_data: Dict[str, Any]) -> None:
     """Helper function to emit task-related events."""
-    event_bus.publish_sync(create_system_event(event_type, task_data))
+    publish_from_worker(create_system_event(event_type, task_data))
 
 
 async def record_task_history(task_id: str, task_name: str, status: str, result: Any = None, error: str = None, duration: float = None, worker: str = None) -> None:
@@ -65,8 +62,8 @@ async def record_task_history(task_id: str, task_name: str, status: str, result:
 def record_task_history_sync(task_id: str, task_name: str, status: str, result: Any = None, error: str = None, duration: float = None, worker: str = None) -> None:
     """Synchronous version of record_task_history for use in Celery tasks."""
     try:
-        # Submit the asynchronous function to the thread pool
-        thread_pool.submit(asyncio.run, record_task_history(task_id, task_name, status, result, error, duration, worker))
+        # Runs on the worker's event loop without waiting for it
+        run_in_worker_loop(record_task_history(task_id, task_name, status, result, error, duration, worker))
     except Exception as e:
         logger.error(f"Failed to record task history (sync): {e}")
 
@@ -74,7 +71,6 @@ def record_task_history_sync(task_id: str, task_name: str, status: str, result:
 @celery_app.task(bind=True, name='nagatha.system.health_check')
 def system_health_check(self):
     """System health check task."""
-    import asyncio
     import time
     
     task_id = self.request.id
@@ -106,18 +102,10 @@ def system_health_check(self):
             'timestamp': datetime.now().isoformat()
         }
         
-        # Store in memory (using sync version to avoid async issues in Celery task)
+        # Store in memory on the worker's event loop
         try:
             memory = get_memory_manager()
-            # Use the sync version to avoid async issues in Celery tasks
-            import asyncio
-            try:
-                loop = asyncio.get_running_loop()
-                # If we have a running loop, create a task
-                asyncio.create_task(memory.set('system', 'health_check', health_data))
-            except RuntimeError:
-                # No running loop, run in a new event loop
-                asyncio.run(memory.set('system', 'health_check', health_data))
+            run_in_worker_loop(memory.set('system', 'health_check', health_data)).result(timeout=30)
         except Exception as e:
             logger.warning(f"Failed to store health check data: {e}")
         
@@ -275,8 +263,16 @@ def cleanup_logs(self, days_to_keep: int = 7):
 
 
 @celery_app.task(bind=True, name='nagatha.memory.backup')
-async def backup_memory(self, section: Optional[str] = None):
-    """Backup memory data to file."""
+def backup_memory(self, section: Optional[str] = None, incremental: bool = False):
+    """
+    Backup memory data to a compressed NDJSON file.
+    
+    Entries are streamed from the database, so memory use does not grow with
+    the size of the store. In incremental mode only entries changed since the
+    previous backup's high-water mark are written.
+    """
+    from ..core.memory_export import export_memory
+    
     task_id = self.request.id
     
     emit_task_event(StandardEventTypes.TASK_UPDATED, {
@@ -285,19 +281,12 @@ async def backup_memory(self, section: Optional[str] = None):
         'task_name': 'memory.backup'
     })
     
-    try:
+    async def _backup():
         memory = get_memory_manager()
         
-        if section:
-            # Backup specific section
-            data = await memory.get_all(section)
-            backup_data = {section: data}
-        else:
-            # Backup all sections
-            sections = await memory.list_sections()
-            backup_data = {}
-            for sect in sections:
-                backup_data[sect] = await memory.get_all(sect)
+        # High-water marks are tracked per section filter
+        state_key = f"memory_backup_high_water_{section or 'all'}"
+        since = await memory.get('system', state_key) if incremental else None
         
         # Create backup directory
         backup_dir = "backups"
@@ -306,16 +295,25 @@ async def backup_memory(self, section: Optional[str] = None):
         # Generate filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         section_suffix = f"_{section}" if section else ""
-        backup_file = os.path.join(backup_dir, f"memory_backup{section_suffix}_{timestamp}.json")
+        mode_suffix = "_incremental" if since else ""
+        backup_file = os.path.join(
+            backup_dir, f"memory_backup{section_suffix}{mode_suffix}_{timestamp}.ndjson.gz"
+        )
         
-        # Write backup
-        with open(backup_file, 'w') as f:
-            json.dump(backup_data, f, indent=2, default=str)
+        summary = await export_memory(backup_file, sections=[section] if section else None, since=since)
+        if summary['high_water_mark']:
+            await memory.set('system', state_key, summary['high_water_mark'])
+        return summary
+    
+    try:
+        summary = run_in_worker_loop(_backup()).result()
         
         result = {
-            'backup_file': backup_file,
-            'sections_backed_up': list(backup_data.keys()),
-            'total_entries': sum(len(data) for data in backup_data.values()),
+            'backup_file': summary['file'],
+            'sections_backed_up': list(summary['sections'].keys()),
+            'total_entries': summary['entries'],
+            'high_water_mark': summary['high_water_mark'],
+            'incremental': incremental,
             'timestamp': datetime.now().isoformat()
         }
         
@@ -414,7 +412,7 @@ def send_notification(self, message: str, notification_type: str = "info",
     
     try:
         # Emit notification event
-        event_bus.publish_sync(create_system_event(
+        publish_from_worker(create_system_event(
             StandardEventTypes.UI_NOTIFICATION,
             {
                 'message': message,
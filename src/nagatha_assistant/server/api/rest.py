@@ -3,6 +3,7 @@ REST API for the unified Nagatha server.
 """
 
 import asyncio
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 from aiohttp import web
 from nagatha_assistant.utils.logger import get_logger
@@ -30,7 +31,9 @@ class RESTAPI:
         self.app.router.add_get('/sessions', self._list_sessions)
         self.app.router.add_post('/sessions', self._create_session)
         self.app.router.add_get('/sessions/{session_id}', self._get_session)
+        self.app.router.add_get('/sessions/{session_id}/messages', self._get_messages)
         self.app.router.add_post('/sessions/{session_id}/messages', self._send_message)
+        self.app.router.add_get('/events', self._get_events)
         
         # Start the server
         self.runner = web.AppRunner(self.app)
@@ -65,7 +68,16 @@ class RESTAPI:
     async def _get_status(self, request):
         """Get server status."""
         try:
+            from nagatha_assistant.core.event_bus import get_event_bus
+            from nagatha_assistant.core.llm_gateway import get_llm_gateway
+            from nagatha_assistant.core.agent import get_session_actors
+            from nagatha_assistant.core.model_router import get_model_router
+            
             status = await self.server.get_server_status()
+            status["event_bus"] = get_event_bus().get_metrics()
+            status["llm_gateway"] = get_llm_gateway().get_metrics()
+            status["session_actors"] = get_session_actors().get_metrics()
+            status["model_router"] = get_model_router().get_metrics()
             return web.json_response(status)
         except Exception as e:
             logger.exception(f"Error getting status: {e}")
@@ -92,7 +104,8 @@ class RESTAPI:
                 message=message,
                 user_id=user_id,
                 interface=interface,
-                interface_context=interface_context
+                interface_context=interface_context,
+                priority=data.get('priority')
             )
             
             return web.json_response({"response": response})
@@ -144,6 +157,53 @@ class RESTAPI:
             logger.exception(f"Error getting session: {e}")
             return web.json_response({"error": str(e)}, status=500)
     
+    async def _get_messages(self, request):
+        """Get a newest-first page of a session's message history."""
+        try:
+            session_id = int(request.match_info['session_id'])
+            limit = max(1, min(int(request.query.get('limit', 50)), 200))
+            before_id = request.query.get('before_id')
+            before_id = int(before_id) if before_id else None
+        except ValueError:
+            return web.json_response(
+                {"error": "session_id, limit and before_id must be integers"},
+                status=400
+            )
+        
+        try:
+            from nagatha_assistant.core.agent import get_messages, message_page
+            
+            messages = await get_messages(session_id, limit=limit, before_id=before_id)
+            return web.json_response({"session_id": session_id, **message_page(messages, limit)})
+        except Exception as e:
+            logger.exception(f"Error getting messages: {e}")
+            return web.json_response({"error": str(e)}, status=500)
+    
+    async def _get_events(self, request):
+        """Replay past events, oldest first, filtered by type and time range."""
+        try:
+            limit = max(1, min(int(request.query.get('limit', 100)), 1000))
+            since = _parse_time(request.query.get('since'))
+            until = _parse_time(request.query.get('until'))
+        except ValueError:
+            return web.json_response(
+                {"error": "limit must be an integer; since and until must be epoch seconds or ISO 8601"},
+                status=400
+            )
+        event_type = request.query.get('type')
+        
+        try:
+            from nagatha_assistant.core.event_bus import get_event_bus
+            
+            event_bus = get_event_bus()
+            events = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: event_bus.replay_events(since, until, event_type, limit)
+            )
+            return web.json_response({"events": [event.to_dict() for event in events]})
+        except Exception as e:
+            logger.exception(f"Error replaying events: {e}")
+            return web.json_response({"error": str(e)}, status=500)
+    
     async def _send_message(self, request):
         """Send a message to a specific session."""
         try:
@@ -184,11 +244,25 @@ class RESTAPI:
                 message=message,
                 user_id=user_id,
                 interface=interface,
-                interface_context=interface_context
+                interface_context=interface_context,
+                priority=data.get('priority')
             )
             
             return web.json_response({"response": response})
             
         except Exception as e:
             logger.exception(f"Error sending message to session: {e}")
-            return web.json_response({"error": str(e)}, status=500) 
\ No newline at end of file
+            return web.json_response({"error": str(e)}, status=500) 
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """Parse epoch seconds or an ISO 8601 time from a query parameter."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
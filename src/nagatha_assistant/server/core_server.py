@@ -17,6 +17,7 @@ from nagatha_assistant.utils.logger import get_logger
 
 # Import agent functions for real AI processing
 from nagatha_assistant.core.agent import send_message, startup, shutdown as agent_shutdown, start_session
+from nagatha_assistant.core.llm_gateway import priority_for
 
 # Import API components
 from .api.rest import RESTAPI
@@ -57,6 +58,7 @@ class NagathaUnifiedServer:
         self.mcp_manager = None
         self.celery_app = None
         self.event_bus = None
+        self.event_bridge = None
         self.plugin_manager = None
         self._agent_initialized = False
         
@@ -102,6 +104,10 @@ class NagathaUnifiedServer:
                 # Continue anyway - some functionality may work without full agent
                 self._agent_initialized = False
             
+            # Receive events published by Celery workers
+            if self._agent_initialized:
+                await self._start_event_bridge()
+            
             # Update server state
             self._running = True
             self._start_time = datetime.now()
@@ -180,6 +186,10 @@ class NagathaUnifiedServer:
             if self.rest_api:
                 await self.rest_api.stop()
             
+            if self.event_bridge:
+                await self.event_bridge.stop()
+                self.event_bridge = None
+            
             # Shutdown agent system if it was initialized
             if self._agent_initialized:
                 self.logger.info("Shutting down agent system...")
@@ -209,8 +219,26 @@ class NagathaUnifiedServer:
         except Exception as e:
             self.logger.error(f"Error during server shutdown: {e}")
     
-    async def process_message(self, message: str, user_id: str, interface: str, interface_context: Dict[str, Any] = None) -> str:
-        """Process a message through the unified system."""
+    async def _start_event_bridge(self):
+        """Start consuming the Redis event stream if NAGATHA_EVENT_BRIDGE_URL is set."""
+        from nagatha_assistant.core.event_bridge import bridge_from_env
+        from nagatha_assistant.core.event_bus import get_event_bus
+        
+        try:
+            self.event_bridge = bridge_from_env(get_event_bus(), "server")
+            if self.event_bridge:
+                await self.event_bridge.start()
+        except Exception as e:
+            self.logger.error(f"Failed to start event bridge: {e}")
+            self.event_bridge = None
+    
+    async def process_message(self, message: str, user_id: str, interface: str, interface_context: Dict[str, Any] = None,
+                              priority: Optional[str] = None) -> str:
+        """Process a message through the unified system.
+
+        ``priority`` names an LLM queue priority (interactive, channel or
+        background); by default it is chosen from the interface.
+        """
         if not self._agent_initialized:
             return "❌ Sorry, the AI agent system is not properly initialized. Please check the server logs."
         
@@ -219,7 +247,10 @@ class NagathaUnifiedServer:
             session_id = await self.session_manager.get_or_create_session(user_id, interface, interface_context)
             
             # Process message through the real agent system
-            response = await send_message(session_id, message)
+            response = await send_message(
+                session_id, message, interface=interface,
+                priority=priority_for(interface, interface_context, priority)
+            )
             
             self.stats["total_requests"] += 1
             return response
@@ -253,6 +284,7 @@ class NagathaUnifiedServer:
                 "mcp_manager": self._agent_initialized,
                 "celery_app": False,
                 "event_bus": self._agent_initialized,
+                "event_bridge": self.event_bridge is not None,
                 "plugin_manager": self._agent_initialized,
                 "rest_api": self.rest_api is not None
             }
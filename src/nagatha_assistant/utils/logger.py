@@ -1,6 +1,71 @@
 import os
+import sys
+import queue
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict
+
+
+# Loggers already configured by get_logger, by name
+_loggers: Dict[str, logging.Logger] = {}
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Queue handler that writes through another handler on a listener thread.
+
+    Callers only put the record on a queue; formatting the final line and the
+    file I/O happen on the listener thread, so logging from the event loop
+    never blocks on disk. Closing the handler (``logging.shutdown`` does this
+    at exit) drains the queue before the target handler is closed.
+    """
+
+    def __init__(self, handler: logging.Handler):
+        super().__init__(queue.SimpleQueue())
+        self.handler = handler
+        # Drop what the target would discard before it is queued, so those
+        # records are never formatted on the calling thread; set the target's
+        # level and filters before wrapping it
+        self.setLevel(handler.level)
+        for record_filter in handler.filters:
+            self.addFilter(record_filter)
+        self.listener = QueueListener(self.queue, handler, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in this process, so unlike the base class there is
+        # no need to copy and fully format the record; only the message is
+        # fixed now in case the arguments change before it is written.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def close(self) -> None:
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
+
+
+def background_handler(handler: logging.Handler) -> logging.Handler:
+    """
+    Wrap a handler so that its output is written off the calling thread.
+
+    Set NAGATHA_LOG_QUEUE=false to write synchronously instead.
+
+    Args:
+        handler: Handler doing the actual I/O
+
+    Returns:
+        The handler to attach to loggers
+    """
+    if os.getenv("NAGATHA_LOG_QUEUE", "true").lower() in ("0", "false", "no", "off"):
+        return handler
+    return BackgroundHandler(handler)
+
+
+def _target(handler: logging.Handler) -> logging.Handler:
+    """Get the handler doing the I/O behind a background handler."""
+    return handler.handler if isinstance(handler, BackgroundHandler) else handler
 
 
 def setup_logger(
@@ -33,6 +98,7 @@ def setup_logger(
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
     handler.setFormatter(formatter)
+    handler = background_handler(handler)
     logger.addHandler(handler)
 
     # Add the RotatingFileHandler to the root logger
@@ -44,7 +110,7 @@ def setup_logger(
         logging.root.handlers = [
             h
             for h in logging.root.handlers
-            if not isinstance(h, logging.StreamHandler)
+            if not isinstance(_target(h), logging.StreamHandler)
         ]
 
     return logger
@@ -84,12 +150,12 @@ def setup_logger_with_env_control():
     file_handler = logging.FileHandler("nagatha.log")
     file_handler.setLevel(file_level)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    logger.addHandler(background_handler(file_handler))
     
     # Store chat log level for UI components to use
     logger.chat_log_level = chat_level
     
-    logger.info(f"Logger initialized - File level: {file_log_level}, Chat level: {chat_log_level}")
+    logger.info("Logger initialized - File level: %s, Chat level: %s", file_log_level, chat_log_level)
     
     return logger
 
@@ -99,6 +165,8 @@ def get_logger(name: str = None) -> logging.Logger:
     
     This is the preferred way to get loggers throughout the application.
     It ensures consistent configuration and avoids duplicate handler setup.
+    Loggers are configured once and cached, so call this at module level
+    rather than inside frequently called functions.
     
     Args:
         name: Logger name (defaults to calling module's __name__)
@@ -108,16 +176,12 @@ def get_logger(name: str = None) -> logging.Logger:
     """
     if name is None:
         # Get the calling module's name
-        import inspect
-        frame = inspect.currentframe()
-        try:
-            # Go up one frame to get the caller's module
-            caller_frame = frame.f_back
-            name = caller_frame.f_globals.get('__name__', __name__)
-        finally:
-            # Clean up the frame reference
-            del frame
-    
+        name = sys._getframe(1).f_globals.get('__name__', __name__)
+
+    cached = _loggers.get(name)
+    if cached is not None:
+        return cached
+
     logger = logging.getLogger(name)
     
     # If this is the first time getting this logger, ensure it's configured
@@ -135,7 +199,8 @@ def get_logger(name: str = None) -> logging.Logger:
     # Ensure the logger level is at least INFO to reduce debug noise
     if logger.level < logging.INFO:
         logger.setLevel(logging.INFO)
-    
+
+    _loggers[name] = logger
     return logger
 
 def should_log_to_chat(level: int) -> bool:
@@ -1,23 +1,42 @@
 """Track OpenAI API token usage and cost.
 
-This helper is intentionally lightweight – it records cumulative usage in a
-JSON file (``.nagatha_usage.json`` in the project root).  Using a file keeps
-the dependency surface small and avoids additional database migrations.
-
-If you need more sophisticated reporting (per-day breakdown, per-feature
-aggregation), migrate this logic into the existing SQL database – the public
-API of :func:`record_usage` can remain unchanged.
+Every completion, text-to-speech and speech-to-text call is recorded with
+:func:`record_usage`, which only adds the counts to an in-memory buffer keyed
+by (day, model, session, interface, tool round). Recording takes a lock and a
+dictionary update, so it is cheap on the chat hot path and safe from any
+thread.
+
+The buffer is written to the ``usage_ledger`` table, and to the ``usage_daily``
+rollup, in one transaction:
+
+- ``NAGATHA_USAGE_FLUSH_SECONDS`` after the first call following a flush,
+- as soon as it holds ``NAGATHA_USAGE_MAX_BUFFER`` rows,
+- on shutdown, and before usage is read.
+
+Summaries come from indexed queries: :func:`load_usage` reads the daily
+rollup, which grows by one row per model per day, and
+:func:`get_usage_breakdown` aggregates the ledger by model, day, session,
+interface or tool round.
+
+Totals from the JSON file used by earlier versions (``.nagatha_usage.json``)
+are imported into the ledger the first time it is written or read; the file is
+then renamed with an ``.imported`` suffix.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import threading
-from datetime import datetime
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import MutableMapping
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import delete, func, select
 
+from nagatha_assistant.db import SessionLocal, ensure_schema, increment_row
+from nagatha_assistant.db_models import UsageDaily, UsageLedger, UsageReset
 from nagatha_assistant.utils.logger import get_logger
 
 _log = get_logger()
@@ -41,33 +60,66 @@ MODEL_PRICING: dict[str, tuple[float, float]] = {
     "gpt-4.1-nano": (0.0001, 0.0004), # Input $0.10/M Output $0.40/M
 }
 
+# Audio models: USD per 1K input characters for speech synthesis and per
+# minute of audio for transcription.  Local Whisper models cost nothing.
+AUDIO_PRICING: dict[str, float] = {
+    "tts-1": 0.015,
+    "tts-1-hd": 0.030,
+    "whisper-1": 0.006,
+}
+
 
 # ---------------------------------------------------------------------------
-# Persistence helpers
+# In-memory buffer
 # ---------------------------------------------------------------------------
 
+FLUSH_INTERVAL = float(os.getenv("NAGATHA_USAGE_FLUSH_SECONDS", "5"))
+MAX_BUFFER = int(os.getenv("NAGATHA_USAGE_MAX_BUFFER", "500"))
+
+# Ledger key columns and the totals kept for each key, in buffer order
+_KEY_COLUMNS = ("day", "model", "session_scope", "interface", "tool_round")
+_TOTALS = ("requests", "prompt_tokens", "completion_tokens", "characters", "audio_seconds", "cost_usd")
+
+UsageKey = Tuple[str, str, int, str, int]
+
 _FILE_PATH = Path(os.getenv("NAGATHA_USAGE_FILE", ".nagatha_usage.json"))
 _LOCK = threading.Lock()
+_buffer: Dict[UsageKey, List[float]] = {}
+_flush_task: Optional[asyncio.Task] = None
+_ready = False
 
 
-def _load() -> MutableMapping[str, dict[str, float]]:
-    if _FILE_PATH.is_file():
-        try:
-            with _FILE_PATH.open("r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return data  # type: ignore[return-value]
-        except Exception as exc:  # pragma: no cover – non-fatal
-            _log.warning("Failed to read usage file: %s", exc)
-    return {}
+def _empty_totals() -> List[float]:
+    return [0, 0, 0, 0, 0.0, 0.0]
 
 
-def _save(data: MutableMapping[str, dict[str, float]]) -> None:
-    try:
-        with _FILE_PATH.open("w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-    except Exception as exc:  # pragma: no cover
-        _log.warning("Failed to write usage file: %s", exc)
+def _add(totals: List[float], deltas: List[float]) -> None:
+    for i, delta in enumerate(deltas):
+        totals[i] += delta
+
+
+def _day(value: Union[date, str, None]) -> Optional[str]:
+    """Format a date as a ledger day."""
+    if value is None or isinstance(value, str):
+        return value
+    return value.strftime("%Y-%m-%d")
+
+
+def usage_cost(model: str, prompt_tokens: int = 0, completion_tokens: int = 0,
+               characters: int = 0, audio_seconds: float = 0.0) -> float:
+    """Price a call with :data:`MODEL_PRICING` and :data:`AUDIO_PRICING`.
+
+    Unknown models cost ``0`` so that they can be repriced later.
+    """
+    cost = 0.0
+    price = MODEL_PRICING.get(model)
+    if price:
+        p_cost, c_cost = price
+        cost += (prompt_tokens / 1000) * p_cost + (completion_tokens / 1000) * c_cost
+    audio_price = AUDIO_PRICING.get(model)
+    if audio_price:
+        cost += (characters / 1000) * audio_price + (audio_seconds / 60) * audio_price
+    return cost
 
 
 # ---------------------------------------------------------------------------
@@ -75,115 +127,263 @@ def _save(data: MutableMapping[str, dict[str, float]]) -> None:
 # ---------------------------------------------------------------------------
 
 
-def record_usage(model: str, prompt_tokens: int, completion_tokens: int) -> None:
-    """Add the given token counts to the persistent running totals.
+def record_usage(model: str, prompt_tokens: int = 0, completion_tokens: int = 0, *,
+                 session_id: Optional[int] = None, interface: str = "chat",
+                 tool_round: int = 0, characters: int = 0, audio_seconds: float = 0.0) -> None:
+    """Add one API call to the usage buffer.
+
+    Args:
+        model: Model the call was made with
+        prompt_tokens: Input tokens of a completion
+        completion_tokens: Output tokens of a completion
+        session_id: Conversation session the call was made for
+        interface: Where the call came from (chat, discord, voice, ...)
+        tool_round: 0 for a turn's first completion, n for the completion
+            after the n-th tool call
+        characters: Input characters of a speech synthesis call
+        audio_seconds: Audio length of a transcription call
+    """
+    key = (datetime.now(timezone.utc).strftime("%Y-%m-%d"), model, session_id or 0, interface, tool_round)
+    deltas = [1, prompt_tokens, completion_tokens, characters, audio_seconds,
+              usage_cost(model, prompt_tokens, completion_tokens, characters, audio_seconds)]
+
+    with _LOCK:
+        totals = _buffer.get(key)
+        if totals is None:
+            totals = _buffer[key] = _empty_totals()
+        _add(totals, deltas)
+        full = len(_buffer) >= MAX_BUFFER
+
+    _schedule_flush(full)
+
+
+def _schedule_flush(now: bool) -> None:
+    """Start a flush on the running loop, immediately or after FLUSH_INTERVAL."""
+    global _flush_task
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # No loop in this thread; the next flush_usage() writes it
+
+    if now:
+        loop.create_task(flush_usage())
+    elif _flush_task is None or _flush_task.done() or _flush_task.get_loop() is not loop:
+        _flush_task = loop.create_task(_flush_after(FLUSH_INTERVAL))
+
 
-    Cost is computed using :data:`MODEL_PRICING`.  Unknown models are recorded
-    but cost defaults to ``0`` so that future migrations can recalculate when
-    pricing becomes known.
+async def _flush_after(delay: float) -> None:
+    await asyncio.sleep(delay)
+    await flush_usage()
+
+
+async def flush_usage() -> int:
+    """Write the buffered usage to the database in one transaction.
+
+    If the write fails the usage is put back into the buffer for the next
+    flush.
+
+    Returns:
+        Number of ledger rows written
     """
+    global _buffer
+
+    await _ensure_ready()
     with _LOCK:
-        data = _load()
-        
-        # Ensure metadata exists
-        if "_metadata" not in data:
-            data["_metadata"] = {
-                "reset_timestamp": None,
-                "reset_count": 0
-            }
-        
-        # Get or create model record
-        rec = data.setdefault(model, {
-            "prompt_tokens": 0, 
-            "completion_tokens": 0, 
-            "cost_usd": 0.0,
-            "requests": 0,
-            "last_used": None,
-            "daily_usage": {}
-        })
-
-        # Handle backward compatibility for existing records
-        if "requests" not in rec:
-            rec["requests"] = 0
-        if "last_used" not in rec:
-            rec["last_used"] = None
-        if "daily_usage" not in rec:
-            rec["daily_usage"] = {}
-
-        rec["prompt_tokens"] += prompt_tokens
-        rec["completion_tokens"] += completion_tokens
-        rec["requests"] += 1
-        rec["last_used"] = datetime.now().isoformat()
-
-        # Track daily usage
-        today = datetime.now().strftime('%Y-%m-%d')
-        daily_rec = rec["daily_usage"].setdefault(today, {
-            "prompt_tokens": 0,
-            "completion_tokens": 0,
-            "cost_usd": 0.0,
-            "requests": 0
-        })
-        
-        daily_rec["prompt_tokens"] += prompt_tokens
-        daily_rec["completion_tokens"] += completion_tokens
-        daily_rec["requests"] += 1
-
-        # Calculate costs
-        price = MODEL_PRICING.get(model)
-        if price:
-            p_cost, c_cost = price
-            request_cost = (prompt_tokens / 1000) * p_cost + (completion_tokens / 1000) * c_cost
-            rec["cost_usd"] += request_cost
-            daily_rec["cost_usd"] += request_cost
-
-        _save(data)
-
-
-def load_usage() -> dict[str, dict[str, float]]:
-    """Return the cumulative usage structure.
-    
-    Returns only model usage data, filtering out metadata.
+        if not _buffer:
+            return 0
+        pending, _buffer = _buffer, {}
+
+    daily: Dict[Tuple[str, str], List[float]] = {}
+    for key, totals in pending.items():
+        _add(daily.setdefault(key[:2], _empty_totals()), totals)
+
+    try:
+        async with SessionLocal() as session:
+            now = datetime.now(timezone.utc)
+            for key, totals in pending.items():
+                await _add_totals(session, UsageLedger, dict(zip(_KEY_COLUMNS, key)), totals, now)
+            for (day, model), totals in daily.items():
+                await _add_totals(session, UsageDaily, {"day": day, "model": model}, totals, now)
+            await session.commit()
+    except Exception as exc:
+        with _LOCK:
+            for key, totals in pending.items():
+                _add(_buffer.setdefault(key, _empty_totals()), totals)
+        _log.warning("Failed to write usage ledger: %s", exc)
+        return 0
+
+    _log.debug("Wrote %d usage ledger rows", len(pending))
+    return len(pending)
+
+
+async def _add_totals(session, model_class, key: Dict[str, Any], totals: List[float],
+                      now: datetime) -> None:
+    """Add totals to a ledger or rollup row, inserting it if missing."""
+    await increment_row(session, model_class, key, dict(zip(_TOTALS, totals)),
+                        values={"updated_at": now})
+
+
+async def load_usage() -> dict[str, dict[str, Any]]:
+    """Return cumulative usage per model from the daily rollup.
+
+    Returns:
+        ``{model: {requests, prompt_tokens, completion_tokens, characters,
+        audio_seconds, cost_usd, last_used, daily_usage: {day: totals}}}``
     """
-    data = _load()
-    # Filter out metadata when returning usage data
-    return {k: v for k, v in data.items() if k != "_metadata"}
 
+    await flush_usage()
+    try:
+        async with SessionLocal() as session:
+            rows = (await session.execute(
+                select(UsageDaily).order_by(UsageDaily.model, UsageDaily.day)
+            )).scalars().all()
+    except Exception as exc:
+        _log.warning("Failed to read usage: %s", exc)
+        return {}
+
+    usage: dict[str, dict[str, Any]] = {}
+    for row in rows:
+        day_totals = {name: getattr(row, name) for name in _TOTALS}
+        rec = usage.setdefault(row.model, {**{name: 0 for name in _TOTALS},
+                                           "last_used": None, "daily_usage": {}})
+        for name, value in day_totals.items():
+            rec[name] += value
+        rec["daily_usage"][row.day] = day_totals
+        last_used = row.updated_at.isoformat() if row.updated_at else None
+        if last_used and (rec["last_used"] is None or last_used > rec["last_used"]):
+            rec["last_used"] = last_used
+    return usage
+
+
+async def get_usage_breakdown(by: str = "model", since: Union[date, str, None] = None,
+                              until: Union[date, str, None] = None,
+                              session_id: Optional[int] = None,
+                              interface: Optional[str] = None) -> dict[Any, dict[str, Any]]:
+    """Aggregate ledger totals over a range of days.
+
+    Args:
+        by: Group by "model", "day", "session", "interface" or "tool_round"
+        since: First day to include (date or YYYY-MM-DD)
+        until: Last day to include
+        session_id: Only calls for this conversation session
+        interface: Only calls from this interface
 
-def reset_usage() -> None:
-    """Reset all usage data while preserving reset timestamp.
-    
-    This clears all token counts and costs but maintains the reset history
-    so users know when the current tracking period started.
+    Returns:
+        Mapping of group value to totals
     """
 
+    column_name = "session_scope" if by == "session" else by
+    if column_name not in _KEY_COLUMNS:
+        raise ValueError(f"Cannot group usage by '{by}'")
+    group = getattr(UsageLedger, column_name)
+
+    await flush_usage()
+    stmt = select(group, *(func.sum(getattr(UsageLedger, name)) for name in _TOTALS)).group_by(group)
+    if session_id is not None:
+        stmt = stmt.where(UsageLedger.session_scope == session_id)
+    if interface is not None:
+        stmt = stmt.where(UsageLedger.interface == interface)
+    if since is not None:
+        stmt = stmt.where(UsageLedger.day >= _day(since))
+    if until is not None:
+        stmt = stmt.where(UsageLedger.day <= _day(until))
+
+    async with SessionLocal() as session:
+        rows = (await session.execute(stmt)).all()
+    return {row[0]: dict(zip(_TOTALS, row[1:])) for row in rows}
+
+
+async def reset_usage() -> None:
+    """Clear all usage totals and record the time of the reset."""
+
+    await _ensure_ready()
     with _LOCK:
-        # Store the current timestamp as the reset time
-        reset_timestamp = datetime.now().isoformat()
-        
-        # Create new empty data structure with reset metadata
-        data = {
-            "_metadata": {
-                "reset_timestamp": reset_timestamp,
-                "reset_count": 1  # Track how many times data has been reset
-            }
-        }
-        
-        # Check if there's existing metadata to preserve reset count
-        existing_data = _load()
-        if "_metadata" in existing_data:
-            existing_metadata = existing_data["_metadata"]
-            if "reset_count" in existing_metadata:
-                data["_metadata"]["reset_count"] = existing_metadata["reset_count"] + 1
-        
-        _save(data)
-        _log.info(f"Usage data reset at {reset_timestamp}")
-
-
-def get_reset_info() -> dict[str, any]:
+        _buffer.clear()
+
+    reset_at = datetime.now(timezone.utc)
+    async with SessionLocal() as session:
+        await session.execute(delete(UsageLedger))
+        await session.execute(delete(UsageDaily))
+        session.add(UsageReset(reset_at=reset_at))
+        await session.commit()
+    _log.info(f"Usage data reset at {reset_at.isoformat()}")
+
+
+async def get_reset_info() -> dict[str, Any]:
     """Get information about the last reset.
-    
+
+    Returns:
+        dict with ``reset_timestamp`` (None if never reset) and ``reset_count``
+    """
+
+    await _ensure_ready()
+    async with SessionLocal() as session:
+        count, last = (await session.execute(
+            select(func.count(UsageReset.id), func.max(UsageReset.reset_at))
+        )).one()
+    return {"reset_timestamp": last.isoformat() if last else None, "reset_count": count}
+
+
+# ---------------------------------------------------------------------------
+# Schema and legacy file import
+# ---------------------------------------------------------------------------
+
+
+async def _ensure_ready() -> None:
+    """Make sure the schema exists and the legacy JSON file is imported."""
+    global _ready
+    if _ready:
+        return
+
+    await ensure_schema()
+    _ready = True
+    if _FILE_PATH.is_file():
+        await import_usage_file(_FILE_PATH)
+
+
+async def import_usage_file(path: Union[str, Path]) -> int:
+    """Import the totals of a legacy ``.nagatha_usage.json`` file.
+
+    Per-day totals are added to the ledger with the interface ``legacy``;
+    totals recorded before the file tracked days are added to the day the
+    model was last used. The file is renamed with an ``.imported`` suffix.
+
+    Args:
+        path: JSON usage file
+
     Returns:
-        dict containing reset_timestamp and reset_count, or empty dict if never reset
+        Number of (day, model) totals imported
     """
-    data = _load()
-    return data.get("_metadata", {})
+    path = Path(path)
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as exc:
+        _log.warning("Failed to read usage file %s: %s", path, exc)
+        return 0
+    if not isinstance(data, dict):
+        return 0
+
+    imported = 0
+    with _LOCK:
+        for model, rec in data.items():
+            if model == "_metadata" or not isinstance(rec, dict):
+                continue
+            remaining = [rec.get("requests", 0), rec.get("prompt_tokens", 0),
+                         rec.get("completion_tokens", 0), 0, 0.0, rec.get("cost_usd", 0.0)]
+            for day, daily in (rec.get("daily_usage") or {}).items():
+                totals = [daily.get("requests", 0), daily.get("prompt_tokens", 0),
+                          daily.get("completion_tokens", 0), 0, 0.0, daily.get("cost_usd", 0.0)]
+                _add(_buffer.setdefault((day, model, 0, "legacy", 0), _empty_totals()), totals)
+                _add(remaining, [-value for value in totals])
+                imported += 1
+            if any(value > 0 for value in remaining):
+                last_used = rec.get("last_used") or datetime.now(timezone.utc).isoformat()
+                _add(_buffer.setdefault((last_used[:10], model, 0, "legacy", 0), _empty_totals()),
+                     [max(value, 0) for value in remaining])
+                imported += 1
+
+    if await flush_usage() or not imported:
+        path.rename(path.with_name(path.name + ".imported"))
+        _log.info("Imported %d usage totals from %s", imported, path)
+    return imported
@@ -11,4 +11,6 @@ import tempfile
 # Use a fresh SQLite database file for each test session to avoid test pollution
 fd, db_path = tempfile.mkstemp(prefix="nagatha_test_", suffix=".db")
 os.close(fd)
-os.environ['DATABASE_URL'] = f"sqlite:///{db_path}"
\ No newline at end of file
+os.environ['DATABASE_URL'] = f"sqlite:///{db_path}"
+# Keep routing decisions logged by agent tests out of the working tree
+os.environ.setdefault('NAGATHA_ROUTER_LOG', os.path.join(tempfile.mkdtemp(prefix="nagatha_routing_"), "routing.jsonl"))
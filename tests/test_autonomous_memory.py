@@ -2,6 +2,7 @@
 Tests for autonomous memory management functionality.
 """
 
+import asyncio
 import pytest
 import pytest_asyncio
 from unittest.mock import AsyncMock, MagicMock
@@ -12,6 +13,7 @@ from nagatha_assistant.core.memory import (
     get_memory_learning, get_contextual_recall, get_memory_maintenance,
     get_personality_memory
 )
+from nagatha_assistant.core.memory_rules import RuleProfiler, stable_hash
 from nagatha_assistant.core.storage import InMemoryStorageBackend
 
 
@@ -121,6 +123,38 @@ class TestMemoryTrigger:
                 assert session_entry["session_id"] == 456
                 assert "task" in session_entry["value"]
 
+    
+    @pytest.mark.asyncio
+    async def test_fact_keys_are_stable(self, memory_trigger):
+        """Test that generated keys do not depend on the process hash seed."""
+        content = "I think Python is a programming language. I think Python is a programming language."
+        result = await memory_trigger.analyze_for_storage(content)
+        
+        fact_entries = [e for e in result["entries"] if e["section"] == "facts"]
+        assert len(fact_entries) == 1
+        assert fact_entries[0]["key"] == f"fact_{stable_hash('I think Python is a programming language.')}"
+    
+    @pytest.mark.asyncio
+    async def test_rule_profiling(self, memory_trigger):
+        """Test that the profiling hook reports time per rule."""
+        memory_trigger.profiler = RuleProfiler()
+        content = "I always prefer detailed explanations. I'm working on a big project today."
+        await memory_trigger.analyze_for_storage(content, {"session_id": 1})
+        
+        report = memory_trigger.profiler.report()
+        assert {"scan", "importance", "preferences", "personality", "facts", "session_state"} <= set(report)
+        assert report["scan"]["calls"] == 1
+        assert report["facts"]["total_ms"] >= 0
+    
+    @pytest.mark.asyncio
+    async def test_long_content_offloaded(self, memory_trigger):
+        """Test that long messages are scanned in a worker thread with the same result."""
+        content = "I prefer tea in the morning. " * 50
+        inline = await memory_trigger.analyze_for_storage(content)
+        
+        memory_trigger.offload_threshold = 100
+        offloaded = await memory_trigger.analyze_for_storage(content)
+        assert [e["key"] for e in offloaded["entries"]] == [e["key"] for e in inline["entries"]]
 
 class TestMemoryLearning:
     """Test suite for the MemoryLearning class."""
@@ -344,6 +378,54 @@ class TestPersonalityMemory:
         assert "formality" in adaptations
         assert "response_style" in adaptations
 
+    
+    @pytest.mark.asyncio
+    async def test_profile_is_materialized(self, personality_memory):
+        """Test that repeated profile reads are served without storage calls."""
+        manager = personality_memory.memory_manager
+        await manager.set("personality", "formal_style", {"style_type": "formality_preference"}, session_id=7)
+        
+        await personality_memory.adapt_to_context("first turn", session_id=7)
+        manager._storage.get = AsyncMock(side_effect=AssertionError("storage read"))
+        manager._storage.list_keys = AsyncMock(side_effect=AssertionError("storage read"))
+        manager._storage.list_entries = AsyncMock(side_effect=AssertionError("storage read"))
+        
+        # Writes and deletes update the view in place
+        await manager.set("personality", "emotion_positive_emotion_7",
+                          {"emotion_type": "positive_emotion"}, session_id=7)
+        adaptations = await personality_memory.adapt_to_context("second turn", session_id=7)
+        assert adaptations["formality"] == "formal"
+        assert adaptations["tone"] == "enthusiastic and warm"
+        
+        await manager.delete("personality", "formal_style", session_id=7)
+        profile = await personality_memory.get_personality_profile(session_id=7)
+        assert list(profile["interaction_preferences"]) == []
+        assert list(profile["emotional_adaptations"]) == ["emotion_positive_emotion_7"]
+    
+    @pytest.mark.asyncio
+    async def test_profile_drops_expired_emotions(self, personality_memory):
+        """Test that expired emotions disappear from the materialized profile."""
+        manager = personality_memory.memory_manager
+        await personality_memory.get_personality_profile(session_id=8)
+        await manager.set("personality", "emotion_confusion_state_8",
+                          {"emotion_type": "confusion_state"}, session_id=8, ttl_seconds=-1)
+        
+        profile = await personality_memory.get_personality_profile(session_id=8)
+        assert profile["emotional_adaptations"] == {}
+    
+    @pytest.mark.asyncio
+    async def test_rebuilt_profile_keeps_expiry(self, personality_memory):
+        """Test that a view rebuilt from storage still drops emotions when they expire."""
+        manager = personality_memory.memory_manager
+        await manager.set("personality", "emotion_confusion_state_9",
+                          {"emotion_type": "confusion_state"}, session_id=9, ttl_seconds=1)
+        manager._personality_views.clear()
+        
+        assert "emotion_confusion_state_9" in await manager.get_personality_entries(session_id=9)
+        await asyncio.sleep(1.1)
+        
+        assert await manager.get("personality", "emotion_confusion_state_9", session_id=9) is None
+        assert await manager.get_personality_entries(session_id=9) == {}
 
 class TestAutonomousMemoryIntegration:
     """Integration tests for autonomous memory components."""
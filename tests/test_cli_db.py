@@ -9,10 +9,12 @@ from click.testing import CliRunner
 
 from sqlalchemy import create_engine
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
 
 # Ensure project src is on path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 from nagatha_assistant.cli import cli
+import nagatha_assistant.db as db_mod
 from nagatha_assistant.db import Base
 
 
@@ -122,4 +124,28 @@ def test_db_backup_default_timestamp(tmp_path, monkeypatch):
     expected_name = 'srcfile_backup_20200101T000000.db'
     dest = src.with_name(expected_name)
     assert dest.exists()
-    assert dest.read_bytes() == b'data'
\ No newline at end of file
+    assert dest.read_bytes() == b'data'
+
+def test_db_verify(tmp_path, monkeypatch):
+    runner = CliRunner()
+    db_file = tmp_path / 'verify.db'
+    engine = create_engine(f'sqlite:///{db_file}')
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    # verify checks the application engine, not a URL of its own
+    monkeypatch.setattr(db_mod, 'engine', db_mod.create_engine_for(
+        f'sqlite+aiosqlite:///{db_file}', 'legacy', poolclass=NullPool))
+
+    result = runner.invoke(cli, ['db', 'verify'])
+    assert result.exit_code == 0
+    assert 'Database schema matches the models.' in result.output
+
+    # Dropping an index is drift that create_all would not repair
+    conn = sqlite3.connect(db_file)
+    conn.execute('DROP INDEX ix_messages_session_timestamp')
+    conn.commit()
+    conn.close()
+
+    result = runner.invoke(cli, ['db', 'verify'])
+    assert result.exit_code == 1
+    assert 'Missing index: messages.ix_messages_session_timestamp' in result.output
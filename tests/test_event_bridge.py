@@ -0,0 +1,208 @@
+"""
+Tests for the Redis Streams event bridge.
+
+A small in-memory stand-in implements the stream commands the bridge uses,
+with consumer groups that track delivered and pending entries like Redis.
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from redis.exceptions import ResponseError
+
+from nagatha_assistant.core.event import Event
+from nagatha_assistant.core.event_bridge import RedisStreamBridge
+from nagatha_assistant.core.event_bus import EventBus
+
+
+class FakeStreams:
+    """Single-stream Redis stand-in supporting XADD, XREADGROUP and XACK."""
+
+    def __init__(self):
+        self.entries = []
+        self.groups = {}
+        self.executes = 0
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def add(self, fields):
+        entry_id = f"{len(self.entries) + 1}-0"
+        self.entries.append((entry_id, fields))
+        return entry_id
+
+    async def xgroup_create(self, stream, group, id="$", mkstream=False):
+        if group in self.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        self.groups[group] = {"next": len(self.entries) if id == "$" else 0, "pending": {}}
+
+    async def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        (stream, cursor), = streams.items()
+        state = self.groups[group]
+        pending = state["pending"].setdefault(consumer, [])
+        if cursor == "0":
+            entries = [entry for entry in self.entries if entry[0] in pending][:count]
+        else:
+            entries = self.entries[state["next"]:state["next"] + count]
+            state["next"] += len(entries)
+            pending.extend(entry_id for entry_id, _ in entries)
+            if not entries:
+                await asyncio.sleep(block / 1000)
+        return [[stream, entries]] if entries else []
+
+    async def xack(self, stream, group, *entry_ids):
+        for pending in self.groups[group]["pending"].values():
+            pending[:] = [entry_id for entry_id in pending if entry_id not in entry_ids]
+        return len(entry_ids)
+
+    async def aclose(self):
+        pass
+
+
+class FakePipeline:
+    def __init__(self, streams):
+        self.streams = streams
+        self.commands = []
+
+    def xadd(self, stream, fields, maxlen=None, approximate=True):
+        self.commands.append(fields)
+
+    async def execute(self):
+        self.streams.executes += 1
+        return [self.streams.add(fields) for fields in self.commands]
+
+
+@pytest_asyncio.fixture
+async def buses():
+    """A worker and a server bus, both running."""
+    worker, server = EventBus(), EventBus()
+    await worker.start()
+    await server.start()
+    yield worker, server
+    await worker.stop()
+    await server.stop()
+
+
+@pytest.mark.asyncio
+async def test_task_events_reach_server(buses):
+    """Test that forwarded events are written in one batch and published remotely."""
+    worker, server = buses
+    streams = FakeStreams()
+    received = []
+    server.subscribe("task.*", lambda e: received.append(e))
+
+    consumer = RedisStreamBridge(server, consume=True, block_ms=10, redis_client=streams)
+    forwarder = RedisStreamBridge(worker, forward_patterns=["task.*"], redis_client=streams)
+    await consumer.start()
+    await forwarder.start()
+    try:
+        events = [Event("task.updated", {"n": n}) for n in range(5)]
+        await worker.publish_many(events + [Event("agent.message")])
+        await asyncio.sleep(0.2)
+    finally:
+        await forwarder.stop()
+        await consumer.stop()
+
+    assert [e.event_id for e in received] == [e.event_id for e in events]
+    assert received[0].data == {"n": 0}
+    assert streams.executes == 1
+    assert forwarder.get_stats()["forwarded"] == 5
+    assert consumer.last_id == "5-0"
+    assert streams.groups["nagatha-server"]["pending"][consumer.consumer] == []
+
+
+@pytest.mark.asyncio
+async def test_duplicate_entries_published_once(buses):
+    """Test that an event appended twice is delivered once."""
+    _, server = buses
+    streams = FakeStreams()
+    received = []
+    server.subscribe("task.*", lambda e: received.append(e))
+
+    bridge = RedisStreamBridge(server, consume=True, block_ms=10, redis_client=streams)
+    await bridge.start()
+    try:
+        record = {"event": '{"event_type": "task.completed", "event_id": "same-id", "timestamp": 1.0}'}
+        streams.add(record)
+        streams.add(record)
+        await asyncio.sleep(0.1)
+    finally:
+        await bridge.stop()
+
+    assert len(received) == 1
+    assert bridge.get_stats()["duplicates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_publish_is_redelivered(buses):
+    """Test that entries whose local publish failed are not acked or taken for duplicates."""
+    _, server = buses
+    streams = FakeStreams()
+    received = []
+    server.subscribe("task.*", lambda e: received.append(e.event_id))
+    bridge = RedisStreamBridge(server, consume=True, redis_client=streams)
+    await streams.xgroup_create(bridge.stream, bridge.group)
+    streams.add({"event": '{"event_type": "task.updated", "event_id": "a", "timestamp": 1.0}'})
+    response = await streams.xreadgroup(bridge.group, bridge.consumer, {bridge.stream: ">"}, count=10)
+    entries = response[0][1]
+
+    publish_many = server.publish_many
+
+    async def failing_publish(events):
+        raise RuntimeError("bus unavailable")
+
+    server.publish_many = failing_publish
+    with pytest.raises(RuntimeError):
+        await bridge._deliver(entries)
+    assert streams.groups[bridge.group]["pending"][bridge.consumer] == ["1-0"]
+
+    server.publish_many = publish_many
+    await bridge._deliver(entries)
+    await asyncio.sleep(0.05)
+
+    assert received == ["a"]
+    assert bridge.get_stats()["duplicates"] == 0
+    assert streams.groups[bridge.group]["pending"][bridge.consumer] == []
+
+
+@pytest.mark.asyncio
+async def test_resumes_unacknowledged_entries(buses):
+    """Test that entries read but not acknowledged before a restart are delivered."""
+    _, server = buses
+    streams = FakeStreams()
+    await streams.xgroup_create("nagatha:events", "nagatha-server")
+    streams.add({"event": '{"event_type": "task.updated", "event_id": "a", "timestamp": 1.0}'})
+    # A previous run of this consumer read the entry, then died before XACK
+    await streams.xreadgroup("nagatha-server", "worker-host", {"nagatha:events": ">"}, count=10)
+
+    received = []
+    server.subscribe("task.*", lambda e: received.append(e.event_id))
+    bridge = RedisStreamBridge(server, consume=True, consumer="worker-host", block_ms=10,
+                               redis_client=streams)
+    await bridge.start()
+    try:
+        await asyncio.sleep(0.1)
+    finally:
+        await bridge.stop()
+
+    assert received == ["a"]
+    assert streams.groups["nagatha-server"]["pending"]["worker-host"] == []
+
+
+@pytest.mark.asyncio
+async def test_bridged_events_not_forwarded_back(buses):
+    """Test that events received from the stream are not appended again."""
+    _, server = buses
+    streams = FakeStreams()
+    bridge = RedisStreamBridge(server, forward_patterns=["task.*"], consume=True, block_ms=10,
+                               redis_client=streams)
+    await bridge.start()
+    try:
+        streams.add({"event": '{"event_type": "task.updated", "event_id": "b", "timestamp": 1.0}'})
+        await asyncio.sleep(0.2)
+    finally:
+        await bridge.stop()
+
+    assert streams.executes == 0
+    assert len(streams.entries) == 1
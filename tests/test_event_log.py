@@ -0,0 +1,111 @@
+"""
+Tests for the persistent event log.
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+import pytest
+
+from nagatha_assistant.core.event import Event, EventPriority
+from nagatha_assistant.core.event_bus import EventBus
+from nagatha_assistant.core.event_log import EventLog
+
+
+def test_append_and_replay(tmp_path):
+    """Test that events are read back in order with their fields."""
+    log = EventLog(tmp_path)
+    events = [Event("agent.message", {"n": n}, priority=EventPriority.HIGH, source="agent")
+              for n in range(3)]
+    log.append(events)
+    
+    replayed = list(log.replay())
+    assert replayed == events
+    log.close()
+
+
+def test_replay_filters(tmp_path):
+    """Test filtering by time range and by exact or glob type."""
+    log = EventLog(tmp_path)
+    log.append([
+        Event("memory.entry.created", {"n": 0}, timestamp=100.0),
+        Event("agent.message", {"n": 1}, timestamp=200.0),
+        Event("memory.entry.deleted", {"n": 2}, timestamp=300.0),
+    ])
+    
+    def numbers(**filters):
+        return [event.data["n"] for event in log.replay(**filters)]
+    
+    assert numbers(since=150.0) == [1, 2]
+    assert numbers(until=datetime.fromtimestamp(300.0, timezone.utc)) == [0, 1]
+    assert numbers(event_type_pattern="agent.message") == [1]
+    assert numbers(event_type_pattern="memory.*") == [0, 2]
+    assert numbers(since=150.0, event_type_pattern="memory.*") == [2]
+
+
+def test_rotation_and_retention(tmp_path):
+    """Test that full segments rotate and only the newest are kept."""
+    log = EventLog(tmp_path, segment_bytes=200, max_segments=2)
+    for n in range(10):
+        log.append([Event("bulk", {"n": n, "padding": "x" * 100})])
+    
+    assert len(log.segments()) == 2
+    replayed = [event.data["n"] for event in log.replay()]
+    assert replayed == list(range(10))[-len(replayed):]
+    assert 0 not in replayed
+    log.close()
+
+
+def test_replay_skips_partial_line(tmp_path):
+    """Test that a torn final write is ignored."""
+    log = EventLog(tmp_path)
+    log.append([Event("complete")])
+    log.close()
+    
+    path = log.segments()[-1][1]
+    with open(path, "ab") as f:
+        f.write(b"123.0\tpartial\t{\"event_type\": \"par")
+    
+    assert [event.event_type for event in log.replay()] == ["complete"]
+
+
+def test_background_append_and_replay(tmp_path):
+    """Test that a background log writes on its thread and replay sees every append."""
+    log = EventLog(tmp_path, background=True)
+    writers = []
+    write = log._write
+    log._write = lambda data: (writers.append(threading.current_thread()), write(data))
+    
+    for n in range(20):
+        log.append([Event("queued", {"n": n})])
+    
+    assert [event.data["n"] for event in log.replay()] == list(range(20))
+    assert writers and all(thread is not threading.current_thread() for thread in writers)
+    
+    log.append([Event("queued", {"n": 20})])
+    log.close()
+    assert [event.data["n"] for event in EventLog(tmp_path).replay()] == list(range(21))
+    
+    # The writer restarts after close
+    log.append([Event("queued", {"n": 21})])
+    log.close()
+    assert len(list(EventLog(tmp_path).replay())) == 22
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("background", [False, True])
+async def test_bus_writes_log(tmp_path, background):
+    """Test that published events are logged and replayed through the bus."""
+    bus = EventBus(max_history=2, event_log=EventLog(tmp_path, background=background))
+    await bus.start()
+    try:
+        await bus.publish_many([Event("test.logged", {"n": n}) for n in range(5)])
+        await asyncio.sleep(0.05)
+    finally:
+        await bus.stop()
+    
+    # History only holds the last two, the log has all of them
+    assert len(bus.get_event_history()) == 2
+    assert [event.data["n"] for event in bus.replay_events(event_type_pattern="test.*")] == [0, 1, 2, 3, 4]
+    assert len(bus.replay_events(limit=3)) == 3
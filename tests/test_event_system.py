@@ -3,6 +3,7 @@ Tests for the event system (event.py and event_bus.py).
 """
 
 import asyncio
+import threading
 import pytest
 import pytest_asyncio
 import time
@@ -13,7 +14,10 @@ from nagatha_assistant.core.event import (
     Event, EventPriority, StandardEventTypes,
     create_system_event, create_agent_event, create_mcp_event
 )
-from nagatha_assistant.core.event_bus import EventBus, EventBusError
+from nagatha_assistant.core.event_bus import (
+    DispatchQueue, EventBus, EventBusError, EventHistory, EventSubscription, HandlerMode,
+    OverflowPolicy, SubscriptionIndex
+)
 
 
 class TestEvent:
@@ -52,6 +56,25 @@ class TestEvent:
         assert event.event_id == "custom-id"
         assert event.timestamp == timestamp
     
+    def test_event_is_compact(self):
+        """Test that events are slotted and generate their ID lazily."""
+        event = Event("test.compact")
+        
+        assert not hasattr(event, "__dict__")
+        assert event._event_id is None
+        event_id = event.event_id
+        assert event.event_id == event_id
+    
+    def test_event_dict_round_trip(self):
+        """Test converting an event to a dict and back."""
+        event = Event("test.dict", {"n": 1}, priority=EventPriority.LOW,
+                      source="test", correlation_id="c-1")
+        
+        restored = Event.from_dict(event.to_dict())
+        assert restored == event
+        assert restored.priority is EventPriority.LOW
+        assert abs(restored.created - event.created) < 1e-6
+    
     def test_event_priority_ordering(self):
         """Test that event priorities are ordered correctly."""
         assert EventPriority.CRITICAL < EventPriority.HIGH
@@ -369,6 +392,519 @@ class TestEventBus:
         assert len(history) == 0
 
 
+class TestSubscriptionIndex:
+    """Test the compiled subscription index."""
+    
+    PATTERNS = ["*", "agent.*", "agent.message.*", "agent.message.received", "memory.entry.created",
+                "memory.*.created", "mcp.tool.?alled", "[am]*.started", "system.*", "agent*"]
+    EVENT_TYPES = ["agent.message.received", "agent.message.sent", "agent.conversation.started",
+                   "memory.entry.created", "memory.section.created", "mcp.tool.called",
+                   "mcp.server.started", "system.startup", "agentx", "other"]
+    
+    def test_matches_fnmatch(self):
+        """Test that the index agrees with fnmatch for every pattern kind."""
+        import fnmatch
+        
+        index = SubscriptionIndex()
+        subscriptions = [EventSubscription(pattern, Mock()) for pattern in self.PATTERNS]
+        for subscription in subscriptions:
+            index.add(subscription)
+        
+        for event_type in self.EVENT_TYPES:
+            expected = {sub.pattern for sub in subscriptions if fnmatch.fnmatch(event_type, sub.pattern)}
+            assert {sub.pattern for sub in index.match(event_type)} == expected, event_type
+    
+    def test_cache_invalidated_on_change(self):
+        """Test that cached results are dropped when subscriptions change."""
+        index = SubscriptionIndex()
+        first = EventSubscription("agent.*", Mock())
+        index.add(first)
+        assert index.match("agent.started") == [first]
+        
+        second = EventSubscription("agent.started", Mock())
+        index.add(second)
+        assert set(index.match("agent.started")) == {first, second}
+        
+        index.remove(first)
+        index.remove(second)
+        assert index.match("agent.started") == []
+        assert index._trie == {}
+    
+    def test_dispatch_order(self):
+        """Test that matches are ordered by priority filter, then subscription."""
+        index = SubscriptionIndex()
+        low = EventSubscription("test.*", Mock(), priority_filter=EventPriority.LOW)
+        critical = EventSubscription("test.event", Mock(), priority_filter=EventPriority.CRITICAL)
+        normal = EventSubscription("*", Mock())
+        for subscription in (low, critical, normal):
+            index.add(subscription)
+        
+        assert index.match("test.event") == [critical, normal, low]
+    
+    @pytest.mark.asyncio
+    async def test_unrelated_subscriptions_not_checked(self, monkeypatch):
+        """Test that dispatch does not evaluate non-matching subscriptions."""
+        bus = EventBus()
+        await bus.start()
+        try:
+            received = []
+            for n in range(500):
+                bus.subscribe(f"plugin{n}.*", Mock())
+            bus.subscribe("memory.entry.created", lambda e: received.append(e))
+            
+            checked = []
+            original = EventSubscription.accepts
+            monkeypatch.setattr(EventSubscription, "accepts",
+                                lambda sub, event: checked.append(sub) or original(sub, event))
+            
+            await bus.publish(Event("memory.entry.created", {}))
+            await asyncio.sleep(0.1)
+            
+            assert len(received) == 1
+            assert len(checked) == 1
+        finally:
+            await bus.stop()
+
+
+class TestShardedDispatch:
+    """Test worker sharding, ordering and queue overflow."""
+    
+    @pytest.mark.asyncio
+    async def test_slow_handler_does_not_block_other_shards(self):
+        """Test that a stalled handler only delays its own subscription."""
+        bus = EventBus(num_workers=2)
+        await bus.start()
+        try:
+            release = asyncio.Event()
+            fast_events = []
+            
+            async def slow_handler(event):
+                await release.wait()
+            
+            slow = bus.subscribe("work.*", slow_handler)
+            bus.subscribe("work.*", lambda e: fast_events.append(e))
+            
+            for i in range(3):
+                await bus.publish(Event("work.item", {"n": i}))
+            await asyncio.sleep(0.1)
+            
+            assert len(fast_events) == 3
+            slow_worker = next(sub.sequence for sub in bus._subscriptions if sub.subscription_id == slow) % 2
+            assert bus.get_queue_stats()["worker_depths"][slow_worker] == 2
+            release.set()
+        finally:
+            await bus.stop()
+    
+    @pytest.mark.asyncio
+    async def test_per_subscription_order(self):
+        """Test that each handler sees events in publish order."""
+        bus = EventBus(num_workers=3)
+        await bus.start()
+        try:
+            seen = {name: [] for name in "abc"}
+            
+            for name in seen:
+                async def handler(event, name=name):
+                    await asyncio.sleep(0.001 * (event.data["n"] % 3))
+                    seen[name].append(event.data["n"])
+                bus.subscribe("order.*", handler)
+            
+            for i in range(20):
+                await bus.publish(Event("order.item", {"n": i}))
+            await asyncio.sleep(0.3)
+            
+            assert all(values == list(range(20)) for values in seen.values())
+        finally:
+            await bus.stop()
+    
+    @pytest.mark.asyncio
+    async def test_partition_key(self):
+        """Test that one subscription runs different keys on different workers."""
+        bus = EventBus(num_workers=2, partition_key=lambda e: e.data.get("session"))
+        await bus.start()
+        try:
+            release = asyncio.Event()
+            seen = []
+            
+            async def handler(event):
+                if event.data["session"] == 1:
+                    await release.wait()
+                seen.append((event.data["session"], event.data["n"]))
+            
+            bus.subscribe("chat.*", handler)
+            for n in range(2):
+                await bus.publish(Event("chat.message", {"session": 1, "n": n}))
+                await bus.publish(Event("chat.message", {"session": 2, "n": n}))
+            await asyncio.sleep(0.1)
+            
+            # Session 2 is not held up by session 1, which keeps its order
+            assert seen == [(2, 0), (2, 1)]
+            release.set()
+            await asyncio.sleep(0.1)
+            assert seen[2:] == [(1, 0), (1, 1)]
+        finally:
+            await bus.stop()
+    
+    @pytest.mark.asyncio
+    async def test_drop_oldest(self):
+        """Test that a full queue discards its oldest event."""
+        queue = DispatchQueue(2, OverflowPolicy.DROP_OLDEST)
+        for i in range(3):
+            assert await queue.offer(Event("e", {"n": i}))
+        
+        assert [queue.get_nowait().data["n"] for _ in range(2)] == [1, 2]
+        assert queue.dropped == 1
+        assert queue.high_water == 2
+    
+    @pytest.mark.asyncio
+    async def test_drop_low_priority(self):
+        """Test that a full queue discards the lowest-priority event."""
+        queue = DispatchQueue(2, "drop_low_priority")
+        await queue.offer(Event("low", priority=EventPriority.LOW))
+        await queue.offer(Event("normal", priority=EventPriority.NORMAL))
+        
+        # A higher-priority event replaces the queued low one
+        assert await queue.offer(Event("high", priority=EventPriority.HIGH))
+        # An event no more important than anything queued is dropped itself
+        assert not await queue.offer(Event("low2", priority=EventPriority.LOW))
+        
+        assert [queue.get_nowait().event_type for _ in range(2)] == ["normal", "high"]
+        assert queue.dropped == 2
+    
+    @pytest.mark.asyncio
+    async def test_block_waits_for_space(self):
+        """Test that the block policy applies backpressure to publishers."""
+        queue = DispatchQueue(1, OverflowPolicy.BLOCK)
+        await queue.offer(Event("first"))
+        
+        pending = asyncio.create_task(queue.offer(Event("second")))
+        await asyncio.sleep(0.01)
+        assert not pending.done()
+        
+        queue.get_nowait()
+        assert await asyncio.wait_for(pending, timeout=1.0)
+        assert queue.dropped == 0
+    
+    @pytest.mark.asyncio
+    async def test_queue_stats(self):
+        """Test the queue depth gauge."""
+        bus = EventBus(num_workers=2, queue_size=50, overflow_policy="drop_oldest")
+        assert bus.get_queue_stats()["depth"] == 0
+        
+        await bus.start()
+        try:
+            await bus.publish(Event("gauge.test"))
+            await asyncio.sleep(0.05)
+            stats = bus.get_queue_stats()
+        finally:
+            await bus.stop()
+        
+        assert stats["depth"] == 0
+        assert stats["worker_depths"] == [0, 0]
+        assert stats["capacity"] == 50
+        assert stats["high_water"] == 1
+        assert stats["dropped"] == 0
+        assert stats["overflow_policy"] == "drop_oldest"
+        assert stats["workers"] == 2
+    
+    def test_invalid_overflow_policy(self):
+        """Test that an unknown overflow policy is rejected."""
+        with pytest.raises(ValueError):
+            EventBus(overflow_policy="spill")
+
+
+class TestBatchedPublish:
+    """Test batched publishing, coalescing and debounced delivery."""
+    
+    @pytest_asyncio.fixture
+    async def event_bus(self):
+        """Create a test event bus."""
+        bus = EventBus(max_history=100)
+        await bus.start()
+        yield bus
+        await bus.stop()
+    
+    @pytest.mark.asyncio
+    async def test_publish_many(self, event_bus):
+        """Test that publish_many records and delivers every event in order."""
+        received = []
+        event_bus.subscribe("many.*", lambda e: received.append(e.data["n"]))
+        
+        await event_bus.publish_many([Event("many.item", {"n": i}) for i in range(5)])
+        await asyncio.sleep(0.1)
+        
+        assert received == [0, 1, 2, 3, 4]
+        assert len(event_bus.get_event_history()) == 5
+
+    @pytest.mark.asyncio
+    async def test_debug_logging_keeps_event_id_lazy(self, event_bus):
+        """Test that debug logging on publish and dispatch does not generate event IDs."""
+        import logging
+
+        bus_logger = logging.getLogger("nagatha_assistant.core.event_bus")
+        level = bus_logger.level
+        bus_logger.setLevel(logging.DEBUG)
+        try:
+            events = [Event("lazy.unheard", {"n": i}) for i in range(3)]
+            await event_bus.publish_many(events)
+            await asyncio.sleep(0.05)
+        finally:
+            bus_logger.setLevel(level)
+
+        assert all(event._event_id is None for event in events)
+
+    @pytest.mark.asyncio
+    async def test_coalesced_burst_is_one_batch(self, event_bus):
+        """Test that a burst of a coalesced type arrives as one batch event."""
+        received = []
+        event_bus.subscribe("memory.entry.created", lambda e: received.append(e))
+        event_bus.set_coalescing("memory.entry.created", 0.05)
+        
+        for i in range(10):
+            await event_bus.publish(Event("memory.entry.created", {"n": i}, priority=EventPriority.LOW))
+        await event_bus.publish(Event("memory.entry.created", {"n": 10}, priority=EventPriority.HIGH))
+        await asyncio.sleep(0.15)
+        
+        assert len(received) == 1
+        batch = received[0]
+        assert batch.data["batch"] is True
+        assert batch.data["count"] == 11
+        assert [item["n"] for item in batch.data["items"]] == list(range(11))
+        assert batch.priority == EventPriority.HIGH
+        # History keeps the individual events
+        assert len(event_bus.get_event_history()) == 11
+    
+    @pytest.mark.asyncio
+    async def test_coalesced_single_event_unchanged(self, event_bus):
+        """Test that a window with one event delivers it as published."""
+        received = []
+        event_bus.subscribe("memory.*", lambda e: received.append(e))
+        event_bus.set_coalescing("memory.entry.created", 0.01)
+        
+        event = Event("memory.entry.created", {"n": 1})
+        await event_bus.publish(event)
+        await asyncio.sleep(0.1)
+        
+        assert received == [event]
+    
+    @pytest.mark.asyncio
+    async def test_coalescing_max_batch(self, event_bus):
+        """Test that a full batch is delivered without waiting for the window."""
+        received = []
+        event_bus.subscribe("bulk", lambda e: received.append(e.data["count"]))
+        event_bus.set_coalescing("bulk", 10.0, max_batch=3)
+        
+        await event_bus.publish_many([Event("bulk", {}) for _ in range(3)])
+        await asyncio.sleep(0.05)
+        
+        assert received == [3]
+    
+    @pytest.mark.asyncio
+    async def test_stop_flushes_open_batch(self):
+        """Test that stopping the bus delivers a batch whose window is still open."""
+        bus = EventBus()
+        received = []
+        bus.subscribe("slow.batch", lambda e: received.append(e.data["count"]))
+        bus.set_coalescing("slow.batch", 10.0)
+        
+        await bus.start()
+        await bus.publish_many([Event("slow.batch") for _ in range(2)])
+        await bus.stop()
+        
+        assert received == [2]
+    
+    @pytest.mark.asyncio
+    async def test_debounced_subscription(self, event_bus):
+        """Test that a debounced handler gets only the latest event of a burst."""
+        debounced = []
+        every = []
+        event_bus.subscribe("state.*", lambda e: debounced.append(e.data["n"]), debounce=0.05)
+        event_bus.subscribe("state.*", lambda e: every.append(e.data["n"]))
+        
+        for i in range(5):
+            await event_bus.publish(Event("state.changed", {"n": i}))
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.15)
+        
+        assert debounced == [4]
+        assert every == [0, 1, 2, 3, 4]
+    
+    @pytest.mark.asyncio
+    async def test_unsubscribe_cancels_debounced(self, event_bus):
+        """Test that a held event is not delivered after unsubscribing."""
+        received = []
+        subscription_id = event_bus.subscribe("state.*", lambda e: received.append(e), debounce=0.05)
+        
+        await event_bus.publish(Event("state.changed"))
+        await asyncio.sleep(0.02)
+        event_bus.unsubscribe(subscription_id)
+        await asyncio.sleep(0.1)
+        
+        assert received == []
+    
+    @pytest.mark.asyncio
+    async def test_publish_sync_uses_one_task(self, event_bus):
+        """Test that a burst of publish_sync calls is published by a single task."""
+        received = []
+        event_bus.subscribe("sync.*", lambda e: received.append(e.data["n"]))
+        
+        tasks_before = len(asyncio.all_tasks())
+        for i in range(20):
+            event_bus.publish_sync(Event("sync.item", {"n": i}))
+        assert len(asyncio.all_tasks()) == tasks_before + 1
+        
+        await asyncio.sleep(0.1)
+        assert received == list(range(20))
+
+
+class TestHandlerExecution:
+    """Test the bus thread pool, inline handlers and handler timing."""
+    
+    @pytest.mark.asyncio
+    async def test_threaded_handlers_use_bus_pool(self):
+        """Test that sync handlers run on the bus pool, not the default executor."""
+        bus = EventBus(handler_threads=2)
+        await bus.start()
+        try:
+            threads = []
+            bus.subscribe("pool.*", lambda e: threads.append(threading.current_thread().name))
+            await bus.publish(Event("pool.test"))
+            await asyncio.sleep(0.1)
+            
+            assert len(threads) == 1
+            assert threads[0].startswith("nagatha-event")
+        finally:
+            await bus.stop()
+    
+    @pytest.mark.asyncio
+    async def test_inline_handler_runs_on_loop(self):
+        """Test that an inline handler is called on the event loop thread."""
+        bus = EventBus()
+        await bus.start()
+        try:
+            threads = []
+            bus.subscribe("inline.*", lambda e: threads.append(threading.current_thread()),
+                          mode="inline")
+            await bus.publish(Event("inline.test"))
+            await asyncio.sleep(0.05)
+            
+            assert threads == [threading.current_thread()]
+            assert bus.get_subscriptions()[0]["mode"] == HandlerMode.INLINE.value
+        finally:
+            await bus.stop()
+    
+    @pytest.mark.asyncio
+    async def test_handler_timing(self):
+        """Test that calls, errors and run time are recorded per handler."""
+        bus = EventBus()
+        await bus.start()
+        try:
+            async def slow(event):
+                await asyncio.sleep(0.02)
+            
+            def failing(event):
+                raise ValueError("boom")
+            
+            bus.subscribe("timed.*", slow)
+            bus.subscribe("timed.*", failing, mode="inline")
+            for _ in range(2):
+                await bus.publish(Event("timed.test"))
+            await asyncio.sleep(0.15)
+            
+            stats = {entry["handler"].split(".")[-1]: entry for entry in bus.get_handler_stats()}
+        finally:
+            await bus.stop()
+        
+        assert stats["slow"]["mode"] == "async"
+        assert stats["slow"]["calls"] == 2
+        assert stats["slow"]["mean_ms"] >= 15
+        assert stats["slow"]["max_ms"] >= stats["slow"]["mean_ms"]
+        assert stats["failing"]["calls"] == 2
+        assert stats["failing"]["errors"] == 2
+        assert list(stats) == ["slow", "failing"]  # slowest total first
+    
+    @pytest.mark.asyncio
+    async def test_metrics(self):
+        """Test publish counters, latency histograms, errors and lag."""
+        bus = EventBus()
+        await bus.start()
+        try:
+            async def slow(event):
+                await asyncio.sleep(0.002)
+            
+            def failing(event):
+                raise ValueError("boom")
+            
+            bus.subscribe("metric.a", slow)
+            bus.subscribe("metric.*", failing, mode="inline")
+            await bus.publish_many([Event("metric.a"), Event("metric.a"), Event("metric.b")])
+            await asyncio.sleep(0.1)
+            
+            metrics = bus.get_metrics()
+        finally:
+            await bus.stop()
+        
+        assert metrics["published"] == {"metric.a": 2, "metric.b": 1}
+        assert metrics["published_total"] == 3
+        assert metrics["routed"] == 3
+        assert metrics["deliveries"] == 5
+        assert metrics["handler_errors"] == 3
+        assert metrics["router_errors"] == 0
+        assert metrics["lag"]["max_ms"] >= metrics["lag"]["mean_ms"] >= 0
+        
+        slow_stats = next(h for h in metrics["handlers"] if h["handler"].endswith("slow"))
+        assert sum(slow_stats["histogram"].values()) == 2
+        assert slow_stats["histogram"]["0.1"] == 0  # Every call took over 2 ms
+        assert list(slow_stats["histogram"])[-1] == "+Inf"
+    
+    def test_invalid_mode(self):
+        """Test that an unknown handler mode is rejected."""
+        with pytest.raises(ValueError):
+            EventBus().subscribe("x", Mock(), mode="forked")
+
+
+class TestEventHistory:
+    """Test the history ring buffer."""
+    
+    def test_eviction_keeps_type_index(self):
+        """Test that evicted events leave the per-type index."""
+        history = EventHistory(3)
+        history.extend([Event("a", {"n": 0}), Event("b", {"n": 1}),
+                        Event("a", {"n": 2}), Event("c", {"n": 3})])
+        
+        assert len(history) == 3
+        assert [e.data["n"] for e in history.recent()] == [3, 2, 1]
+        assert [e.data["n"] for e in history.recent(event_type_pattern="a")] == [2]
+        
+        history.append(Event("c", {"n": 4}))
+        assert history.recent(event_type_pattern="b") == []
+        assert [e.data["n"] for e in history.recent(event_type_pattern="c")] == [4, 3]
+    
+    def test_glob_merges_types_newest_first(self):
+        """Test that a glob over several types returns them interleaved by age."""
+        history = EventHistory(10)
+        history.extend([Event(t, {"n": n}) for n, t in enumerate(["x.a", "x.b", "y", "x.a", "x.b"])])
+        
+        assert [e.data["n"] for e in history.recent(event_type_pattern="x.*")] == [4, 3, 1, 0]
+        assert [e.data["n"] for e in history.recent(limit=2, event_type_pattern="x.*")] == [4, 3]
+    
+    @pytest.mark.asyncio
+    async def test_replay_from_history(self):
+        """Test replaying by time range without a persistent log."""
+        bus = EventBus()
+        await bus.start()
+        try:
+            await bus.publish_many([
+                Event("old", timestamp=1000.0), Event("new", timestamp=2000.0), Event("new", timestamp=3000.0)
+            ])
+            
+            assert [e.created for e in bus.replay_events(since=1500.0)] == [2000.0, 3000.0]
+            assert [e.event_type for e in bus.replay_events(until=2000.0)] == ["old"]
+            assert [e.created for e in bus.replay_events(event_type_pattern="new", limit=1)] == [2000.0]
+        finally:
+            await bus.stop()
+
+
 class TestEventBusGlobal:
     """Test the global event bus functions."""
     
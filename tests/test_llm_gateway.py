@@ -0,0 +1,195 @@
+"""
+Tests for the LLM gateway: rate limiting, priority admission and retries.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import openai
+import pytest
+
+from nagatha_assistant.core.llm_gateway import (
+    LLMGateway, LLMPriority, ModelLimits, TokenBucket, estimate_tokens, priority_for, retry_after
+)
+
+_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def rate_limit_error(headers=None, code=None):
+    response = httpx.Response(429, headers=headers or {}, request=_REQUEST)
+    return openai.RateLimitError("rate limited", response=response, body={"code": code})
+
+
+def completion(total_tokens=10):
+    return SimpleNamespace(usage=SimpleNamespace(total_tokens=total_tokens))
+
+
+def fake_client(*results):
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(side_effect=list(results))
+    return client
+
+
+def test_token_bucket():
+    """Test refill, oversized requests and refunds."""
+    bucket = TokenBucket(rate=100, capacity=1000)
+    now = time.monotonic()
+
+    assert bucket.wait_time(1000, now) == 0
+    bucket.take(1000, now)
+    assert bucket.wait_time(100, now) == pytest.approx(1.0)
+    # Larger than the capacity only needs a full bucket
+    assert bucket.wait_time(5000, now) == pytest.approx(10.0)
+
+    bucket.give(300)
+    assert bucket.wait_time(100, now) == 0
+
+
+def test_retry_after_headers():
+    """Test the rate limit header formats."""
+    assert retry_after({"retry-after-ms": "250"}) == 0.25
+    assert retry_after({"retry-after": "2"}) == 2.0
+    assert retry_after({"x-ratelimit-reset-requests": "120ms",
+                        "x-ratelimit-reset-tokens": "6m0s"}) == 360.0
+    assert retry_after({"x-ratelimit-reset-tokens": "1.5s"}) == 1.5
+    assert retry_after({}) is None
+
+
+def test_priority_for():
+    """Test that channel auto-chat queues behind direct conversations."""
+    assert priority_for("discord", {"channel_id": "1", "guild_id": "2"}) == LLMPriority.CHANNEL
+    assert priority_for("discord", {"channel_id": "1", "guild_id": None}) == LLMPriority.INTERACTIVE
+    assert priority_for("cli") == LLMPriority.INTERACTIVE
+    assert priority_for("api", {}, "background") == LLMPriority.BACKGROUND
+    assert priority_for("api", {}, "bogus") == LLMPriority.INTERACTIVE
+
+
+def test_estimate_tokens():
+    """Test that the completion budget is reserved on top of the prompt."""
+    messages = [{"role": "user", "content": "x" * 400}]
+    assert 100 < estimate_tokens(messages, max_tokens=1000) - 1000 < 120
+
+
+@pytest.mark.asyncio
+async def test_priority_order():
+    """Test that waiting requests are admitted by priority, then arrival."""
+    gateway = LLMGateway(ModelLimits(concurrency=1))
+    holder = await gateway.acquire("m", 1)
+    order = []
+
+    async def request(name, priority):
+        admission = await gateway.acquire("m", 1, priority)
+        order.append(name)
+        gateway.release(admission)
+
+    tasks = [asyncio.create_task(request(name, priority)) for name, priority in [
+        ("background", LLMPriority.BACKGROUND),
+        ("channel-1", LLMPriority.CHANNEL),
+        ("interactive", LLMPriority.INTERACTIVE),
+        ("channel-2", LLMPriority.CHANNEL),
+    ]]
+    await asyncio.sleep(0.01)
+    assert gateway.get_metrics()["models"]["m"]["queued"] == 4
+
+    gateway.release(holder)
+    await asyncio.gather(*tasks)
+    assert order == ["interactive", "channel-1", "channel-2", "background"]
+
+    metrics = gateway.get_metrics()
+    assert metrics["priorities"]["background"]["max_wait"] > 0
+    assert metrics["models"]["m"]["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_token_budget_delays_requests():
+    """Test that a request waits for the tokens-per-minute bucket to refill."""
+    # 1000 tokens per second, 10000 token burst
+    gateway = LLMGateway(ModelLimits(tpm=60000))
+    first = await gateway.acquire("m", 10000)
+    gateway.release(first)
+
+    start = time.monotonic()
+    second = await gateway.acquire("m", 100)
+    gateway.release(second)
+    assert time.monotonic() - start >= 0.08
+
+
+@pytest.mark.asyncio
+async def test_settle_refunds_unused_tokens():
+    """Test that actual usage replaces the estimate in the token bucket."""
+    gateway = LLMGateway(ModelLimits(tpm=60000))
+    client = fake_client(completion(total_tokens=50))
+
+    await gateway.create_chat_completion(client, model="m", messages=[], max_tokens=9000)
+
+    stats = gateway.get_metrics()["models"]["m"]
+    assert stats["estimated_tokens"] >= 9000
+    assert stats["actual_tokens"] == 50
+    assert stats["token_budget"] >= 9900
+
+
+@pytest.mark.asyncio
+async def test_retries_rate_limit_with_header():
+    """Test that a 429 is retried after the time the provider asks for."""
+    gateway = LLMGateway(backoff_base=0.01)
+    response = completion()
+    client = fake_client(rate_limit_error({"retry-after-ms": "50"}), response)
+
+    start = time.monotonic()
+    result = await gateway.create_chat_completion(client, model="m", messages=[])
+
+    assert result is response
+    assert time.monotonic() - start >= 0.05
+    stats = gateway.get_metrics()["models"]["m"]
+    assert stats["retries"] == 1
+    assert stats["rate_limited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_connection_errors_then_gives_up():
+    """Test jittered retries of transient errors up to max_retries."""
+    gateway = LLMGateway(max_retries=2, backoff_base=0.001)
+    client = fake_client(*[openai.APIConnectionError(request=_REQUEST)] * 3)
+
+    with pytest.raises(openai.APIConnectionError):
+        await gateway.create_chat_completion(client, model="m", messages=[])
+
+    assert client.chat.completions.create.await_count == 3
+    assert gateway.get_metrics()["models"]["m"]["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_final_errors_not_retried():
+    """Test that quota exhaustion and other errors fail immediately."""
+    gateway = LLMGateway(backoff_base=0.001)
+    client = fake_client(rate_limit_error(code="insufficient_quota"), ValueError("bad request"))
+
+    with pytest.raises(openai.RateLimitError):
+        await gateway.create_chat_completion(client, model="m", messages=[])
+    with pytest.raises(ValueError):
+        await gateway.create_chat_completion(client, model="m", messages=[])
+
+    assert client.chat.completions.create.await_count == 2
+    assert gateway.get_metrics()["models"]["m"]["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_frees_queue():
+    """Test that a caller cancelled while queued does not hold up the queue."""
+    gateway = LLMGateway(ModelLimits(concurrency=1))
+    holder = await gateway.acquire("m", 1)
+
+    cancelled = asyncio.create_task(gateway.acquire("m", 1))
+    waiting = asyncio.create_task(gateway.acquire("m", 1, LLMPriority.BACKGROUND))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    await asyncio.gather(cancelled, return_exceptions=True)
+
+    gateway.release(holder)
+    admission = await asyncio.wait_for(waiting, 1)
+    gateway.release(admission)
+    stats = gateway.get_metrics()["models"]["m"]
+    assert (stats["queued"], stats["active"], stats["admitted"]) == (0, 0, 2)
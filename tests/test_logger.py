@@ -6,9 +6,12 @@ Pytest tests for the logger utility module.
 import pytest
 import logging
 import tempfile
+import threading
 import os
 from unittest.mock import patch, MagicMock
-from nagatha_assistant.utils.logger import setup_logger, setup_logger_with_env_control
+from nagatha_assistant.utils.logger import (
+    BackgroundHandler, background_handler, get_logger, setup_logger, setup_logger_with_env_control
+)
 
 
 class TestLogger:
@@ -115,4 +118,114 @@ class TestLogger:
         except PermissionError:
             # The current implementation doesn't handle this gracefully
             # This test documents the current behavior
-            pass 
\ No newline at end of file
+            pass
+
+
+class RecordingHandler(logging.Handler):
+    """Handler remembering each message and the thread that wrote it."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((self.format(record), threading.current_thread().name))
+
+
+class TestBackgroundLogging:
+    """Test cases for queued log output and cached loggers."""
+
+    def test_get_logger_cached(self):
+        """Test that loggers are configured once and named after the caller."""
+        logger = get_logger()
+
+        assert logger.name == __name__
+        assert get_logger() is logger
+        assert get_logger(__name__) is logger
+
+    def test_records_written_off_thread(self):
+        """Test that the target handler runs on the listener thread."""
+        target = RecordingHandler()
+        handler = BackgroundHandler(target)
+        logger = logging.getLogger("test_background_thread")
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            context = ["first"]
+            logger.warning("Context: %s", context)
+            context.append("second")
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+        assert target.records == [("Context: ['first']", target.records[0][1])]
+        assert target.records[0][1] != threading.current_thread().name
+
+    def test_close_drains_queue(self):
+        """Test that closing the handler writes every queued record."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "queued.log")
+            file_handler = logging.FileHandler(path)
+            handler = BackgroundHandler(file_handler)
+            logger = logging.getLogger("test_background_drain")
+            logger.propagate = False
+            logger.addHandler(handler)
+            for n in range(100):
+                logger.warning("line %d", n)
+            logger.removeHandler(handler)
+            handler.close()
+            file_handler.close()
+
+            with open(path) as f:
+                assert f.read().splitlines() == [f"line {n}" for n in range(100)]
+
+    def test_handler_level_respected(self):
+        """Test that the target handler's level still filters records."""
+        target = RecordingHandler()
+        target.setLevel(logging.ERROR)
+        handler = BackgroundHandler(target)
+        logger = logging.getLogger("test_background_level")
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            logger.warning("dropped")
+            logger.error("kept")
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+        assert [message for message, _ in target.records] == ["kept"]
+
+    def test_filtered_records_not_formatted(self):
+        """Test that records below the target's level are dropped before formatting."""
+        target = RecordingHandler()
+        target.setLevel(logging.WARNING)
+        handler = BackgroundHandler(target)
+        logger = logging.getLogger("test_background_unformatted")
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        logger.addHandler(handler)
+        formatted = []
+
+        class Counted:
+            def __str__(self):
+                formatted.append(threading.current_thread().name)
+                return "counted"
+
+        try:
+            for _ in range(5):
+                logger.debug("Value: %s", Counted())
+            logger.warning("Value: %s", Counted())
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+
+        assert formatted == [threading.current_thread().name]
+        assert [message for message, _ in target.records] == ["Value: counted"]
+
+    @patch.dict(os.environ, {'NAGATHA_LOG_QUEUE': 'false'})
+    def test_queue_disabled(self):
+        """Test that NAGATHA_LOG_QUEUE=false keeps the handler synchronous."""
+        target = RecordingHandler()
+
+        assert background_handler(target) is target
@@ -0,0 +1,100 @@
+"""
+Tests for near-duplicate memory consolidation.
+"""
+
+import pytest
+import pytest_asyncio
+
+from nagatha_assistant.core.memory import MemoryManager, MemoryMaintenance
+from nagatha_assistant.core.memory_consolidation import MinHasher, NearDuplicateConsolidator
+from nagatha_assistant.core.storage import InMemoryStorageBackend
+
+
+class TestMinHasher:
+    """Test suite for MinHash signatures."""
+
+    def test_signature_is_deterministic(self):
+        """Test that signatures do not depend on the process hash seed."""
+        text = "The user prefers dark mode in every editor."
+        assert MinHasher().signature(text) == MinHasher().signature(text)
+        assert len(MinHasher(num_perm=64).signature(text)) == 64 * 4
+
+    def test_similarity(self):
+        """Test similarity estimates for related and unrelated texts."""
+        hasher = MinHasher()
+        base = hasher.signature("the user prefers dark mode in the code editor at night")
+        variant = hasher.signature("the user prefers dark mode in the code editor at night time")
+        other = hasher.signature("paris is the capital city of france and sits on the seine")
+
+        assert hasher.similarity(base, base) == 1.0
+        assert hasher.similarity(base, variant) > 0.6
+        assert hasher.similarity(base, other) < 0.2
+
+
+class TestNearDuplicateConsolidator:
+    """Test suite for MinHash/LSH consolidation."""
+
+    @pytest_asyncio.fixture
+    async def memory_manager(self):
+        """Create a memory manager with near-duplicate facts."""
+        manager = MemoryManager(storage_backend=InMemoryStorageBackend())
+        await manager.set("facts", "fact_1", {
+            "fact": "The project deadline is on Friday the twentieth of March.",
+            "stored_at": "2025-01-01T10:00:00+00:00"
+        })
+        await manager.set("facts", "fact_2", {
+            "fact": "The project deadline is on Friday the twentieth of March!",
+            "stored_at": "2025-01-03T10:00:00+00:00",
+            "mention_count": 2
+        })
+        await manager.set("facts", "fact_3", {
+            "fact": "Python is a programming language created by Guido van Rossum.",
+            "stored_at": "2025-01-02T10:00:00+00:00"
+        })
+        return manager
+
+    @pytest.mark.asyncio
+    async def test_consolidate_section(self, memory_manager):
+        """Test that a cluster collapses into one canonical entry."""
+        consolidator = NearDuplicateConsolidator(memory_manager)
+
+        removed = await consolidator.consolidate_section("facts")
+        assert removed == 1
+        assert sorted(await memory_manager.list_keys("facts")) == ["fact_1", "fact_3"]
+
+        canonical = await memory_manager.get("facts", "fact_1")
+        assert canonical["mention_count"] == 3
+        assert canonical["last_seen"] == "2025-01-03T10:00:00+00:00"
+        assert canonical["fact"].endswith("!")
+
+        # Nothing left to merge on a second run
+        assert await consolidator.consolidate_section("facts") == 0
+
+    @pytest.mark.asyncio
+    async def test_partitioned_index_finds_same_clusters(self, memory_manager):
+        """Test that a small memory budget gives the same result in more passes."""
+        unbounded = await NearDuplicateConsolidator(memory_manager).find_clusters("facts")
+        bounded = await NearDuplicateConsolidator(
+            memory_manager, max_index_entries=4, batch_size=1
+        ).find_clusters("facts")
+
+        assert [sorted(cluster) for cluster in bounded] == [sorted(cluster) for cluster in unbounded]
+        assert len(unbounded) == 1
+
+    @pytest.mark.asyncio
+    async def test_signatures_are_stored(self, memory_manager):
+        """Test that signatures are persisted and invalidated on update."""
+        await NearDuplicateConsolidator(memory_manager).find_clusters("facts")
+
+        entries = await memory_manager.scan("facts")
+        assert all(entry["signature"] for entry in entries)
+
+        await memory_manager.set("facts", "fact_3", {"fact": "Something else entirely."})
+        entries = {entry["key"]: entry for entry in await memory_manager.scan("facts")}
+        assert entries["fact_3"]["signature"] is None
+
+    @pytest.mark.asyncio
+    async def test_maintenance_stage(self, memory_manager):
+        """Test that consolidation runs as part of memory maintenance."""
+        results = await MemoryMaintenance(memory_manager).perform_maintenance()
+        assert results["entries_consolidated"] == 1
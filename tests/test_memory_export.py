@@ -0,0 +1,90 @@
+"""
+Tests for streaming memory export and import.
+"""
+
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from nagatha_assistant.core.memory_export import export_memory, import_memory
+from nagatha_assistant.core.storage import DatabaseStorageBackend
+from nagatha_assistant.db import ensure_schema
+
+
+@pytest.mark.asyncio
+async def test_export_import_round_trip(tmp_path):
+    """Test that an exported section can be restored after deletion."""
+    await ensure_schema()
+    backend = DatabaseStorageBackend()
+
+    await backend.set("export_test", "plain", "some text")
+    await backend.set("export_test", "structured", {"fact": "value", "n": 3})
+    await backend.set("export_test", "scoped", [1, 2, 3], session_id=11)
+
+    path = str(tmp_path / "memory.ndjson.gz")
+    summary = await export_memory(path, sections=["export_test"], batch_size=2)
+    assert summary["entries"] == 3
+    assert summary["sections"] == {"export_test": 3}
+    assert summary["high_water_mark"]
+
+    with gzip.open(path, "rt") as f:
+        lines = [json.loads(line) for line in f]
+    assert lines[0]["type"] == "header"
+    assert lines[-1] == {"type": "footer", "entries": 3, "high_water_mark": summary["high_water_mark"]}
+
+    for key in ("plain", "structured"):
+        await backend.delete("export_test", key)
+    await backend.set("export_test", "scoped", "changed", session_id=11)
+
+    result = await import_memory(path, batch_size=2)
+    assert result["entries"] == 3
+    assert await backend.get("export_test", "plain") == "some text"
+    assert await backend.get("export_test", "structured") == {"fact": "value", "n": 3}
+    assert await backend.get("export_test", "scoped", session_id=11) == [1, 2, 3]
+
+    # Counters are reconciled after the bulk import
+    assert await backend.reconcile_stats() == 0
+
+
+@pytest.mark.asyncio
+async def test_incremental_export(tmp_path):
+    """Test that only entries changed after the high-water mark are exported."""
+    await ensure_schema()
+    backend = DatabaseStorageBackend()
+
+    await backend.set("incremental_test", "first", "one")
+    await backend.set("incremental_test", "second", "two")
+    full = await export_memory(str(tmp_path / "full.ndjson"), sections=["incremental_test"])
+    assert full["entries"] == 2
+
+    await backend.set("incremental_test", "second", "two, updated")
+    changes = await export_memory(
+        str(tmp_path / "changes.ndjson"), sections=["incremental_test"], since=full["high_water_mark"]
+    )
+    assert changes["entries"] == 1
+
+    with open(tmp_path / "changes.ndjson") as f:
+        entries = [json.loads(line) for line in f if '"type": "entry"' in line]
+    assert [entry["key"] for entry in entries] == ["second"]
+    assert entries[0]["value"] == "two, updated"
+
+
+@pytest.mark.asyncio
+async def test_export_includes_archived_entries(tmp_path):
+    """Test that entries moved to the cold archive are still exported."""
+    await ensure_schema()
+    backend = DatabaseStorageBackend()
+
+    await backend.set("archive_export_test", "cold", {"fact": "kept"})
+    assert await backend.archive_cold("archive_export_test", datetime.now(timezone.utc) + timedelta(minutes=1)) == 1
+
+    path = str(tmp_path / "archived.ndjson")
+    summary = await export_memory(path, sections=["archive_export_test"])
+    assert summary["entries"] == 1
+
+    with open(path) as f:
+        entries = [json.loads(line) for line in f if '"type": "entry"' in line]
+    assert entries[0]["key"] == "cold"
+    assert json.loads(entries[0]["value"]) == {"fact": "kept"}
@@ -209,6 +209,23 @@ class TestMemorySystem:
         assert "response" in latest_entry["value"]
         assert "timestamp" in latest_entry["value"]
     
+    @pytest.mark.asyncio
+    async def test_command_history_pagination(self, memory_manager):
+        """Test keyset pagination over command history."""
+        for index in range(5):
+            await memory_manager.add_command_to_history(f"command {index}", None, 7)
+        await memory_manager.add_command_to_history("other session", None, 8)
+        
+        first_page = await memory_manager.get_command_history(7, limit=2)
+        assert [entry["value"]["command"] for entry in first_page] == ["command 4", "command 3"]
+        
+        second_page = await memory_manager.get_command_history(7, limit=10, before=first_page[-1]["cursor"])
+        assert [entry["value"]["command"] for entry in second_page] == ["command 2", "command 1", "command 0"]
+        
+        all_sessions = await memory_manager.get_command_history(limit=10)
+        assert all_sessions[0]["value"]["command"] == "other session"
+        assert len(all_sessions) == 6
+    
     @pytest.mark.asyncio
     async def test_facts_storage(self, memory_manager):
         """Test fact storage and retrieval."""
@@ -325,6 +342,50 @@ class TestStorageBackends:
         cleaned = await backend.cleanup_expired()
         assert isinstance(cleaned, int)
     
+    @pytest.mark.asyncio
+    async def test_in_memory_backend_stats(self):
+        """Test that in-memory counters follow writes, updates and deletes."""
+        backend = InMemoryStorageBackend()
+        
+        await backend.set("test", "key1", "abc")
+        await backend.set("test", "key2", "abcdef")
+        await backend.set("test", "key1", "abcd", session_id=7)
+        await backend.set("test", "key2", "ab")  # Update shrinks the value
+        
+        stats = {(row["section"], row["session_id"]): row for row in await backend.get_stats()}
+        assert stats[("test", None)]["count"] == 2
+        assert stats[("test", None)]["bytes"] == 5
+        assert stats[("test", 7)]["count"] == 1
+        assert stats[("test", 7)]["bytes"] == 4
+        
+        assert await backend.delete("test", "key1", session_id=7) is True
+        stats = {(row["section"], row["session_id"]): row for row in await backend.get_stats()}
+        assert ("test", 7) not in stats
+        
+        # Counters agree with the stored entries, so nothing needs correcting
+        assert await backend.reconcile_stats() == 0
+        
+        backend._stats.apply("test", None, 5, 100)
+        assert await backend.reconcile_stats() == 1
+        stats = await backend.get_stats()
+        assert stats == [{"section": "test", "session_id": None, "count": 2, "bytes": 5}]
+    
+    @pytest.mark.asyncio
+    async def test_manager_section_stats(self):
+        """Test per-section statistics reported by the memory manager."""
+        manager = MemoryManager(storage_backend=InMemoryStorageBackend())
+        await manager.set("facts", "fact1", "value")
+        await manager.set("session_state", "state", "value", session_id=3)
+        
+        section_stats = await manager.get_section_stats()
+        assert section_stats["facts"]["count"] == 1
+        assert section_stats["session_state"]["sessions"] == {3: {"count": 1, "bytes": 5}}
+        
+        stats = await manager.get_storage_stats()
+        assert stats["facts"] == 1
+        assert stats["session_state"] == 1
+        assert stats["user_preferences"] == 0
+    
     @pytest.mark.asyncio
     async def test_database_backend(self):
         """Test database storage backend."""
@@ -346,6 +407,317 @@ class TestStorageBackends:
         
         result = await backend.get("test", "db_key")
         assert result is None
+    
+    @pytest.mark.asyncio
+    async def test_database_backend_stats(self):
+        """Test that the memory_stats table follows database writes."""
+        from nagatha_assistant.db import ensure_schema
+        
+        await ensure_schema()
+        
+        backend = DatabaseStorageBackend()
+        await backend._ensure_section("stats_test")
+        await backend.reconcile_stats()
+        
+        async def section_totals():
+            rows = [row for row in await backend.get_stats() if row["section"] == "stats_test"]
+            return sum(row["count"] for row in rows), sum(row["bytes"] for row in rows)
+        
+        base_count, base_bytes = await section_totals()
+        
+        await backend.set("stats_test", "key1", "abc")
+        await backend.set("stats_test", "key1", "abcdef")
+        await backend.set("stats_test", "key2", "xy")
+        assert await section_totals() == (base_count + 2, base_bytes + 8)
+        
+        await backend.delete("stats_test", "key1")
+        await backend.delete("stats_test", "key2")
+        assert await section_totals() == (base_count, base_bytes)
+        assert await backend.reconcile_stats() == 0
+    
+    @pytest.mark.asyncio
+    async def test_database_backend_remove_duplicates(self):
+        """Test grouped duplicate removal, including rows without a stored hash."""
+        from nagatha_assistant.db import ensure_schema, SessionLocal
+        from nagatha_assistant.db_models import MemoryEntry
+        from sqlalchemy import select, update
+        
+        await ensure_schema()
+        
+        backend = DatabaseStorageBackend()
+        await backend.set("dedup_test", "a", {"x": 1, "y": 2})
+        await backend.set("dedup_test", "b", {"y": 2, "x": 1})  # Same value, different key order
+        await backend.set("dedup_test", "c", "unique")
+        await backend.set("dedup_test", "d", "unique")
+        
+        # Simulate a row written before content hashes existed
+        section_id = await backend._ensure_section("dedup_test")
+        async with SessionLocal() as session:
+            await session.execute(
+                update(MemoryEntry)
+                .where(MemoryEntry.section_id == section_id, MemoryEntry.key == "d")
+                .values(content_hash=None)
+            )
+            await session.commit()
+        
+        assert await backend.remove_duplicates("dedup_test") == 2
+        assert sorted(await backend.list_keys("dedup_test")) == ["a", "c"]
+        
+        async with SessionLocal() as session:
+            hashes = (await session.execute(
+                select(MemoryEntry.content_hash).where(MemoryEntry.section_id == section_id)
+            )).scalars().all()
+        assert all(hashes)
+        
+        assert await backend.remove_duplicates("dedup_test") == 0
+    
+    @pytest.mark.asyncio
+    async def test_database_backend_list_entries(self):
+        """Test that a scope is read with its expiry times and expired rows are skipped."""
+        from nagatha_assistant.db import ensure_schema
+        
+        await ensure_schema()
+        
+        backend = DatabaseStorageBackend()
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+        await backend.set("entries_test", "lasting", {"n": 1}, session_id=3)
+        await backend.set("entries_test", "fading", "soon", session_id=3, expires_at=expires_at)
+        await backend.set("entries_test", "gone", "late", session_id=3,
+                          expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+        await backend.set("entries_test", "global", "other scope")
+        
+        entries = {entry["key"]: entry for entry in await backend.list_entries("entries_test", 3)}
+        assert sorted(entries) == ["fading", "lasting"]
+        assert entries["lasting"]["value"] == {"n": 1}
+        assert entries["lasting"]["expires_at"] is None
+        assert abs(entries["fading"]["expires_at"] - expires_at) < timedelta(seconds=1)
+        assert await backend.get("entries_test", "fading", session_id=3) == "soon"
+        assert [entry["key"] for entry in await backend.list_entries("entries_test")] == ["global"]
+    
+    @pytest.mark.asyncio
+    async def test_hybrid_remove_duplicates_evicts_redis_copies(self):
+        """Test that the Redis copies of exactly the removed database rows are deleted."""
+        from nagatha_assistant.db import ensure_schema
+        from nagatha_assistant.core.storage import HybridStorageBackend
+        
+        await ensure_schema()
+        
+        backend = HybridStorageBackend()
+        await backend.db_backend.set("hybrid_dedup", "first", "same")
+        await backend.db_backend.set("hybrid_dedup", "second", "same")
+        await backend.db_backend.set("hybrid_dedup", "mine", "same", session_id=7)
+        await backend.db_backend.set("hybrid_dedup", "copy", "same", session_id=7)
+        backend._should_use_redis = lambda section: True
+        backend.redis_backend.delete = AsyncMock(return_value=True)
+        
+        assert await backend.remove_duplicates("hybrid_dedup") == 2
+        deleted = sorted(call.args for call in backend.redis_backend.delete.await_args_list)
+        assert deleted == [("hybrid_dedup", "copy", 7), ("hybrid_dedup", "second", None)]
+    
+    @pytest.mark.asyncio
+    async def test_in_memory_backend_tail(self):
+        """Test the in-memory append log across rewrites, deletes and expiry."""
+        backend = InMemoryStorageBackend()
+        for index in range(100):
+            await backend.set("log", f"key{index}", index)
+        for index in range(90):
+            await backend.delete("log", f"key{index}")
+        await backend.set("log", "key95", "rewritten")
+        expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        await backend.set("log", "expired", "gone", expires_at=expires_at)
+        
+        entries = await backend.tail("log", limit=3)
+        assert [entry["key"] for entry in entries] == ["key99", "key98", "key97"]
+        
+        entries = await backend.tail("log", limit=20, before=entries[-1]["cursor"])
+        assert [entry["key"] for entry in entries] == [f"key{index}" for index in range(96, 89, -1)]
+        assert entries[1]["value"] == "rewritten"
+        assert await backend.get("log", "expired") is None
+    
+    @pytest.mark.asyncio
+    async def test_database_backend_tail(self):
+        """Test keyset pagination over the created_at index."""
+        from nagatha_assistant.db import ensure_schema
+        
+        await ensure_schema()
+        
+        backend = DatabaseStorageBackend()
+        for index in range(5):
+            await backend.set("tail_test", f"entry{index}", {"n": index}, session_id=42)
+        
+        first_page = await backend.tail("tail_test", session_id=42, limit=2)
+        assert [entry["key"] for entry in first_page] == ["entry4", "entry3"]
+        
+        second_page = await backend.tail("tail_test", session_id=42, limit=10, before=first_page[-1]["cursor"])
+        assert [entry["key"] for entry in second_page] == ["entry2", "entry1", "entry0"]
+        assert second_page[0]["value"] == {"n": 2}
+    
+    @pytest.mark.asyncio
+    async def test_database_backend_scan_signatures(self):
+        """Test keyset scanning and signature storage in the database backend."""
+        from nagatha_assistant.db import ensure_schema
+        
+        await ensure_schema()
+        
+        backend = DatabaseStorageBackend()
+        for index in range(5):
+            await backend.set("scan_test", f"key{index}", {"text": f"value {index}"})
+        
+        first = await backend.scan("scan_test", limit=3)
+        rest = await backend.scan("scan_test", after=first[-1]["cursor"], limit=3)
+        keys = [entry["key"] for entry in first + rest]
+        assert keys[-5:] == [f"key{index}" for index in range(5)]
+        assert rest[-1]["value"] == {"text": "value 4"}
+        
+        await backend.set_signatures("scan_test", {("key0", None): "abcd"})
+        entries = {entry["key"]: entry for entry in await backend.scan("scan_test")}
+        assert entries["key0"]["signature"] == "abcd"
+        
+        # Changing the value invalidates the stored signature
+        await backend.set("scan_test", "key0", {"text": "changed"})
+        entries = {entry["key"]: entry for entry in await backend.scan("scan_test")}
+        assert entries["key0"]["signature"] is None
+
+    
+    @pytest.mark.asyncio
+    async def test_in_memory_backend_tiering(self):
+        """Test archiving cold entries and promoting them back on read."""
+        backend = InMemoryStorageBackend()
+        await backend.set("facts", "cold", {"fact": "rarely used"})
+        await backend.set("facts", "warm", {"fact": "read often"})
+        await backend.record_access("facts", {("warm", None): (10, datetime.now(timezone.utc))})
+        
+        assert await backend.archive_cold("facts", datetime.now(timezone.utc) - timedelta(days=1)) == 0
+        assert await backend.archive_cold("facts", datetime.now(timezone.utc) + timedelta(seconds=1)) == 2
+        
+        # Promotion keeps the recorded access counts
+        assert await backend.get("facts", "warm") == {"fact": "read often"}
+        stats = (await backend.get_access_stats())["facts"]
+        assert (stats["entries"], stats["archived"], stats["accesses"]) == (1, 1, 10)
+        assert (await backend.get_stats())[0]["count"] == 1
+        
+        assert await backend.get("facts", "cold") == {"fact": "rarely used"}
+        assert sorted(await backend.list_keys("facts")) == ["cold", "warm"]
+        assert (await backend.get_stats())[0]["count"] == 2
+        assert await backend.reconcile_stats() == 0
+    
+    @pytest.mark.asyncio
+    async def test_database_backend_tiering(self):
+        """Test the compressed archive table and transparent promotion."""
+        from nagatha_assistant.db import ensure_schema
+        
+        await ensure_schema()
+        
+        backend = DatabaseStorageBackend()
+        await backend.set("tiering_test", "cold", {"fact": "archived " * 20})
+        await backend.set("tiering_test", "scoped", "session value", session_id=8)
+        await backend.record_access("tiering_test", {("cold", None): (5, datetime.now(timezone.utc))})
+        
+        future = datetime.now(timezone.utc) + timedelta(minutes=1)
+        assert await backend.archive_cold("tiering_test", future) == 2
+        assert await backend.list_keys("tiering_test") == ["cold"]
+        assert await backend.reconcile_stats() == 0
+        
+        stats = (await backend.get_access_stats())["tiering_test"]
+        assert (stats["entries"], stats["archived"], stats["accesses"]) == (0, 2, 5)
+        
+        # Reads promote, writes and deletes supersede the archived copy
+        assert await backend.get("tiering_test", "cold") == {"fact": "archived " * 20}
+        await backend.set("tiering_test", "scoped", "rewritten", session_id=8)
+        stats = (await backend.get_access_stats())["tiering_test"]
+        assert (stats["entries"], stats["archived"], stats["accesses"]) == (2, 0, 5)
+        assert await backend.get("tiering_test", "scoped", session_id=8) == "rewritten"
+        
+        assert await backend.archive_cold("tiering_test", future) == 2
+        assert await backend.delete("tiering_test", "cold") is True
+        assert await backend.get("tiering_test", "cold") is None
+        assert await backend.reconcile_stats() == 0
+    
+    @pytest.mark.asyncio
+    async def test_in_memory_search_and_tail_promote_archived(self):
+        """Test that search and tail find archived entries and put them back in order."""
+        backend = InMemoryStorageBackend()
+        for index in range(3):
+            await backend.set("log_test", f"entry{index}", f"text {index}")
+        await backend.set("log_test", "scoped", "scoped text", session_id=2)
+        future = datetime.now(timezone.utc) + timedelta(seconds=1)
+        
+        assert await backend.archive_cold("log_test", future) == 4
+        results = await backend.search("log_test", "TEXT 1")
+        assert [result["key"] for result in results] == ["entry1"]
+        assert (await backend.get_access_stats())["log_test"]["archived"] == 3
+        
+        page = await backend.tail("log_test", limit=10)
+        assert [entry["key"] for entry in page] == ["scoped", "entry2", "entry1", "entry0"]
+        assert await backend.reconcile_stats() == 0
+    
+    @pytest.mark.asyncio
+    async def test_database_search_and_tail_promote_archived(self):
+        """Test that database search and tail read through the archive."""
+        from nagatha_assistant.db import ensure_schema
+        
+        await ensure_schema()
+        
+        backend = DatabaseStorageBackend()
+        for index in range(3):
+            await backend.set("archive_read_test", f"entry{index}", f"text {index}")
+        await backend.set("archive_read_test", "scoped", "scoped text", session_id=9)
+        future = datetime.now(timezone.utc) + timedelta(minutes=1)
+        assert await backend.archive_cold("archive_read_test", future) == 4
+        
+        results = await backend.search("archive_read_test", "Text 2")
+        assert [(result["key"], result["value"]) for result in results] == [("entry2", "text 2")]
+        assert await backend.search("archive_read_test", "text", session_id=9) == [{
+            "key": "scoped", "value": "scoped text", "section": "archive_read_test", "session_id": 9
+        }]
+        stats = (await backend.get_access_stats())["archive_read_test"]
+        assert (stats["entries"], stats["archived"]) == (2, 2)
+        
+        page = await backend.tail("archive_read_test", limit=10)
+        assert sorted(entry["key"] for entry in page) == ["entry0", "entry1", "entry2", "scoped"]
+        assert (await backend.get_access_stats())["archive_read_test"]["archived"] == 0
+        assert await backend.reconcile_stats() == 0
+    
+    @pytest.mark.asyncio
+    async def test_manager_search_keeps_entries_hot(self):
+        """Test that search hits count as reads and append logs are never archived."""
+        manager = MemoryManager(storage_backend=InMemoryStorageBackend())
+        manager.access_tracker.sample_rate = 1.0
+        await manager.set("facts", "sky", "The sky is blue")
+        await manager.set("command_history", "cmd1", "ls")
+        
+        assert len(await manager.search("facts", "sky")) == 1
+        stats = await manager.get_access_stats()
+        assert stats["facts"]["accesses"] == 1
+        
+        await manager.archive_cold_entries(max_idle_days=-1)
+        stats = await manager.get_access_stats()
+        assert stats["command_history"]["archived"] == 0
+        assert [entry["key"] for entry in await manager.tail("command_history")] == ["cmd1"]
+        
+        # Recall still finds an archived fact
+        assert stats["facts"]["archived"] == 1
+        assert [result["key"] for result in await manager.search("facts", "")] == ["sky"]
+    
+    @pytest.mark.asyncio
+    async def test_manager_access_tracking(self):
+        """Test that sampled reads are buffered and flushed in batches."""
+        manager = MemoryManager(storage_backend=InMemoryStorageBackend())
+        manager.access_tracker.sample_rate = 1.0
+        await manager.set("facts", "fact", "value")
+        await manager.set("temporary", "scratch", "value")
+        
+        for _ in range(3):
+            await manager.get("facts", "fact")
+        await manager.get("facts", "missing")
+        
+        stats = await manager.get_access_stats()
+        assert stats["facts"]["accesses"] == 3
+        
+        # Temporary sections are never archived
+        assert await manager.archive_cold_entries(max_idle_days=-1) == 1
+        assert await manager.list_keys("temporary") == ["scratch"]
+        assert await manager.get("facts", "fact") == "value"
 
 
 class TestMemoryIntegration:
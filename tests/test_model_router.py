@@ -0,0 +1,172 @@
+"""
+Tests for tiered model routing, escalation and learning from logged turns.
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from nagatha_assistant.core.model_router import (
+    FEATURE_NAMES, ModelRouter, ModelTier, turn_features
+)
+
+
+def make_router(tmp_path, **kwargs):
+    return ModelRouter(ModelTier("cheap", "gpt-4o-mini", 400), ModelTier("standard", "gpt-4o", 4000),
+                       log_path=tmp_path / "routing.jsonl", **kwargs)
+
+
+def completion(content="ok", tool_calls=None, finish_reason="stop", prompt_tokens=20,
+               completion_tokens=5):
+    message = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, finish_reason=finish_reason)],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens),
+    )
+
+
+def read_log(router):
+    router.close()
+    return [json.loads(line) for line in router.log_path.read_text().splitlines()]
+
+
+def test_turn_features():
+    """Test that the features pick out acknowledgements, code, links and hints."""
+    named = dict(zip(FEATURE_NAMES, turn_features("thanks Nagatha!")))
+    assert named["acknowledgement"] == 1.0
+    assert named["tool_hints"] == 0.0
+
+    named = dict(zip(FEATURE_NAMES, turn_features("Search https://example.com and explain why?")))
+    assert named["acknowledgement"] == 0.0
+    assert named["url"] == 1.0
+    assert named["tool_hints"] == 1.0
+    assert named["reasoning_hints"] == 2.0
+    assert named["questions"] == 1.0
+
+
+def test_heuristic_routing(tmp_path):
+    """Test the routing rules used before the learned models have enough data."""
+    router = make_router(tmp_path)
+
+    greeting = router.route("hi there")
+    assert (greeting.tier, greeting.model, greeting.max_tokens) == ("cheap", "gpt-4o-mini", 400)
+    assert greeting.reason == "acknowledgement"
+
+    assert router.route("what did we talk about").tier == "cheap"
+    assert router.route("```print(1)```").reason == "code_or_link"
+    assert router.route("please search the news for me").tier == "standard"
+    assert router.route("word " * 100).reason == "long_message"
+
+    pinned = router.route("hi", model="gpt-4.1")
+    assert (pinned.tier, pinned.model, pinned.reason) == ("standard", "gpt-4.1", "pinned")
+
+    router.enabled = False
+    assert router.route("hi").tier == "standard"
+
+
+def test_escalation_on_tools_and_truncation(tmp_path):
+    """Test that only cheap turns escalate, once, for tool calls or truncation."""
+    router = make_router(tmp_path)
+
+    decision = router.route("hey")
+    assert router.escalation(decision, completion()) is None
+    assert router.escalation(decision, completion(finish_reason="length")) == "truncated"
+    assert router.escalation(decision, completion(tool_calls=[object()])) == "tools"
+
+    router.escalate(decision, "tools")
+    assert (decision.tier, decision.model, decision.max_tokens) == ("cheap", "gpt-4o", 4000)
+    assert router.escalation(decision, completion(finish_reason="length")) is None
+
+    standard = router.route("explain how transformers work")
+    assert router.escalation(standard, completion(tool_calls=[object()])) is None
+
+
+def test_outcomes_are_logged(tmp_path):
+    """Test the logged outcome of an escalated turn."""
+    router = make_router(tmp_path)
+
+    decision = router.route("ok cool")
+    decision.observe(completion(finish_reason="length", completion_tokens=400))
+    router.escalate(decision, "truncated")
+    decision.observe(completion(completion_tokens=900))
+    router.finish(decision, session_id=3, interface="discord")
+
+    failed = router.route("hello")
+    router.finish(failed, session_id=3, error=True)
+
+    entries = read_log(router)
+    assert len(entries) == 1
+    entry = entries[0]
+    assert entry["session_id"] == 3
+    assert entry["interface"] == "discord"
+    assert (entry["tier"], entry["model"], entry["escalated"]) == ("cheap", "gpt-4o", "truncated")
+    assert (entry["finish_reason"], entry["reply_tokens"]) == ("length", 400)
+    assert (entry["completions"], entry["completion_tokens"]) == (2, 1300)
+    assert entry["cost_usd"] > 0
+    assert entry["latency_ms"] >= 0
+
+    metrics = router.get_metrics()
+    assert metrics["tiers"]["cheap"]["turns"] == 2
+    assert metrics["tiers"]["cheap"]["escalated"] == 1
+    assert metrics["tiers"]["cheap"]["errors"] == 1
+    assert metrics["samples"] == 1
+
+
+def test_learns_from_logged_turns(tmp_path):
+    """Test that a new router replays the log and routes and budgets with the learned models."""
+    router = make_router(tmp_path, min_samples=50)
+    for _ in range(300):
+        # Questions about today's weather needed tools; small talk got short replies
+        decision = router.route("will it rain today")
+        decision.observe(completion(tool_calls=[object()]))
+        router.finish(decision)
+        decision = router.route("what do you think of cats")
+        decision.observe(completion(completion_tokens=40))
+        router.finish(decision)
+    router.close()
+
+    trained = make_router(tmp_path, min_samples=50)
+    assert trained.learned
+    assert trained.samples == 600
+
+    chat = trained.route("what do you think of dogs")
+    assert (chat.tier, chat.reason) == ("cheap", "learned")
+    assert chat.risk < trained.risk_threshold
+    assert 128 <= chat.max_tokens < 400
+
+    weather = trained.route("is it sunny today")
+    assert weather.tier == "standard"
+    assert weather.risk >= trained.risk_threshold
+    trained.close()
+
+
+@pytest.mark.asyncio
+async def test_agent_escalates_truncated_cheap_turn(tmp_path):
+    """Test that the agent repeats a truncated cheap completion on the standard tier."""
+    from unittest.mock import AsyncMock, MagicMock, patch
+    from nagatha_assistant.core import agent
+
+    router = make_router(tmp_path)
+    gateway = MagicMock()
+    gateway.create_chat_completion = AsyncMock(side_effect=[
+        completion("Hel", finish_reason="length"), completion("Hello! How are you today?"),
+    ])
+    bus = MagicMock(_running=False)
+
+    with patch.object(agent, "get_model_router", return_value=router), \
+         patch.object(agent, "get_llm_gateway", return_value=gateway), \
+         patch.object(agent, "get_openai_client"), \
+         patch.object(agent, "get_available_tools", AsyncMock(return_value=[])), \
+         patch.object(agent, "get_event_bus", return_value=bus):
+        session_id = await agent.start_session()
+        reply = await agent.send_message(session_id, "hello")
+
+    assert reply == "Hello! How are you today?"
+    calls = gateway.create_chat_completion.await_args_list
+    assert [(c.kwargs["model"], c.kwargs["max_tokens"]) for c in calls] == [
+        ("gpt-4o-mini", 400), ("gpt-4o", 4000)
+    ]
+    [entry] = read_log(router)
+    assert entry["escalated"] == "truncated"
+    assert entry["session_id"] == session_id
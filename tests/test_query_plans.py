@@ -0,0 +1,267 @@
+"""
+Query plan regression tests.
+
+Every statement issued by the database code in ``core/storage.py``,
+``core/agent.py`` and ``server/discord_bot.py`` is captured while a small
+workload runs, then explained with ``EXPLAIN QUERY PLAN``. A test fails if a
+statement falls back to a full table scan of a table that is expected to
+grow, or a request-path query sorts its rows in a temporary B-tree instead of
+reading them in index order. Either usually means a query changed shape or
+lost its index. Periodic jobs and reports may sort the rows their index found.
+"""
+
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+
+from nagatha_assistant.db import DATABASE_URL, engine, ensure_schema
+from nagatha_assistant.core.storage import DatabaseStorageBackend
+
+pytestmark = pytest.mark.skipif(
+    not DATABASE_URL.startswith("sqlite"), reason="query plans are checked on SQLite"
+)
+
+# "SCAN <table>" is a full table (or full index) scan; "SEARCH" uses an index
+_FULL_SCAN = re.compile(r"^SCAN (\w+)")
+
+# ORDER BY / GROUP BY / DISTINCT that can't be answered in index order
+_TEMP_SORT = re.compile(r"^USE TEMP B-TREE FOR")
+
+# Tables that stay small, where a scan is cheaper than any index
+SMALL_TABLES = {"memory_sections", "memory_stats"}
+
+
+@contextmanager
+def capture_statements():
+    """Collect (sql, parameters) for every statement executed on the engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if executemany and parameters:
+            parameters = parameters[0]
+        statements.append((statement, tuple(parameters or ())))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def full_scans(statements, allowed=frozenset(), sorts=False):
+    """
+    Explain each statement and return the ones that scan a whole table.
+
+    Unless ``sorts`` is true, statements sorting in a temporary B-tree are
+    returned too: on a growing table the sort reads every matching row
+    before the LIMIT applies.
+    """
+    db_file = DATABASE_URL.split("///", 1)[1]
+    offenders = []
+    with sqlite3.connect(db_file) as conn:
+        for sql, parameters in statements:
+            if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                continue
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+            for row in plan:
+                match = _FULL_SCAN.match(row[-1])
+                if match and match.group(1) not in SMALL_TABLES | set(allowed):
+                    offenders.append((sql, row[-1]))
+                elif not sorts and _TEMP_SORT.match(row[-1]):
+                    offenders.append((sql, row[-1]))
+    return offenders
+
+
+def plans(statements):
+    """Get the EXPLAIN QUERY PLAN detail lines for statements."""
+    db_file = DATABASE_URL.split("///", 1)[1]
+    with sqlite3.connect(db_file) as conn:
+        return [row[-1] for sql, parameters in statements
+                for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()]
+
+
+@pytest_asyncio.fixture
+async def backend():
+    """A database backend with a few entries in a fresh section."""
+    await ensure_schema()
+    backend = DatabaseStorageBackend()
+    await backend.set("plan_test", "global", {"fact": "value"})
+    await backend.set("plan_test", "scoped", "scoped value", session_id=3)
+    await backend.set("plan_test", "expiring", "soon gone",
+                      expires_at=datetime.now(timezone.utc) + timedelta(hours=1))
+    return backend
+
+
+@pytest.mark.asyncio
+async def test_storage_queries_use_indexes(backend):
+    """Test that per-entry and per-section storage queries never scan or sort a table."""
+    with capture_statements() as statements:
+        await backend.set("plan_test", "global", {"fact": "updated"})
+        await backend.get("plan_test", "global")
+        await backend.get("plan_test", "missing")
+        await backend.list_keys("plan_test")
+        await backend.list_keys("plan_test", session_id=3)
+        await backend.search("plan_test", "value", session_id=3)
+        page = await backend.tail("plan_test", limit=1)
+        await backend.tail("plan_test", session_id=3, limit=1)
+        await backend.tail("plan_test", limit=1, before=page[-1]["cursor"])
+        await backend.scan("plan_test", after=0, limit=10)
+        await backend.set_signatures("plan_test", {("global", None): "ab"})
+        await backend.record_access("plan_test", {("global", None): (1, datetime.now(timezone.utc))})
+        await backend.archive_cold("plan_test", datetime.now(timezone.utc) - timedelta(days=30))
+        await backend.delete("plan_test", "scoped", session_id=3)
+        await backend.get_stats()
+
+    assert statements
+    assert full_scans(statements) == []
+
+    # Periodic cleanup groups the few rows it removes to adjust the counters
+    with capture_statements() as statements:
+        await backend.cleanup_expired()
+        await backend.remove_duplicates("plan_test")
+    assert statements
+    assert full_scans(statements, sorts=True) == []
+
+
+@pytest.mark.asyncio
+async def test_tail_reads_in_index_order(backend):
+    """Test that scoped and unscoped tails read in index order without sorting the section."""
+    for scope, index in ((None, "ix_memory_entries_section_created_id"),
+                         (3, "ix_memory_entries_section_session_created")):
+        with capture_statements() as statements:
+            page = await backend.tail("plan_test", session_id=scope, limit=1)
+            await backend.tail("plan_test", session_id=scope, limit=1, before=page[-1]["cursor"])
+
+        details = plans([statement for statement in statements
+                         if statement[0].lstrip().upper().startswith("SELECT")])
+        assert not any("TEMP B-TREE" in detail for detail in details), details
+        assert any(index in detail for detail in details), details
+
+
+@pytest.mark.asyncio
+async def test_archive_queries_use_indexes(backend):
+    """Test archiving, promotion and archive cleanup against the archive indexes."""
+    with capture_statements() as statements:
+        await backend.archive_cold("plan_test", datetime.now(timezone.utc) + timedelta(minutes=1))
+        await backend.list_keys("plan_test")
+        await backend.get("plan_test", "global")
+        await backend.cleanup_expired()
+
+    assert full_scans(statements, sorts=True) == []
+
+
+@pytest.mark.asyncio
+async def test_aggregate_queries_scan_only_entry_tables(backend):
+    """Test that full recounts scan the entry tables and nothing else."""
+    with capture_statements() as statements:
+        await backend.reconcile_stats()
+        await backend.get_access_stats()
+
+    assert full_scans(statements, allowed={"memory_entries", "memory_archive"}, sorts=True) == []
+
+
+@pytest.mark.asyncio
+async def test_agent_queries_use_indexes():
+    """Test the conversation queries in the agent module."""
+    from nagatha_assistant.core.agent import get_messages, list_sessions, start_session
+
+    await ensure_schema()
+    session_id = await start_session()
+
+    with capture_statements() as statements:
+        await get_messages(session_id)
+        page = await get_messages(session_id, limit=15)
+        await get_messages(session_id, limit=15, before_id=page[-1].id)
+    assert full_scans(statements) == []
+    assert any("ix_messages_session_id_id" in plan for plan in plans(statements[1:]))
+
+    # Listing every session is a full, sorted read by design
+    with capture_statements() as statements:
+        await list_sessions()
+    assert full_scans(statements, allowed={"conversation_sessions"}, sorts=True) == []
+
+
+@pytest.mark.asyncio
+async def test_discord_queries_use_indexes():
+    """Test the auto-chat configuration queries in the Discord bot."""
+    from nagatha_assistant.server.discord_bot import (
+        get_auto_chat_setting, set_auto_chat_setting, update_auto_chat_usage
+    )
+
+    await ensure_schema()
+    with capture_statements() as statements:
+        await set_auto_chat_setting("plan-channel", None, True, "user")
+        await get_auto_chat_setting("plan-channel")
+        await update_auto_chat_usage("plan-channel")
+
+    assert statements
+    assert full_scans(statements) == []
+
+
+def test_full_scan_detection():
+    """Test that the checker flags a query without a usable index."""
+    statements = [("SELECT * FROM messages WHERE content = ?", ("x",))]
+    assert full_scans(statements) == [(statements[0][0], "SCAN messages")]
+
+
+def test_temp_sort_detection():
+    """Test that the checker flags a sort the index can't provide."""
+    statements = [("SELECT * FROM messages WHERE session_id = ? ORDER BY content LIMIT 5", (1,))]
+    assert full_scans(statements) == [(statements[0][0], "USE TEMP B-TREE FOR ORDER BY")]
+    assert full_scans(statements, sorts=True) == []
+
+
+@pytest.mark.asyncio
+async def test_due_reminder_query_uses_index():
+    """Test the due-reminder poll against the (delivered, remind_at) index."""
+    from sqlalchemy import select
+    from nagatha_assistant.db import SessionLocal
+    from nagatha_assistant.db_models import Reminder
+
+    await ensure_schema()
+    stmt = select(Reminder).where(
+        Reminder.delivered.is_(False),
+        Reminder.remind_at <= datetime.now(timezone.utc)
+    ).order_by(Reminder.remind_at).limit(50)
+
+    with capture_statements() as statements:
+        async with SessionLocal() as session:
+            await session.execute(stmt)
+
+    assert full_scans(statements) == []
+    assert any("ix_reminders_delivered_remind_at" in plan for plan in plans(statements))
+
+
+@pytest.mark.asyncio
+async def test_usage_queries_use_indexes():
+    """Test usage ledger flushes and filtered breakdowns."""
+    from nagatha_assistant.utils.usage_tracker import (
+        flush_usage, get_usage_breakdown, load_usage, record_usage
+    )
+
+    await ensure_schema()
+    record_usage("gpt-4o-mini", 10, 5, session_id=4, interface="discord")
+    await flush_usage()
+
+    with capture_statements() as statements:
+        record_usage("gpt-4o-mini", 10, 5, session_id=4, interface="discord")
+        await flush_usage()
+    assert statements
+    assert full_scans(statements) == []
+
+    # Breakdowns group the rows their index found
+    with capture_statements() as statements:
+        await get_usage_breakdown("tool_round", session_id=4)
+        await get_usage_breakdown("session", interface="discord", since="2025-01-01")
+        await get_usage_breakdown("model", since="2025-01-01", until="2025-12-31")
+    assert full_scans(statements, sorts=True) == []
+
+    # The daily rollup is read whole, one row per model per day
+    with capture_statements() as statements:
+        await load_usage()
+    assert full_scans(statements, allowed={"usage_daily"}) == []
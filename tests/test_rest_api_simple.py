@@ -17,11 +17,12 @@ from nagatha_assistant.server.core_server import NagathaUnifiedServer, ServerCon
 class MockRequest:
     """Simple mock request for testing."""
     
-    def __init__(self, method='GET', path='/', json_data=None, match_info=None):
+    def __init__(self, method='GET', path='/', json_data=None, match_info=None, query=None):
         self.method = method
         self.path = path
         self._json_data = json_data
         self.match_info = match_info or {}
+        self.query = query or {}
     
     async def json(self):
         if self._json_data is None:
@@ -84,7 +85,8 @@ class TestRESTAPISimple:
             message="Hello",
             user_id="test_user",
             interface="api",
-            interface_context={"test": "context"}
+            interface_context={"test": "context"},
+            priority=None
         )
     
     @pytest.mark.asyncio
@@ -192,7 +194,8 @@ class TestRESTAPISimple:
             message="Hello from session",
             user_id="discord_channel:12345",  # Should use session_key, not original user_id
             interface="discord",
-            interface_context={"channel_id": "12345"}
+            interface_context={"channel_id": "12345"},
+            priority=None
         )
     
     @pytest.mark.asyncio
@@ -246,6 +249,87 @@ class TestRESTAPISimple:
         assert response.status == 500
         response_data = json.loads(response.text)
         assert "Server error" in response_data['error']
+    
+    @pytest.mark.asyncio
+    async def test_get_messages_pages_history(self, rest_api):
+        """Test that message history is returned newest first with a cursor."""
+        from nagatha_assistant.core.agent import start_session, push_message
+        
+        session_id = await start_session()
+        for n in range(5):
+            await push_message(session_id, f"message {n}")
+        
+        request = MockRequest(match_info={'session_id': str(session_id)}, query={'limit': '3'})
+        response = await rest_api._get_messages(request)
+        assert response.status == 200
+        page = json.loads(response.text)
+        assert [m['content'] for m in page['messages']] == ["message 4", "message 3", "message 2"]
+        assert page['next_before_id'] == page['messages'][-1]['id']
+        
+        request = MockRequest(match_info={'session_id': str(session_id)},
+                              query={'limit': '3', 'before_id': str(page['next_before_id'])})
+        page = json.loads((await rest_api._get_messages(request)).text)
+        # Two pushed messages plus the welcome message, and nothing older
+        assert [m['content'] for m in page['messages']][:2] == ["message 1", "message 0"]
+        assert len(page['messages']) == 3
+        assert page['next_before_id'] == page['messages'][-1]['id']
+        
+        request = MockRequest(match_info={'session_id': str(session_id)},
+                              query={'before_id': str(page['next_before_id'])})
+        page = json.loads((await rest_api._get_messages(request)).text)
+        assert page == {"session_id": session_id, "messages": [], "next_before_id": None}
+    
+    @pytest.mark.asyncio
+    async def test_get_messages_rejects_bad_cursor(self, rest_api):
+        """Test that non-integer paging parameters are rejected."""
+        request = MockRequest(match_info={'session_id': '1'}, query={'before_id': 'abc'})
+        response = await rest_api._get_messages(request)
+        assert response.status == 400
+    
+    @pytest.mark.asyncio
+    async def test_get_events_replays(self, rest_api):
+        """Test that events are replayed oldest first with filters."""
+        from nagatha_assistant.core.event import Event
+        from nagatha_assistant.core.event_bus import EventBus
+        
+        bus = EventBus()
+        await bus.start()
+        try:
+            await bus.publish_many([Event("api.test", {"n": n}, timestamp=1000.0 + n) for n in range(3)])
+            with patch('nagatha_assistant.core.event_bus.get_event_bus', return_value=bus):
+                request = MockRequest(query={'type': 'api.*', 'since': '1001', 'limit': '5'})
+                response = await rest_api._get_events(request)
+        finally:
+            await bus.stop()
+        
+        assert response.status == 200
+        events = json.loads(response.text)['events']
+        assert [event['data']['n'] for event in events] == [1, 2]
+        assert events[0]['event_type'] == 'api.test'
+    
+    @pytest.mark.asyncio
+    async def test_get_events_rejects_bad_time(self, rest_api):
+        """Test that unparseable time bounds are rejected."""
+        response = await rest_api._get_events(MockRequest(query={'since': 'yesterday'}))
+        assert response.status == 400
+    
+    @pytest.mark.asyncio
+    async def test_status_includes_event_bus_metrics(self, rest_api, mock_server):
+        """Test that /status reports the event bus metrics."""
+        from nagatha_assistant.core.event_bus import EventBus
+        
+        mock_server.get_server_status = AsyncMock(return_value={"server": {"running": True}})
+        with patch('nagatha_assistant.core.event_bus.get_event_bus', return_value=EventBus()):
+            response = await rest_api._get_status(MockRequest())
+        
+        assert response.status == 200
+        status = json.loads(response.text)
+        assert status["server"] == {"running": True}
+        assert status["event_bus"]["published_total"] == 0
+        assert "depth" in status["event_bus"]["queue"]
+        assert set(status["llm_gateway"]["priorities"]) == {"interactive", "channel", "background"}
+        assert "coalesced" in status["session_actors"]
+        assert set(status["model_router"]["tiers"]) == {"cheap", "standard"}
 
 
 class TestDiscordSessionKeyFix:
@@ -306,7 +390,8 @@ class TestDiscordSessionKeyFix:
             interface_context={
                 "channel_id": "67890",
                 "guild_id": "11111"
-            }
+            },
+            priority=None
         )
     
     @pytest.mark.asyncio
@@ -339,5 +424,6 @@ class TestDiscordSessionKeyFix:
             message="Test message",
             user_id="api_user_123",  # Should use user_id as fallback
             interface="api",
-            interface_context={"client": "mobile"}
-        )
\ No newline at end of file
+            interface_context={"client": "mobile"},
+            priority=None
+        )
@@ -0,0 +1,123 @@
+"""
+Tests for per-session actors: turn serialization, coalescing and eviction.
+"""
+
+import asyncio
+
+import pytest
+
+from nagatha_assistant.core.session_actor import SessionActors
+
+
+class RecordingHandler:
+    """Turn handler that records calls and how many turns overlap."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = []
+        self.running = {}
+        self.max_running = {}
+
+    async def __call__(self, session_id, user_message, **options):
+        self.calls.append((session_id, user_message, options))
+        self.running[session_id] = self.running.get(session_id, 0) + 1
+        self.max_running[session_id] = max(self.max_running.get(session_id, 0),
+                                           self.running[session_id])
+        try:
+            await asyncio.sleep(self.delay)
+            if user_message == "boom":
+                raise RuntimeError("turn failed")
+            return f"reply to {user_message!r}"
+        finally:
+            self.running[session_id] -= 1
+
+
+@pytest.mark.asyncio
+async def test_turns_of_a_session_are_serialized():
+    """Test that one session runs one turn at a time while sessions run in parallel."""
+    handler = RecordingHandler()
+    actors = SessionActors(handler)
+
+    replies = await asyncio.gather(
+        actors.submit(1, "a"), actors.submit(1, "b"), actors.submit(2, "c")
+    )
+
+    assert replies == ["reply to 'a'", "reply to 'b'", "reply to 'c'"]
+    assert [call[1] for call in handler.calls if call[0] == 1] == ["a", "b"]
+    assert handler.max_running == {1: 1, 2: 1}
+    assert actors.get_metrics()["turns"] == 3
+
+
+@pytest.mark.asyncio
+async def test_burst_is_coalesced_into_one_turn():
+    """Test that a burst within the window becomes one turn answered to every sender."""
+    handler = RecordingHandler(delay=0)
+    actors = SessionActors(handler, coalesce_window=0.05)
+
+    first = asyncio.ensure_future(actors.submit(1, "hi", interface="discord"))
+    await asyncio.sleep(0.01)
+    second = asyncio.ensure_future(actors.submit(1, "are you there?", interface="discord"))
+    replies = await asyncio.gather(first, second)
+
+    assert len(handler.calls) == 1
+    assert handler.calls[0] == (1, "hi\nare you there?", {"interface": "discord"})
+    assert replies[0] == replies[1]
+    assert actors.get_metrics()["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_only_compatible_messages_are_merged():
+    """Test that tool calls and messages with other options get their own turn."""
+    handler = RecordingHandler(delay=0)
+    actors = SessionActors(handler, coalesce_window=0.02, max_batch=2)
+
+    await asyncio.gather(
+        actors.submit(1, "one"),
+        actors.submit(1, "two"),
+        actors.submit(1, "three"),
+        actors.submit(1, "tool", mergeable=False, tool_name="search"),
+        actors.submit(1, "four", model="gpt-4o"),
+    )
+
+    assert [call[1] for call in handler.calls] == ["one\ntwo", "three", "tool", "four"]
+
+
+@pytest.mark.asyncio
+async def test_failed_turn_reaches_every_sender():
+    """Test that a handler error is raised to the senders without stopping the actor."""
+    actors = SessionActors(RecordingHandler(delay=0), coalesce_window=0.01)
+
+    results = await asyncio.gather(actors.submit(1, "boom"), return_exceptions=True)
+    assert isinstance(results[0], RuntimeError)
+    assert await actors.submit(1, "again") == "reply to 'again'"
+    assert actors.get_metrics()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_idle_actor_is_evicted():
+    """Test that an idle actor is dropped and a new one serves later messages."""
+    actors = SessionActors(RecordingHandler(delay=0), idle_timeout=0.02)
+
+    await actors.submit(1, "hello")
+    assert actors.get_metrics()["active"] == 1
+    await asyncio.sleep(0.1)
+    assert actors.get_metrics()["active"] == 0
+    assert actors.get_metrics()["evicted"] == 1
+
+    assert await actors.submit(1, "back") == "reply to 'back'"
+    await actors.stop()
+    assert actors.get_metrics()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_nested_call_for_same_session_runs_inline():
+    """Test that a turn sending to its own session does not deadlock."""
+    actors = SessionActors(None)
+
+    async def handler(session_id, user_message, **options):
+        if user_message == "outer":
+            return await actors.submit(session_id, "inner")
+        return "inner reply"
+
+    actors.handler = handler
+    assert await asyncio.wait_for(actors.submit(1, "outer"), 1) == "inner reply"
@@ -0,0 +1,143 @@
+"""
+Tests for per-turn batching of conversation writes.
+"""
+
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import event
+
+from nagatha_assistant.core.storage import DatabaseStorageBackend
+from nagatha_assistant.core.unit_of_work import TurnUnitOfWork, save_message
+from nagatha_assistant.db import engine, ensure_schema
+
+
+@contextmanager
+def count_commits():
+    """Count transactions committed on the application engine."""
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(engine.sync_engine, "commit", on_commit)
+    try:
+        yield commits
+    finally:
+        event.remove(engine.sync_engine, "commit", on_commit)
+
+
+@pytest.mark.asyncio
+async def test_turn_commits_twice():
+    """Test that a turn writes messages and memories in two transactions."""
+    from nagatha_assistant.core.agent import send_message, start_session
+    from nagatha_assistant.core.memory import MemoryManager
+
+    await ensure_schema()
+    session_id = await start_session()
+    manager = MemoryManager(storage_backend=DatabaseStorageBackend())
+
+    with patch("nagatha_assistant.core.memory.get_memory_manager", return_value=manager), \
+         patch("nagatha_assistant.core.agent.call_tool_or_command", AsyncMock(return_value="42")):
+        with count_commits() as commits:
+            reply = await send_message(
+                session_id, "I prefer short answers. My project is a compiler.", tool_name="calc"
+            )
+
+    assert reply == "Tool 'calc' result:\n42"
+    assert len(commits) == 2
+
+    context = await manager.tail("conversation_context", session_id, limit=10)
+    assert [entry["value"]["role"] for entry in context] == ["assistant", "user"]
+    assert await manager.list_keys("temporary", pattern="feedback_*")
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_falls_back():
+    """Test that the reply is stored even if the joined memory writes fail."""
+    await ensure_schema()
+    from nagatha_assistant.core.agent import start_session
+    session_id = await start_session()
+
+    manager = MagicMock()
+    manager.conversation_context_entry.return_value = {"section": "conversation_context", "key": "k", "value": {}}
+    manager.set_many = AsyncMock(side_effect=[RuntimeError("boom"), None])
+
+    turn = TurnUnitOfWork(session_id, memory_manager=manager)
+    turn.remember_entry({"section": "facts", "key": "fact", "value": "kept"})
+    message = await turn.commit("assistant", "hello")
+
+    assert message.id and message.timestamp
+    assert manager.set_many.await_count == 2
+    retried = manager.set_many.await_args_list[1].args[0]
+    assert {"section": "facts", "key": "fact", "value": "kept"} in retried
+    assert turn.entries == []
+
+
+@pytest.mark.asyncio
+async def test_side_effects_follow_commit():
+    """Test that events are published once, after the commit that stored the entries."""
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from nagatha_assistant.core.agent import start_session
+    from nagatha_assistant.core.memory import MemoryManager
+
+    await ensure_schema()
+    session_id = await start_session()
+    manager = MemoryManager(storage_backend=DatabaseStorageBackend())
+    manager._publish_created = AsyncMock()
+
+    turn = TurnUnitOfWork(session_id, memory_manager=manager)
+    turn.remember_entry({"section": "facts", "key": "uow_fact", "value": "kept"})
+
+    commit = AsyncSession.commit
+    calls = []
+
+    async def fail_first_commit(self):
+        calls.append(manager._publish_created.await_count)
+        if len(calls) == 1:
+            raise RuntimeError("commit failed")
+        await commit(self)
+
+    with patch.object(AsyncSession, "commit", fail_first_commit):
+        await turn.commit("assistant", "hello")
+
+    # Nothing was published before or for the failed commit
+    assert calls[0] == 0
+    manager._publish_created.assert_awaited_once()
+    published = manager._publish_created.await_args.args[0]
+    assert [event.data["key"] for event in published][0] == "uow_fact"
+    assert len(published) == 2
+    assert await manager.get("facts", "uow_fact") == "kept"
+
+
+@pytest.mark.asyncio
+async def test_save_message_returns_generated_columns():
+    """Test that RETURNING populates the id and server-side timestamp."""
+    await ensure_schema()
+    from nagatha_assistant.core.agent import get_messages, start_session
+    session_id = await start_session()
+
+    message = await save_message(session_id, "user", "hi")
+    assert message.id is not None
+    assert message.timestamp is not None
+    assert (await get_messages(session_id))[-1].id == message.id
+
+
+@pytest.mark.asyncio
+async def test_storage_set_many():
+    """Test that a batch upserts in one transaction and keeps counters exact."""
+    await ensure_schema()
+    backend = DatabaseStorageBackend()
+
+    with count_commits() as commits:
+        await backend.set_many([
+            ("set_many_test", "a", "first", None, None),
+            ("set_many_test", "b", {"n": 1}, 5, None),
+            ("set_many_test", "a", "second", None, None),
+        ])
+
+    assert len(commits) == 1
+    assert await backend.get("set_many_test", "a") == "second"
+    assert await backend.get("set_many_test", "b", session_id=5) == {"n": 1}
+    assert await backend.reconcile_stats() == 0
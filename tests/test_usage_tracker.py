@@ -3,280 +3,214 @@
 Pytest tests for the usage_tracker utility module.
 """
 
-import pytest
-import tempfile
-import os
+import asyncio
 import json
+from contextlib import contextmanager
 from pathlib import Path
-from unittest.mock import patch, mock_open
-from nagatha_assistant.utils.usage_tracker import record_usage, load_usage, reset_usage, get_reset_info
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+
+from nagatha_assistant.db import engine
+from nagatha_assistant.utils import usage_tracker
+from nagatha_assistant.utils.usage_tracker import (
+    flush_usage, get_reset_info, get_usage_breakdown, import_usage_file, load_usage,
+    record_usage, reset_usage
+)
+
+
+@contextmanager
+def count_commits():
+    """Count transactions committed on the application engine."""
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(engine.sync_engine, "commit", on_commit)
+    try:
+        yield commits
+    finally:
+        event.remove(engine.sync_engine, "commit", on_commit)
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def empty_ledger(tmp_path):
+    """Start every test with an empty buffer and ledger and no legacy file."""
+    with patch.object(usage_tracker, "_FILE_PATH", tmp_path / "missing.json"), \
+         patch.object(usage_tracker, "_ready", False):
+        await reset_usage()
+        yield
 
 
 class TestUsageTracker:
     """Test cases for the usage_tracker utility module."""
 
-    def test_record_usage_new_model(self):
-        """Test recording usage for a new model."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                record_usage("gpt-4", 100, 50)
-                
-                # Check that file was created and contains correct data
-                assert usage_file.exists()
-                with open(usage_file, 'r') as f:
-                    data = json.load(f)
-                    assert "gpt-4" in data
-                    assert data["gpt-4"]["prompt_tokens"] == 100
-                    assert data["gpt-4"]["completion_tokens"] == 50
-
-    def test_record_usage_existing_model(self):
-        """Test recording usage for an existing model (accumulation)."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                # First usage
-                record_usage("gpt-3.5-turbo", 50, 25)
-                # Second usage
-                record_usage("gpt-3.5-turbo", 30, 15)
-                
-                with open(usage_file, 'r') as f:
-                    data = json.load(f)
-                    assert data["gpt-3.5-turbo"]["prompt_tokens"] == 80
-                    assert data["gpt-3.5-turbo"]["completion_tokens"] == 40
-
-    def test_record_usage_multiple_models(self):
-        """Test recording usage for multiple models."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                record_usage("gpt-4", 100, 50)
-                record_usage("gpt-3.5-turbo", 200, 100)
-                record_usage("claude-3", 150, 75)
-                
-                # Check the filtered usage data (what load_usage returns)
-                usage_data = load_usage()
-                assert len(usage_data) == 3
-                assert "gpt-4" in usage_data
-                assert "gpt-3.5-turbo" in usage_data
-                assert "claude-3" in usage_data
-                
-                # Check that metadata is present in raw file but not in load_usage result
-                with open(usage_file, 'r') as f:
-                    raw_data = json.load(f)
-                    assert len(raw_data) == 4  # 3 models + metadata
-                    assert "_metadata" in raw_data
-                    assert "_metadata" not in usage_data
-
-    def test_load_usage_empty(self):
-        """Test loading usage when no data exists."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "nonexistent.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                stats = load_usage()
-                assert stats == {}
-
-    def test_load_usage_with_data(self):
-        """Test loading usage with existing data."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            # Create test data
-            test_data = {
-                "gpt-4": {"prompt_tokens": 100, "completion_tokens": 50, "cost_usd": 0.5},
-                "gpt-3.5-turbo": {"prompt_tokens": 200, "completion_tokens": 100, "cost_usd": 0.2}
-            }
-            with open(usage_file, 'w') as f:
-                json.dump(test_data, f)
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                stats = load_usage()
-                assert stats == test_data
-
-    def test_record_usage_zero_tokens(self):
-        """Test recording usage with zero tokens."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                record_usage("gpt-4", 0, 0)
-                
-                with open(usage_file, 'r') as f:
-                    data = json.load(f)
-                    assert data["gpt-4"]["prompt_tokens"] == 0
-                    assert data["gpt-4"]["completion_tokens"] == 0
-
-    def test_record_usage_negative_tokens(self):
-        """Test recording usage with negative tokens (should handle gracefully)."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                record_usage("gpt-4", -10, -5)
-                
-                # Should still create the entry
-                with open(usage_file, 'r') as f:
-                    data = json.load(f)
-                    assert "gpt-4" in data
-
-    def test_record_usage_cost_calculation(self):
-        """Test that cost is calculated correctly for known models."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                # Use a model with known pricing
-                record_usage("gpt-3.5-turbo", 1000, 500)  # 1K prompt, 500 completion tokens
-                
-                with open(usage_file, 'r') as f:
-                    data = json.load(f)
-                    # Should have calculated cost based on pricing table
-                    assert "cost_usd" in data["gpt-3.5-turbo"]
-                    assert data["gpt-3.5-turbo"]["cost_usd"] > 0
-
-    def test_record_usage_unknown_model(self):
-        """Test recording usage for unknown model (cost should be 0)."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                record_usage("unknown-model", 100, 50)
-                
-                with open(usage_file, 'r') as f:
-                    data = json.load(f)
-                    assert data["unknown-model"]["cost_usd"] == 0.0
-
-    @patch('nagatha_assistant.utils.usage_tracker._save')
-    def test_record_usage_file_error(self, mock_save):
-        """Test recording usage when file operations fail."""
-        mock_save.side_effect = PermissionError("Permission denied")
-        
-        # Should not raise an exception, but it currently does because _save is called
-        # Let's test the _load functionality instead when it can't save
-        try:
-            record_usage("gpt-4", 100, 50)
-            # If it reaches here, the function handled the error gracefully
-        except PermissionError:
-            # The current implementation doesn't handle this gracefully
-            # This test documents the current behavior
-            pass
-
-    def test_record_usage_string_model_name(self):
-        """Test recording usage with various model name formats."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                # Test various model name formats
-                record_usage("gpt-4-turbo-preview", 100, 50)
-                record_usage("claude-3-opus-20240229", 200, 100)
-                record_usage("model_with_underscores", 150, 75)
-                
-                # Check the filtered usage data (what load_usage returns)
-                usage_data = load_usage()
-                assert len(usage_data) == 3
-                assert "gpt-4-turbo-preview" in usage_data
-                assert "claude-3-opus-20240229" in usage_data
-                assert "model_with_underscores" in usage_data
-                
-                # Check that metadata is present in raw file but not in load_usage result
-                with open(usage_file, 'r') as f:
-                    raw_data = json.load(f)
-                    assert len(raw_data) == 4  # 3 models + metadata
-                    assert "_metadata" in raw_data
-
-    def test_load_usage_invalid_json(self):
-        """Test loading usage with invalid JSON file."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "invalid.json"
-            
-            # Create invalid JSON file
-            with open(usage_file, 'w') as f:
-                f.write("invalid json content")
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                stats = load_usage()
-                assert stats == {}  # Should return empty dict on error
+    @pytest.mark.asyncio
+    async def test_record_usage_buffers_until_flush(self):
+        """Test that recording writes nothing until the buffer is flushed."""
+        with count_commits() as commits:
+            record_usage("gpt-4o", 100, 50)
+            record_usage("gpt-4o", 30, 15)
+            assert commits == []
+
+            assert await flush_usage() == 1
+        assert len(commits) == 1
+
+        usage = await load_usage()
+        assert usage["gpt-4o"]["prompt_tokens"] == 130
+        assert usage["gpt-4o"]["completion_tokens"] == 65
+        assert usage["gpt-4o"]["requests"] == 2
+        assert usage["gpt-4o"]["last_used"] is not None
+        assert list(usage["gpt-4o"]["daily_usage"].values())[0]["requests"] == 2
+
+    @pytest.mark.asyncio
+    async def test_flushes_accumulate(self):
+        """Test that later flushes add to the existing ledger rows."""
+        record_usage("gpt-3.5-turbo", 50, 25)
+        await flush_usage()
+        record_usage("gpt-3.5-turbo", 30, 15)
+        record_usage("claude-3", 150, 75)
+
+        usage = await load_usage()
+        assert usage["gpt-3.5-turbo"]["prompt_tokens"] == 80
+        assert usage["gpt-3.5-turbo"]["completion_tokens"] == 40
+        assert set(usage) == {"gpt-3.5-turbo", "claude-3"}
+
+    @pytest.mark.asyncio
+    async def test_cost_calculation(self):
+        """Test token, speech and unknown model pricing."""
+        record_usage("gpt-3.5-turbo", 1000, 500)
+        record_usage("tts-1", characters=2000)
+        record_usage("unknown-model", 100, 50)
+
+        usage = await load_usage()
+        assert usage["gpt-3.5-turbo"]["cost_usd"] == pytest.approx(0.0005 + 0.00075)
+        assert usage["tts-1"]["cost_usd"] == pytest.approx(0.03)
+        assert usage["tts-1"]["characters"] == 2000
+        assert usage["unknown-model"]["cost_usd"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_breakdown_by_session_interface_and_round(self):
+        """Test attribution to sessions, interfaces and tool rounds."""
+        record_usage("gpt-4o-mini", 100, 10, session_id=7, interface="discord")
+        record_usage("gpt-4o-mini", 300, 30, session_id=7, interface="discord", tool_round=1)
+        record_usage("gpt-4o-mini", 50, 5, session_id=8)
+        record_usage("whisper-base", interface="voice", audio_seconds=12.5)
+
+        by_round = await get_usage_breakdown("tool_round", session_id=7)
+        assert by_round[0]["prompt_tokens"] == 100
+        assert by_round[1]["prompt_tokens"] == 300
+
+        by_session = await get_usage_breakdown("session", interface="discord")
+        assert list(by_session) == [7]
+        assert by_session[7]["requests"] == 2
+
+        by_interface = await get_usage_breakdown("interface")
+        assert by_interface["chat"]["completion_tokens"] == 5
+        assert by_interface["voice"]["audio_seconds"] == 12.5
+
+        assert await get_usage_breakdown("day", since="2000-01-01", until="2000-12-31") == {}
+
+    @pytest.mark.asyncio
+    async def test_breakdown_rejects_unknown_group(self):
+        """Test that grouping by a non-key column is refused."""
+        with pytest.raises(ValueError):
+            await get_usage_breakdown("cost_usd")
+
+    @pytest.mark.asyncio
+    async def test_scheduled_flush(self):
+        """Test that recording on a running loop flushes after the interval."""
+        with patch.object(usage_tracker, "FLUSH_INTERVAL", 0.01):
+            record_usage("gpt-4o", 10, 5)
+            await asyncio.sleep(0.2)
+
+        assert usage_tracker._buffer == {}
+        assert (await load_usage())["gpt-4o"]["requests"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_usage(self):
+        """Test that usage is put back into the buffer when the write fails."""
+        record_usage("gpt-4o", 10, 5)
+        with patch.object(usage_tracker, "SessionLocal", side_effect=RuntimeError("db down")):
+            assert await flush_usage() == 0
+
+        record_usage("gpt-4o", 10, 5)
+        usage = await load_usage()
+        assert usage["gpt-4o"]["requests"] == 2
+
+    @pytest.mark.asyncio
+    async def test_load_usage_empty(self):
+        """Test load_usage with no recorded usage."""
+        assert await load_usage() == {}
+
+    @pytest.mark.asyncio
+    async def test_reset_usage_functionality(self):
+        """Test that reset clears the totals and counts resets."""
+        before = (await get_reset_info())["reset_count"]
+        record_usage("gpt-4", 100, 50)
+        record_usage("gpt-3.5-turbo", 200, 100)
+        assert len(await load_usage()) == 2
+
+        await reset_usage()
+
+        assert await load_usage() == {}
+        reset_info = await get_reset_info()
+        assert reset_info["reset_count"] == before + 1
+        assert reset_info["reset_timestamp"] is not None
+
+    @pytest.mark.asyncio
+    async def test_import_legacy_file(self, tmp_path):
+        """Test that totals from the old JSON file are imported once."""
+        legacy = tmp_path / ".nagatha_usage.json"
+        legacy.write_text(json.dumps({
+            "_metadata": {"reset_timestamp": None, "reset_count": 0},
+            "gpt-4o": {
+                "prompt_tokens": 300, "completion_tokens": 30, "cost_usd": 0.5, "requests": 3,
+                "last_used": "2025-07-02T10:00:00",
+                "daily_usage": {
+                    "2025-07-01": {"prompt_tokens": 100, "completion_tokens": 10,
+                                   "cost_usd": 0.2, "requests": 1},
+                },
+            },
+        }))
+
+        assert await import_usage_file(legacy) == 2
+        assert not legacy.exists()
+        assert Path(f"{legacy}.imported").exists()
+
+        usage = await load_usage()
+        assert usage["gpt-4o"]["prompt_tokens"] == 300
+        assert usage["gpt-4o"]["daily_usage"]["2025-07-02"]["requests"] == 2
+        assert list(await get_usage_breakdown("interface")) == ["legacy"]
 
     def test_pricing_table_access(self):
         """Test that the pricing table is accessible and has expected models."""
         from nagatha_assistant.utils.usage_tracker import MODEL_PRICING
-        
+
         assert isinstance(MODEL_PRICING, dict)
         assert "gpt-3.5-turbo" in MODEL_PRICING
         assert "gpt-4o" in MODEL_PRICING
-        
+
         # Check pricing format (prompt_price, completion_price)
         gpt35_pricing = MODEL_PRICING["gpt-3.5-turbo"]
         assert isinstance(gpt35_pricing, tuple)
         assert len(gpt35_pricing) == 2
         assert all(isinstance(price, float) for price in gpt35_pricing)
-        
-    def test_reset_usage_functionality(self):
-        """Test the reset usage functionality."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                # Record some initial usage
-                record_usage("gpt-4", 100, 50)
-                record_usage("gpt-3.5-turbo", 200, 100)
-                
-                # Verify data exists
-                usage_data = load_usage()
-                assert len(usage_data) == 2
-                assert usage_data["gpt-4"]["prompt_tokens"] == 100
-                
-                # Reset usage
-                reset_usage()
-                
-                # Verify data is cleared
-                usage_data_after_reset = load_usage()
-                assert len(usage_data_after_reset) == 0
-                
-                # Verify reset info is available
-                reset_info = get_reset_info()
-                assert "reset_timestamp" in reset_info
-                assert "reset_count" in reset_info
-                assert reset_info["reset_count"] == 1
-                assert reset_info["reset_timestamp"] is not None
-                
-    def test_reset_usage_preserves_count(self):
-        """Test that reset usage preserves the reset count across multiple resets."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                # First reset
-                reset_usage()
-                reset_info = get_reset_info()
-                assert reset_info["reset_count"] == 1
-                
-                # Add some data
-                record_usage("gpt-4", 100, 50)
-                
-                # Second reset
-                reset_usage()
-                reset_info = get_reset_info()
-                assert reset_info["reset_count"] == 2
-                
-    def test_get_reset_info_empty(self):
-        """Test get_reset_info when no reset has occurred."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            usage_file = Path(temp_dir) / "test_usage.json"
-            
-            with patch('nagatha_assistant.utils.usage_tracker._FILE_PATH', usage_file):
-                # Before any usage or reset
-                reset_info = get_reset_info()
-                assert reset_info == {}
-                
-                # After recording usage but no reset
-                record_usage("gpt-4", 100, 50)
-                reset_info = get_reset_info()
-                assert "reset_timestamp" in reset_info
-                assert reset_info["reset_timestamp"] is None
-                assert reset_info["reset_count"] == 0 
\ No newline at end of file
+
+    @pytest.mark.asyncio
+    async def test_agent_records_completion_usage(self):
+        """Test that the agent attributes completions and skips responses without usage."""
+        from nagatha_assistant.core.agent import _record_completion_usage
+
+        response = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=40, completion_tokens=4))
+        _record_completion_usage(response, "gpt-4o-mini", 3, "cli", 2)
+        _record_completion_usage(SimpleNamespace(usage=None), "gpt-4o-mini", 3, "cli", 0)
+
+        by_round = await get_usage_breakdown("tool_round", session_id=3, interface="cli")
+        assert by_round == {2: {"requests": 1, "prompt_tokens": 40, "completion_tokens": 4,
+                                "characters": 0, "audio_seconds": 0.0,
+                                "cost_usd": pytest.approx(0.0000084)}}